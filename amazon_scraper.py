@@ -24,6 +24,9 @@ except ImportError:
     # Fallback if bsr_parser not available
     parse_bsr = None
 
+from app.utils.amazon_urls import clean_amazon_url
+from app.utils.product_page import ProductPageResult, extract_product_page
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -75,6 +78,24 @@ class AmazonScraper:
         Returns:
             BSR value as integer, or None if not found
         """
+        page = self.scrape_product(amazon_url, use_playwright=use_playwright)
+        return page.bsr if page else None
+    
+    def scrape_product(self, amazon_url: str, use_playwright: bool = False) -> Optional[ProductPageResult]:
+        """
+        Scrape a product page once for its BSR and every other product field
+        
+        Same strategy as extract_bsr (Playwright for UK, requests for US). When the
+        page was downloaded, the cover, title, author, price and reviews come from
+        the same HTML, so callers never need a second request for them.
+        
+        Args:
+            amazon_url: Full Amazon product URL
+            use_playwright: If True, use Playwright for extraction (more reliable for UK/blocked pages)
+            
+        Returns:
+            ProductPageResult (bsr may be None), or None if nothing could be scraped
+        """
         # For UK domains, always use Playwright (Amazon UK blocks simple requests + needs screenshot OCR)
         is_uk_domain = '.co.uk' in amazon_url or 'amazon.co.uk' in amazon_url
         
@@ -92,10 +113,11 @@ class AmazonScraper:
         if use_playwright:
             try:
                 # Use refactored scraper (production-ready)
-                from app.services.playwright_scraper_refactored import extract_bsr_with_playwright_sync
-                bsr = extract_bsr_with_playwright_sync(amazon_url)
-                if bsr:
-                    return bsr
+                from app.services.playwright_scraper_refactored import scrape_product_with_playwright_sync
+                page = scrape_product_with_playwright_sync(amazon_url)
+                if page is not None:
+                    # Fields of the fetched page (cover, title...); rank only if it came from screenshot OCR
+                    return page
                 # If Playwright returns None, it could be CAPTCHA - don't retry
                 logger.warning(f"Playwright extraction returned None (may be CAPTCHA) - not retrying")
                 return None  # Don't fallback to simple method if CAPTCHA detected
@@ -109,16 +131,7 @@ class AmazonScraper:
         
         # Clean URL - remove /ref and other parameters that might cause issues
         # Also fix common URL issues like missing slashes
-        clean_url = amazon_url.split('/ref')[0].split('?')[0].rstrip('/')
-        
-        # Fix common URL issues: amazon.co.ukgp -> amazon.co.uk/gp
-        if '.ukgp' in clean_url:
-            clean_url = clean_url.replace('.ukgp', '.uk/gp')
-        if '.comgp' in clean_url:
-            clean_url = clean_url.replace('.comgp', '.com/gp')
-        
-        if not clean_url.endswith('/'):
-            clean_url += '/'
+        clean_url = clean_amazon_url(amazon_url)
         
         for attempt in range(self.retry_attempts):
             try:
@@ -157,12 +170,12 @@ class AmazonScraper:
                 response.raise_for_status()
                 
                 # Use strict BSR parser to extract main BSR (prioritizes "in Kindle Store" over category rankings)
+                html_content = response.content.decode('utf-8', errors='ignore')
+                page = extract_product_page(html_content)
                 if parse_bsr:
-                    html_content = response.content.decode('utf-8', errors='ignore')
-                    bsr = parse_bsr(html_content)
-                    if bsr:
-                        logger.info(f"✅ Extracted BSR using strict parser: #{bsr:,}")
-                        return bsr
+                    if page.bsr:
+                        logger.info(f"✅ Extracted BSR using strict parser: #{page.bsr:,}")
+                        return page
                     else:
                         logger.warning(f"Strict parser did not find BSR on page: {clean_url}")
                 else:
@@ -183,7 +196,8 @@ class AmazonScraper:
                             bsr_value = int(bsr_str)
                             if 1 <= bsr_value < 10000000:  # Validate range
                                 logger.info(f"✅ Extracted BSR using fallback: #{bsr_value:,}")
-                                return bsr_value
+                                page.bsr = bsr_value
+                                return page
                 
                 # If all methods failed, try alternative scraping method
                 logger.info("Trying alternative scraping method...")
@@ -192,12 +206,14 @@ class AmazonScraper:
                     bsr = extract_bsr_via_alternative_method(clean_url)
                     if bsr:
                         logger.info(f"✅ Extracted BSR using alternative method: #{bsr:,}")
-                        return bsr
+                        page.bsr = bsr
+                        return page
                 except Exception as e:
                     logger.debug(f"Alternative method failed: {e}")
                 
                 logger.warning(f"BSR not found on page: {clean_url}")
-                return None
+                # The other fields of the page are still usable (e.g. the cover)
+                return page
                 
             except requests.exceptions.RequestException as e:
                 logger.error(f"Request error on attempt {attempt + 1}: {e}")
@@ -218,6 +234,27 @@ class AmazonScraper:
         
         return None
     
+    def fetch_product_page(self, amazon_url: str, use_playwright: bool = False) -> Optional[ProductPageResult]:
+        """
+        Download a product page once and extract every field from it
+        
+        Args:
+            amazon_url: Full Amazon product URL
+            use_playwright: If True, download the page with the Playwright browser pool
+            
+        Returns:
+            ProductPageResult, or None if the page could not be downloaded
+        """
+        clean_url = clean_amazon_url(amazon_url)
+        if use_playwright:
+            from app.services.playwright_scraper import fetch_product_page_with_playwright_sync
+            return fetch_product_page_with_playwright_sync(clean_url)
+        
+        headers = self._get_headers()
+        response = self.session.get(clean_url, headers=headers, timeout=30)
+        response.raise_for_status()
+        return extract_product_page(response.content.decode('utf-8', errors='ignore'))
+    
     def extract_book_info(self, amazon_url: str) -> Optional[Dict[str, str]]:
         """
         Extract additional book information (title, author, cover image, price, reviews)
@@ -229,43 +266,8 @@ class AmazonScraper:
             Dictionary with book info or None
         """
         try:
-            headers = self._get_headers()
-            response = self.session.get(amazon_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            info = {}
-            
-            # Extract title
-            title_elem = soup.find('span', {'id': 'productTitle'})
-            if title_elem:
-                info['title'] = title_elem.get_text().strip()
-            
-            # Extract author
-            author_elem = soup.find('a', {'class': 'a-link-normal', 'href': re.compile(r'/gp/product/.*author')})
-            if not author_elem:
-                author_elem = soup.find('span', {'class': 'author'})
-            if author_elem:
-                info['author'] = author_elem.get_text().strip()
-            
-            # Extract cover image
-            img_elem = soup.find('img', {'id': 'landingImage'}) or soup.find('img', {'id': 'imgBlkFront'})
-            if img_elem and img_elem.get('src'):
-                info['cover_image'] = img_elem['src']
-            
-            # Extract price
-            price_elem = soup.find('span', {'class': 'a-price-whole'})
-            if price_elem:
-                price_fraction = soup.find('span', {'class': 'a-price-fraction'})
-                if price_fraction:
-                    info['price'] = f"{price_elem.get_text()}.{price_fraction.get_text()}"
-            
-            # Extract review count
-            review_elem = soup.find('span', {'id': 'acrCustomerReviewText'})
-            if review_elem:
-                info['reviews'] = review_elem.get_text().strip()
-            
+            page = self.fetch_product_page(amazon_url)
+            info = page.to_info() if page else {}
             return info if info else None
             
         except Exception as e:
@@ -294,45 +296,16 @@ class AmazonScraper:
     
         if use_playwright:
             try:
-                from app.services.playwright_scraper import extract_cover_image_with_playwright_sync
-                return extract_cover_image_with_playwright_sync(amazon_url)
+                page = self.fetch_product_page(amazon_url, use_playwright=True)
+                return page.cover_image if page else None
             except Exception as e:
                 logger.warning(f"Playwright extraction failed, trying simple method: {e}")
         
         # Simple method using requests
         try:
-            clean_url = amazon_url.split('/ref')[0].split('?')[0].rstrip('/')
-            
-            # Fix common URL issues: amazon.co.ukgp -> amazon.co.uk/gp
-            if '.ukgp' in clean_url:
-                clean_url = clean_url.replace('.ukgp', '.uk/gp')
-            if '.comgp' in clean_url:
-                clean_url = clean_url.replace('.comgp', '.com/gp')
-            
-            if not clean_url.endswith('/'):
-                clean_url += '/'
-            
-            headers = self._get_headers()
-            response = self.session.get(clean_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Try multiple selectors for cover image
-            img_elem = soup.find('img', {'id': 'landingImage'}) or soup.find('img', {'id': 'imgBlkFront'})
-            if img_elem and img_elem.get('src'):
-                cover_url = img_elem['src']
-                # Clean up image URL for better quality
-                cover_url = re.sub(r'_SL\d+_', '_SL800_', cover_url)
-                cover_url = re.sub(r'\._AC_[^_]+_', '._AC_SL800_', cover_url)
-                if '_SL' not in cover_url:
-                    cover_url = cover_url.replace('._AC_', '._AC_SL800_')
-                cover_url = re.sub(r'_SX\d+_', '_SX800_', cover_url)
-                return cover_url
-            
-            return None
+            page = self.fetch_product_page(amazon_url)
+            return page.cover_image if page else None
             
         except Exception as e:
             logger.error(f"Error extracting cover image: {e}")
             return None
-
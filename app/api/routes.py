@@ -6,7 +6,6 @@ from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from typing import Optional, List
 import logging
-import re
 import time
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -165,15 +164,11 @@ async def get_rankings(
                     retry_attempts=1
                 )
                 
-                cover_url = thread_scraper.extract_cover_image(amazon_link, use_playwright=True)
+                # One download gives the cover (already sized to 800px) with the rest of the page
+                page = thread_scraper.fetch_product_page(amazon_link, use_playwright=True)
+                cover_url = page.cover_image if page else None
                 
                 if cover_url:
-                    # Clean up image URL for better quality
-                    cover_url = re.sub(r'_SL\d+_', '_SL800_', cover_url)
-                    cover_url = re.sub(r'\._AC_[^_]+_', '._AC_SL800_', cover_url)
-                    if '_SL' not in cover_url:
-                        cover_url = cover_url.replace('._AC_', '._AC_SL800_')
-                    cover_url = re.sub(r'_SX\d+_', '_SX800_', cover_url)
                     book['cover_image'] = cover_url
                     try:
                         set_cached_cover(amazon_link, cover_url)
@@ -360,6 +355,8 @@ async def clear_cache():
     """Clear all caches (for debugging)"""
     try:
         clear_all_caches()
+        from app.services.sheets_service import invalidate_worksheet_cache
+        invalidate_worksheet_cache()
         logger.info("All caches cleared")
         return {"status": "success", "message": "All caches cleared"}
     except Exception as e:
@@ -367,6 +364,29 @@ async def clear_cache():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/sheets-quota")
+async def get_sheets_quota():
+    """Google Sheets quota headroom, rate governor counters and executor load"""
+    try:
+        from app.services.sheets_quota import get_quota_stats
+        from app.services.sheets_executor import get_executor_stats
+        return {"quota": get_quota_stats(), "executor": get_executor_stats()}
+    except Exception as e:
+        logger.error(f"Error getting Sheets quota stats: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/blocked-books")
+async def get_blocked_books(limit: int = Query(500, ge=1, le=5000)):
+    """Books whose BSR could not be fetched, with their attempts and when each will be retried"""
+    try:
+        from app.services.blocked_registry import get_blocked_registry
+        return get_blocked_registry().get_stats(limit)
+    except Exception as e:
+        logger.error(f"Error listing blocked books: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/api/update-bsr")
 @router.post("/api/trigger-bsr-update")
 async def trigger_bsr_update(request: Request):
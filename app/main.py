@@ -63,6 +63,39 @@ try:
         name='Daily BSR Update at 10:00 AM Bucharest time',
         replace_existing=True
     )
+    
+    # Full reconciliation of the local history store (catches edits made by hand in the sheet)
+    from app.services.sheets_service import reconcile_all_worksheets, SYNC_ENABLED
+    from app.services.sheets_sync import RECONCILE_INTERVAL
+    if SYNC_ENABLED:
+        scheduler.add_job(
+            func=reconcile_all_worksheets,
+            trigger='interval',
+            seconds=RECONCILE_INTERVAL,
+            id='history_reconcile',
+            name='Full reconciliation of the local history store',
+            replace_existing=True
+        )
+    
+    # Blocked books whose retry time has come go back to Celery, one task per book
+    from app.tasks.bsr_tasks import dispatch_blocked_retries
+    import config
+    
+    def send_blocked_retries():
+        """Wrapper to send the blocked-book retry dispatcher to Celery"""
+        try:
+            dispatch_blocked_retries.delay()
+        except Exception as e:
+            logger.error(f"Error sending blocked-book retry dispatcher to Celery: {e}", exc_info=True)
+    
+    scheduler.add_job(
+        func=send_blocked_retries,
+        trigger='interval',
+        seconds=getattr(config, 'AMAZON_BLOCKED_DISPATCH_INTERVAL', 300),
+        id='blocked_retry_dispatch',
+        name='Retry blocked books whose retry time has come',
+        replace_existing=True
+    )
     logger.info("Scheduler initialized with Celery tasks")
 except Exception as e:
     logger.warning(f"Scheduler not initialized (Celery may not be available): {e}")
@@ -96,6 +129,19 @@ async def shutdown_event():
         except Exception as e:
             logger.error(f"Error shutting down scheduler: {e}", exc_info=True)
     
+    # Flush buffered Google Sheets writes
+    try:
+        from app.services.sheets_service import flush_pending_updates
+        flush_pending_updates()
+    except Exception as e:
+        logger.warning(f"Error flushing sheet updates: {e}", exc_info=True)
+    
+    try:
+        from app.services.sheets_executor import shutdown_sheets_executor
+        shutdown_sheets_executor()
+    except Exception as e:
+        logger.warning(f"Error shutting down Sheets executor: {e}", exc_info=True)
+    
     # Cleanup browser pool
     try:
         from app.services.browser_pool import cleanup_browser_pool
@@ -0,0 +1,334 @@
+"""
+Adaptive pacing for Amazon page fetches
+One request rate per Amazon domain and egress IP, shared by every worker through Redis:
+- AIMDPolicy: additive increase while the window of recent pages is clean (about
+  increase_rpm per minute, like TCP's congestion window), multiplicative decrease
+  on every CAPTCHA (sharp) and 5xx (milder)
+- PacingController: reserves the next request slot of a domain and feeds page
+  outcomes back into the rate (windowed rates come from ScraperMetrics)
+- LocalPacingState / RedisPacingState: where the rate and the next free slot live
+
+Recorded outcomes (AMAZON_PACING_TRACE) can be replayed offline with simulate_pacing.py.
+"""
+import asyncio
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import config
+from app.services.redis_cache import get_redis_client
+from app.services.scraper_metrics import ScraperMetrics, get_metrics
+
+logger = logging.getLogger(__name__)
+
+PACING_KEY_PREFIX = 'amazon_pacing'
+
+# Page outcomes the controller reacts to
+OUTCOME_SUCCESS = 'success'
+OUTCOME_CAPTCHA = 'captcha'
+OUTCOME_SERVER_ERROR = 'server_error'  # HTTP 5xx
+OUTCOME_ERROR = 'error'                # Timeouts, network errors, pages without a rank
+OUTCOMES = (OUTCOME_SUCCESS, OUTCOME_CAPTCHA, OUTCOME_SERVER_ERROR, OUTCOME_ERROR)
+
+# An idle domain keeps its learned rate this long (seconds)
+PACING_STATE_TTL = 7 * 86400
+
+# Where outcomes are appended for simulate_pacing.py (JSON lines; empty = not recorded)
+PACING_TRACE_PATH = getattr(config, 'AMAZON_PACING_TRACE', '')
+
+# Reserve the next slot of a key in one atomic step; the Redis clock keeps all hosts in agreement.
+# Returns {1 = reserved / 0 = next slot too far away, seconds to wait, requests per minute}
+RESERVE_SCRIPT = """
+local start_rpm = tonumber(ARGV[1])
+local stretch = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'rpm', 'next_slot')
+local rpm = tonumber(state[1]) or start_rpm
+local start = math.max(now, tonumber(state[2]) or now)
+if start - now > max_wait then
+    return {0, tostring(start - now), tostring(rpm)}
+end
+redis.call('HSET', KEYS[1], 'rpm', tostring(rpm), 'next_slot', tostring(start + 60 / rpm * stretch))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, tostring(start - now), tostring(rpm)}
+"""
+
+# Change the rate of a key ('grow': + value per minute of pages, i.e. value / rpm per page
+# and at most value per page; 'mul': times value), clamped to [min, max]. A decrease also
+# pushes the next slot out to one full new interval from now. Returns the new requests per minute.
+ADJUST_SCRIPT = """
+local start_rpm = tonumber(ARGV[1])
+local op = ARGV[2]
+local value = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'rpm', 'next_slot')
+local old = tonumber(state[1]) or start_rpm
+local rpm = old
+if op == 'grow' then rpm = rpm + value / math.max(rpm, 1) else rpm = rpm * value end
+rpm = math.max(tonumber(ARGV[4]), math.min(tonumber(ARGV[5]), rpm))
+local next_slot = tonumber(state[2]) or now
+if rpm < old then next_slot = math.max(next_slot, now + 60 / rpm) end
+redis.call('HSET', KEYS[1], 'rpm', tostring(rpm), 'next_slot', tostring(next_slot))
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return tostring(rpm)
+"""
+
+
+@dataclass(frozen=True)
+class AIMDPolicy:
+    """How the request rate (per minute) of one domain reacts to page outcomes"""
+    start_rpm: float
+    min_rpm: float
+    max_rpm: float
+    increase_rpm: float = 0.1           # Gained per minute of clean pages (per page below 1/min)
+    captcha_factor: float = 0.25        # Rate kept after a CAPTCHA (4x the gap)
+    server_error_factor: float = 0.5    # Rate kept after a 5xx
+    window: float = 600.0               # Seconds of outcomes the increase looks at
+    target_success: float = 0.9         # Success rate the window needs for an increase
+    jitter: float = 0.5                 # Gaps stretched by a random 0..jitter share
+    max_wait: float = 120.0             # Longest a slot is reserved ahead (seconds); farther slots are waited for first
+
+    @classmethod
+    def from_config(cls) -> 'AIMDPolicy':
+        start_rpm = getattr(config, 'AMAZON_PACING_START_RPM',
+                            60.0 / max(getattr(config, 'AMAZON_DELAY_BETWEEN_REQUESTS', 45), 0.001))
+        return cls(
+            start_rpm=start_rpm,
+            min_rpm=getattr(config, 'AMAZON_PACING_MIN_RPM', 0.1),
+            max_rpm=getattr(config, 'AMAZON_PACING_MAX_RPM', 20.0),
+            increase_rpm=getattr(config, 'AMAZON_PACING_INCREASE_RPM', 0.1),
+            captcha_factor=getattr(config, 'AMAZON_PACING_CAPTCHA_FACTOR', 0.25),
+            server_error_factor=getattr(config, 'AMAZON_PACING_SERVER_ERROR_FACTOR', 0.5),
+            window=getattr(config, 'AMAZON_PACING_WINDOW', 600.0),
+            target_success=getattr(config, 'AMAZON_PACING_TARGET_SUCCESS', 0.9),
+            jitter=getattr(config, 'AMAZON_PACING_JITTER', 0.5),
+            max_wait=getattr(config, 'AMAZON_PACING_MAX_WAIT', 120.0),
+        )
+
+    def decide(self, outcome: str, window: Dict) -> Optional[Tuple[str, float]]:
+        """
+        Rate change for an outcome, given the window of recent outcomes (ScraperMetrics.window_rates)
+
+        Returns:
+            ('grow', rpm per minute) or ('mul', factor), or None to keep the rate
+        """
+        if outcome == OUTCOME_CAPTCHA:
+            return 'mul', self.captcha_factor
+        if outcome == OUTCOME_SERVER_ERROR:
+            return 'mul', self.server_error_factor
+        if (outcome == OUTCOME_SUCCESS and window['captcha_rate'] == 0
+                and window['success_rate'] >= self.target_success):
+            return 'grow', self.increase_rpm
+        return None
+
+    def stretch(self) -> float:
+        return random.uniform(1.0, 1.0 + self.jitter)
+
+
+class LocalPacingState:
+    """Per-process pacing state (used without Redis, and by the simulator with a fake clock)"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._state: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, start_rpm: float) -> Dict[str, float]:
+        return self._state.setdefault(key, {'rpm': start_rpm, 'next_slot': self.clock()})
+
+    def reserve(self, key: str, policy: AIMDPolicy, stretch: float) -> Tuple[bool, float, float]:
+        """(reserved, seconds to wait, rpm); nothing is reserved if the wait would exceed policy.max_wait"""
+        with self._lock:
+            now = self.clock()
+            state = self._get(key, policy.start_rpm)
+            start = max(now, state['next_slot'])
+            if start - now > policy.max_wait:
+                return False, start - now, state['rpm']
+            state['next_slot'] = start + 60.0 / state['rpm'] * stretch
+            return True, start - now, state['rpm']
+
+    def adjust(self, key: str, policy: AIMDPolicy, op: str, value: float) -> float:
+        """Apply a rate change (see ADJUST_SCRIPT); returns the new rpm"""
+        with self._lock:
+            now = self.clock()
+            state = self._get(key, policy.start_rpm)
+            old = state['rpm']
+            rpm = old + value / max(old, 1.0) if op == 'grow' else old * value
+            state['rpm'] = max(policy.min_rpm, min(policy.max_rpm, rpm))
+            if state['rpm'] < old:
+                state['next_slot'] = max(state['next_slot'], now + 60.0 / state['rpm'])
+            return state['rpm']
+
+    def rpm(self, key: str, policy: AIMDPolicy) -> float:
+        with self._lock:
+            return self._get(key, policy.start_rpm)['rpm']
+
+
+class RedisPacingState:
+    """Pacing state shared by all workers through one Redis hash per key"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._reserve = redis_client.register_script(RESERVE_SCRIPT)
+        self._adjust = redis_client.register_script(ADJUST_SCRIPT)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"{PACING_KEY_PREFIX}:{key}"
+
+    def reserve(self, key: str, policy: AIMDPolicy, stretch: float) -> Tuple[bool, float, float]:
+        reserved, wait, rpm = self._reserve(keys=[self._key(key)],
+                                            args=[policy.start_rpm, stretch, policy.max_wait, PACING_STATE_TTL])
+        return bool(int(reserved)), float(wait), float(rpm)
+
+    def adjust(self, key: str, policy: AIMDPolicy, op: str, value: float) -> float:
+        return float(self._adjust(keys=[self._key(key)],
+                                  args=[policy.start_rpm, op, value, policy.min_rpm, policy.max_rpm, PACING_STATE_TTL]))
+
+    def rpm(self, key: str, policy: AIMDPolicy) -> float:
+        value = self.redis.hget(self._key(key), 'rpm')
+        return float(value) if value is not None else policy.start_rpm
+
+
+def egress_id() -> str:
+    """Name of the IP this process reaches Amazon from: AMAZON_EGRESS_ID, the proxy host, or the host name"""
+    configured = getattr(config, 'AMAZON_EGRESS_ID', '')
+    if configured:
+        return configured
+    if getattr(config, 'AMAZON_USE_PROXY', False) and getattr(config, 'AMAZON_PROXY', ''):
+        parts = urlsplit(config.AMAZON_PROXY)
+        return f"proxy-{parts.hostname}:{parts.port}" if parts.port else f"proxy-{parts.hostname}"
+    return socket.gethostname()
+
+
+class PacingController:
+    """
+    AIMD request pacing per Amazon domain and egress IP
+
+    Before a page: reserve(domain) / await wait(domain) for the domain's next slot.
+    After it: record(domain, outcome). Slots are reserved before sleeping, so
+    every worker sharing the state queues behind the others.
+    """
+
+    def __init__(self, state=None, policy: Optional[AIMDPolicy] = None, metrics: Optional[ScraperMetrics] = None,
+                 egress: Optional[str] = None, fallback: Optional[LocalPacingState] = None,
+                 trace_path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.state = state or LocalPacingState(clock)
+        self.policy = policy or AIMDPolicy.from_config()
+        self.metrics = metrics or get_metrics()
+        self.egress = egress or egress_id()
+        self.clock = clock
+        self._fallback = fallback
+        self._trace_path = PACING_TRACE_PATH if trace_path is None else trace_path
+        self._trace_lock = threading.Lock()
+
+    def key(self, domain: str) -> str:
+        return f"{domain}:{self.egress}"
+
+    def _call(self, method: str, *args):
+        try:
+            return getattr(self.state, method)(*args)
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            logger.warning(f"Shared pacing state unavailable, pacing this process only: {e}")
+            return getattr(self._fallback, method)(*args)
+
+    def try_reserve(self, domain: str) -> Tuple[bool, float]:
+        """(reserved, seconds until the domain's next slot); nothing is reserved if it is more than max_wait away"""
+        reserved, wait, rpm = self._call('reserve', self.key(domain), self.policy, self.policy.stretch())
+        return reserved, wait
+
+    def reserve(self, domain: str) -> Optional[float]:
+        """Reserve the domain's next slot; seconds to wait, or None if it is more than max_wait away"""
+        reserved, wait = self.try_reserve(domain)
+        return wait if reserved else None
+
+    async def wait(self, domain: str, url: str = '', patient: bool = True) -> bool:
+        """
+        Sleep until the domain's next slot
+
+        A slot more than max_wait away is not reserved: a patient caller sleeps until it
+        is within max_wait and tries again (the page is slowed down, never dropped); an
+        impatient one (e.g. holding a browser context) gets False without waiting.
+        """
+        reserved, delay = self.try_reserve(domain)
+        while not reserved:
+            if not patient:
+                logger.warning(f"⏸️  {domain} paced out ({self.rpm(domain):.2f}/min), not waiting for {url}")
+                return False
+            backoff = max(delay - self.policy.max_wait, 1.0)
+            logger.info(f"⏸️  {domain} backed off ({self.rpm(domain):.2f}/min), next slot in {delay:.0f}s for {url}")
+            await asyncio.sleep(backoff)
+            reserved, delay = self.try_reserve(domain)
+        if delay > 0:
+            logger.info(f"⏳ Waiting {delay:.1f}s before navigation to {url} ({self.rpm(domain):.2f}/min on {domain})")
+            await asyncio.sleep(delay)
+        return True
+
+    def record(self, domain: str, outcome: str) -> float:
+        """Feed a page outcome back into the domain's rate; returns the new requests per minute"""
+        key = self.key(domain)
+        now = self.clock()
+        self.metrics.record_outcome(key, outcome, now=now)
+        window = self.metrics.window_rates(key, self.policy.window, now=now)
+        change = self.policy.decide(outcome, window)
+        if change is None:
+            rpm = self._call('rpm', key, self.policy)
+        else:
+            rpm = self._call('adjust', key, self.policy, *change)
+            if change[0] == 'mul':
+                logger.warning(f"Pacing {key}: {outcome}, slowing down to {rpm:.2f}/min ({60 / rpm:.0f}s apart)")
+        self._trace(domain, outcome, rpm, now)
+        return rpm
+
+    def rpm(self, domain: str) -> float:
+        return self._call('rpm', self.key(domain), self.policy)
+
+    def _trace(self, domain: str, outcome: str, rpm: float, now: float):
+        if not self._trace_path:
+            return
+        line = json.dumps({'t': round(now, 3), 'domain': domain, 'egress': self.egress,
+                           'outcome': outcome, 'rpm': round(rpm, 4)})
+        try:
+            with self._trace_lock, open(self._trace_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.debug(f"Could not write pacing trace: {e}")
+
+    def get_stats(self, domains=('amazon.com', 'amazon.co.uk')) -> Dict[str, Dict]:
+        """Current rate and windowed outcome rates per domain"""
+        stats = {}
+        for domain in domains:
+            key = self.key(domain)
+            rpm = self.rpm(domain)
+            stats[key] = dict(self.metrics.window_rates(key, self.policy.window, now=self.clock()),
+                              rpm=round(rpm, 3), interval_s=round(60 / rpm, 1))
+        return stats
+
+
+_controller: Optional[PacingController] = None
+_controller_lock = threading.Lock()
+
+
+def get_pacing_controller() -> PacingController:
+    """Process-wide controller (Redis state shared by all workers, per-process state without Redis)"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            redis_client = get_redis_client()
+            if redis_client is None:
+                logger.warning("Redis unavailable: Amazon pacing is per process only")
+                _controller = PacingController(LocalPacingState())
+            else:
+                _controller = PacingController(RedisPacingState(redis_client), fallback=LocalPacingState())
+        return _controller
@@ -7,6 +7,8 @@ from typing import Optional
 import requests
 from bs4 import BeautifulSoup
 
+from app.utils.amazon_urls import extract_asin
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,7 +50,7 @@ def extract_bsr_via_alternative_method(amazon_url: str) -> Optional[int]:
         logger.debug(f"Mobile page method failed: {e}")
     
     # Method 2: Try to extract ASIN and use alternative endpoints
-    asin = _extract_asin(amazon_url)
+    asin = extract_asin(amazon_url)
     if asin:
         # Try Amazon's product API endpoint (sometimes works)
         try:
@@ -70,20 +72,6 @@ def extract_bsr_via_alternative_method(amazon_url: str) -> Optional[int]:
     return None
 
 
-def _extract_asin(url: str) -> Optional[str]:
-    """Extract ASIN from Amazon URL"""
-    patterns = [
-        r'/dp/([A-Z0-9]{10})',
-        r'/gp/product/([A-Z0-9]{10})',
-        r'/product/([A-Z0-9]{10})',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
-
-
 def _extract_bsr_from_html(html: str) -> Optional[int]:
     """Extract BSR from HTML using multiple patterns"""
     if not html:
@@ -2,13 +2,13 @@
 Tiered Amazon Scraping Strategy
 Tier 1: httpx/requests with caching
 Tier 2: Playwright fallback
-Tier 3: Mark as blocked with exponential backoff
+Tier 3: Mark as blocked in the shared registry (blocked_registry.py) with exponential backoff
 """
 import logging
 import time
 import json
-from typing import Optional, Dict, Tuple
-from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from datetime import datetime
 from dataclasses import dataclass, asdict
 import httpx
 from bs4 import BeautifulSoup
@@ -16,6 +16,7 @@ import re
 
 from app.services.browser_pool import fetch_page as playwright_fetch_page
 from app.services.redis_cache import get_or_set, get_cache, set_cache
+from app.services.blocked_registry import BlockedRegistry, get_blocked_registry
 
 # Import strict BSR parser
 try:
@@ -114,17 +115,16 @@ class TieredAmazonScraper:
     Tiered scraping strategy for Amazon pages
     """
     
-    def __init__(self, cache_ttl: int = 3600, max_retry_delay: int = 86400):
+    def __init__(self, cache_ttl: int = 3600, blocked: Optional[BlockedRegistry] = None):
         """
         Initialize tiered scraper
         
         Args:
             cache_ttl: Cache TTL in seconds (default: 1 hour)
-            max_retry_delay: Maximum retry delay in seconds (default: 24 hours)
+            blocked: Registry of blocked books (default: the shared one; backoff from AMAZON_BLOCKED_*_DELAY)
         """
         self.cache_ttl = cache_ttl
-        self.max_retry_delay = max_retry_delay
-        self.blocked_books: Dict[str, datetime] = {}  # URL -> retry_after timestamp
+        self.blocked = blocked or get_blocked_registry()
         
         # Realistic headers for Amazon
         self.headers = {
@@ -160,29 +160,14 @@ class TieredAmazonScraper:
             logger.error(f"Failed to log failure: {e}")
     
     def _is_blocked(self, url: str) -> bool:
-        """Check if URL is currently blocked"""
-        if url not in self.blocked_books:
-            return False
-        
-        retry_after = self.blocked_books[url]
-        if datetime.now() < retry_after:
-            return True
-        
-        # Retry time has passed, remove from blocked list
-        del self.blocked_books[url]
-        return False
+        """Check if URL is currently blocked (the book stays registered until a fetch succeeds)"""
+        return self.blocked.is_blocked(url)
     
-    def _mark_blocked(self, url: str, retry_after: Optional[datetime] = None):
-        """Mark URL as blocked with retry time"""
-        if retry_after is None:
-            # Exponential backoff: start with 1 hour, double each time
-            last_retry = self.blocked_books.get(url, datetime.now() - timedelta(hours=1))
-            hours_since_last = (datetime.now() - last_retry).total_seconds() / 3600
-            retry_hours = min(2 ** int(hours_since_last), 24)  # Cap at 24 hours
-            retry_after = datetime.now() + timedelta(hours=retry_hours)
-        
-        self.blocked_books[url] = retry_after
-        logger.warning(f"Marked {url} as blocked until {retry_after.isoformat()}")
+    def _mark_blocked(self, url: str, retry_after: Optional[datetime] = None) -> datetime:
+        """Mark URL as blocked (exponential backoff per ASIN unless retry_after is given); returns the retry time"""
+        retry_at = self.blocked.mark_blocked(url, reason='blocked',
+                                             retry_after=retry_after.timestamp() if retry_after else None)
+        return datetime.fromtimestamp(retry_at)
     
     def fetch_page_tier1(self, url: str) -> Optional[Tuple[str, bool]]:
         """
@@ -341,6 +326,7 @@ class TieredAmazonScraper:
             html, is_blocked = self.fetch_page_tier1(url)
             
             if html:
+                self.blocked.clear(url)
                 return html
             
             if is_blocked:
@@ -358,12 +344,12 @@ class TieredAmazonScraper:
         html, is_blocked = loop.run_until_complete(self.fetch_page_tier2(url))
         
         if html:
+            self.blocked.clear(url)
             return html
         
         if is_blocked:
             # Mark as blocked for Tier 3
-            self._mark_blocked(url)
-            retry_after = self.blocked_books.get(url)
+            retry_after = self._mark_blocked(url)
             self._log_failure(ScrapingFailure(
                 timestamp=datetime.now().isoformat(),
                 url=url,
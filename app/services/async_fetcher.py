@@ -0,0 +1,229 @@
+"""
+Async tier-1 fetch engine for Amazon product pages
+One shared httpx connection pool; each marketplace has its own rate limiter,
+so many books are in flight across domains while each domain stays paced
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+
+import config
+from app.services.amazon_scraper_tiered import AmazonRobotDetector
+from app.services.scraper_metrics import get_metrics
+from app.utils.amazon_urls import amazon_domain, clean_amazon_url
+from app.utils.product_page import ProductPageResult, extract_product_page
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute per domain; the default keeps the current pacing (one request per AMAZON_DELAY_BETWEEN_REQUESTS)
+_DEFAULT_PER_MINUTE = 60.0 / max(getattr(config, 'AMAZON_DELAY_BETWEEN_REQUESTS', 45), 0.001)
+DOMAIN_RATE_LIMITS = getattr(config, 'AMAZON_DOMAIN_RATE_LIMITS', None) or {
+    'amazon.com': _DEFAULT_PER_MINUTE,
+    'amazon.co.uk': _DEFAULT_PER_MINUTE,
+}
+
+# Requests in flight per domain
+DOMAIN_CONCURRENCY = getattr(config, 'AMAZON_DOMAIN_CONCURRENCY', 2)
+
+# Each gap is stretched by a random 0..PACING_JITTER share, so requests never arrive on a fixed beat
+# and the rate only ever drops below the limit
+PACING_JITTER = getattr(config, 'AMAZON_PACING_JITTER', 0.5)
+
+# Shared connection pool size (all domains)
+MAX_CONNECTIONS = getattr(config, 'AMAZON_ASYNC_MAX_CONNECTIONS', 10)
+
+REQUEST_TIMEOUT = 30.0
+
+# Domains only ever fetched with Playwright (Amazon UK blocks simple requests, see AmazonScraper.scrape_product);
+# fetch_bsr_many leaves them out rather than spend a request that is likely to be blocked
+PLAYWRIGHT_ONLY_DOMAINS = ('amazon.co.uk',)
+
+# Statuses Amazon uses to turn robots away
+BLOCKED_STATUSES = (403, 429, 503)
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one tier-1 fetch"""
+    url: str
+    domain: str
+    status: Optional[int] = None
+    html: Optional[str] = None  # Raw page, dropped once it is parsed into page (robot pages keep it)
+    page: Optional[ProductPageResult] = None  # Every product field parsed from html
+    bsr: Optional[int] = None
+    blocked: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0  # Request time, without the wait for a rate-limit slot
+    waited: float = 0.0   # Time spent waiting for a slot
+
+
+class DomainRateLimiter:
+    """
+    Paces requests to one domain
+
+    Slots are handed out at least 60/per_minute seconds apart (plus jitter),
+    and at most `concurrency` requests run at the same time.
+    """
+
+    def __init__(self, domain: str, per_minute: float, concurrency: int = 2, jitter: float = PACING_JITTER):
+        self.domain = domain
+        self.interval = 60.0 / per_minute
+        self.jitter = jitter
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._next_slot = 0.0
+        self.requests = 0
+
+    async def wait(self) -> float:
+        """Wait for this domain's next slot; returns the seconds waited"""
+        now = time.monotonic()
+        start = max(now, self._next_slot)
+        # Reserved before sleeping, so concurrent callers queue up behind each other
+        self._next_slot = start + self.interval * random.uniform(1.0, 1.0 + self.jitter)
+        self.requests += 1
+        delay = start - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class AsyncAmazonFetcher:
+    """Concurrent tier-1 fetcher: one connection pool, one rate limiter per Amazon domain"""
+
+    def __init__(self, rate_limits: Optional[Dict[str, float]] = None, concurrency: int = DOMAIN_CONCURRENCY,
+                 jitter: float = PACING_JITTER, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.rate_limits = dict(rate_limits or DOMAIN_RATE_LIMITS)
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self._limiters: Dict[str, DomainRateLimiter] = {}
+
+        proxies = None
+        if getattr(config, 'AMAZON_USE_PROXY', False) and getattr(config, 'AMAZON_PROXY', ''):
+            proxies = config.AMAZON_PROXY
+        self.client = httpx.AsyncClient(
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'none',
+                'Cache-Control': 'max-age=0',
+            },
+            timeout=REQUEST_TIMEOUT,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            proxies=proxies,
+            transport=transport,
+        )
+
+    def _limiter(self, domain: str) -> DomainRateLimiter:
+        limiter = self._limiters.get(domain)
+        if limiter is None:
+            per_minute = self.rate_limits.get(domain, _DEFAULT_PER_MINUTE)
+            limiter = self._limiters[domain] = DomainRateLimiter(domain, per_minute, self.concurrency, self.jitter)
+        return limiter
+
+    @staticmethod
+    def _domain_headers(domain: str) -> Dict[str, str]:
+        if domain == 'amazon.co.uk':
+            return {'Accept-Language': 'en-GB,en;q=0.9', 'Referer': 'https://www.amazon.co.uk/'}
+        return {'Accept-Language': 'en-US,en;q=0.9', 'Referer': 'https://www.amazon.com/'}
+
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch one product page within its domain's rate limit and extract its fields"""
+        clean_url = clean_amazon_url(url)
+        domain = amazon_domain(clean_url)
+        result = FetchResult(url=url, domain=domain)
+        limiter = self._limiter(domain)
+
+        async with limiter.semaphore:
+            result.waited = await limiter.wait()
+            start = time.monotonic()
+            try:
+                response = await self.client.get(clean_url, headers=self._domain_headers(domain))
+                result.status = response.status_code
+                if response.status_code in BLOCKED_STATUSES:
+                    result.blocked = True
+                    result.error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    result.html = response.text
+            except httpx.TimeoutException as e:
+                result.error = f"timeout: {e}"
+            except httpx.HTTPError as e:
+                result.error = f"network: {e}"
+            result.elapsed = time.monotonic() - start
+
+        if result.html is not None:
+            is_robot, reason = AmazonRobotDetector.is_robot_page(result.html)
+            if is_robot:
+                result.blocked = True
+                result.error = reason
+            else:
+                result.page = extract_product_page(result.html)
+                result.bsr = result.page.bsr
+                result.html = None
+                if result.bsr is None:
+                    result.error = 'bsr_not_found'
+
+        get_metrics().record_request(result.elapsed, success=result.bsr is not None,
+                                     captcha=result.blocked, error_reason=result.error)
+        if result.bsr is not None:
+            logger.info(f"✓ Tier-1 BSR #{result.bsr:,} for {clean_url} ({result.elapsed:.2f}s, waited {result.waited:.1f}s)")
+        else:
+            logger.warning(f"✗ Tier-1 fetch of {clean_url} gave no BSR: {result.error}")
+        return result
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Fetch all URLs concurrently (each domain paced by its own limiter); results in input order"""
+        return list(await asyncio.gather(*[self.fetch(url) for url in urls]))
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {
+            domain: {'per_minute': round(60.0 / limiter.interval, 2), 'requests': limiter.requests}
+            for domain, limiter in self._limiters.items()
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def fetch_bsr_many(urls: Iterable[str], **kwargs) -> Dict[str, FetchResult]:
+    """
+    Fetch many product pages from synchronous code (e.g. a Celery task)
+
+    URLs of PLAYWRIGHT_ONLY_DOMAINS are skipped and get no result.
+
+    Returns:
+        {url: FetchResult}
+    """
+    urls = list(dict.fromkeys(urls))
+    skipped = [url for url in urls if amazon_domain(url) in PLAYWRIGHT_ONLY_DOMAINS]
+    if skipped:
+        logger.info(f"Tier-1 skips {len(skipped)} pages of {', '.join(PLAYWRIGHT_ONLY_DOMAINS)} (Playwright only)")
+        urls = [url for url in urls if amazon_domain(url) not in PLAYWRIGHT_ONLY_DOMAINS]
+
+    async def run():
+        async with AsyncAmazonFetcher(**kwargs) as fetcher:
+            results = await fetcher.fetch_many(urls)
+            logger.info(f"Tier-1 fetch stats: {fetcher.get_stats()}")
+            return results
+
+    start = time.monotonic()
+    results = asyncio.run(run())
+    found = sum(1 for r in results if r.bsr is not None)
+    logger.info(f"Tier-1 fetched {len(urls)} pages in {time.monotonic() - start:.1f}s ({found} with BSR)")
+    return {result.url: result for result in results}
@@ -0,0 +1,357 @@
+"""
+Registry of Amazon books whose BSR could not be fetched
+One entry per canonical ASIN and Amazon domain, shared by every process through Redis:
+- a sorted set (amazon_blocked) scored by the time each book is next due for a retry
+- one hash per book: URL, attempt counter, last reason, worksheet/column, retry time
+
+Each failure pushes the retry out exponentially (BLOCKED_BASE_DELAY, doubling up to
+BLOCKED_MAX_DELAY); a success removes the book. dispatch_due() hands the due books to
+a retry callback (the bsr.dispatch_blocked_retries Celery task enqueues one task per book).
+"""
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from app.services.redis_cache import get_redis_client
+from app.utils.amazon_urls import amazon_domain, clean_amazon_url, extract_asin
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_KEY = 'amazon_blocked'
+BLOCKED_ITEM_PREFIX = f'{BLOCKED_KEY}:item:'
+
+# First retry delay after a failure, doubled on every further failure up to the maximum (seconds)
+BLOCKED_BASE_DELAY = getattr(config, 'AMAZON_BLOCKED_BASE_DELAY', 3600)
+BLOCKED_MAX_DELAY = getattr(config, 'AMAZON_BLOCKED_MAX_DELAY', 86400)
+
+# A dispatched book is not handed out again for this long; its retry task clears or re-marks it first (seconds)
+BLOCKED_CLAIM_LEASE = getattr(config, 'AMAZON_BLOCKED_CLAIM_LEASE', 1800)
+
+# Books dispatched per run of the dispatcher
+BLOCKED_DISPATCH_BATCH = getattr(config, 'AMAZON_BLOCKED_DISPATCH_BATCH', 20)
+
+# Count a failure and schedule the retry in one atomic step; the Redis clock keeps all hosts in agreement.
+# ARGV: base delay, max delay, retry time (0 = backoff), member, then field/value pairs.
+# Returns {attempts, retry time}
+MARK_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local attempts = redis.call('HINCRBY', KEYS[2], 'attempts', 1)
+local retry_at = tonumber(ARGV[3])
+if retry_at <= 0 then
+    retry_at = now + math.min(tonumber(ARGV[2]), tonumber(ARGV[1]) * 2 ^ (attempts - 1))
+end
+redis.call('HSETNX', KEYS[2], 'first_blocked', tostring(now))
+redis.call('HSET', KEYS[2], 'last_blocked', tostring(now), 'retry_at', tostring(retry_at))
+redis.call('HDEL', KEYS[2], 'dispatched_at')
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+redis.call('ZADD', KEYS[1], retry_at, ARGV[4])
+return {attempts, tostring(retry_at)}
+"""
+
+# Claim up to ARGV[1] due books: each one's score moves a lease ahead, so no other
+# dispatcher hands it out while its retry runs. Returns the claimed members.
+CLAIM_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1]))
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), member)
+    redis.call('HSET', ARGV[3] .. member, 'dispatched_at', tostring(now))
+end
+return due
+"""
+
+
+def registry_key(url: str) -> str:
+    """'{domain}:{ASIN}' of a product URL (a hash of the clean URL when it has no ASIN)"""
+    asin = extract_asin(url) or hashlib.md5(clean_amazon_url(url).encode()).hexdigest()[:10]
+    return f"{amazon_domain(url)}:{asin}"
+
+
+def retry_delay(attempts: int, base: float = BLOCKED_BASE_DELAY, maximum: float = BLOCKED_MAX_DELAY) -> float:
+    """Seconds until the retry after the given number of failures in a row"""
+    return min(maximum, base * 2 ** (max(attempts, 1) - 1))
+
+
+@dataclass
+class BlockedBook:
+    key: str
+    url: str
+    attempts: int
+    reason: str
+    retry_at: float                  # When the book may be fetched again
+    due_at: float                    # When the dispatcher hands it out (a lease ahead once dispatched)
+    first_blocked: float
+    last_blocked: float
+    worksheet: Optional[str] = None
+    col: Optional[int] = None
+    dispatched_at: Optional[float] = None
+
+    @classmethod
+    def from_fields(cls, key: str, fields: Dict[str, str], due_at: float) -> 'BlockedBook':
+        def number(name):
+            value = fields.get(name)
+            return float(value) if value not in (None, '') else None
+
+        return cls(
+            key=key,
+            url=fields.get('url', ''),
+            attempts=int(fields.get('attempts') or 0),
+            reason=fields.get('reason', ''),
+            retry_at=number('retry_at') or due_at,
+            due_at=due_at,
+            first_blocked=number('first_blocked') or due_at,
+            last_blocked=number('last_blocked') or due_at,
+            worksheet=fields.get('worksheet') or None,
+            col=int(fields['col']) if fields.get('col') else None,
+            dispatched_at=number('dispatched_at'),
+        )
+
+    def to_dict(self, now: Optional[float] = None) -> Dict:
+        """JSON view with readable times and the seconds left until the retry"""
+        now = time.time() if now is None else now
+        data = asdict(self)
+        for name in ('retry_at', 'due_at', 'first_blocked', 'last_blocked', 'dispatched_at'):
+            if data[name] is not None:
+                data[name] = datetime.fromtimestamp(data[name]).isoformat(timespec='seconds')
+        data['retry_in_s'] = max(0, round(self.retry_at - now))
+        return data
+
+
+class LocalBlockedState:
+    """Per-process registry (used without Redis, and by the tests with a fake clock)"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._items: Dict[str, Dict[str, str]] = {}
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, member: str, fields: Dict[str, str], retry_at: float, base: float, maximum: float) -> Tuple[int, float]:
+        """Count a failure and schedule the retry (see MARK_SCRIPT); (attempts, retry time)"""
+        with self._lock:
+            now = self.clock()
+            item = self._items.setdefault(member, {'first_blocked': str(now)})
+            attempts = int(item.get('attempts', 0)) + 1
+            if retry_at <= 0:
+                retry_at = now + retry_delay(attempts, base, maximum)
+            item.pop('dispatched_at', None)
+            item.update(fields, attempts=str(attempts), last_blocked=str(now), retry_at=str(retry_at))
+            self._due[member] = retry_at
+            return attempts, retry_at
+
+    def get(self, member: str) -> Optional[BlockedBook]:
+        with self._lock:
+            if member not in self._due:
+                return None
+            return BlockedBook.from_fields(member, self._items[member], self._due[member])
+
+    def clear(self, member: str) -> bool:
+        with self._lock:
+            self._items.pop(member, None)
+            return self._due.pop(member, None) is not None
+
+    def claim_due(self, limit: int, lease: float) -> List[str]:
+        """Claim up to limit due books (see CLAIM_SCRIPT)"""
+        with self._lock:
+            now = self.clock()
+            due = sorted((at, member) for member, at in self._due.items() if at <= now)[:limit]
+            for _, member in due:
+                self._due[member] = now + lease
+                self._items[member]['dispatched_at'] = str(now)
+            return [member for _, member in due]
+
+    def entries(self, limit: int) -> List[BlockedBook]:
+        with self._lock:
+            members = sorted(self._due, key=self._due.get)[:limit]
+            return [BlockedBook.from_fields(member, self._items[member], self._due[member]) for member in members]
+
+
+class RedisBlockedState:
+    """Registry shared by all workers: one sorted set of due times, one hash per book"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._mark = redis_client.register_script(MARK_SCRIPT)
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+
+    def mark(self, member: str, fields: Dict[str, str], retry_at: float, base: float, maximum: float) -> Tuple[int, float]:
+        pairs = [value for item in fields.items() for value in item]
+        attempts, retry_at = self._mark(keys=[BLOCKED_KEY, BLOCKED_ITEM_PREFIX + member],
+                                        args=[base, maximum, retry_at, member, *pairs])
+        return int(attempts), float(retry_at)
+
+    def get(self, member: str) -> Optional[BlockedBook]:
+        pipe = self.redis.pipeline()
+        pipe.zscore(BLOCKED_KEY, member)
+        pipe.hgetall(BLOCKED_ITEM_PREFIX + member)
+        due_at, fields = pipe.execute()
+        if due_at is None:
+            return None
+        return BlockedBook.from_fields(member, fields, float(due_at))
+
+    def clear(self, member: str) -> bool:
+        pipe = self.redis.pipeline()
+        pipe.zrem(BLOCKED_KEY, member)
+        pipe.delete(BLOCKED_ITEM_PREFIX + member)
+        removed, _ = pipe.execute()
+        return bool(removed)
+
+    def claim_due(self, limit: int, lease: float) -> List[str]:
+        return list(self._claim(keys=[BLOCKED_KEY], args=[limit, lease, BLOCKED_ITEM_PREFIX]))
+
+    def entries(self, limit: int) -> List[BlockedBook]:
+        members = self.redis.zrange(BLOCKED_KEY, 0, limit - 1, withscores=True)
+        pipe = self.redis.pipeline()
+        for member, _ in members:
+            pipe.hgetall(BLOCKED_ITEM_PREFIX + member)
+        return [BlockedBook.from_fields(member, fields, float(due_at))
+                for (member, due_at), fields in zip(members, pipe.execute())]
+
+
+class BlockedRegistry:
+    """
+    Books to retry later, keyed by canonical ASIN and domain
+
+    Failures: mark_blocked(url, reason, worksheet, col). Successes: clear(url).
+    Fetchers check is_blocked(url) before spending a request on a book.
+    """
+
+    def __init__(self, state=None, fallback: Optional[LocalBlockedState] = None,
+                 base_delay: float = BLOCKED_BASE_DELAY, max_delay: float = BLOCKED_MAX_DELAY,
+                 clock: Callable[[], float] = time.time):
+        self.state = state or LocalBlockedState(clock)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self._fallback = fallback
+
+    def _call(self, method: str, *args):
+        try:
+            return getattr(self.state, method)(*args)
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            logger.warning(f"Shared blocked-book registry unavailable, using this process's: {e}")
+            return getattr(self._fallback, method)(*args)
+
+    def mark_blocked(self, url: str, reason: str = 'blocked', worksheet: Optional[str] = None,
+                     col: Optional[int] = None, retry_after: Optional[float] = None) -> float:
+        """
+        Record a failed fetch and schedule its retry
+
+        Args:
+            url: Product URL
+            reason: Why the fetch failed (CAPTCHA, no BSR, error...)
+            worksheet: Worksheet the book is in (kept from an earlier failure if not given)
+            col: Column of the book in that worksheet
+            retry_after: Retry time (epoch seconds) instead of the exponential backoff
+
+        Returns:
+            Retry time (epoch seconds)
+        """
+        key = registry_key(url)
+        fields = {'url': url, 'reason': reason}
+        if worksheet:
+            fields['worksheet'] = worksheet
+        if col is not None:
+            fields['col'] = str(col)
+        attempts, retry_at = self._call('mark', key, fields, retry_after or 0, self.base_delay, self.max_delay)
+        logger.warning(f"Blocked {key} ({reason}, attempt {attempts}), "
+                       f"retry at {datetime.fromtimestamp(retry_at).isoformat(timespec='seconds')}")
+        return retry_at
+
+    def get(self, key: str) -> Optional[BlockedBook]:
+        return self._call('get', key)
+
+    def retry_at(self, url: str) -> Optional[float]:
+        """When a blocked book may be fetched again (None = not blocked)"""
+        book = self.get(registry_key(url))
+        return book.retry_at if book else None
+
+    def is_blocked(self, url: str) -> bool:
+        retry_at = self.retry_at(url)
+        return retry_at is not None and self.clock() < retry_at
+
+    def clear(self, url: str) -> bool:
+        """Forget a book after a successful fetch; True if it was in the registry"""
+        key = registry_key(url)
+        removed = self._call('clear', key)
+        if removed:
+            logger.info(f"Unblocked {key}")
+        return removed
+
+    def clear_key(self, key: str) -> bool:
+        return self._call('clear', key)
+
+    def claim_due(self, limit: int = BLOCKED_DISPATCH_BATCH, lease: float = BLOCKED_CLAIM_LEASE) -> List[BlockedBook]:
+        """Due books, each leased to the caller so no other dispatcher hands it out meanwhile"""
+        books = []
+        for key in self._call('claim_due', limit, lease):
+            book = self.get(key)
+            if book is not None:
+                books.append(book)
+        return books
+
+    def list_blocked(self, limit: int = 500) -> List[BlockedBook]:
+        """Blocked books, the next one due first"""
+        return self._call('entries', limit)
+
+    def get_stats(self, limit: int = 500) -> Dict:
+        """Registry view for the API: counts and every book with its retry time"""
+        now = self.clock()
+        books = self.list_blocked(limit)
+        return {
+            'count': len(books),
+            'due': sum(1 for book in books if book.due_at <= now),
+            'books': [book.to_dict(now) for book in books],
+        }
+
+
+def dispatch_due(registry: BlockedRegistry, enqueue: Callable[[BlockedBook], None],
+                 limit: int = BLOCKED_DISPATCH_BATCH) -> List[str]:
+    """
+    Hand the due books to enqueue (e.g. a Celery task's delay) one by one
+
+    A book whose enqueue fails goes back to the backoff with the error as reason.
+
+    Returns:
+        Keys of the books enqueued
+    """
+    dispatched = []
+    for book in registry.claim_due(limit):
+        try:
+            enqueue(book)
+            dispatched.append(book.key)
+        except Exception as e:
+            logger.error(f"Could not enqueue retry of {book.key}: {e}")
+            registry.mark_blocked(book.url, reason=f"dispatch failed: {e}", worksheet=book.worksheet, col=book.col)
+    if dispatched:
+        logger.info(f"Dispatched {len(dispatched)} blocked book retries")
+    return dispatched
+
+
+_registry: Optional[BlockedRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_blocked_registry() -> BlockedRegistry:
+    """Process-wide registry (Redis state shared by all workers, per-process state without Redis)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            redis_client = get_redis_client()
+            if redis_client is None:
+                logger.warning("Redis unavailable: blocked books are tracked per process only")
+                _registry = BlockedRegistry(LocalBlockedState())
+            else:
+                _registry = BlockedRegistry(RedisBlockedState(redis_client), fallback=LocalBlockedState())
+        return _registry
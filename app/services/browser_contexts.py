@@ -0,0 +1,250 @@
+"""
+Browser contexts of the refactored Playwright pool
+- FingerprintProfile: a consistent browser identity (user agent, platform, screen, hardware)
+- ContextSlot: one context of the pool with its own profile, session file and health
+- ContextScheduler: hands out slots to pages (bounded page count, fair order, CAPTCHA cooldown)
+
+Nothing here talks to Playwright; BrowserPool opens and closes the contexts.
+"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Contexts (identities) in the pool; each serves one page at a time
+CONTEXT_COUNT = getattr(config, 'PLAYWRIGHT_CONTEXTS', 1)
+
+# Pages open at once across all contexts (never more than CONTEXT_COUNT)
+MAX_PAGES = getattr(config, 'PLAYWRIGHT_MAX_PAGES', CONTEXT_COUNT)
+
+# A context that hit a CAPTCHA sits out this long (seconds), doubling for each CAPTCHA in a row
+CAPTCHA_COOLDOWN = getattr(config, 'PLAYWRIGHT_CAPTCHA_COOLDOWN', 900)
+MAX_COOLDOWN_FACTOR = 8
+
+# Failed pages in a row after which a context is closed and opened again
+MAX_CONTEXT_FAILURES = getattr(config, 'PLAYWRIGHT_MAX_CONTEXT_FAILURES', 3)
+
+# Outcomes that say nothing about the context's health
+NEUTRAL_OUTCOMES = ('captcha_cooldown',)
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+    delete navigator.__proto__.webdriver;
+    window.chrome = { runtime: {}, loadTimes: function() {}, csi: function() {}, app: {} };
+    Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
+    Object.defineProperty(navigator, 'languages', { get: () => %(languages)s });
+    Object.defineProperty(navigator, 'platform', { get: () => %(platform)s });
+    Object.defineProperty(navigator, 'hardwareConcurrency', { get: () => %(hardware_concurrency)d });
+    Object.defineProperty(navigator, 'deviceMemory', { get: () => %(device_memory)d });
+    Object.defineProperty(navigator, 'vendor', { get: () => 'Google Inc.' });
+    Object.defineProperty(navigator, 'connection', {
+        get: () => ({ effectiveType: '4g', rtt: 50, downlink: 10, saveData: false })
+    });
+"""
+
+
+@dataclass(frozen=True)
+class FingerprintProfile:
+    """Browser identity of one context; every field agrees with the user agent"""
+    name: str
+    user_agent: str
+    platform: str
+    viewport: Tuple[int, int]
+    hardware_concurrency: int
+    device_memory: int
+    timezone_id: str = 'America/New_York'
+    locale: str = 'en-US'
+
+    def context_options(self) -> Dict:
+        """Keyword arguments for browser.new_context()"""
+        width, height = self.viewport
+        return {
+            'viewport': {'width': width, 'height': height},
+            'user_agent': self.user_agent,
+            'locale': self.locale,
+            'timezone_id': self.timezone_id,
+            'permissions': ['geolocation'],
+            'ignore_https_errors': False,
+            'java_script_enabled': True,
+            'bypass_csp': True,
+            'extra_http_headers': {
+                'Accept-Language': f'{self.locale},en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'none',
+                'Sec-Fetch-User': '?1',
+                'Cache-Control': 'max-age=0',
+                'DNT': '1',
+            }
+        }
+
+    def init_script(self) -> str:
+        """Stealth script matching this profile (navigator.* agrees with the user agent)"""
+        return STEALTH_SCRIPT % {
+            'languages': json.dumps([self.locale, 'en']),
+            'platform': json.dumps(self.platform),
+            'hardware_concurrency': self.hardware_concurrency,
+            'device_memory': self.device_memory,
+        }
+
+
+FINGERPRINT_PROFILES = [
+    FingerprintProfile(
+        name='mac-chrome',
+        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        platform='MacIntel', viewport=(1920, 1080), hardware_concurrency=8, device_memory=8,
+    ),
+    FingerprintProfile(
+        name='windows-chrome',
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        platform='Win32', viewport=(1536, 864), hardware_concurrency=8, device_memory=8,
+        timezone_id='America/Chicago',
+    ),
+    FingerprintProfile(
+        name='mac-chrome-laptop',
+        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+        platform='MacIntel', viewport=(1440, 900), hardware_concurrency=10, device_memory=8,
+        timezone_id='America/Los_Angeles',
+    ),
+    FingerprintProfile(
+        name='windows-chrome-laptop',
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+        platform='Win32', viewport=(1366, 768), hardware_concurrency=4, device_memory=4,
+        timezone_id='America/Denver',
+    ),
+]
+
+
+@dataclass
+class ContextSlot:
+    """One context of the pool and what the pool knows about its health"""
+    index: int
+    profile: FingerprintProfile
+    storage_state_path: Path
+    context: object = None
+    busy: bool = False
+    needs_reset: bool = False    # Close and reopen before the next page
+    drop_session: bool = False   # ...without the saved cookies (they led to a CAPTCHA)
+    pages: int = 0
+    captchas: int = 0            # CAPTCHAs in a row
+    failures: int = 0            # Failed pages in a row
+    cooldown_until: float = 0.0  # time.monotonic() value
+    last_used: float = 0.0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"context-{self.index} ({self.profile.name})"
+
+    def cooling_down(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.cooldown_until
+
+
+def build_slots(storage_dir: Path, count: int = None,
+                profiles: List[FingerprintProfile] = None) -> List[ContextSlot]:
+    """Slots for `count` contexts, profiles assigned round-robin, one session file each"""
+    count = max(1, count or CONTEXT_COUNT)
+    profiles = profiles or FINGERPRINT_PROFILES
+    return [
+        ContextSlot(
+            index=i,
+            profile=profiles[i % len(profiles)],
+            storage_state_path=Path(storage_dir) / f'amazon_session_{i}.json',
+        )
+        for i in range(count)
+    ]
+
+
+class ContextScheduler:
+    """
+    Hands out context slots to pages
+
+    A semaphore bounds the pages open at once (waiters are served first come,
+    first served); among the idle contexts the one that has rested longest
+    gets the page, so the load is spread evenly.
+    Contexts cooling down after a CAPTCHA are skipped.
+    """
+
+    def __init__(self, slots: List[ContextSlot], max_pages: int = None,
+                 captcha_cooldown: float = None, max_failures: int = None):
+        self.slots = slots
+        self.max_pages = max(1, min(max_pages or MAX_PAGES, len(slots)))
+        self.captcha_cooldown = CAPTCHA_COOLDOWN if captcha_cooldown is None else captcha_cooldown
+        self.max_failures = max_failures or MAX_CONTEXT_FAILURES
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+
+    async def acquire(self) -> Optional[ContextSlot]:
+        """
+        Wait for a free page and pick a context for it
+
+        Returns:
+            The slot (call release() when the page is done), or None when every
+            idle context is cooling down after a CAPTCHA
+        """
+        await self._semaphore.acquire()
+        now = time.monotonic()
+        idle = [slot for slot in self.slots if not slot.busy]
+        ready = [slot for slot in idle if not slot.cooling_down(now)]
+        if not ready:
+            self._semaphore.release()
+            wait = min(slot.cooldown_until for slot in idle) - now
+            logger.warning(f"All contexts cooling down after CAPTCHAs ({wait:.0f}s left)")
+            return None
+        slot = min(ready, key=lambda s: (s.last_used, s.index))
+        slot.busy = True
+        return slot
+
+    def release(self, slot: ContextSlot, error_reason: Optional[str] = None):
+        """Return a slot after its page, updating its health from the page outcome"""
+        now = time.monotonic()
+        slot.busy = False
+        slot.last_used = now
+        slot.pages += 1
+        outcome = error_reason or 'success'
+        slot.outcomes[outcome] = slot.outcomes.get(outcome, 0) + 1
+
+        if error_reason is None:
+            slot.captchas = 0
+            slot.failures = 0
+        elif error_reason == 'captcha':
+            slot.captchas += 1
+            factor = min(2 ** (slot.captchas - 1), MAX_COOLDOWN_FACTOR)
+            slot.cooldown_until = now + self.captcha_cooldown * factor
+            slot.needs_reset = True
+            slot.drop_session = True
+            logger.warning(f"CAPTCHA on {slot.name}: cooling down for {self.captcha_cooldown * factor:.0f}s")
+        elif error_reason not in NEUTRAL_OUTCOMES:
+            slot.failures += 1
+            if slot.failures >= self.max_failures:
+                slot.failures = 0
+                slot.needs_reset = True
+                logger.warning(f"{slot.name} failed {self.max_failures} pages in a row - reopening it")
+        self._semaphore.release()
+
+    def stats(self) -> List[Dict]:
+        """Per-context health for logs and the metrics endpoint"""
+        now = time.monotonic()
+        return [
+            {
+                'context': slot.index,
+                'profile': slot.profile.name,
+                'pages': slot.pages,
+                'busy': slot.busy,
+                'cooldown_s': round(max(0.0, slot.cooldown_until - now), 1),
+                'captchas_in_row': slot.captchas,
+                'failures_in_row': slot.failures,
+                'outcomes': dict(slot.outcomes),
+            }
+            for slot in self.slots
+        ]
@@ -4,13 +4,10 @@ Optimized for stealth, stability, and low memory usage
 """
 import logging
 import asyncio
-import random
 import re
 import json
 import time
 from typing import Optional, Tuple
-from contextlib import asynccontextmanager
-from threading import Lock
 from pathlib import Path
 import os
 
@@ -20,10 +17,39 @@ try:
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
+from app.services.adaptive_pacing import (
+    OUTCOME_CAPTCHA, OUTCOME_ERROR, OUTCOME_SERVER_ERROR, OUTCOME_SUCCESS, get_pacing_controller,
+)
+from app.services.browser_contexts import ContextScheduler, ContextSlot, build_slots
+from app.services.page_fragments import EXTRACTION_MODE, EXTRACTION_MODES, PageFragment, extract_fragment
+from app.services.page_waits import NAVIGATION_WAIT_UNTIL, RANK_SELECTORS, RANK_WAIT_MS, wait_for_rank
+from app.services.request_policy import get_request_policy
 from app.services.scraper_metrics import get_metrics
+from app.utils.amazon_urls import amazon_domain
+from app.utils.screenshot_ocr import ocr_bsr_async
 
 logger = logging.getLogger(__name__)
 
+# After each scroll step, how long lazy sections get to render the rank (ms)
+SCROLL_SETTLE_MS = 1000
+
+# Navigation attempts per page (5xx responses and timeouts are retried at the domain's next slot)
+MAX_NAVIGATION_ATTEMPTS = 3
+
+# Outcomes the pacing controller learns nothing from (it already saw each 5xx response)
+UNPACED_OUTCOMES = ('captcha_cooldown', 'cancelled')
+
+
+def pacing_outcome(error_reason: Optional[str]) -> Optional[str]:
+    """What a fetch_page result means for the domain's request rate (None = nothing)"""
+    if error_reason is None:
+        return OUTCOME_SUCCESS
+    if error_reason in UNPACED_OUTCOMES or re.match(r'HTTP 5\d\d', error_reason):
+        return None
+    if error_reason in ('captcha', 'continue_shopping_interstitial'):
+        return OUTCOME_CAPTCHA  # The interstitial is Amazon turning the browser away, too
+    return OUTCOME_ERROR
+
 
 class CaptchaDetected(Exception):
     """Exception raised when CAPTCHA is detected - should abort immediately"""
@@ -33,23 +59,32 @@ class CaptchaDetected(Exception):
 class BrowserPool:
     """
     Production-ready browser pool with stealth optimizations
-    - Single browser instance (no parallel scraping)
-    - Persistent session storage
+    - One browser, N contexts (each with its own fingerprint profile and session file)
+    - Bounded number of pages open at once, contexts handed out fairly
+    - Per-context health: CAPTCHA cooldown, reopen after repeated failures
+    - Adaptive pacing per Amazon domain (shared by every worker, see adaptive_pacing)
     - CAPTCHA detection with immediate abort
-    - Exponential backoff for errors
     - Metrics tracking
     """
     
-    def __init__(self, headless: Optional[bool] = None):
+    def __init__(self, headless: Optional[bool] = None, contexts: Optional[int] = None,
+                 extraction_mode: Optional[str] = None):
         """
         Initialize browser pool
         
         Args:
             headless: Run browser in headless mode (None = auto-detect from env)
+            contexts: Number of browser contexts (None = PLAYWRIGHT_CONTEXTS)
+            extraction_mode: 'fragment' or 'html' (None = PLAYWRIGHT_EXTRACTION_MODE)
         """
         if not PLAYWRIGHT_AVAILABLE:
             raise ImportError("Playwright not installed. Install with: pip install playwright && playwright install chromium")
         
+        # What fetch_page takes out of the browser: the rank sections only, or the whole document
+        self.extraction_mode = extraction_mode or EXTRACTION_MODE
+        if self.extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode {self.extraction_mode!r} (expected one of {EXTRACTION_MODES})")
+        
         # Auto-detect from environment variable if not specified
         if headless is None:
             headless_env = os.getenv('PLAYWRIGHT_HEADLESS', 'true').lower()
@@ -58,77 +93,40 @@ class BrowserPool:
             self.headless = headless
         self.playwright = None
         self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
-        self._lock = Lock()  # Threading lock for cross-thread synchronization
         self._initialized = False
-        self._init_lock = None  # Will be created per event loop
-        self._initializing = False
-        self._init_thread_lock = Lock()  # Threading lock for initialization check
+        self._init_lock = asyncio.Lock()
+        self.startup_timings = {}  # Seconds per startup step, for the browser worker's stats
         
-        # Storage state path for session persistence
+        # One session file per context, for session persistence
         storage_dir = Path(os.getenv('PLAYWRIGHT_STORAGE_DIR', '/tmp/playwright_storage'))
         storage_dir.mkdir(parents=True, exist_ok=True)
-        self.storage_state_path = storage_dir / 'amazon_session.json'
+        self.slots = build_slots(storage_dir, contexts)
+        self.scheduler = ContextScheduler(self.slots)
+        
+        # Session file of the old single-context pool carries over to the first context
+        legacy_state = storage_dir / 'amazon_session.json'
+        if legacy_state.exists() and not self.slots[0].storage_state_path.exists():
+            legacy_state.rename(self.slots[0].storage_state_path)
         
         # Metrics
         self.metrics = get_metrics()
-    
-    async def initialize(self):
-        """Initialize browser (thread-safe, single browser only)"""
-        # Use threading lock for cross-thread initialization check
-        with self._init_thread_lock:
-            if self._initialized:
-                return
-            
-            if self._initializing:
-                # Wait for initialization to complete
-                while self._initializing:
-                    await asyncio.sleep(0.1)
-                if self._initialized:
-                    return
-            
-            self._initializing = True
         
-        # Create asyncio lock for current event loop (must be done in async context)
-        try:
-            # Get current event loop
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            # No running loop, try to get existing one
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                # No event loop exists, create new one
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+        # Which sub-resources pages load (images, trackers, ...)
+        self.request_policy = get_request_policy()
         
-        # Create lock in current event loop (thread-local)
-        if self._init_lock is None or self._init_lock._loop is not loop:
-                self._init_lock = asyncio.Lock()
-        
-        # Use asyncio lock for async initialization
+        # Request rate per Amazon domain, learned from CAPTCHAs and errors
+        self.pacing = get_pacing_controller()
+    
+    async def initialize(self):
+        """Launch the browser and open every context (once; later calls return at once)"""
         async with self._init_lock:
-            # Double-check after acquiring async lock
             if self._initialized:
                 return
-            if self._initialized:
-                return
-            
-            if self._initializing:
-                while self._initializing:
-                    await asyncio.sleep(0.1)
-                if self._initialized:
-                    return
-            
-            self._initializing = True
             
             try:
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = asyncio.get_event_loop()
-                
+                step = time.perf_counter()
                 self.playwright = await async_playwright().start()
+                self.startup_timings['playwright_start_s'] = round(time.perf_counter() - step, 3)
                 
                 # Configure proxy if available
                 proxy_config = None
@@ -173,80 +171,55 @@ class BrowserPool:
                 if proxy_config:
                     launch_options['proxy'] = proxy_config
                 
+                step = time.perf_counter()
                 self.browser = await self.playwright.chromium.launch(**launch_options)
+                self.startup_timings['browser_launch_s'] = round(time.perf_counter() - step, 3)
                 
-                # Load storage state if exists (persist session)
-                storage_state = None
-                if self.storage_state_path.exists():
-                    try:
-                        with open(self.storage_state_path, 'r') as f:
-                            storage_state = json.load(f)
-                        logger.debug("Loaded existing storage state for session persistence")
-                    except Exception as e:
-                        logger.debug(f"Could not load storage state: {e}")
-                
-                # Create context with realistic settings
-                context_options = {
-                    'viewport': {'width': 1920, 'height': 1080},
-                    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'locale': 'en-US',
-                    'timezone_id': 'America/New_York',
-                    'permissions': ['geolocation'],
-                    'ignore_https_errors': False,
-                    'java_script_enabled': True,
-                    'bypass_csp': True,
-                    'extra_http_headers': {
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Cache-Control': 'max-age=0',
-                        'DNT': '1',
-                    }
-                }
-                
-                if storage_state:
-                    context_options['storage_state'] = storage_state
-                
-                self.context = await self.browser.new_context(**context_options)
-                
-                # Add comprehensive stealth scripts
-                await self.context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-                    delete navigator.__proto__.webdriver;
-                    window.chrome = { runtime: {}, loadTimes: function() {}, csi: function() {}, app: {} };
-                    Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-                    Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
-                    Object.defineProperty(navigator, 'platform', { get: () => 'MacIntel' });
-                    Object.defineProperty(navigator, 'hardwareConcurrency', { get: () => 8 });
-                    Object.defineProperty(navigator, 'deviceMemory', { get: () => 8 });
-                    Object.defineProperty(navigator, 'vendor', { get: () => 'Google Inc.' });
-                    Object.defineProperty(navigator, 'connection', {
-                        get: () => ({ effectiveType: '4g', rtt: 50, downlink: 10, saveData: false })
-                    });
-                """)
+                step = time.perf_counter()
+                for slot in self.slots:
+                    await self._open_context(slot)
+                self.startup_timings['contexts_open_s'] = round(time.perf_counter() - step, 3)
                 
                 self._initialized = True
-                logger.info("Browser pool initialized (single browser)")
+                logger.info(f"Browser pool initialized (1 browser, {len(self.slots)} contexts, "
+                            f"up to {self.scheduler.max_pages} pages at once)")
             
             except Exception as e:
-                self._initializing = False
                 logger.error(f"Failed to initialize browser pool: {e}", exc_info=True)
-                await self.cleanup()
+                await self._close()
                 raise
     
-    @asynccontextmanager
-    async def get_context(self):
-        """Get browser context (always returns the same context)"""
-        if not self._initialized:
-            await self.initialize()
+    async def _open_context(self, slot: ContextSlot):
+        """(Re)open a slot's context with its profile and saved session"""
+        if slot.context is not None:
+            if not slot.drop_session:
+                await self._save_storage_state(slot)
+            try:
+                await slot.context.close()
+            except Exception as e:
+                logger.debug(f"Could not close {slot.name}: {e}")
+            slot.context = None
+        
+        if slot.drop_session:
+            # The session got a CAPTCHA; start the next one without its cookies
+            slot.storage_state_path.unlink(missing_ok=True)
+        
+        # Load storage state if exists (persist session)
+        context_options = slot.profile.context_options()
+        if slot.storage_state_path.exists():
+            try:
+                with open(slot.storage_state_path, 'r') as f:
+                    context_options['storage_state'] = json.load(f)
+                logger.debug(f"Loaded existing storage state for {slot.name}")
+            except Exception as e:
+                logger.debug(f"Could not load storage state: {e}")
         
-        yield self.context
+        slot.context = await self.browser.new_context(**context_options)
+        await self.request_policy.attach(slot.context)
+        await slot.context.add_init_script(slot.profile.init_script())
+        slot.needs_reset = False
+        slot.drop_session = False
+        logger.debug(f"Opened {slot.name}")
     
     def _detect_captcha(self, html: str) -> bool:
         """
@@ -280,9 +253,6 @@ class BrowserPool:
         (cookie consent, promotional modals, newsletter signups, delivery address notifications, etc.)
         """
         try:
-            # Wait a bit for pop-ups to appear (they may load after page content)
-            await page.wait_for_timeout(1500)
-            
             # First, check for delivery address notification modal by text content
             # This is a common modal that appears early on Amazon pages
             try:
@@ -302,7 +272,7 @@ class BrowserPool:
                             if element and await element.is_visible():
                                 logger.info(f"Clicking Dismiss button (selector: {selector})")
                                 await element.click(timeout=2000)
-                                await page.wait_for_timeout(1000)
+                                await self._wait_hidden(element)
                                 break
                         except:
                             continue
@@ -359,7 +329,7 @@ class BrowserPool:
                         if is_visible:
                             logger.info(f"Found pop-up, dismissing with selector: {selector}")
                             await element.click(timeout=2000)
-                            await page.wait_for_timeout(1000)  # Wait for pop-up to close
+                            await self._wait_hidden(element)  # Wait for pop-up to close
                             dismissed = True
                             break
                 except Exception as e:
@@ -370,366 +340,344 @@ class BrowserPool:
             if not dismissed:
                 try:
                     await page.keyboard.press('Escape')
-                    await page.wait_for_timeout(500)
                     logger.debug("Pressed Escape to dismiss any modal")
                 except:
                     pass
             
-            # Wait a bit more for any animations to complete
-            await page.wait_for_timeout(500)
-            
         except Exception as e:
             # Don't fail if pop-up dismissal fails - just log and continue
             logger.debug(f"Error dismissing pop-ups (non-critical): {e}")
     
-    async def _save_storage_state(self):
-        """Save browser storage state for session persistence"""
+    @staticmethod
+    async def _wait_hidden(element, timeout: int = 2000):
+        """Wait for a clicked pop-up control to disappear (instead of a fixed sleep)"""
         try:
-            if self.context:
-                storage_state = await self.context.storage_state()
-                with open(self.storage_state_path, 'w') as f:
-                    json.dump(storage_state, f)
-                logger.debug("Saved storage state")
+            await element.wait_for_element_state('hidden', timeout=timeout)
+        except Exception:
+            pass
+    
+    async def _click_continue_shopping(self, page: Page) -> bool:
+        """Click through the "Continue shopping" interstitial; True if a button was clicked"""
+        button_selectors = [
+            'button:has-text("Continue shopping")',
+            'a:has-text("Continue shopping")',
+            'input[value*="Continue"]',
+            'button[type="submit"]',
+            '.a-button-primary:has-text("Continue")',
+        ]
+        
+        try:
+            for selector in button_selectors:
+                try:
+                    button = await page.query_selector(selector)
+                    if button:
+                        logger.info(f"Clicking 'Continue shopping' button (selector: {selector})")
+                        await button.click()
+                        await page.wait_for_load_state('domcontentloaded', timeout=10000)
+                        logger.info("✅ Successfully clicked 'Continue shopping' - page should redirect")
+                        return True
+                except Exception as e:
+                    logger.debug(f"Selector {selector} failed: {e}")
+                    continue
+            
+            # Try clicking by text content
+            await page.click('text=Continue shopping', timeout=5000)
+            await page.wait_for_load_state('domcontentloaded', timeout=10000)
+            logger.info("Clicked 'Continue shopping' by text")
+            return True
         except Exception as e:
-            logger.debug(f"Could not save storage state: {e}")
+            logger.warning(f"Could not find/click 'Continue shopping' button: {e}")
+            return False
     
-    async def _extract_bsr_from_screenshot(self, screenshot_path: str) -> Optional[int]:
+    async def _open_product_details(self, page: Page, url: str) -> Optional[int]:
         """
-        Extract BSR from screenshot using OCR
+        Scroll to "See all details", open it and wait for the rank to render;
+        if it still isn't in the DOM, read it from a screenshot with OCR
         
-        Args:
-            screenshot_path: Path to screenshot image
-            
         Returns:
-            BSR value or None
+            BSR from the screenshot, or None (the caller reads the HTML)
         """
-        try:
-            # Try to use OCR to extract text from screenshot
-            try:
-                import pytesseract
-                from PIL import Image
-                OCR_AVAILABLE = True
-            except ImportError:
-                OCR_AVAILABLE = False
-                logger.debug("OCR not available (pytesseract/PIL not installed)")
-                return None
+        see_all_selectors = [
+            '#rich_product_information-learn_more_link',
+            'a[href*="detailBullets_feature_div"]',
+            'a:has-text("See all details")',
+            'a:has-text("see all details")',
+            '.a-link-normal:has-text("See all details")',
+        ]
+        
+        # Scroll gradually; lazy sections render as they come into view
+        for pos in [0.2, 0.4, 0.6, 0.8, 1.0]:
+            await page.evaluate("pos => window.scrollTo({top: Math.floor(document.body.scrollHeight * pos)})", pos)
             
-            if not OCR_AVAILABLE:
-                return None
+            element = None
+            for selector in see_all_selectors:
+                try:
+                    candidate = await page.query_selector(selector)
+                    if candidate and await candidate.is_visible():
+                        element = candidate
+                        break
+                except Exception as e:
+                    logger.debug(f"Selector {selector} failed: {e}")
             
-            # Load and process image
-            image = Image.open(screenshot_path)
+            if element is None:
+                if await wait_for_rank(page, time.monotonic() + SCROLL_SETTLE_MS / 1000) == 'rank':
+                    return None
+                continue
             
-            # Extract text using OCR
-            text = pytesseract.image_to_string(image)
-            logger.debug(f"OCR extracted text length: {len(text)}")
+            try:
+                logger.info(f"Found 'See all details' link - clicking (selector: {selector})")
+                await element.scroll_into_view_if_needed()
+                await element.click(timeout=5000)
+                logger.info("✅ Successfully clicked 'See all details'")
+            except Exception as e:
+                logger.debug(f"Error clicking 'See all details': {e}")
+                continue
             
-            # Search for BSR pattern in OCR text
-            bsr_patterns = [
-                r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-                r'Best\s+Sellers\s+Rank[:\s]*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
-                r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-            ]
+            if await wait_for_rank(page, time.monotonic() + RANK_WAIT_MS / 1000) == 'rank':
+                return None  # Rank is in the HTML now
             
-            for pattern in bsr_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        bsr_str = match.group(1).replace(',', '')
-                        bsr_value = int(bsr_str)
-                        if 1 <= bsr_value < 10000000:
-                            logger.info(f"✅ BSR extracted from screenshot OCR: #{bsr_value:,}")
-                            return bsr_value
-                    except (ValueError, AttributeError):
-                        continue
+            # The fragment may hold a rank the wait doesn't look for; OCR only when it doesn't
+            try:
+                if (await extract_fragment(page)).bsr:
+                    return None
+            except Exception as e:
+                logger.debug(f"Fragment check before OCR failed: {e}")
+            
+            return await self._ocr_rank_section(page, url)
+        
+        return None
+    
+    async def _ocr_rank_section(self, page: Page, url: str) -> Optional[int]:
+        """
+        OCR a screenshot of the rank section (in memory, in the OCR process pool)
+        
+        Returns:
+            BSR value or None; screenshots without a rank are kept in SCREENSHOT_DIR for process_screenshots.py
+        """
+        try:
+            png = None
+            for selector in RANK_SELECTORS:
+                element = await page.query_selector(selector)
+                if element and await element.is_visible():
+                    png = await element.screenshot(type='png')
+                    break
+            if png is None:
+                png = await page.screenshot(full_page=True, type='png')
             
-            logger.debug("BSR not found in OCR text")
-            return None
+            bsr_from_screenshot = await ocr_bsr_async(png)
+            if bsr_from_screenshot:
+                logger.info(f"✅ BSR extracted from screenshot OCR: #{bsr_from_screenshot:,}")
+                return bsr_from_screenshot
             
+            import hashlib
+            screenshot_dir = Path(os.getenv('SCREENSHOT_DIR', '/tmp/amazon_screenshots'))
+            screenshot_dir.mkdir(parents=True, exist_ok=True)
+            url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+            screenshot_path = screenshot_dir / f"amazon_bsr_{int(time.time())}_{url_hash}.png"
+            screenshot_path.write_bytes(png)
+            # The page URL, so process_screenshots.py can put a recovered BSR in the right column
+            screenshot_path.with_suffix('.json').write_text(json.dumps({'url': url, 'taken_at': time.time()}))
+            logger.warning(f"⚠️  Could not extract BSR from screenshot OCR (saved {screenshot_path}), continuing with HTML parsing")
         except Exception as e:
-            logger.warning(f"Error extracting BSR from screenshot: {e}")
-            return None
+            logger.warning(f"Could not take/process screenshot: {e}")
+        return None
     
-    async def fetch_page(self, url: str, timeout: int = 30000) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    async def _page_html(self, page: Page, full_html: bool = False) -> Tuple[str, Optional[PageFragment]]:
+        """
+        HTML for the parsers: the DOM fragment when it settles the page (rank or
+        CAPTCHA found), otherwise the whole document
+        """
+        if self.extraction_mode == 'fragment' and not full_html:
+            try:
+                fragment = await extract_fragment(page)
+            except Exception as e:
+                logger.debug(f"Fragment extraction failed, reading the whole document: {e}")
+            else:
+                if fragment.captcha or fragment.bsr:
+                    return fragment.to_html(), fragment
+                logger.debug("No rank in the page fragment - reading the whole document")
+        return await page.content(), None
+    
+    async def _save_storage_state(self, slot: ContextSlot):
+        """Save a context's storage state for session persistence"""
+        try:
+            if slot.context:
+                storage_state = await slot.context.storage_state()
+                with open(slot.storage_state_path, 'w') as f:
+                    json.dump(storage_state, f)
+                logger.debug(f"Saved storage state of {slot.name}")
+        except Exception as e:
+            logger.debug(f"Could not save storage state: {e}")
+    
+    async def fetch_page(self, url: str, timeout: int = 30000,
+                         full_html: bool = False) -> Tuple[Optional[str], Optional[str], Optional[int]]:
         """
         Fetch page HTML with production-ready error handling
         
+        Waits for a free page, then loads the URL in the context that has
+        rested longest; the outcome feeds that context's health. In 'fragment'
+        mode the HTML is a small document rebuilt from the rank sections, title
+        and cover read in the browser (see page_fragments).
+        
         Args:
             url: URL to fetch
             timeout: Timeout in milliseconds
+            full_html: Return the whole document even in 'fragment' mode (debugging snapshots)
             
         Returns:
-            Tuple of (html, error_reason)
-            - If successful: (html, None)
-            - If CAPTCHA: (None, "captcha")
-            - If network error: (None, "network_error")
-            - If other error: (None, error_message)
+            Tuple of (html, error_reason, bsr_from_screenshot)
+            - If successful: (html, None, None)
+            - If CAPTCHA: (None, "captcha", None)
+            - If every context is cooling down after a CAPTCHA: (None, "captcha_cooldown", None)
+            - If network error: (None, "network_error", None)
+            - If other error: (None, error_message, None)
         """
         if not self._initialized:
             await self.initialize()
         
+        # The domain's next slot (shared by every worker) comes before a context;
+        # after a CAPTCHA that can be minutes away, and the page waits for it
+        domain = amazon_domain(url)
+        await self.pacing.wait(domain, url)
+        
+        slot = await self.scheduler.acquire()
+        if slot is None:
+            return None, "captcha_cooldown", None
+        
+        error_reason = "cancelled"
+        try:
+            html, error_reason, bsr_from_screenshot = await self._fetch_in_context(slot, url, timeout, full_html)
+            return html, error_reason, bsr_from_screenshot
+        finally:
+            self.scheduler.release(slot, error_reason)
+            outcome = pacing_outcome(error_reason)
+            if outcome:
+                self.pacing.record(domain, outcome)
+    
+    async def _fetch_in_context(self, slot: ContextSlot, url: str, timeout: int,
+                                full_html: bool = False) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+        """Load one page in a borrowed context (see fetch_page)"""
         start_time = time.time()
         retried = False
+        variant = None
         
         try:
-            async with self.get_context() as context:
-                page = await context.new_page()
+            if slot.needs_reset or slot.context is None:
+                await self._open_context(slot)
+            page = await slot.context.new_page()
+            traffic = self.request_policy.track(page)
+            variant = f"routing:{traffic.mode}"
+            
+            try:
+                logger.info(f"🌐 Navigating to {url}...")
                 
-                try:
-                    # Random delay: 45-120 seconds (or from env for testing)
-                    # Check environment variables FIRST (for local testing)
-                    env_delay_min = os.getenv('AMAZON_DELAY_MIN')
-                    env_delay_max = os.getenv('AMAZON_DELAY_MAX')
-                    
-                    if env_delay_min and env_delay_max:
-                        # Use environment variables if set (for testing)
-                        delay_min = float(env_delay_min)
-                        delay_max = float(env_delay_max)
-                        logger.info(f"Using test delays from environment: {delay_min}-{delay_max}s")
-                    else:
-                        # Use config defaults (now 2-5s for local, can be overridden with env vars for production)
-                        try:
-                            import config
-                            delay_min = getattr(config, 'AMAZON_DELAY_MIN', 2)
-                            delay_max = getattr(config, 'AMAZON_DELAY_MAX', 5)
-                        except:
-                            delay_min = 2
-                            delay_max = 5
-                    
-                    delay = random.uniform(delay_min, delay_max)
-                    logger.info(f"⏳ Waiting {delay:.1f}s before navigation to {url}")
-                    await asyncio.sleep(delay)
-                    
-                    logger.info(f"🌐 Navigating to {url}...")
-                    
-                    # Navigate with exponential backoff for 500/503
-                    max_retries = 3
-                    backoff_delays = [60, 180, 600]  # 1 min, 3 min, 10 min
-                    
-                    response = None
-                    for retry_attempt in range(max_retries):
-                        try:
-                            logger.info(f"📡 Attempting to navigate to {url} (attempt {retry_attempt + 1}/{max_retries})")
-                            response = await page.goto(
-                                url,
-                                wait_until='networkidle',
-                                timeout=timeout
-                            )
-                            logger.info(f"✅ Navigation successful, status: {response.status if response else 'N/A'}")
-                            
-                            # Check for 500/503 errors
-                            if response and response.status in [500, 503]:
-                                if retry_attempt < len(backoff_delays):
-                                    backoff = backoff_delays[retry_attempt]
-                                    logger.warning(f"Received {response.status} error, applying {backoff}s backoff (attempt {retry_attempt + 1}/{max_retries})")
-                                    await asyncio.sleep(backoff)
-                                    continue
-                                else:
-                                    logger.error(f"Received {response.status} error after {max_retries} attempts")
-                                    raise Exception(f"HTTP {response.status} after {max_retries} retries")
-                            else:
-                                break  # Success or other status code
+                # Navigate; a 500/503 or a timeout slows the domain down and waits for its next slot
+                max_retries = MAX_NAVIGATION_ATTEMPTS
+                domain = amazon_domain(url)
+                
+                response = None
+                for retry_attempt in range(max_retries):
+                    try:
+                        logger.info(f"📡 Attempting to navigate to {url} (attempt {retry_attempt + 1}/{max_retries})")
+                        response = await page.goto(
+                            url,
+                            wait_until=NAVIGATION_WAIT_UNTIL,
+                            timeout=timeout
+                        )
+                        logger.info(f"✅ Navigation successful, status: {response.status if response else 'N/A'}")
                         
-                        except PlaywrightTimeoutError:
+                        # Check for 500/503 errors
+                        if response and response.status in [500, 503]:
+                            self.pacing.record(domain, OUTCOME_SERVER_ERROR)
                             if retry_attempt < max_retries - 1:
-                                backoff = backoff_delays[retry_attempt] if retry_attempt < len(backoff_delays) else 600
-                                logger.warning(f"Timeout, retrying after {backoff}s (attempt {retry_attempt + 1}/{max_retries})")
-                                await asyncio.sleep(backoff)
+                                logger.warning(f"Received {response.status} error, retrying at the next {domain} slot (attempt {retry_attempt + 1}/{max_retries})")
+                                if not await self.pacing.wait(domain, url, patient=False):
+                                    raise Exception(f"HTTP {response.status}, {domain} paced out")
                                 retried = True
                                 continue
                             else:
-                                raise
-                    
-                    # Wait for page to fully load
-                    await page.wait_for_timeout(2000)
-                    
-                    # Handle pop-ups (cookie consent, promotional modals, etc.)
-                    await self._dismiss_popups(page)
-                    
-                    page_content = await page.content()
-                    page_text = await page.inner_text('body')
-                    
-                    # Detect "Continue shopping" interstitial page
-                    if 'continue shopping' in page_text.lower() or 'click the button below to continue' in page_text.lower():
-                        logger.warning("⚠️  Detected 'Continue shopping' interstitial page - attempting to click button")
-                        try:
-                            # Try multiple selectors for the continue button
-                            button_selectors = [
-                                'button:has-text("Continue shopping")',
-                                'a:has-text("Continue shopping")',
-                                'input[value*="Continue"]',
-                                'button[type="submit"]',
-                                '.a-button-primary:has-text("Continue")',
-                            ]
-                            
-                            clicked = False
-                            for selector in button_selectors:
-                                try:
-                                    button = await page.query_selector(selector)
-                                    if button:
-                                        logger.info(f"Clicking 'Continue shopping' button (selector: {selector})")
-                                        await button.click()
-                                        await page.wait_for_timeout(3000)  # Wait for redirect
-                                        clicked = True
-                                        break
-                                except Exception as e:
-                                    logger.debug(f"Selector {selector} failed: {e}")
-                                    continue
-                            
-                            if not clicked:
-                                # Try clicking by text content
-                                try:
-                                    await page.click('text=Continue shopping', timeout=5000)
-                                    await page.wait_for_timeout(3000)
-                                    clicked = True
-                                    logger.info("Clicked 'Continue shopping' by text")
-                                except:
-                                    pass
-                            
-                            if clicked:
-                                # Wait for navigation after click
-                                await page.wait_for_load_state('networkidle', timeout=10000)
-                                logger.info("✅ Successfully clicked 'Continue shopping' - page should redirect")
-                            else:
-                                logger.warning("Could not find/click 'Continue shopping' button")
-                        except Exception as e:
-                            logger.warning(f"Error handling 'Continue shopping' page: {e}")
+                                logger.error(f"Received {response.status} error after {max_retries} attempts")
+                                raise Exception(f"HTTP {response.status} after {max_retries} retries")
+                        else:
+                            break  # Success or other status code
                     
-                    # Re-check page content after handling interstitial
-                    page_content = await page.content()
-                    page_text = await page.inner_text('body')
+                    except PlaywrightTimeoutError:
+                        if retry_attempt < max_retries - 1:
+                            logger.warning(f"Timeout, retrying at the next {domain} slot (attempt {retry_attempt + 1}/{max_retries})")
+                            if await self.pacing.wait(domain, url, patient=False):
+                                retried = True
+                                continue
+                        raise
+                
+                # Done as soon as the rank (or a CAPTCHA / interstitial) is in the DOM
+                deadline = time.monotonic() + RANK_WAIT_MS / 1000
+                state = await wait_for_rank(page, deadline)
+                
+                # Detect "Continue shopping" interstitial page
+                if state == 'interstitial':
+                    logger.warning("⚠️  Detected 'Continue shopping' interstitial page - attempting to click button")
+                    if await self._click_continue_shopping(page):
+                        state = await wait_for_rank(page, deadline)
                     
-                    # Check again if we're still on interstitial page after click
-                    if 'continue shopping' in page_text.lower() and 'click the button below' in page_text.lower():
+                    if state == 'interstitial':
                         # Still on interstitial - this is likely a blocking page
                         logger.warning("Still on 'Continue shopping' page after click - likely blocked")
                         duration = time.time() - start_time
-                        self.metrics.record_request(duration, success=False, error_reason="continue_shopping_interstitial")
-                        await self._save_storage_state()
-                        return None, "continue_shopping_interstitial"
-                    
-                    # Human-like behavior
-                    await page.wait_for_timeout(random.uniform(2000, 4000))
-                    await page.mouse.move(random.randint(100, 500), random.randint(100, 500))
-                    await page.wait_for_timeout(random.uniform(500, 1000))
-                    
-                    # Scroll gradually to find "See all details" section
-                    scroll_positions = [0.2, 0.4, 0.6, 0.8, 1.0]
-                    for pos in scroll_positions:
-                        scroll_y = await page.evaluate(f"Math.floor(document.body.scrollHeight * {pos})")
-                        await page.evaluate(f"window.scrollTo({{top: {scroll_y}, behavior: 'smooth'}})")
-                        await page.wait_for_timeout(random.uniform(1000, 2000))
-                        
-                        # Try to find and click "See all details" link
-                        try:
-                            # Multiple selectors for "See all details" link
-                            see_all_selectors = [
-                                '#rich_product_information-learn_more_link',
-                                'a[href*="detailBullets_feature_div"]',
-                                'a:has-text("See all details")',
-                                'a:has-text("see all details")',
-                                '.a-link-normal:has-text("See all details")',
-                            ]
-                            
-                            clicked = False
-                            for selector in see_all_selectors:
-                                try:
-                                    element = await page.query_selector(selector)
-                                    if element:
-                                        # Check if element is visible
-                                        is_visible = await element.is_visible()
-                                        if is_visible:
-                                            logger.info(f"Found 'See all details' link - clicking (selector: {selector})")
-                                            # Scroll element into view
-                                            await element.scroll_into_view_if_needed()
-                                            await page.wait_for_timeout(random.uniform(500, 1000))
-                                            # Click with human-like delay
-                                            await element.click(timeout=5000)
-                                            await page.wait_for_timeout(random.uniform(2000, 3000))  # Wait for content to load
-                                            clicked = True
-                                            logger.info("✅ Successfully clicked 'See all details'")
-                                            break
-                                except Exception as e:
-                                    logger.debug(f"Selector {selector} failed: {e}")
-                                    continue
-                            
-                            if clicked:
-                                # Wait a bit more for the expanded content to load
-                                await page.wait_for_timeout(random.uniform(2000, 3000))
-                                
-                                # Take screenshot after clicking "See all details"
-                                try:
-                                    from pathlib import Path
-                                    import hashlib
-                                    screenshot_dir = Path(os.getenv('SCREENSHOT_DIR', '/tmp/amazon_screenshots'))
-                                    screenshot_dir.mkdir(parents=True, exist_ok=True)
-                                    
-                                    # Generate screenshot filename with timestamp and URL hash
-                                    url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-                                    timestamp = int(time.time())
-                                    screenshot_path = screenshot_dir / f"amazon_bsr_{timestamp}_{url_hash}.png"
-                                    
-                                    # Take full page screenshot
-                                    await page.screenshot(path=str(screenshot_path), full_page=True)
-                                    logger.info(f"📸 Screenshot saved: {screenshot_path}")
-                                    
-                                    # Process screenshot with OCR immediately
-                                    bsr_from_screenshot = await self._extract_bsr_from_screenshot(str(screenshot_path))
-                                    if bsr_from_screenshot:
-                                        logger.info(f"✅ BSR extracted from screenshot OCR: #{bsr_from_screenshot:,}")
-                                        # Return BSR directly (third return value)
-                                        duration = time.time() - start_time
-                                        self.metrics.record_request(duration, success=True)
-                                        await self._save_storage_state()
-                                        await page.close()
-                                        # Return HTML with BSR embedded AND BSR value directly
-                                        html_with_bsr = f"<html><body>Best Sellers Rank: #{bsr_from_screenshot:,} in Kindle Store</body></html>"
-                                        return html_with_bsr, None, bsr_from_screenshot
-                                    else:
-                                        logger.warning("⚠️  Could not extract BSR from screenshot OCR, continuing with HTML parsing")
-                                        # Continue with normal HTML extraction
-                                except Exception as e:
-                                    logger.warning(f"Could not take/process screenshot: {e}")
-                                
-                                break  # Found and clicked, no need to continue scrolling
-                        except Exception as e:
-                            logger.debug(f"Error looking for 'See all details': {e}")
-                            continue
-                    
-                    # Final wait after all scrolling/interactions
-                    await page.wait_for_timeout(random.uniform(2000, 4000))
-                    
-                    # Get HTML (now with expanded "See all details" content)
-                    html = await page.content()
-                    
-                    # Check for CAPTCHA - IMMEDIATE ABORT
-                    if self._detect_captcha(html):
+                        self.metrics.record_request(duration, success=False, error_reason="continue_shopping_interstitial", variant=variant)
+                        await self._save_storage_state(slot)
+                        return None, "continue_shopping_interstitial", None
+                
+                if state == 'timeout':
+                    # No rank by the deadline: clear pop-ups and open "See all details" (screenshot OCR there)
+                    logger.info("Rank not in the page yet - dismissing pop-ups and opening product details")
+                    await self._dismiss_popups(page)
+                    bsr_from_screenshot = await self._open_product_details(page, url)
+                    if bsr_from_screenshot:
+                        # Return BSR directly (third return value)
                         duration = time.time() - start_time
-                        logger.warning(f"CAPTCHA detected for {url} - aborting immediately")
-                        self.metrics.record_request(duration, success=False, captcha=True, error_reason="captcha")
-                        await self._save_storage_state()
-                        raise CaptchaDetected("CAPTCHA detected")
-                    
-                    # Success
+                        self.metrics.record_request(duration, success=True, variant=variant)
+                        await self._save_storage_state(slot)
+                        # Return HTML with BSR embedded AND BSR value directly
+                        html_with_bsr = f"<html><body>Best Sellers Rank: #{bsr_from_screenshot:,} in Kindle Store</body></html>"
+                        return html_with_bsr, None, bsr_from_screenshot
+                
+                # Get HTML (with expanded "See all details" content if it was opened)
+                html, fragment = await self._page_html(page, full_html)
+                
+                # Check for CAPTCHA - IMMEDIATE ABORT
+                if state == 'captcha' or (fragment and fragment.captcha) or self._detect_captcha(html):
                     duration = time.time() - start_time
-                    self.metrics.record_request(duration, success=True)
-                    await self._save_storage_state()
-                    return html, None, None  # (html, error_reason, bsr_from_screenshot)
+                    logger.warning(f"CAPTCHA detected for {url} - aborting immediately")
+                    self.metrics.record_request(duration, success=False, captcha=True, error_reason="captcha", variant=variant)
+                    await self._save_storage_state(slot)
+                    raise CaptchaDetected("CAPTCHA detected")
                 
-                finally:
-                    await page.close()
+                # Success
+                duration = time.time() - start_time
+                self.metrics.record_request(duration, success=True, variant=variant)
+                logger.info(f"Page ready ({state}) in {duration:.1f}s, "
+                            f"{len(html) / 1024:.0f} KB {'fragment' if fragment else 'document'}")
+                await self._save_storage_state(slot)
+                return html, None, None  # (html, error_reason, bsr_from_screenshot)
+            
+            finally:
+                await page.close()
+                self.request_policy.release(page)
+                self.metrics.record_traffic(variant, traffic.requests, traffic.blocked,
+                                            traffic.bytes_loaded, traffic.bytes_saved)
+                if traffic.blocked:
+                    logger.info(f"🚫 Blocked {traffic.blocked}/{traffic.requests} requests "
+                                f"(~{traffic.bytes_saved / 1024:.0f} KB saved, {traffic.mode})")
         
         except CaptchaDetected:
-            # CAPTCHA - do not retry, abort immediately
-            duration = time.time() - start_time
-            self.metrics.record_request(duration, success=False, captcha=True, error_reason="captcha")
+            # CAPTCHA - do not retry, abort immediately (already recorded where it was detected)
             return None, "captcha", None
         
         except (PlaywrightTimeoutError, asyncio.TimeoutError) as e:
             # Timeout - network error, could retry but we don't here
             duration = time.time() - start_time
             error_reason = "timeout"
-            self.metrics.record_request(duration, success=False, retried=retried, error_reason=error_reason)
+            self.metrics.record_request(duration, success=False, retried=retried, error_reason=error_reason, variant=variant)
             logger.warning(f"Timeout fetching {url}: {e}")
             return None, error_reason, None
         
@@ -742,64 +690,61 @@ class BrowserPool:
             if is_network:
                 error_reason = "network_error"
             
-            self.metrics.record_request(duration, success=False, retried=retried, error_reason=error_reason)
+            self.metrics.record_request(duration, success=False, retried=retried, error_reason=error_reason, variant=variant)
             logger.error(f"Error fetching {url}: {e}")
             return None, error_reason, None
     
+    def get_stats(self):
+        """Health of every context (pages, cooldown, failures, outcomes)"""
+        return self.scheduler.stats()
+    
     async def cleanup(self):
-        """Cleanup browser resources"""
-        with self._lock:
+        """Save every session and close the contexts, browser and Playwright"""
+        async with self._init_lock:
             if self._initialized:
+                await self._close()
+                logger.info("Browser pool cleaned up")
+    
+    async def _close(self):
+        for slot in self.slots:
+            if slot.context is not None:
                 try:
-                    if self.context:
-                        await self._save_storage_state()
-                        await self.context.close()
-                        self.context = None
-                    if self.browser:
-                        await self.browser.close()
-                        self.browser = None
-                    if self.playwright:
-                        await self.playwright.stop()
-                        self.playwright = None
-                    self._initialized = False
-                    logger.info("Browser pool cleaned up")
+                    await self._save_storage_state(slot)
+                    await slot.context.close()
                 except Exception as e:
-                    logger.error(f"Error during cleanup: {e}")
-
-
-# Global pool instance (singleton)
-# Use thread-local storage for browser pools to avoid event loop conflicts
-import threading
-_thread_local = threading.local()
-
-_pool_lock = Lock()
+                    logger.error(f"Error closing {slot.name}: {e}")
+                slot.context = None
+        try:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.error(f"Error during cleanup: {e}")
+        self.browser = None
+        self.playwright = None
+        self._initialized = False
 
 
-async def get_browser_pool(headless: Optional[bool] = None) -> BrowserPool:
+async def get_browser_pool() -> BrowserPool:
     """
-    Get or create thread-local browser pool (thread-safe, avoids event loop conflicts)
+    Get the process-wide browser pool, started (thread-safe)
     
-    Args:
-        headless: Run browser in headless mode (None = auto-detect from env)
-        
     Returns:
-        BrowserPool instance (one per thread)
+        BrowserPool instance (one per process, owned by the browser worker; its
+        methods must run on the worker loop, which fetch_page takes care of)
     """
-    # Get thread-local pool
-    if not hasattr(_thread_local, 'pool') or _thread_local.pool is None:
-        _thread_local.pool = BrowserPool(headless=headless)
-    
-    pool = _thread_local.pool
-    
-    if not pool._initialized:
-        await pool.initialize()
-    
-    return pool
+    from app.services.browser_worker import get_browser_worker
+    return await get_browser_worker().get_pool()
 
 
-async def fetch_page(url: str, timeout: int = 30000) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+async def fetch_page(url: str, timeout: int = 30000,
+                     full_html: bool = False) -> Tuple[Optional[str], Optional[str], Optional[int]]:
     """
-    Fetch page using global browser pool
+    Fetch page using the process-wide browser pool (callable from any event loop)
+    
+    Args:
+        full_html: Return the whole document even in 'fragment' mode
     
     Returns:
         Tuple of (html, error_reason, bsr_from_screenshot)
@@ -807,6 +752,5 @@ async def fetch_page(url: str, timeout: int = 30000) -> Tuple[Optional[str], Opt
         - If successful: (html, None, None)
         - If error: (None, error_reason, None)
     """
-    pool = await get_browser_pool()
-    return await pool.fetch_page(url, timeout)
-
+    from app.services.browser_worker import get_browser_worker
+    return await get_browser_worker().fetch(url, timeout, full_html)
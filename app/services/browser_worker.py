@@ -0,0 +1,197 @@
+"""
+Persistent Playwright worker
+One event loop thread per process owns the BrowserPool: Playwright and Chromium
+start once and every fetch after that reuses them. Callers never run their own
+event loop for a page:
+- sync code submits and gets a concurrent.futures.Future (submit / fetch_sync)
+- async code awaits fetch() from any event loop
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fetch durations kept for the steady-state percentiles
+TIMING_WINDOW = 1000
+
+FetchResult = Tuple[Optional[str], Optional[str], Optional[int]]
+
+
+def _percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class BrowserWorker:
+    """
+    Event loop thread that owns the browser pool
+
+    The pool (and Chromium) starts on the first submission, or up front with
+    start(); stop() saves the sessions and closes the browser.
+    """
+
+    def __init__(self, pool_factory: Optional[Callable] = None, headless: Optional[bool] = None):
+        """
+        Args:
+            pool_factory: Builds the pool on the worker loop (None = BrowserPool(headless))
+            headless: Run browser in headless mode (None = auto-detect from env)
+        """
+        self._pool_factory = pool_factory or (lambda: _default_pool(headless))
+        self.pool = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pool_ready: Optional[asyncio.Future] = None
+        self._durations = deque(maxlen=TIMING_WINDOW)
+        self.fetches = 0
+        self.first_fetch_s: Optional[float] = None
+        self.startup_s: Optional[float] = None
+        self.startup_timings: Dict[str, float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The worker's event loop (the thread starts on first use)"""
+        with self._lock:
+            if not self.running:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='browser-worker', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def start(self, timeout: Optional[float] = None) -> Dict[str, float]:
+        """Start the pool now instead of on the first fetch; returns the startup timings"""
+        self.run(self._get_pool()).result(timeout)
+        return self.startup_timings
+
+    def run(self, coro) -> concurrent.futures.Future:
+        """Schedule any coroutine on the worker loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def submit(self, url: str, timeout: int = 60000, full_html: bool = False) -> concurrent.futures.Future:
+        """Queue a page fetch; the future resolves to (html, error_reason, bsr_from_screenshot)"""
+        return self.run(self._fetch(url, timeout, full_html))
+
+    def fetch_sync(self, url: str, timeout: int = 60000, wait: Optional[float] = None,
+                   full_html: bool = False) -> FetchResult:
+        """Fetch a page from sync code (blocks the calling thread only)"""
+        return self.submit(url, timeout, full_html).result(wait)
+
+    async def fetch(self, url: str, timeout: int = 60000, full_html: bool = False) -> FetchResult:
+        """Fetch a page from async code on any event loop"""
+        return await self.on_loop(self._fetch(url, timeout, full_html))
+
+    async def on_loop(self, coro):
+        """Await a coroutine on the worker loop, from any loop"""
+        loop = self.loop
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def get_pool(self):
+        """The pool, started (from any loop)"""
+        return await self.on_loop(self._get_pool())
+
+    async def _get_pool(self):
+        # Runs on the worker loop; concurrent first callers share one startup
+        if self._pool_ready is None:
+            self._pool_ready = asyncio.ensure_future(self._start_pool())
+        try:
+            return await asyncio.shield(self._pool_ready)
+        except Exception:
+            self._pool_ready = None  # Let the next caller try again
+            raise
+
+    async def _start_pool(self):
+        start = time.perf_counter()
+        pool = self._pool_factory()
+        await pool.initialize()
+        self.pool = pool
+        self.startup_s = time.perf_counter() - start
+        self.startup_timings = dict(getattr(pool, 'startup_timings', {}), total_s=round(self.startup_s, 3))
+        logger.info(f"Browser worker ready in {self.startup_s:.2f}s {self.startup_timings}")
+        return pool
+
+    async def _fetch(self, url: str, timeout: int, full_html: bool = False) -> FetchResult:
+        pool = await self._get_pool()
+        start = time.perf_counter()
+        try:
+            return await pool.fetch_page(url, timeout, full_html=full_html)
+        finally:
+            duration = time.perf_counter() - start
+            self.fetches += 1
+            if self.first_fetch_s is None:
+                self.first_fetch_s = duration
+            else:
+                self._durations.append(duration)
+
+    def stats(self) -> Dict:
+        """Startup and steady-state timings (steady state leaves out the first fetch)"""
+        durations = list(self._durations)
+        stats = {
+            'running': self.running,
+            'startup': self.startup_timings,
+            'fetches': self.fetches,
+            'first_fetch_s': round(self.first_fetch_s, 3) if self.first_fetch_s is not None else None,
+        }
+        if durations:
+            stats['steady_state'] = {
+                'fetches': len(durations),
+                'avg_s': round(sum(durations) / len(durations), 3),
+                'p50_s': round(_percentile(durations, 50), 3),
+                'p95_s': round(_percentile(durations, 95), 3),
+            }
+        if self.pool is not None and hasattr(self.pool, 'get_stats'):
+            stats['contexts'] = self.pool.get_stats()
+        return stats
+
+    def stop(self, timeout: float = 30):
+        """Save sessions, close the browser and end the loop thread"""
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+        if self.pool is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self.pool.cleanup(), loop).result(timeout)
+            except Exception as e:
+                logger.error(f"Error stopping browser worker: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
+        with self._lock:
+            self.pool = None
+            self._pool_ready = None
+            self._loop = None
+            self._thread = None
+        logger.info(f"Browser worker stopped after {self.fetches} fetches")
+
+
+def _default_pool(headless: Optional[bool]):
+    from app.services.browser_pool_refactored import BrowserPool
+    return BrowserPool(headless=headless)
+
+
+_worker: Optional[BrowserWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_browser_worker() -> BrowserWorker:
+    """Process-wide browser worker (stopped cleanly at interpreter exit)"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = BrowserWorker()
+            atexit.register(_worker.stop)
+        return _worker
@@ -8,75 +8,11 @@ from datetime import datetime, timedelta
 from app.services.sheets_service import get_avg_history_for_worksheet, get_default_worksheet
 from app.services.redis_cache import get_redis_client
 from app.models.schemas import ChartData
+from app.utils.date_utils import parse_date
 
 logger = logging.getLogger(__name__)
 
 
-def parse_date(date_str):
-    """
-    Parse date string in various formats and return datetime object
-    
-    Supports:
-    - YYYY-MM-DD (e.g., '2024-02-06')
-    - M/D/YYYY (e.g., '2/6/2024', '02/06/2024')
-    - MM/DD/YYYY (e.g., '02/06/2024')
-    - M-D-YYYY (e.g., '2-6-2024')
-    - Various other common formats
-    
-    Returns:
-        datetime object or None if parsing fails
-    """
-    if not date_str:
-        return None
-    
-    if isinstance(date_str, datetime):
-        return date_str
-    
-    date_str = str(date_str).strip()
-    
-    if not date_str:
-        return None
-    
-    # Try YYYY-MM-DD format first
-    try:
-        return datetime.strptime(date_str, '%Y-%m-%d')
-    except ValueError:
-        pass
-    
-    # Try M/D/YYYY or MM/DD/YYYY format
-    try:
-        return datetime.strptime(date_str, '%m/%d/%Y')
-    except ValueError:
-        pass
-    
-    # Try M/D/YY format (2-digit year)
-    try:
-        parsed = datetime.strptime(date_str, '%m/%d/%y')
-        # Convert 2-digit year to 4-digit (assume 2000s if < 50, else 1900s)
-        if parsed.year < 50:
-            parsed = parsed.replace(year=parsed.year + 2000)
-        else:
-            parsed = parsed.replace(year=parsed.year + 1900)
-        return parsed
-    except ValueError:
-        pass
-    
-    # Try M-D-YYYY format
-    try:
-        return datetime.strptime(date_str, '%m-%d-%Y')
-    except ValueError:
-        pass
-    
-    # Try DD/MM/YYYY format (European)
-    try:
-        return datetime.strptime(date_str, '%d/%m/%Y')
-    except ValueError:
-        pass
-    
-    logger.warning(f"Could not parse date: {date_str}")
-    return None
-
-
 def normalize_date(date_str):
     """
     Normalize date string to YYYY-MM-DD format
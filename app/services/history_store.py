@@ -0,0 +1,203 @@
+"""
+Local append-only store of worksheet history
+One JSON Lines log per worksheet, replayed into memory and served instead of the Sheets API
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import config
+from app.utils.bsr_matrix import BSRMatrix, HEADER_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one <worksheet>.jsonl log per worksheet
+HISTORY_STORE_DIR = getattr(config, 'HISTORY_STORE_DIR', os.path.join('data', 'history'))
+
+# Record types in the log. Later records for the same row replace earlier ones.
+RECORD_HEADER = 'header'      # {"rows": [[titles], [authors], [links], [categories]]}
+RECORD_ROW = 'row'            # {"row": 12, "values": [...]}
+RECORD_TRUNCATE = 'truncate'  # {"row_count": 40} - rows after row_count were removed in the sheet
+RECORD_SYNC = 'sync'          # {"last_row": 40, "at": 1700000000.0, "full": true} ("full_at" after compaction)
+
+
+def store_filename(worksheet_name: str) -> str:
+    """Filesystem-safe log name for a worksheet ("Crime Fiction - US" -> crime-fiction-us-<hash>.jsonl)"""
+    slug = re.sub(r'[^a-z0-9]+', '-', worksheet_name.lower()).strip('-') or 'worksheet'
+    digest = hashlib.sha1(worksheet_name.encode('utf-8')).hexdigest()[:8]
+    return f"{slug}-{digest}.jsonl"
+
+
+class WorksheetHistoryStore:
+    """
+    Append-only history log for one worksheet
+
+    Every process replays the log into memory and then only reads the bytes
+    appended since its last refresh. Compaction rewrites the log; readers notice
+    the new file and replay it from the start.
+    """
+
+    def __init__(self, worksheet_name: str, directory: str = HISTORY_STORE_DIR):
+        self.worksheet_name = worksheet_name
+        self.path = os.path.join(directory, store_filename(worksheet_name))
+        self.header: List[List[str]] = []
+        self.rows: Dict[int, List[str]] = {}  # 1-based worksheet row -> values
+        self.row_count = 0  # Rows in the worksheet (headers included)
+        self.last_synced_row = 0
+        self.last_sync_at = 0.0
+        self.last_full_sync_at = 0.0
+        self.version = 0  # Bumped whenever the in-memory state changes
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.RLock()
+        self._matrix: Optional[BSRMatrix] = None
+        self._matrix_version = -1
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Advisory lock on a sidecar file, shared by all processes using the store"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reset(self):
+        self.header = []
+        self.rows = {}
+        self.row_count = 0
+        self.last_synced_row = 0
+        self.last_sync_at = 0.0
+        self.last_full_sync_at = 0.0
+        self._offset = 0
+
+    def _apply(self, record: Dict):
+        """Apply one log record to the in-memory state"""
+        kind = record.get('t')
+        if kind == RECORD_HEADER:
+            self.header = [list(row) for row in record['rows']]
+            self.row_count = max(self.row_count, len(self.header))
+        elif kind == RECORD_ROW:
+            row = record['row']
+            self.rows[row] = list(record['values'])
+            self.row_count = max(self.row_count, row)
+        elif kind == RECORD_TRUNCATE:
+            row_count = record['row_count']
+            for row in [r for r in self.rows if r > row_count]:
+                del self.rows[row]
+            self.row_count = row_count
+        elif kind == RECORD_SYNC:
+            self.last_synced_row = record['last_row']
+            self.last_sync_at = record['at']
+            if record.get('full'):
+                self.last_full_sync_at = record['at']
+            elif 'full_at' in record:
+                self.last_full_sync_at = record['full_at']
+
+    def refresh(self):
+        """Replay records appended to the log since the last refresh (by any process)"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                if self._offset:
+                    self._reset()
+                    self.version += 1
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Compacted (or replaced): replay from the start
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+
+            with self._file_lock(exclusive=False):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    f.seek(self._offset)
+                    for line in f:
+                        if not line.endswith('\n'):
+                            break  # Partial write - picked up on the next refresh
+                        self._offset += len(line.encode('utf-8'))
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, KeyError) as e:
+                            logger.warning(f"Skipping bad record in {self.path}: {e}")
+            self.version += 1
+
+    def append(self, records: List[Dict]):
+        """Append records to the log and apply them"""
+        if not records:
+            return
+        with self._lock:
+            self.refresh()
+            data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+            with self._file_lock(exclusive=True):
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(data)
+            self.refresh()
+
+    def compact(self):
+        """Rewrite the log with one record per live row (after a full reconciliation)"""
+        with self._lock:
+            self.refresh()
+            records = []
+            if self.header:
+                records.append({'t': RECORD_HEADER, 'rows': self.header})
+            records.extend({'t': RECORD_ROW, 'row': row, 'values': self.rows[row]} for row in sorted(self.rows))
+            records.append({'t': RECORD_TRUNCATE, 'row_count': self.row_count})
+            records.append({
+                't': RECORD_SYNC, 'last_row': self.last_synced_row,
+                'at': self.last_sync_at, 'full_at': self.last_full_sync_at
+            })
+
+            tmp_path = self.path + '.tmp'
+            with self._file_lock(exclusive=True):
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                os.replace(tmp_path, self.path)
+            self.refresh()
+
+    def has_data(self) -> bool:
+        """True once at least one sync has stored the header rows"""
+        self.refresh()
+        return bool(self.header)
+
+    def values(self) -> List[List[str]]:
+        """Worksheet values in get_all_values() layout (header rows, then date rows)"""
+        with self._lock:
+            self.refresh()
+            header = self.header + [[] for _ in range(HEADER_ROWS - len(self.header))]
+            return header + [self.rows.get(row, []) for row in range(HEADER_ROWS + 1, self.row_count + 1)]
+
+    def get_matrix(self) -> BSRMatrix:
+        """Parsed matrix of the stored history, rebuilt only when the store changed"""
+        with self._lock:
+            self.refresh()
+            if self._matrix is None or self._matrix_version != self.version:
+                self._matrix = BSRMatrix.from_values(self.values())
+                self._matrix_version = self.version
+            return self._matrix
+
+
+# One store object per worksheet per process
+_stores: Dict[str, WorksheetHistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_history_store(worksheet_name: str) -> WorksheetHistoryStore:
+    """Get the (process-wide) history store for a worksheet"""
+    with _stores_lock:
+        store = _stores.get(worksheet_name)
+        if store is None:
+            store = WorksheetHistoryStore(worksheet_name)
+            _stores[worksheet_name] = store
+        return store
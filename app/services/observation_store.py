@@ -0,0 +1,324 @@
+"""
+Local SQLite mirror of BSR observations
+Keyed by (worksheet, book column, date); the API read path. Google Sheets stays the human-facing copy.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from app.utils.amazon_urls import extract_asin
+from app.utils.bsr_matrix import BSRMatrix, BookColumn, MISSING_BSR
+from app.utils.date_utils import date_key, SHEET_DATE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# SQLite database file (created on first use)
+OBSERVATION_DB_PATH = getattr(config, 'OBSERVATION_DB_PATH', os.path.join('data', 'observations.db'))
+
+# Bumped when the tables change; an older database is dropped and rebuilt by the next backfill/reconcile
+SCHEMA_VERSION = 2
+
+# Rows are keyed on the sheet column: two columns of a worksheet may list the same ASIN (duplicate listings)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    worksheet   TEXT NOT NULL,
+    col         INTEGER NOT NULL,
+    asin        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    author      TEXT NOT NULL DEFAULT '',
+    amazon_link TEXT NOT NULL,
+    category    TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (worksheet, col)
+);
+CREATE TABLE IF NOT EXISTS observations (
+    worksheet   TEXT NOT NULL,
+    col         INTEGER NOT NULL,
+    asin        TEXT NOT NULL,
+    date        TEXT NOT NULL,  -- YYYY-MM-DD
+    sheet_date  TEXT NOT NULL,  -- date as written in the worksheet
+    bsr         INTEGER NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (worksheet, col, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_observations_date ON observations (worksheet, date);
+CREATE INDEX IF NOT EXISTS idx_observations_asin ON observations (asin, date);
+CREATE TABLE IF NOT EXISTS averages (
+    worksheet   TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    sheet_date  TEXT NOT NULL,
+    average_bsr REAL NOT NULL,
+    PRIMARY KEY (worksheet, date)
+) WITHOUT ROWID;
+"""
+
+
+def book_key(book) -> str:
+    """ASIN of a book (dict or BookColumn), falling back to its link when there is no ASIN in it"""
+    link = book['amazon_link'] if isinstance(book, dict) else book.amazon_link
+    return extract_asin(link) or link
+
+
+class ObservationStore:
+    """
+    SQLite store of BSR observations and AVG values
+
+    One connection per thread; WAL mode so API readers don't block the writers.
+    Read results are cached until the database changes (in this or any other process).
+    """
+
+    def __init__(self, path: str = OBSERVATION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0  # Commits made through this object
+        self._cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], List[Dict]]] = {}
+        self._cache_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._migrate()
+
+    def _migrate(self):
+        """Create the tables; a database of an older schema is dropped (it is rebuilt from the sheets)"""
+        conn = self._connection()
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            tables = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            if tables:
+                logger.warning(f"Observation store {self.path} has schema {version}, dropping it for schema "
+                               f"{SCHEMA_VERSION}; run backfill_observations.py (reads use Google Sheets until then)")
+                for table in ('books', 'observations', 'averages'):
+                    conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.executescript(SCHEMA)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        self._writes += 1
+
+    def _version(self) -> Tuple[int, int]:
+        """Changes whenever any connection commits (data_version covers the others, _writes our own)"""
+        return self._connection().execute('PRAGMA data_version').fetchone()[0], self._writes
+
+    def _cached(self, kind: str, worksheet_name: str, load) -> List[Dict]:
+        version = self._version()
+        with self._cache_lock:
+            entry = self._cache.get((kind, worksheet_name))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        result = load()
+        with self._cache_lock:
+            self._cache[(kind, worksheet_name)] = (version, result)
+        return result
+
+    # ----- writes -----
+
+    def replace_worksheet(self, worksheet_name: str, all_values: List[List[str]]) -> int:
+        """
+        Replace everything stored for a worksheet with its current values (backfill / reconciliation)
+
+        Args:
+            worksheet_name: Name of the worksheet
+            all_values: get_all_values()-style rows
+
+        Returns:
+            Number of BSR observations stored
+        """
+        matrix = BSRMatrix.from_values(all_values)
+        with self._transaction() as conn:
+            for table in ('books', 'observations', 'averages'):
+                conn.execute(f'DELETE FROM {table} WHERE worksheet = ?', (worksheet_name,))
+            count = self._insert_matrix(conn, worksheet_name, matrix)
+        logger.info(f"Stored {count} observations for {worksheet_name}")
+        return count
+
+    def upsert_rows(self, worksheet_name: str, all_values: List[List[str]], rows: Iterable[int]) -> int:
+        """
+        Re-import some date rows of a worksheet (incremental sync)
+
+        Cells that are empty now remove the stored observation for that book and date.
+
+        Args:
+            worksheet_name: Name of the worksheet
+            all_values: get_all_values()-style rows (headers are needed for the book columns)
+            rows: 1-based worksheet rows to re-import
+        """
+        matrix = BSRMatrix.from_values(all_values)
+        row_indices = [idx for idx in (matrix.row_index(row) for row in rows) if idx is not None]
+        keys = [key for key in (date_key(matrix.dates[idx]) for idx in row_indices) if key]
+        if not keys:
+            return 0
+        with self._transaction() as conn:
+            for key in keys:
+                conn.execute('DELETE FROM observations WHERE worksheet = ? AND date = ?', (worksheet_name, key))
+                conn.execute('DELETE FROM averages WHERE worksheet = ? AND date = ?', (worksheet_name, key))
+            return self._insert_matrix(conn, worksheet_name, matrix, row_indices)
+
+    def record_bsr(self, worksheet_name: str, book: Dict, date_value, bsr: int, sheet_date: Optional[str] = None):
+        """Write-through of one scraped BSR value"""
+        key = date_key(date_value)
+        if not key:
+            raise ValueError(f"Not a date: {date_value}")
+        sheet_date = sheet_date or _sheet_date(date_value)
+        with self._transaction() as conn:
+            self._upsert_books(conn, worksheet_name, [BookColumn(
+                col=book['col'], name=book['name'], author=book.get('author', ''),
+                amazon_link=book['amazon_link'], category=book.get('category', '')
+            )])
+            conn.execute(
+                'INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (worksheet_name, book['col'], book_key(book), key, sheet_date, int(bsr), time.time())
+            )
+
+    def record_average(self, worksheet_name: str, date_value, average_bsr: float, sheet_date: Optional[str] = None):
+        """Write-through of one AVG value"""
+        key = date_key(date_value)
+        if not key:
+            raise ValueError(f"Not a date: {date_value}")
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO averages VALUES (?, ?, ?, ?)',
+                (worksheet_name, key, sheet_date or _sheet_date(date_value), float(average_bsr))
+            )
+
+    @staticmethod
+    def _upsert_books(conn: sqlite3.Connection, worksheet_name: str, books: List[BookColumn]):
+        conn.executemany(
+            'INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(worksheet_name, b.col, book_key(b), b.name, b.author, b.amazon_link, b.category) for b in books]
+        )
+
+    def _insert_matrix(self, conn: sqlite3.Connection, worksheet_name: str, matrix: BSRMatrix,
+                       row_indices: Optional[List[int]] = None) -> int:
+        """Insert books, observations and averages of (some rows of) a parsed matrix"""
+        self._upsert_books(conn, worksheet_name, matrix.books)
+        if row_indices is None:
+            row_indices = range(len(matrix.dates))
+        keys = {row_idx: date_key(matrix.dates[row_idx]) for row_idx in row_indices}
+        keys = {row_idx: key for row_idx, key in keys.items() if key}
+        if not keys:
+            return 0
+
+        selected = np.array(sorted(keys), dtype=np.int64)
+        asins = [book_key(book) for book in matrix.books]
+        book_cols = [book.col for book in matrix.books]
+        now = time.time()
+        sub = matrix.bsr[selected]
+        rows, cols = np.nonzero(sub != MISSING_BSR)
+        values = sub[rows, cols].tolist()
+        observations = [
+            (worksheet_name, book_cols[c], asins[c], keys[selected[r]], matrix.dates[selected[r]].strip(), v, now)
+            for r, c, v in zip(rows.tolist(), cols.tolist(), values)
+        ]
+        conn.executemany('INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)', observations)
+
+        if matrix.avg is not None:
+            averages = [
+                (worksheet_name, keys[row_idx], matrix.dates[row_idx].strip(), float(matrix.avg[row_idx]))
+                for row_idx in keys if not np.isnan(matrix.avg[row_idx])
+            ]
+            conn.executemany('INSERT OR REPLACE INTO averages VALUES (?, ?, ?, ?)', averages)
+        return len(observations)
+
+    # ----- reads -----
+
+    def has_worksheet(self, worksheet_name: str) -> bool:
+        row = self._connection().execute(
+            'SELECT 1 FROM books WHERE worksheet = ? LIMIT 1', (worksheet_name,)
+        ).fetchone()
+        return row is not None
+
+    def get_books_history(self, worksheet_name: str) -> List[Dict]:
+        """Books with BSR history, in the get_bsr_history format and worksheet column order"""
+        books = self._cached('books', worksheet_name, lambda: self._load_books_history(worksheet_name))
+        # Callers add fields (cover_image) to the book dicts; the histories are shared
+        return [dict(book) for book in books]
+
+    def _load_books_history(self, worksheet_name: str) -> List[Dict]:
+        conn = self._connection()
+        books = conn.execute(
+            'SELECT col, name, author, amazon_link, category FROM books WHERE worksheet = ? ORDER BY col',
+            (worksheet_name,)
+        ).fetchall()
+        history: Dict[int, List[Dict]] = defaultdict(list)
+        for col, sheet_date, bsr in conn.execute(
+            'SELECT col, sheet_date, bsr FROM observations WHERE worksheet = ? ORDER BY col, date',
+            (worksheet_name,)
+        ):
+            history[col].append({'date': sheet_date, 'bsr': bsr})
+
+        books_data = []
+        for col, name, author, amazon_link, category in books:
+            bsr_history = history.get(col, [])
+            books_data.append({
+                'name': name,
+                'author': author,
+                'amazon_link': amazon_link,
+                'category': category,
+                'bsr_history': bsr_history,
+                'current_bsr': bsr_history[-1]['bsr'] if bsr_history else None
+            })
+        return books_data
+
+    def get_avg_history(self, worksheet_name: str) -> List[Dict]:
+        """AVG values as [{'date': ..., 'average_bsr': ...}] in date order"""
+        entries = self._cached('avg', worksheet_name, lambda: [
+            {'date': sheet_date, 'average_bsr': average_bsr}
+            for sheet_date, average_bsr in self._connection().execute(
+                'SELECT sheet_date, average_bsr FROM averages WHERE worksheet = ? ORDER BY date',
+                (worksheet_name,)
+            )
+        ])
+        return [dict(entry) for entry in entries]
+
+    def get_observations(self, asin: str, since: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """(worksheet, YYYY-MM-DD date, bsr) rows for one ASIN across worksheets"""
+        query = 'SELECT worksheet, date, bsr FROM observations WHERE asin = ?'
+        params: Tuple = (asin,)
+        if since:
+            query += ' AND date >= ?'
+            params += (since,)
+        return self._connection().execute(query + ' ORDER BY date', params).fetchall()
+
+
+def _sheet_date(date_value) -> str:
+    """Worksheet spelling of a date (same format get_today_row writes)"""
+    if isinstance(date_value, str):
+        return date_value.strip()
+    return date_value.strftime(SHEET_DATE_FORMAT)
+
+
+# Singleton instance
+_observation_store: Optional[ObservationStore] = None
+_observation_store_lock = threading.Lock()
+
+
+def get_observation_store() -> ObservationStore:
+    """Lazy initialization of the observation store"""
+    global _observation_store
+    with _observation_store_lock:
+        if _observation_store is None:
+            _observation_store = ObservationStore()
+        return _observation_store
@@ -0,0 +1,115 @@
+"""
+DOM fragment extraction for Playwright product pages
+One page.evaluate returns what the scraper reads (the rank sections' text, the
+title and the cover image) as a few KB of JSON, instead of page.content()
+serializing the multi-MB document for BeautifulSoup to parse again.
+
+PageFragment.to_html() rebuilds those pieces as a small HTML document, so
+parse_bsr and extract_product_page read it exactly as they read a full page.
+"""
+import html as html_lib
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import config
+from app.services.page_waits import CAPTCHA_SELECTORS, RANK_SELECTORS
+from app.utils.bsr_parser import parse_bsr
+
+logger = logging.getLogger(__name__)
+
+# 'fragment': read the rank sections in the browser (full HTML only when they have no rank)
+# 'html': always serialize the whole document
+EXTRACTION_MODES = ('fragment', 'html')
+EXTRACTION_MODE = getattr(config, 'PLAYWRIGHT_EXTRACTION_MODE', 'fragment')
+
+# Same order as COVER_SELECTORS in app/utils/product_page.py
+COVER_CSS_SELECTORS = ['img#landingImage', 'img#imgBlkFront', 'img#ebooksImgBlkFront', 'img#main-image', 'img.a-dynamic-image']
+
+# Longest text kept per section (the rank sections are a few KB)
+MAX_SECTION_CHARS = 20000
+
+# Runs in the page; text is textContent without script/style/template, as BeautifulSoup's get_text sees it
+FRAGMENT_SCRIPT = """
+({rankSelectors, captchaSelectors, coverSelectors, maxChars}) => {
+    const textOf = (element) => {
+        const clone = element.cloneNode(true);
+        clone.querySelectorAll('script, style, template').forEach(node => node.remove());
+        return (clone.textContent || '').slice(0, maxChars);
+    };
+    const sections = [];
+    for (const selector of rankSelectors) {
+        const element = document.querySelector(selector);
+        if (element) sections.push([selector.replace(/^#/, ''), textOf(element)]);
+    }
+    if (!sections.some(([, text]) => /Best\\s*Sellers\\s*Rank/i.test(text))) {
+        // Rank outside the known sections: take the row around the label
+        const label = document.evaluate(
+            "//body//text()[contains(., 'Best Sellers Rank')][not(ancestor::script or ancestor::style)]",
+            document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const row = label && label.parentElement && label.parentElement.closest('li, tr, div');
+        if (row) sections.push(['', textOf(row)]);
+    }
+    let image = null;
+    for (const selector of coverSelectors) {
+        const element = document.querySelector(selector);
+        if (element && element.getAttribute('src')) { image = element.getAttribute('src'); break; }
+    }
+    const title = document.querySelector('span#productTitle');
+    return {
+        title: title ? title.textContent : null,
+        image: image,
+        sections: sections,
+        captcha: captchaSelectors.some(selector => document.querySelector(selector) !== null),
+    };
+}
+"""
+
+
+@dataclass
+class PageFragment:
+    """What the scraper needs from a product page, read in the browser"""
+    title: Optional[str] = None
+    cover_image: Optional[str] = None
+    sections: List[Tuple[str, str]] = field(default_factory=list)  # (element id or '', text)
+    captcha: bool = False
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> 'PageFragment':
+        return cls(
+            title=payload.get('title'),
+            cover_image=payload.get('image'),
+            sections=[(section_id, text) for section_id, text in payload.get('sections') or []],
+            captcha=bool(payload.get('captcha')),
+        )
+
+    def to_html(self) -> str:
+        """The fragment as a small HTML document (same ids as the product page)"""
+        parts = ['<html><body>']
+        if self.title is not None:
+            parts.append(f'<span id="productTitle">{html_lib.escape(self.title)}</span>')
+        if self.cover_image:
+            parts.append(f'<img id="landingImage" src="{html_lib.escape(self.cover_image)}">')
+        for section_id, text in self.sections:
+            id_attr = f' id="{html_lib.escape(section_id)}"' if section_id else ''
+            parts.append(f'<div{id_attr}>{html_lib.escape(text)}</div>')
+        parts.append('</body></html>')
+        return '\n'.join(parts)
+
+    @property
+    def bsr(self) -> Optional[int]:
+        return parse_bsr(self.to_html()) if self.sections else None
+
+
+async def extract_fragment(page) -> PageFragment:
+    """Read the fragment with one page.evaluate"""
+    payload = await page.evaluate(FRAGMENT_SCRIPT, {
+        'rankSelectors': RANK_SELECTORS,
+        'captchaSelectors': CAPTCHA_SELECTORS,
+        'coverSelectors': COVER_CSS_SELECTORS,
+        'maxChars': MAX_SECTION_CHARS,
+    })
+    fragment = PageFragment.from_payload(payload or {})
+    logger.debug(f"Page fragment: {len(fragment.sections)} sections, "
+                 f"{sum(len(text) for _, text in fragment.sections)} chars of text")
+    return fragment
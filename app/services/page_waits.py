@@ -0,0 +1,83 @@
+"""
+Wait strategy for Playwright product page fetches
+- wait_for_rank: returns as soon as the page shows a Best Sellers Rank, a CAPTCHA
+  or the "Continue shopping" interstitial, bounded by a deadline (no fixed sleeps)
+
+The gaps between pages are the adaptive pacing controller's job (adaptive_pacing.py).
+"""
+import logging
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Sections that hold the rank (US detail bullets, UK SalesRank, product details tables)
+RANK_SELECTORS = [
+    '#SalesRank',
+    '#detailBulletsWrapper_feature_div',
+    '#detailBullets_feature_div',
+    '#productDetails_detailBullets_sections1',
+    '#productDetails_db_sections',
+    '#prodDetails',
+]
+
+CAPTCHA_SELECTORS = [
+    'form[action*="validateCaptcha"]',
+    '#captchacharacters',
+]
+
+# Navigation only waits for the document; wait_for_rank takes it from there
+NAVIGATION_WAIT_UNTIL = getattr(config, 'PLAYWRIGHT_WAIT_UNTIL', 'domcontentloaded')
+
+# Longest wait for the rank after navigation (ms)
+RANK_WAIT_MS = getattr(config, 'PLAYWRIGHT_RANK_WAIT_MS', 15000)
+
+# How often the page is checked while waiting (ms)
+RANK_POLL_MS = 250
+
+# Runs in the page; a truthy result ends the wait
+RANK_STATE_SCRIPT = """
+({rankSelectors, captchaSelectors}) => {
+    for (const selector of captchaSelectors) {
+        if (document.querySelector(selector)) return 'captcha';
+    }
+    for (const selector of rankSelectors) {
+        const element = document.querySelector(selector);
+        if (element && /Best\\s*Sellers\\s*Rank[\\s\\S]{0,60}?\\d/i.test(element.textContent || '')) return 'rank';
+    }
+    const text = document.body ? document.body.innerText.toLowerCase() : '';
+    if (text.includes('continue shopping') && text.includes('click the button below to continue')) return 'interstitial';
+    return false;
+}
+"""
+
+
+async def wait_for_rank(page, deadline: float) -> str:
+    """
+    Wait until the page shows what we came for
+
+    Args:
+        page: Playwright page (navigation already started)
+        deadline: time.monotonic() value to give up at
+
+    Returns:
+        'rank', 'captcha', 'interstitial' or 'timeout'
+    """
+    timeout_ms = max((deadline - time.monotonic()) * 1000, 1)
+    start = time.monotonic()
+    try:
+        handle = await page.wait_for_function(
+            RANK_STATE_SCRIPT,
+            arg={'rankSelectors': RANK_SELECTORS, 'captchaSelectors': CAPTCHA_SELECTORS},
+            timeout=timeout_ms,
+            polling=RANK_POLL_MS,
+        )
+        state = await handle.json_value()
+    except Exception as e:
+        # Playwright's TimeoutError, or the page navigated away mid-check
+        logger.debug(f"No rank before deadline: {e}")
+        state = 'timeout'
+    logger.debug(f"Page state '{state}' after {time.monotonic() - start:.2f}s")
+    return state
+
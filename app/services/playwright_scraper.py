@@ -9,6 +9,8 @@ from bs4 import BeautifulSoup
 import re
 
 from app.services.browser_pool import fetch_page
+from app.utils.amazon_urls import clean_amazon_url
+from app.utils.product_page import ProductPageResult, extract_product_page
 
 # Import strict BSR parser
 try:
@@ -140,48 +142,37 @@ async def extract_cover_image_with_playwright(amazon_url: str) -> Optional[str]:
         logger.warning(f"Invalid amazon_url format (not a URL): {amazon_url[:50]}")
         return None
     
-    # Clean URL
-    clean_url = amazon_url.split('/ref')[0].split('?')[0].rstrip('/')
-    if not clean_url.endswith('/'):
-        clean_url += '/'
+    page = await fetch_product_page_with_playwright(amazon_url)
+    if page is None:
+        return None
+    if not page.cover_image:
+        logger.warning("Cover image not found even with Playwright")
+    return page.cover_image
+
+
+async def fetch_product_page_with_playwright(amazon_url: str) -> Optional[ProductPageResult]:
+    """
+    Download a product page with the browser pool and extract every field from it
     
+    Returns:
+        ProductPageResult, or None if the page could not be fetched
+    """
+    clean_url = clean_amazon_url(amazon_url)
     try:
-        logger.debug(f"Fetching page with Playwright for cover image: {clean_url}")
+        logger.debug(f"Fetching page with Playwright: {clean_url}")
         html = await fetch_page(clean_url, timeout=30000, retries=2)
         
         if not html:
             logger.warning("Failed to fetch page with Playwright")
             return None
         
-        # Parse HTML
-        soup = BeautifulSoup(html, 'lxml')
-        
-        # Try multiple selectors for cover image
-        cover_selectors = [
-            {'id': 'landingImage'},
-            {'id': 'imgBlkFront'},
-            {'id': 'main-image'},
-            {'class': 'a-dynamic-image'},
-        ]
-        
-        for selector in cover_selectors:
-            img = soup.find('img', selector)
-            if img and img.get('src'):
-                cover_url = img['src']
-                # Clean up image URL for better quality
-                cover_url = re.sub(r'_SL\d+_', '_SL800_', cover_url)
-                cover_url = re.sub(r'\._AC_[^_]+_', '._AC_SL800_', cover_url)
-                if '_SL' not in cover_url:
-                    cover_url = cover_url.replace('._AC_', '._AC_SL800_')
-                cover_url = re.sub(r'_SX\d+_', '_SX800_', cover_url)
-                logger.debug(f"✓ Cover image extracted with Playwright: {cover_url[:100]}...")
-                return cover_url
-        
-        logger.warning("Cover image not found even with Playwright")
-        return None
+        page = extract_product_page(html)
+        if page.cover_image:
+            logger.debug(f"✓ Cover image extracted with Playwright: {page.cover_image[:100]}...")
+        return page
         
     except Exception as e:
-        logger.error(f"Error extracting cover image with Playwright: {e}", exc_info=True)
+        logger.error(f"Error fetching product page with Playwright: {e}", exc_info=True)
         return None
 
 
@@ -236,3 +227,16 @@ def extract_cover_image_with_playwright_sync(amazon_url: str) -> Optional[str]:
     
     return loop.run_until_complete(extract_cover_image_with_playwright(amazon_url))
 
+
+def fetch_product_page_with_playwright_sync(amazon_url: str) -> Optional[ProductPageResult]:
+    """
+    Synchronous wrapper for fetch_product_page_with_playwright
+    For use in non-async contexts
+    """
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    
+    return loop.run_until_complete(fetch_product_page_with_playwright(amazon_url))
@@ -2,13 +2,15 @@
 Production-ready Playwright scraper with CAPTCHA handling and metrics
 """
 import logging
-import asyncio
+import concurrent.futures
 from typing import Optional, Tuple
 from bs4 import BeautifulSoup
 import re
 
 from app.services.browser_pool_refactored import fetch_page, CaptchaDetected
+from app.services.browser_worker import get_browser_worker
 from app.services.scraper_metrics import get_metrics
+from app.utils.product_page import ProductPageResult, extract_product_page
 
 try:
     from app.utils.bsr_parser import parse_bsr as strict_parse_bsr
@@ -20,18 +22,23 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
-async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], Optional[str]]:
+async def scrape_product_with_playwright(amazon_url: str) -> Tuple[Optional[ProductPageResult], Optional[str]]:
     """
-    Extract BSR using Playwright with production-ready error handling
+    Fetch a product page with Playwright and extract every field from it
+    
+    The rank section fragment the browser pool returns carries the title and
+    cover too, so callers get them without a second fetch.
     
     Args:
         amazon_url: Amazon product URL
         
     Returns:
-        Tuple of (bsr_value, error_reason)
-        - If successful: (bsr_value, None)
+        Tuple of (page, error_reason)
+        - If successful: (page, None)
+        - If the page has no BSR: (page, "bsr_not_found") - the other fields are still usable
         - If CAPTCHA: (None, "captcha")
         - If error: (None, error_reason)
+        A BSR from screenshot OCR comes back as a page with from_html=False (rank only).
     """
     metrics = get_metrics()
     
@@ -45,10 +52,10 @@ async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], O
         # Increased timeout to 60 seconds to account for delays and slow navigation
         html, error_reason, bsr_from_screenshot = await fetch_page(clean_url, timeout=60000)
         
-        # If BSR was extracted from screenshot OCR, return it directly
+        # If BSR was extracted from screenshot OCR, return it directly (no HTML behind it)
         if bsr_from_screenshot:
             logger.info(f"✅ BSR extracted from screenshot OCR: #{bsr_from_screenshot:,}")
-            return bsr_from_screenshot, None
+            return ProductPageResult(bsr=bsr_from_screenshot, from_html=False), None
         
         if error_reason == "captcha":
             # CAPTCHA detected - abort immediately, do not retry
@@ -64,20 +71,10 @@ async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], O
             logger.warning(f"Failed to fetch page: {error_reason}")
             return None, error_reason
         
-        # Extract BSR using strict parser
-        if STRICT_BSR_PARSER_AVAILABLE:
-            bsr = strict_parse_bsr(html)
-            if bsr:
-                logger.info(f"✅ BSR extracted from HTML: #{bsr:,}")
-                return bsr, None
-            else:
-                # Don't log warning if we already tried screenshot OCR
-                logger.debug(f"BSR not found in HTML for {clean_url}")
-                return None, "bsr_not_found"
-        else:
+        page = extract_product_page(html)
+        if not page.bsr and not STRICT_BSR_PARSER_AVAILABLE:
             # Fallback parser
-            soup = BeautifulSoup(html, 'lxml')
-            page_text = soup.get_text()
+            page_text = BeautifulSoup(html, 'lxml').get_text()
             
             patterns = [
                 r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
@@ -90,13 +87,17 @@ async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], O
                     try:
                         bsr_value = int(match.group(1).replace(',', ''))
                         if 1 <= bsr_value < 10000000:
-                            logger.info(f"✅ BSR extracted: #{bsr_value:,}")
-                            return bsr_value, None
+                            page.bsr = bsr_value
+                            break
                     except:
                         continue
-            
-            logger.warning(f"BSR not found for {clean_url}")
-            return None, "bsr_not_found"
+        
+        if page.bsr:
+            logger.info(f"✅ BSR extracted from HTML: #{page.bsr:,}")
+            return page, None
+        # Don't log warning if we already tried screenshot OCR
+        logger.debug(f"BSR not found in HTML for {clean_url}")
+        return page, "bsr_not_found"
     
     except CaptchaDetected:
         logger.warning(f"CAPTCHA detected for {clean_url} - aborting")
@@ -107,60 +108,59 @@ async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], O
         return None, str(e)
 
 
-def extract_bsr_with_playwright_sync(amazon_url: str) -> Optional[int]:
+async def extract_bsr_with_playwright(amazon_url: str) -> Tuple[Optional[int], Optional[str]]:
     """
-    Synchronous wrapper for extract_bsr_with_playwright
-    Returns only BSR value (None if error or CAPTCHA)
+    Extract BSR using Playwright with production-ready error handling
+    
+    Args:
+        amazon_url: Amazon product URL
+        
+    Returns:
+        Tuple of (bsr_value, error_reason)
+        - If successful: (bsr_value, None)
+        - If CAPTCHA: (None, "captcha")
+        - If error: (None, error_reason)
+    """
+    page, error_reason = await scrape_product_with_playwright(amazon_url)
+    return (page.bsr if page else None), error_reason
+
+
+def scrape_product_with_playwright_sync(amazon_url: str) -> Optional[ProductPageResult]:
+    """
+    Synchronous wrapper for scrape_product_with_playwright
+    Returns the page (bsr may be None), or None on CAPTCHA or error
     
-    Uses asyncio.run() to create a fresh event loop for each call,
-    avoiding conflicts with existing event loops.
+    Runs on the persistent browser worker's event loop, so Chromium and the
+    sessions are reused across calls; only the calling thread waits.
     """
+    future = None
     try:
         logger.info(f"Starting BSR extraction for {amazon_url}")
         
-        # Check if we're in an async context (e.g., FastAPI)
-        try:
-            loop = asyncio.get_running_loop()
-            # If we're in an async context, we need to run in a thread
-            import concurrent.futures
-            import threading
-            
-            def run_in_thread():
-                """Run async code in a new thread with its own event loop"""
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                try:
-                    return new_loop.run_until_complete(asyncio.wait_for(
-                        extract_bsr_with_playwright(amazon_url),
-                        timeout=300.0  # 5 minutes (to account for delays + navigation)
-                    ))
-                finally:
-                    new_loop.close()
-            
-            # Run in a thread pool to avoid blocking
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(run_in_thread)
-                bsr, error_reason = future.result(timeout=310.0)  # Slightly longer than async timeout
-            
-        except RuntimeError:
-            # No running event loop - safe to use asyncio.run()
-            bsr, error_reason = asyncio.run(asyncio.wait_for(
-                extract_bsr_with_playwright(amazon_url),
-                timeout=300.0  # 5 minutes (to account for delays + navigation)
-            ))
+        future = get_browser_worker().run(scrape_product_with_playwright(amazon_url))
+        page, error_reason = future.result(timeout=300.0)  # 5 minutes (to account for delays + navigation)
         
         # Check error reason and return appropriate value
         if error_reason == "captcha":
             logger.warning(f"CAPTCHA detected - returning None (reason: {error_reason})")
             return None
         
-        logger.info(f"BSR extraction completed: {bsr}")
-        return bsr
+        logger.info(f"BSR extraction completed: {page.bsr if page else None}")
+        return page
         
-    except asyncio.TimeoutError:
+    except concurrent.futures.TimeoutError:
+        future.cancel()
         logger.error(f"Timeout extracting BSR for {amazon_url} (timeout: 300s)")
         return None
     except Exception as e:
         logger.error(f"Error in synchronous BSR extraction: {e}", exc_info=True)
         return None
 
+
+def extract_bsr_with_playwright_sync(amazon_url: str) -> Optional[int]:
+    """
+    Synchronous wrapper for extract_bsr_with_playwright
+    Returns only BSR value (None if error or CAPTCHA)
+    """
+    page = scrape_product_with_playwright_sync(amazon_url)
+    return page.bsr if page else None
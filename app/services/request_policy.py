@@ -0,0 +1,191 @@
+"""
+Request routing for Playwright contexts
+Decides which sub-resources of an Amazon product page are worth loading; the
+BSR is in the document itself, so images, fonts, video and third-party
+trackers are only bandwidth (and time until networkidle)
+
+Modes:
+  off       - load everything (the control arm of an A/B test)
+  allowlist - stealth-safe: Amazon and its CDNs load exactly as in a real
+              browser (their own bot checks and beacons included), every
+              other host is blocked
+  block     - also block heavy resource types and Amazon's analytics beacons
+"""
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import config
+
+logger = logging.getLogger(__name__)
+
+ROUTING_MODES = ('off', 'allowlist', 'block')
+
+ROUTING_MODE = getattr(config, 'PLAYWRIGHT_ROUTING_MODE', 'off')
+
+# Share of pages that get ROUTING_MODE; the rest run as 'off', so both arms show up in ScraperMetrics
+ROUTING_AB_SPLIT = getattr(config, 'PLAYWRIGHT_ROUTING_AB_SPLIT', 1.0)
+
+# Resource types 'block' mode never loads (the document, scripts and XHR always load)
+BLOCKED_RESOURCE_TYPES = tuple(getattr(config, 'PLAYWRIGHT_BLOCKED_RESOURCE_TYPES', ('image', 'media', 'font')))
+
+# Amazon's own hosts (subdomains included); 'allowlist' loads all of them
+FIRST_PARTY_DOMAINS = (
+    'amazon.com', 'amazon.co.uk',
+    'media-amazon.com', 'ssl-images-amazon.com', 'images-amazon.com', 'amazon-adsystem.com',
+)
+
+# Analytics, ads and beacons; always blocked in 'block' mode (first-party ones included)
+TRACKER_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'facebook.net', 'facebook.com', 'scorecardresearch.com', 'adnxs.com', 'criteo.com',
+    'amazon-adsystem.com', 'fls-na.amazon.com', 'fls-eu.amazon.co.uk', 'unagi.amazon.com', 'unagi-na.amazon.com',
+)
+
+# Typical transfer size per resource type, used to estimate what a blocked request would have cost;
+# replaced by the sizes of loaded responses as pages come in
+DEFAULT_RESOURCE_BYTES = {
+    'image': 40000, 'media': 500000, 'font': 60000, 'stylesheet': 30000,
+    'script': 50000, 'xhr': 5000, 'fetch': 5000, 'other': 5000,
+}
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+@dataclass
+class PageTraffic:
+    """Requests of one page under its routing mode"""
+    mode: str
+    requests: int = 0
+    blocked: int = 0
+    bytes_loaded: int = 0  # From Content-Length of loaded responses
+    bytes_saved: int = 0   # Estimated size of the blocked requests
+
+
+class RequestPolicy:
+    """
+    Context-level routing policy
+
+    attach(context) installs one route for the whole context; each page is
+    assigned a mode when it opens (track(page)), so one context can serve both
+    arms of an A/B test. Note that Chromium skips its HTTP cache for routed
+    contexts, so 'off' pages of an attached context are the fair comparison.
+    """
+
+    def __init__(self, mode: Optional[str] = None, ab_split: Optional[float] = None,
+                 blocked_types: Iterable[str] = None, first_party: Iterable[str] = None,
+                 trackers: Iterable[str] = None):
+        self.mode = mode or ROUTING_MODE
+        if self.mode not in ROUTING_MODES:
+            raise ValueError(f"Unknown routing mode {self.mode!r} (expected one of {ROUTING_MODES})")
+        self.ab_split = ROUTING_AB_SPLIT if ab_split is None else ab_split
+        self.blocked_types = tuple(blocked_types or BLOCKED_RESOURCE_TYPES)
+        self.first_party = tuple(first_party or FIRST_PARTY_DOMAINS)
+        self.trackers = tuple(trackers or TRACKER_DOMAINS)
+        self._pages: Dict[object, PageTraffic] = {}
+        self._avg_bytes = dict(DEFAULT_RESOURCE_BYTES)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off' and self.ab_split > 0
+
+    def decide(self, url: str, resource_type: str, mode: Optional[str] = None) -> Optional[str]:
+        """
+        Why a request should be blocked under a mode
+
+        Returns:
+            Block reason ('tracker', 'third_party' or the resource type), or None to load it
+        """
+        mode = mode or self.mode
+        if mode == 'off' or resource_type == 'document':
+            return None
+        host = (urlsplit(url).hostname or '').lower()
+        if not host:
+            return None  # data: and blob: URLs never leave the browser
+
+        first_party = _host_matches(host, self.first_party)
+        if mode == 'allowlist':
+            return None if first_party else 'third_party'
+
+        if _host_matches(host, self.trackers):
+            return 'tracker'
+        if resource_type in self.blocked_types:
+            return resource_type
+        return None if first_party else 'third_party'
+
+    async def attach(self, context):
+        """Route every request of the context through this policy (no-op when routing is off)"""
+        if not self.enabled:
+            return
+        await context.route('**/*', self._handle)
+        logger.info(f"Request routing on: mode={self.mode}, A/B split={self.ab_split:.0%}")
+
+    def track(self, page) -> PageTraffic:
+        """Assign a routing mode to a new page and start counting its traffic"""
+        mode = self.mode if self.enabled and random.random() < self.ab_split else 'off'
+        traffic = PageTraffic(mode=mode)
+        with self._lock:
+            self._pages[page] = traffic
+        page.on('response', lambda response: self._record_response(traffic, response))
+        return traffic
+
+    def release(self, page) -> Optional[PageTraffic]:
+        """Stop tracking a page (call when it closes); returns its traffic"""
+        with self._lock:
+            return self._pages.pop(page, None)
+
+    def estimated_bytes(self, resource_type: str) -> int:
+        return self._avg_bytes.get(resource_type, DEFAULT_RESOURCE_BYTES['other'])
+
+    def _record_response(self, traffic: PageTraffic, response):
+        traffic.requests += 1
+        try:
+            size = int(response.headers.get('content-length') or 0)
+        except (TypeError, ValueError):
+            size = 0
+        if size <= 0:
+            return
+        traffic.bytes_loaded += size
+        resource_type = response.request.resource_type
+        with self._lock:
+            average = self._avg_bytes.get(resource_type, DEFAULT_RESOURCE_BYTES['other'])
+            self._avg_bytes[resource_type] = int(0.9 * average + 0.1 * size)
+
+    async def _handle(self, route):
+        request = route.request
+        try:
+            page = request.frame.page
+        except Exception:
+            page = None  # Service worker requests have no frame
+        with self._lock:
+            traffic = self._pages.get(page)
+
+        reason = self.decide(request.url, request.resource_type, traffic.mode if traffic else None)
+        if reason is None:
+            await route.continue_()
+            return
+        if traffic:
+            traffic.requests += 1
+            traffic.blocked += 1
+            traffic.bytes_saved += self.estimated_bytes(request.resource_type)
+        logger.debug(f"Blocked {request.resource_type} ({reason}): {request.url[:100]}")
+        await route.abort('blockedbyclient')
+
+
+_policy: Optional[RequestPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_request_policy() -> RequestPolicy:
+    """Process-wide routing policy from config"""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = RequestPolicy()
+        return _policy
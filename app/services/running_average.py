@@ -0,0 +1,48 @@
+"""
+Running average of a date row, maintained as BSR values are written
+Kept in the process of the update run: one task writes the row and averages it
+"""
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RunningAverage:
+    """
+    Average of one worksheet date row, updated with each BSR write
+
+    Seeded from the values already in the row (taken from the loaded snapshot),
+    then every write replaces the book's cell in the sum, so the final average
+    needs no read of the sheet.
+    """
+
+    def __init__(self, worksheet_name: str, row: int, avg_col: Optional[int]):
+        self.worksheet_name = worksheet_name
+        self.row = row
+        self.avg_col = avg_col
+        self._cells: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def seed(self, cells: Dict[int, int]):
+        """Add the row's existing values without replacing cells already tracked"""
+        with self._lock:
+            for col, bsr in cells.items():
+                self._cells.setdefault(col, bsr)
+
+    def add(self, col: int, bsr: int) -> Tuple[float, int]:
+        """Record a book's BSR for this row; returns (sum, count)"""
+        with self._lock:
+            self._cells[col] = bsr
+            return float(sum(self._cells.values())), len(self._cells)
+
+    def average(self) -> Optional[float]:
+        """Current average, or None if no book has a value"""
+        with self._lock:
+            return sum(self._cells.values()) / len(self._cells) if self._cells else None
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return len(self._cells)
@@ -1,15 +1,19 @@
 """
 Metrics tracking for Amazon scraper
 Tracks success rate, CAPTCHA rate, retry rate, and scrape times
+(plus recent outcomes per pacing key, for the adaptive pacing controller)
 """
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 from threading import Lock
 from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Recent outcomes kept per pacing key (domain:egress) for the windowed rates
+OUTCOME_HISTORY = 1000
+
 
 class ScraperMetrics:
     """Thread-safe metrics tracker for scraper performance"""
@@ -28,10 +32,14 @@ class ScraperMetrics:
         self.retries = 0
         self.scrape_times = []  # List of scrape durations in seconds
         self.error_reasons = defaultdict(int)  # Error reason -> count
+        # Per A/B variant (e.g. request routing mode): requests, outcomes and page traffic
+        self.variants = defaultdict(lambda: defaultdict(int))
+        # Per pacing key: (timestamp, outcome) of the latest pages
+        self.outcomes = defaultdict(lambda: deque(maxlen=OUTCOME_HISTORY))
     
     def record_request(self, duration: float, success: bool, 
                       captcha: bool = False, retried: bool = False,
-                      error_reason: Optional[str] = None):
+                      error_reason: Optional[str] = None, variant: Optional[str] = None):
         """
         Record a scraping request
         
@@ -41,8 +49,15 @@ class ScraperMetrics:
             captcha: Whether CAPTCHA was detected
             retried: Whether this was a retry attempt
             error_reason: Reason for failure if not successful
+            variant: A/B variant the request ran under (counted separately as well)
         """
         with self._lock:
+            if variant:
+                counts = self.variants[variant]
+                counts['requests'] += 1
+                counts['successes'] += int(success)
+                counts['captchas'] += int(captcha and not success)
+
             self.total_requests += 1
             self.scrape_times.append(duration)
             
@@ -63,6 +78,53 @@ class ScraperMetrics:
             if retried:
                 self.retries += 1
     
+    def record_traffic(self, variant: str, requests: int, blocked: int, bytes_loaded: int, bytes_saved: int):
+        """Record the network traffic of one page fetched under a variant"""
+        with self._lock:
+            counts = self.variants[variant]
+            counts['pages'] += 1
+            counts['page_requests'] += requests
+            counts['blocked_requests'] += blocked
+            counts['bytes_loaded'] += bytes_loaded
+            counts['bytes_saved'] += bytes_saved
+    
+    def record_outcome(self, key: str, outcome: str, now: Optional[float] = None):
+        """Record a page outcome ('success', 'captcha', 'server_error', 'error') under a pacing key"""
+        with self._lock:
+            self.outcomes[key].append((time.time() if now is None else now, outcome))
+    
+    def window_rates(self, key: str, window: float, now: Optional[float] = None) -> Dict:
+        """Outcome rates of a pacing key over the last `window` seconds"""
+        now = time.time() if now is None else now
+        with self._lock:
+            recent = [outcome for ts, outcome in self.outcomes.get(key, ()) if now - ts <= window]
+        requests = len(recent)
+        
+        def rate(outcome):
+            return recent.count(outcome) / requests if requests else 0.0
+        
+        return {
+            'requests': requests,
+            'success_rate': rate('success'),
+            'captcha_rate': rate('captcha'),
+            'server_error_rate': rate('server_error'),
+        }
+    
+    def _variant_stats(self) -> Dict:
+        stats = {}
+        for variant, counts in self.variants.items():
+            requests, pages = counts['requests'], counts['pages']
+            stats[variant] = {
+                'requests': requests,
+                'success_rate': counts['successes'] / requests if requests else 0.0,
+                'captcha_rate': counts['captchas'] / requests if requests else 0.0,
+                'pages': pages,
+                'avg_blocked_requests': counts['blocked_requests'] / pages if pages else 0.0,
+                'avg_bytes_loaded': counts['bytes_loaded'] / pages if pages else 0.0,
+                'avg_bytes_saved': counts['bytes_saved'] / pages if pages else 0.0,
+            }
+        return stats
+    
     def get_stats(self) -> Dict:
         """Get current statistics"""
         with self._lock:
@@ -74,7 +136,8 @@ class ScraperMetrics:
                     'retry_rate': 0.0,
                     'avg_scrape_time': 0.0,
                     'network_error_rate': 0.0,
-                    'error_reasons': {}
+                    'error_reasons': {},
+                    'variants': self._variant_stats()
                 }
             
             avg_time = sum(self.scrape_times) / len(self.scrape_times) if self.scrape_times else 0.0
@@ -91,7 +154,8 @@ class ScraperMetrics:
                 'network_errors': self.network_errors,
                 'other_errors': self.other_errors,
                 'retries': self.retries,
-                'error_reasons': dict(self.error_reasons)
+                'error_reasons': dict(self.error_reasons),
+                'variants': self._variant_stats()
             }
     
     def log_stats(self):
@@ -110,6 +174,10 @@ class ScraperMetrics:
             logger.info("Error Reasons:")
             for reason, count in stats['error_reasons'].items():
                 logger.info(f"  - {reason}: {count}")
+        for variant, variant_stats in stats['variants'].items():
+            logger.info(f"Variant {variant}: {variant_stats['requests']} requests, "
+                        f"success {variant_stats['success_rate']:.1%}, CAPTCHA {variant_stats['captcha_rate']:.1%}, "
+                        f"{variant_stats['avg_bytes_saved'] / 1024:.0f} KB saved per page")
         logger.info("=" * 60)
     
     def reset(self):
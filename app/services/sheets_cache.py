@@ -24,6 +24,9 @@ class WorksheetMetadata:
     max_cols: int
     headers: List[str]
     avg_col: Optional[int] = None  # Column index (1-based) for average
+    sheet_id: Optional[int] = None  # gid of the worksheet
+    grid_rows: Optional[int] = None  # Grid size (rows/columns allocated, not used)
+    grid_cols: Optional[int] = None
 
 
 def get_metadata_cache_key(worksheet_name: str) -> str:
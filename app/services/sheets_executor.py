@@ -0,0 +1,94 @@
+"""
+Bounded executor for blocking Google Sheets calls
+Async handlers await run_sheets() so gspread never runs on the event loop
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Threads running Sheets calls per process (the concurrency cap; extra calls queue)
+SHEETS_EXECUTOR_WORKERS = getattr(config, 'SHEETS_EXECUTOR_WORKERS', 4)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stats = {'submitted': 0, 'started': 0, 'completed': 0, 'failed': 0, 'max_running': 0}
+_stats_lock = threading.Lock()
+
+
+def get_sheets_executor() -> ThreadPoolExecutor:
+    """Lazy initialization of the Sheets executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SHEETS_EXECUTOR_WORKERS, thread_name_prefix='sheets')
+            logger.info(f"Sheets executor started with {SHEETS_EXECUTOR_WORKERS} workers")
+        return _executor
+
+
+def _tracked(call: Callable[[], T]) -> T:
+    """Run one call on a worker thread, keeping the running/queued counters"""
+    with _stats_lock:
+        _stats['started'] += 1
+        running = _stats['started'] - _stats['completed'] - _stats['failed']
+        _stats['max_running'] = max(_stats['max_running'], running)
+    try:
+        result = call()
+    except Exception:
+        with _stats_lock:
+            _stats['failed'] += 1
+        raise
+    with _stats_lock:
+        _stats['completed'] += 1
+    return result
+
+
+async def run_sheets(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Await a blocking Sheets call on the bounded executor
+
+    Args:
+        func: Blocking callable (usually a GoogleSheetsManager method)
+        *args, **kwargs: Passed to func
+
+    Returns:
+        Whatever func returns (exceptions propagate to the caller)
+    """
+    loop = asyncio.get_running_loop()
+    with _stats_lock:
+        _stats['submitted'] += 1
+    return await loop.run_in_executor(
+        get_sheets_executor(), _tracked, functools.partial(func, *args, **kwargs)
+    )
+
+
+def get_executor_stats() -> Dict[str, int]:
+    """Counters for monitoring: calls running now, waiting for a worker, done, failed"""
+    with _stats_lock:
+        finished = _stats['completed'] + _stats['failed']
+        return {
+            'workers': SHEETS_EXECUTOR_WORKERS,
+            'running': _stats['started'] - finished,
+            'queued': _stats['submitted'] - _stats['started'],
+            'completed': _stats['completed'],
+            'failed': _stats['failed'],
+            'max_running': _stats['max_running'],
+        }
+
+
+def shutdown_sheets_executor(wait: bool = True):
+    """Stop the executor (application shutdown); a later run_sheets() starts a new one"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+        logger.info("Sheets executor shut down")
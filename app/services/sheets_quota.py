@@ -0,0 +1,309 @@
+"""
+Shared Google Sheets API rate governor
+Read and write token buckets in Redis, shared by every process that uses GoogleSheetsManager
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+import config
+from app.services.redis_cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Sheets API requests allowed per minute (keep below the project's per-user quota)
+READ_QUOTA_PER_MINUTE = getattr(config, 'SHEETS_READ_QUOTA_PER_MINUTE', 50)
+WRITE_QUOTA_PER_MINUTE = getattr(config, 'SHEETS_WRITE_QUOTA_PER_MINUTE', 50)
+
+# Requests that may be sent back to back before the per-minute rate applies
+QUOTA_BURST = getattr(config, 'SHEETS_QUOTA_BURST', 10)
+
+# Share of each bucket kept for interactive requests (batch jobs wait once the bucket drops below it)
+BATCH_RESERVE = getattr(config, 'SHEETS_QUOTA_BATCH_RESERVE', 0.3)
+
+# Longest a request waits for a token before giving up (seconds)
+QUOTA_MAX_WAIT = getattr(config, 'SHEETS_QUOTA_MAX_WAIT', 300)
+
+QUOTA_KEY_PREFIX = 'sheets_quota'
+
+# Priority classes
+PRIORITY_INTERACTIVE = 'interactive'  # Dashboard/API reads
+PRIORITY_BATCH = 'batch'              # Celery tasks and maintenance scripts
+
+# Priority of the current context; None means the process default
+_priority: ContextVar[Optional[str]] = ContextVar('sheets_priority', default=None)
+_default_priority = getattr(config, 'SHEETS_DEFAULT_PRIORITY', PRIORITY_INTERACTIVE)
+
+# Token bucket in one atomic step; the Redis clock keeps all hosts in agreement.
+# Returns {seconds to wait (0 = granted), tokens left}; cost 0 only reports the level.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local floor = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens - cost >= floor then
+    tokens = tokens - cost
+else
+    wait = (floor + cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {tostring(wait), tostring(tokens)}
+"""
+
+
+class QuotaWaitTimeout(Exception):
+    """Raised when a request waited QUOTA_MAX_WAIT seconds without getting a token"""
+
+
+def set_default_priority(priority: str):
+    """Priority for Sheets requests of this process that don't set one (e.g. batch for Celery workers)"""
+    global _default_priority
+    _default_priority = priority
+
+
+def current_priority() -> str:
+    return _priority.get() or _default_priority
+
+
+@contextmanager
+def sheets_priority(priority: str):
+    """Run the Sheets requests of a block with the given priority class"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class LocalTokenBucket:
+    """In-process token bucket (used when Redis is unavailable)"""
+
+    def __init__(self, name: str, capacity: float, rate: float):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, floor: float = 0.0, cost: float = 1.0):
+        """(seconds to wait, tokens left); a wait of 0 means the token was granted"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            if self._tokens - cost >= floor:
+                self._tokens -= cost
+                return 0.0, self._tokens
+            return (floor + cost - self._tokens) / self.rate, self._tokens
+
+
+class RedisTokenBucket:
+    """Token bucket shared by all processes through one Redis hash"""
+
+    def __init__(self, name: str, capacity: float, rate: float, redis_client):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+        self.key = f"{QUOTA_KEY_PREFIX}:{name}"
+        self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, floor: float = 0.0, cost: float = 1.0):
+        wait, tokens = self._script(keys=[self.key], args=[self.capacity, self.rate, floor, cost])
+        return float(wait), float(tokens)
+
+
+class _InflightRead:
+    """A read being sent; identical reads wait for its result instead of spending quota"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SheetsQuotaGovernor:
+    """
+    Rate governor for gspread traffic
+
+    GET requests use the read bucket, everything else the write bucket. Batch
+    requests leave BATCH_RESERVE of each bucket to interactive ones, so the
+    dashboard keeps working while a Celery run or a script uses up the quota.
+    Identical GET requests in flight at the same time are sent once.
+    """
+
+    def __init__(self, buckets: Dict[str, Any], fallback: Optional[Dict[str, LocalTokenBucket]] = None):
+        self.buckets = buckets
+        self._fallback = fallback or {}
+        self._inflight: Dict[tuple, _InflightRead] = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {
+            kind: {'granted': 0, 'waited': 0, 'wait_seconds': 0.0, 'timeouts': 0,
+                   PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 0}
+            for kind in buckets
+        }
+        self._coalesced = 0
+
+    def _take(self, kind: str, floor: float):
+        bucket = self.buckets[kind]
+        try:
+            return bucket.take(floor)
+        except Exception as e:
+            if kind not in self._fallback:
+                raise
+            logger.warning(f"Sheets quota bucket {bucket.name} unavailable, using local bucket: {e}")
+            return self._fallback[kind].take(floor)
+
+    def acquire(self, kind: str, priority: Optional[str] = None):
+        """
+        Block until the bucket for kind ('read' or 'write') grants a token
+
+        Raises:
+            QuotaWaitTimeout: No token within QUOTA_MAX_WAIT seconds
+        """
+        priority = priority or current_priority()
+        bucket = self.buckets[kind]
+        floor = bucket.capacity * BATCH_RESERVE if priority == PRIORITY_BATCH else 0.0
+        start = time.monotonic()
+        while True:
+            wait, _ = self._take(kind, floor)
+            if wait <= 0:
+                break
+            waited = time.monotonic() - start
+            if waited + wait > QUOTA_MAX_WAIT:
+                with self._stats_lock:
+                    self._stats[kind]['timeouts'] += 1
+                raise QuotaWaitTimeout(f"No Sheets {kind} quota for {waited:.0f}s ({priority})")
+            # Short sleeps with jitter so waiting processes don't wake in lockstep
+            time.sleep(min(wait, 1.0) * random.uniform(1.0, 1.2))
+
+        waited = time.monotonic() - start
+        with self._stats_lock:
+            stats = self._stats[kind]
+            stats['granted'] += 1
+            stats[priority] = stats.get(priority, 0) + 1
+            if waited > 0.001:
+                stats['waited'] += 1
+                stats['wait_seconds'] += waited
+
+    def wrap(self, request: Callable) -> Callable:
+        """Wrap gspread's Client.request(method, endpoint, params=..., ...) with the governor"""
+
+        def governed_request(method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+            def send():
+                return request(method, endpoint, params=params, data=data, json=json, files=files, headers=headers)
+
+            if method.lower() != 'get':
+                self.acquire('write')
+                return send()
+            key = (endpoint, _freeze(params))
+            return self._coalesced_read(key, send)
+
+        return governed_request
+
+    def _coalesced_read(self, key: tuple, send: Callable):
+        with self._inflight_lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = _InflightRead()
+
+        if not leader:
+            inflight.done.wait()
+            with self._stats_lock:
+                self._coalesced += 1
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            self.acquire('read')
+            inflight.result = send()
+            return inflight.result
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+    def install(self, client):
+        """Send all requests of a gspread client through the governor"""
+        client.request = self.wrap(client.request)
+        return client
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Quota headroom (tokens left / burst size) and counters per bucket"""
+        result: Dict[str, Any] = {'coalesced_reads': self._coalesced, 'buckets': {}}
+        for kind, bucket in self.buckets.items():
+            try:
+                _, tokens = self._take_level(kind)
+            except Exception as e:
+                logger.debug(f"Could not read Sheets quota level for {kind}: {e}")
+                tokens = None
+            with self._stats_lock:
+                stats = dict(self._stats[kind])
+            stats.update({
+                'backend': 'redis' if isinstance(bucket, RedisTokenBucket) else 'local',
+                'per_minute': round(bucket.rate * 60, 2),
+                'burst': bucket.capacity,
+                'tokens': round(tokens, 2) if tokens is not None else None,
+                'headroom': round(tokens / bucket.capacity, 3) if tokens is not None else None,
+                'wait_seconds': round(stats['wait_seconds'], 2),
+            })
+            result['buckets'][kind] = stats
+        return result
+
+    def _take_level(self, kind: str):
+        return self.buckets[kind].take(0.0, cost=0.0)
+
+
+def _freeze(params) -> tuple:
+    """Hashable form of request params (dicts, lists of pairs or None)"""
+    if not params:
+        return ()
+    items = params.items() if isinstance(params, dict) else params
+    return tuple(sorted((str(k), str(v)) for k, v in items))
+
+
+def _make_buckets(redis_client) -> Dict[str, Any]:
+    quotas = {'read': READ_QUOTA_PER_MINUTE, 'write': WRITE_QUOTA_PER_MINUTE}
+    if redis_client is None:
+        return {kind: LocalTokenBucket(kind, QUOTA_BURST, quota / 60.0) for kind, quota in quotas.items()}
+    return {kind: RedisTokenBucket(kind, QUOTA_BURST, quota / 60.0, redis_client) for kind, quota in quotas.items()}
+
+
+# Singleton instance
+_governor: Optional[SheetsQuotaGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_quota_governor() -> SheetsQuotaGovernor:
+    """Lazy initialization of the governor (Redis buckets, per-process buckets without Redis)"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            redis_client = get_redis_client()
+            if redis_client is None:
+                logger.warning("Redis unavailable: Sheets quota is enforced per process only")
+            _governor = SheetsQuotaGovernor(_make_buckets(redis_client), fallback=_make_buckets(None))
+        return _governor
+
+
+def get_quota_stats() -> Dict[str, Any]:
+    """Quota headroom and counters of this process's governor"""
+    return get_quota_governor().get_stats()
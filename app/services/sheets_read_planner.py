@@ -0,0 +1,75 @@
+"""
+Google Sheets read planner
+Turns a read request into the smallest set of A1 ranges for one values_batch_get call
+"""
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from gspread.utils import rowcol_to_a1
+
+from app.services.sheets_cache import WorksheetMetadata
+from app.utils.date_utils import HEADER_ROWS, FIRST_DATE_ROW
+
+logger = logging.getLogger(__name__)
+
+# Date rows re-read before the last known row when looking for today's row.
+# Ranges are open-ended, so rows appended since the metadata was cached are included.
+TAIL_ROWS = 3
+
+
+def column_letter(col: int) -> str:
+    """Column letter(s) for a 1-based column index (1 -> A, 27 -> AA)"""
+    return rowcol_to_a1(1, col)[:-1]
+
+
+@dataclass
+class ReadPlan:
+    """A1 ranges (without the sheet name) fetched together in one values_batch_get"""
+    kind: str
+    ranges: List[str]
+    start_row: int = 1  # First worksheet row covered by the first range
+
+
+def plan_header() -> ReadPlan:
+    """
+    Rows 1-4 only (titles, authors, links, categories)
+
+    Whole rows are read so book columns added since the last read are included.
+    """
+    return ReadPlan('header', [f"1:{HEADER_ROWS}"])
+
+
+def plan_avg_column(metadata: WorksheetMetadata) -> ReadPlan:
+    """Date column plus the AVG column, date rows only"""
+    if not metadata.avg_col:
+        raise ValueError(f"No AVG column known for {metadata.worksheet_name}")
+    avg = column_letter(metadata.avg_col)
+    return ReadPlan('avg', [f"A{FIRST_DATE_ROW}:A", f"{avg}{FIRST_DATE_ROW}:{avg}"], start_row=FIRST_DATE_ROW)
+
+
+def plan_tail_dates(metadata: Optional[WorksheetMetadata] = None, tail_rows: int = TAIL_ROWS) -> ReadPlan:
+    """
+    Date column from a few rows before the last known date row to the end
+
+    Without a known row count the whole date column is read (still one column).
+    """
+    start_row = FIRST_DATE_ROW
+    if metadata and metadata.max_rows:
+        start_row = max(FIRST_DATE_ROW, metadata.max_rows - tail_rows + 1)
+    return ReadPlan('tail', [f"A{start_row}:A"], start_row=start_row)
+
+
+def plan_row(row: int) -> ReadPlan:
+    """A single worksheet row (whole row, like the header)"""
+    return ReadPlan('row', [f"{row}:{row}"], start_row=row)
+
+
+def plan_sync_tail(start_row: int, window: int) -> ReadPlan:
+    """
+    Header rows plus a block of full rows starting at start_row (incremental sync)
+
+    Whole rows are read so columns added since the last sync are included.
+    """
+    start_row = max(start_row, FIRST_DATE_ROW)
+    return ReadPlan('sync', [f"1:{HEADER_ROWS}", f"{start_row}:{start_row + window - 1}"], start_row=start_row)
@@ -4,12 +4,24 @@ Google Sheets service layer
 import logging
 from typing import List, Dict, Optional
 from google_sheets_transposed import GoogleSheetsManager
+from app.services.history_store import WorksheetHistoryStore, get_history_store
+from app.services.sheets_sync import SheetsSyncEngine
+from app.services.observation_store import ObservationStore, get_observation_store
+from app.services.sheets_executor import run_sheets
+from app.services.sheets_quota import sheets_priority, PRIORITY_BATCH
 import config
 
 logger = logging.getLogger(__name__)
 
-# Singleton instance
+# Serve history reads from the local store kept in sync with the worksheet
+SYNC_ENABLED = getattr(config, 'SHEETS_SYNC_ENABLED', True)
+
+# Serve /api/books, /api/rankings and /api/chart-data from the SQLite observation store
+OBSERVATION_STORE_ENABLED = getattr(config, 'OBSERVATION_STORE_ENABLED', True)
+
+# Singleton instances
 _sheets_manager: Optional[GoogleSheetsManager] = None
+_sync_engine: Optional[SheetsSyncEngine] = None
 
 
 def get_sheets_manager() -> GoogleSheetsManager:
@@ -23,14 +35,96 @@ def get_sheets_manager() -> GoogleSheetsManager:
     return _sheets_manager
 
 
+def get_sync_engine() -> SheetsSyncEngine:
+    """Lazy initialization of the history sync engine"""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = SheetsSyncEngine(
+            get_sheets_manager,
+            observation_store=get_observation_store() if OBSERVATION_STORE_ENABLED else None
+        )
+    return _sync_engine
+
+
+def _get_synced_store(worksheet_name: str) -> Optional[WorksheetHistoryStore]:
+    """
+    Sync the local history store (tail only, at most every SHEETS_SYNC_INTERVAL)
+    
+    Returns:
+        The store, or None if sync is disabled or nothing has been synced yet
+    """
+    if not SYNC_ENABLED:
+        return None
+    try:
+        get_sync_engine().sync(worksheet_name)
+    except Exception as e:
+        logger.warning(f"History sync failed for {worksheet_name}, serving last synced data: {e}")
+    store = get_history_store(worksheet_name)
+    return store if store.has_data() else None
+
+
+def _get_observation_store(worksheet_name: str) -> Optional[ObservationStore]:
+    """
+    Observation store for the API read path (after the usual tail sync)
+
+    Returns:
+        The store, or None if it is disabled or holds nothing for this worksheet yet
+    """
+    if not OBSERVATION_STORE_ENABLED or _get_synced_store(worksheet_name) is None:
+        return None
+    try:
+        store = get_observation_store()
+        return store if store.has_worksheet(worksheet_name) else None
+    except Exception as e:
+        logger.warning(f"Observation store unavailable for {worksheet_name}: {e}")
+        return None
+
+
+def reconcile_all_worksheets():
+    """Full reconciliation of every worksheet store (picks up edits made by hand)"""
+    with sheets_priority(PRIORITY_BATCH):
+        manager = get_sheets_manager()
+        for worksheet_name in manager.get_all_worksheets():
+            try:
+                get_sync_engine().sync(worksheet_name, full=True)
+            except Exception as e:
+                logger.error(f"Error reconciling history for {worksheet_name}: {e}", exc_info=True)
+
+
+def invalidate_worksheet_cache():
+    """Drop the manager's cached reads and worksheet handles if it was ever created"""
+    if _sheets_manager is not None:
+        _sheets_manager.invalidate_snapshot()
+
+
+def flush_pending_updates():
+    """Flush buffered sheet writes if the manager was ever created (used on shutdown)"""
+    if _sheets_manager is None:
+        return
+    try:
+        _sheets_manager.flush_batch_updates()
+    except Exception as e:
+        logger.error(f"Error flushing pending sheet updates: {e}", exc_info=True)
+
+
 async def get_all_worksheets() -> List[str]:
     """Get all worksheet names"""
-    manager = get_sheets_manager()
-    return manager.get_all_worksheets()
+    return await run_sheets(lambda: get_sheets_manager().get_all_worksheets())
 
 
 async def get_books_for_worksheet(worksheet_name: str) -> List[Dict]:
-    """Get all books for a specific worksheet"""
+    """Get all books for a specific worksheet (off the event loop)"""
+    return await run_sheets(load_books_for_worksheet, worksheet_name)
+
+
+def load_books_for_worksheet(worksheet_name: str) -> List[Dict]:
+    """Get all books for a specific worksheet (from the local stores when available; blocking)"""
+    observations = _get_observation_store(worksheet_name)
+    if observations is not None:
+        return observations.get_books_history(worksheet_name)
+    store = _get_synced_store(worksheet_name)
+    if store is not None:
+        return store.get_matrix().books_history()
     manager = get_sheets_manager()
     return manager.get_bsr_history(worksheet_name=worksheet_name)
 
@@ -46,7 +140,18 @@ async def get_default_worksheet() -> str:
 
 
 async def get_avg_history_for_worksheet(worksheet_name: str) -> List[Dict]:
-    """Get average BSR history for a worksheet"""
+    """Get average BSR history for a worksheet (off the event loop)"""
+    return await run_sheets(load_avg_history_for_worksheet, worksheet_name)
+
+
+def load_avg_history_for_worksheet(worksheet_name: str) -> List[Dict]:
+    """Get average BSR history for a worksheet (from the local stores when available; blocking)"""
+    observations = _get_observation_store(worksheet_name)
+    if observations is not None:
+        return observations.get_avg_history(worksheet_name)
+    store = _get_synced_store(worksheet_name)
+    if store is not None:
+        return store.get_matrix().avg_history()
     manager = get_sheets_manager()
     return manager.get_avg_history(worksheet_name=worksheet_name)
 
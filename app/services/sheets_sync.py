@@ -0,0 +1,183 @@
+"""
+Incremental sync of worksheet history into the local history store
+Each sync fetches only the tail of the worksheet; a periodic full read reconciles hand edits
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import config
+from app.services.history_store import (
+    WorksheetHistoryStore, get_history_store,
+    RECORD_HEADER, RECORD_ROW, RECORD_TRUNCATE, RECORD_SYNC
+)
+from app.utils.date_utils import HEADER_ROWS, FIRST_DATE_ROW
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two tail syncs of the same worksheet
+SYNC_INTERVAL = getattr(config, 'SHEETS_SYNC_INTERVAL', 60)
+
+# Rows before the last synced row that are re-read on every tail sync
+# (today's row keeps filling in after it was first synced)
+SYNC_OVERLAP_ROWS = getattr(config, 'SHEETS_SYNC_OVERLAP_ROWS', 2)
+
+# Rows fetched per tail read; reads go on until a window comes back empty
+SYNC_WINDOW_ROWS = getattr(config, 'SHEETS_SYNC_WINDOW_ROWS', 500)
+
+# Seconds between full reconciliations (catch edits made by hand anywhere in the sheet)
+RECONCILE_INTERVAL = getattr(config, 'SHEETS_RECONCILE_INTERVAL', 6 * 3600)
+
+
+@dataclass
+class SyncResult:
+    """Outcome of one worksheet sync"""
+    worksheet_name: str
+    mode: str  # 'tail', 'full' or 'skipped'
+    rows_fetched: int = 0
+    rows_changed: int = 0
+    last_row: int = 0
+    elapsed: float = 0.0
+
+
+def _trim(row: List[str]) -> List[str]:
+    """Drop trailing empty cells (the API omits them, get_all_values pads them)"""
+    end = len(row)
+    while end and row[end - 1] == '':
+        end -= 1
+    return list(row[:end])
+
+
+def _normalize_header(rows: List[List[str]]) -> List[List[str]]:
+    header = [_trim(row) for row in rows[:HEADER_ROWS]]
+    return header + [[] for _ in range(HEADER_ROWS - len(header))]
+
+
+class SheetsSyncEngine:
+    """
+    Keeps the local history store in step with Google Sheets
+
+    Args:
+        get_manager: Returns the GoogleSheetsManager to read from
+        observation_store: Optional ObservationStore that receives every change
+    """
+
+    def __init__(self, get_manager: Callable, observation_store=None):
+        self._get_manager = get_manager
+        self._observation_store = observation_store
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, worksheet_name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(worksheet_name, threading.Lock())
+
+    def sync(self, worksheet_name: str, force: bool = False, full: bool = False) -> SyncResult:
+        """
+        Bring the store for a worksheet up to date
+
+        Args:
+            worksheet_name: Name of the worksheet
+            force: Sync even if the last sync is younger than SYNC_INTERVAL
+            full: Re-read the whole worksheet (reconciliation)
+
+        Returns:
+            SyncResult
+        """
+        store = get_history_store(worksheet_name)
+        with self._lock_for(worksheet_name):
+            store.refresh()
+            now = time.time()
+            if not store.has_data() or now - store.last_full_sync_at >= RECONCILE_INTERVAL:
+                full = True
+            if not full and not force and now - store.last_sync_at < SYNC_INTERVAL:
+                return SyncResult(worksheet_name, 'skipped', last_row=store.last_synced_row)
+
+            start = time.time()
+            result = self._full_sync(worksheet_name, store) if full else self._tail_sync(worksheet_name, store)
+            result.elapsed = time.time() - start
+            logger.info(
+                f"Synced {worksheet_name} ({result.mode}): {result.rows_fetched} rows fetched, "
+                f"{result.rows_changed} changed, last row {result.last_row} in {result.elapsed:.2f}s"
+            )
+            return result
+
+    def _tail_sync(self, worksheet_name: str, store: WorksheetHistoryStore) -> SyncResult:
+        """Fetch rows from just before the last synced row to the end of the sheet"""
+        manager = self._get_manager()
+        start_row = max(FIRST_DATE_ROW, store.last_synced_row - SYNC_OVERLAP_ROWS + 1)
+
+        # Trailing empty rows are left out of each window, so a short window may still
+        # be followed by rows after a blank one: only an empty window ends the sheet
+        header, rows = manager.read_rows(worksheet_name, start_row, SYNC_WINDOW_ROWS)
+        fetched = list(rows)
+        window_start = start_row
+        while rows:
+            window_start += SYNC_WINDOW_ROWS
+            _, rows = manager.read_rows(worksheet_name, window_start, SYNC_WINDOW_ROWS)
+            if rows:
+                fetched.extend([[] for _ in range(window_start - start_row - len(fetched))])
+                fetched.extend(rows)
+
+        last_row = start_row + len(fetched) - 1 if fetched else start_row - 1
+        records = self._diff(store, _normalize_header(header), start_row, fetched)
+        if last_row < store.row_count:
+            # Rows removed (or emptied) at the end of the sheet
+            records.append({'t': RECORD_TRUNCATE, 'row_count': max(last_row, HEADER_ROWS)})
+        changed = len(records)
+        records.append({'t': RECORD_SYNC, 'last_row': max(last_row, HEADER_ROWS), 'at': time.time(), 'full': False})
+        store.append(records)
+        self._publish(worksheet_name, store, records)
+        return SyncResult(worksheet_name, 'tail', rows_fetched=len(fetched), rows_changed=changed, last_row=last_row)
+
+    def _full_sync(self, worksheet_name: str, store: WorksheetHistoryStore) -> SyncResult:
+        """Re-read the whole worksheet, record every difference and compact the log"""
+        manager = self._get_manager()
+        values = manager.get_all_values(worksheet_name, fresh=True)
+        rows = values[HEADER_ROWS:]
+        last_row = max(len(values), HEADER_ROWS)
+
+        records = self._diff(store, _normalize_header(values), FIRST_DATE_ROW, rows)
+        if last_row != store.row_count:
+            records.append({'t': RECORD_TRUNCATE, 'row_count': last_row})
+        changed = len(records)
+        records.append({'t': RECORD_SYNC, 'last_row': last_row, 'at': time.time(), 'full': True})
+        store.append(records)
+        store.compact()
+        self._publish(worksheet_name, store, None)
+        return SyncResult(worksheet_name, 'full', rows_fetched=len(values), rows_changed=changed, last_row=last_row)
+
+    def _publish(self, worksheet_name: str, store: WorksheetHistoryStore, records: Optional[List[Dict]]):
+        """
+        Mirror synced changes into the observation store
+
+        Changed rows are re-imported; header changes, removed rows and full syncs
+        (records=None) replace the whole worksheet.
+        """
+        if self._observation_store is None:
+            return
+        try:
+            kinds = {record['t'] for record in records} if records is not None else None
+            if kinds is None or RECORD_HEADER in kinds or RECORD_TRUNCATE in kinds:
+                self._observation_store.replace_worksheet(worksheet_name, store.values())
+            elif RECORD_ROW in kinds:
+                rows = [record['row'] for record in records if record['t'] == RECORD_ROW]
+                self._observation_store.upsert_rows(worksheet_name, store.values(), rows)
+        except Exception as e:
+            logger.error(f"Error mirroring {worksheet_name} into the observation store: {e}", exc_info=True)
+
+    @staticmethod
+    def _diff(store: WorksheetHistoryStore, header: List[List[str]],
+              start_row: int, rows: List[List[str]]) -> List[Dict]:
+        """Log records for the header and every fetched row that differs from the store"""
+        records = []
+        if header != store.header:
+            records.append({'t': RECORD_HEADER, 'rows': header})
+        for offset, row_values in enumerate(rows):
+            row = start_row + offset
+            row_values = _trim(row_values)
+            if store.rows.get(row, []) != row_values:
+                records.append({'t': RECORD_ROW, 'row': row, 'values': row_values})
+        return records
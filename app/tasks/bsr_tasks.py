@@ -7,17 +7,75 @@ from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 import pytz
+from celery.signals import worker_init, worker_process_shutdown
 
 from app.celery_app import celery_app
 from google_sheets_transposed import GoogleSheetsManager
 from amazon_scraper import AmazonScraper
-from app.services.sheets_service import get_sheets_manager
+from app.services.sheets_service import get_sheets_manager, flush_pending_updates, OBSERVATION_STORE_ENABLED
 from app.services.cache_service import invalidate_chart_cache
+from app.services.observation_store import get_observation_store
+from app.services.sheets_quota import set_default_priority, PRIORITY_BATCH
+from app.services.async_fetcher import fetch_bsr_many
+from app.services.blocked_registry import BLOCKED_DISPATCH_BATCH, BlockedBook, dispatch_due, get_blocked_registry, registry_key
 import config
 
 logger = logging.getLogger(__name__)
 
 
+@worker_init.connect
+def use_batch_sheets_priority(**kwargs):
+    """Worker Sheets traffic yields quota to the dashboard (inherited by the pool processes)"""
+    set_default_priority(PRIORITY_BATCH)
+
+
+@worker_process_shutdown.connect
+def flush_sheets_on_worker_shutdown(**kwargs):
+    """Flush buffered sheet writes before a worker child exits (atexit may not run)"""
+    flush_pending_updates()
+
+
+def save_book_bsr(sheets_manager, worksheet_name: str, book: dict, bsr: int, page=None) -> int:
+    """
+    Everything a successfully scraped book gets: its BSR in today's row (buffered),
+    the observation store write-through, the cover from the same page, and its
+    removal from the blocked-book registry
+    
+    Returns:
+        Row the BSR was queued for
+    """
+    amazon_url = book['amazon_link']
+    # Get today's row again (in case it changed) - served from the run snapshot
+    today_row = sheets_manager.get_today_row(worksheet_name=worksheet_name)
+    sheets_manager.update_bsr(book['col'], today_row, bsr, worksheet_name=worksheet_name)
+    logger.info(f"✅ Successfully updated BSR: {bsr} for {book['name']} in {worksheet_name} (row {today_row}, col {book['col']})")
+    
+    # Write-through to the observation store read by the API
+    if OBSERVATION_STORE_ENABLED:
+        try:
+            get_observation_store().record_bsr(worksheet_name, book, datetime.now(), bsr)
+        except Exception as e:
+            logger.warning(f"Could not record BSR observation for {book['name']}: {e}")
+    
+    # Cache the cover from the same page (no second download)
+    try:
+        from app.services.cache_service import get_cached_cover, set_cached_cover
+        cached_cover = get_cached_cover(amazon_url)
+        if not cached_cover and page is not None and page.from_html:
+            if page.cover_image:
+                set_cached_cover(amazon_url, page.cover_image)
+                logger.info(f"✓ Cover image cached for {book['name']}: {page.cover_image[:80]}...")
+            elif page.title:
+                # A real product page without a cover: cache None to avoid retrying too often
+                set_cached_cover(amazon_url, None)
+                logger.debug(f"✗ No cover found for {book['name']}")
+    except Exception as cover_error:
+        logger.debug(f"Could not cache cover for {book['name']}: {cover_error}")
+    
+    get_blocked_registry().clear(amazon_url)
+    return today_row
+
+
 @celery_app.task(bind=True, name='bsr.update_worksheet')
 def update_worksheet_bsr(self, worksheet_name: str):
     """
@@ -46,6 +104,7 @@ def update_worksheet_bsr(self, worksheet_name: str):
         else:
             logger.info(f"[{state}] {meta.get('status', '')}")
     
+    sheets_manager = None
     try:
         # Update task state
         safe_update_state(
@@ -60,10 +119,14 @@ def update_worksheet_bsr(self, worksheet_name: str):
         
         # Initialize components
         sheets_manager = get_sheets_manager()
+        # Share one worksheet snapshot across all reads of this run
+        sheets_manager.begin_snapshot_run(worksheet_name)
         amazon_scraper = AmazonScraper(
             delay_between_requests=config.AMAZON_DELAY_BETWEEN_REQUESTS,
             retry_attempts=config.AMAZON_RETRY_ATTEMPTS
         )
+        # Books that fail are retried later by dispatch_blocked_retries
+        blocked = get_blocked_registry()
         
         # Get all books from the specific worksheet
         books = sheets_manager.get_all_books(worksheet_name=worksheet_name)
@@ -85,6 +148,12 @@ def update_worksheet_bsr(self, worksheet_name: str):
         today_row = sheets_manager.get_today_row(worksheet_name=worksheet_name)
         logger.info(f"Today's BSR for {worksheet_name} will be written to row {today_row}")
         
+        # Keep today's sum/count as BSRs land so the AVG cell needs no re-read at the end
+        try:
+            sheets_manager.start_running_average(today_row, worksheet_name=worksheet_name)
+        except Exception as e:
+            logger.warning(f"Could not start running average for {worksheet_name}, will recompute it: {e}")
+        
         # Update task state
         safe_update_state(
             state='PROGRESS',
@@ -119,59 +188,38 @@ def update_worksheet_bsr(self, worksheet_name: str):
                 amazon_url = book['amazon_link']
                 logger.info(f"🔍 Extracting BSR for {book['name']} from {amazon_url}")
                 
-                # Extract BSR (strict parser ensures no invalid values)
-                bsr = thread_scraper.extract_bsr(amazon_url, use_playwright=False)
+                # One download per product page: BSR, cover and the other fields come from the same HTML
+                prefetch = prefetched.get(amazon_url)
+                if prefetch is not None and prefetch.bsr:
+                    page = prefetch.page
+                else:
+                    # Extract BSR (strict parser ensures no invalid values)
+                    page = thread_scraper.scrape_product(amazon_url, use_playwright=False)
+                bsr = page.bsr if page else None
                 
                 if bsr:
                     logger.info(f"✓ BSR extracted: {bsr} for {book['name']}")
                 else:
                     logger.warning(f"✗ BSR extraction returned None for {book['name']}, trying Playwright...")
-                    # Try Playwright as fallback
-                    bsr = thread_scraper.extract_bsr(amazon_url, use_playwright=True)
+                    # Try Playwright as fallback (keep the first page's fields if it only finds the rank)
+                    playwright_page = thread_scraper.scrape_product(amazon_url, use_playwright=True)
+                    bsr = playwright_page.bsr if playwright_page else None
                     if bsr:
                         logger.info(f"✓ BSR extracted with Playwright: {bsr} for {book['name']}")
+                        if page is None or playwright_page.from_html:
+                            page = playwright_page
                 
                 # Double-check: never write invalid BSR values
                 if bsr and bsr > 0 and bsr <= 10000000:
-                    # Get today's row again (in case it changed) for the specific worksheet
-                    current_today_row = sheets_manager.get_today_row(worksheet_name=worksheet_name)
-                    sheets_manager.update_bsr(book['col'], current_today_row, bsr, worksheet_name=worksheet_name)
-                    logger.info(f"✅ Successfully updated BSR: {bsr} for {book['name']} in {worksheet_name} (row {current_today_row}, col {book['col']})")
-                    
-                    # Also extract and cache cover image if not already cached
-                    try:
-                        from app.services.cache_service import get_cached_cover, set_cached_cover
-                        cached_cover = get_cached_cover(amazon_url)
-                        if not cached_cover:
-                            logger.info(f"📸 Extracting cover image for {book['name']}...")
-                            cover_url = thread_scraper.extract_cover_image(amazon_url, use_playwright=False)
-                            if not cover_url:
-                                # Try with Playwright as fallback
-                                cover_url = thread_scraper.extract_cover_image(amazon_url, use_playwright=True)
-                            
-                            if cover_url:
-                                # Clean up image URL for better quality
-                                import re
-                                cover_url = re.sub(r'_SL\d+_', '_SL800_', cover_url)
-                                cover_url = re.sub(r'\._AC_[^_]+_', '._AC_SL800_', cover_url)
-                                if '_SL' not in cover_url:
-                                    cover_url = cover_url.replace('._AC_', '._AC_SL800_')
-                                cover_url = re.sub(r'_SX\d+_', '_SX800_', cover_url)
-                                set_cached_cover(amazon_url, cover_url)
-                                logger.info(f"✓ Cover image cached for {book['name']}: {cover_url[:80]}...")
-                            else:
-                                # Cache None to avoid retrying too often
-                                set_cached_cover(amazon_url, None)
-                                logger.debug(f"✗ No cover found for {book['name']}")
-                    except Exception as cover_error:
-                        logger.debug(f"Could not extract cover for {book['name']}: {cover_error}")
-                    
+                    save_book_bsr(sheets_manager, worksheet_name, book, bsr, page)
                     with count_lock:
                         success_count += 1
                         processed_count += 1
                     return True
                 else:
                     logger.warning(f"✗ Invalid BSR value ({bsr}) for {book['name']} in {worksheet_name}")
+                    blocked.mark_blocked(amazon_url, reason='no BSR' if bsr is None else f'invalid BSR {bsr}',
+                                         worksheet=worksheet_name, col=book['col'])
                     with count_lock:
                         failure_count += 1
                         processed_count += 1
@@ -180,11 +228,25 @@ def update_worksheet_bsr(self, worksheet_name: str):
                     logger.error(f"✗ Error processing {book['name']} in {worksheet_name}: {e}", exc_info=True)
                     import traceback
                     logger.error(f"Traceback: {traceback.format_exc()}")
+                    try:
+                        blocked.mark_blocked(book['amazon_link'], reason=f"{type(e).__name__}: {e}",
+                                             worksheet=worksheet_name, col=book['col'])
+                    except Exception as mark_error:
+                        logger.warning(f"Could not register failure of {book['name']}: {mark_error}")
                     with count_lock:
                         failure_count += 1
                         processed_count += 1
                     return False
         
+        # Tier-1 pages for all books at once (UK books are left to Playwright), each domain paced separately;
+        # only books without a BSR from it go through the per-book scraper below
+        prefetched = {}
+        if getattr(config, 'AMAZON_ASYNC_FETCH', False):
+            try:
+                prefetched = fetch_bsr_many(book['amazon_link'] for book in books)
+            except Exception as e:
+                logger.warning(f"Async tier-1 fetch failed for {worksheet_name}, scraping book by book: {e}")
+        
         # Use ThreadPoolExecutor for parallel processing
         max_workers = min(config.AMAZON_MAX_WORKERS, len(books))
         logger.info(f"Processing {len(books)} books with {max_workers} threads in parallel for {worksheet_name}...")
@@ -194,7 +256,8 @@ def update_worksheet_bsr(self, worksheet_name: str):
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = {}
             for idx, book in enumerate(books, 1):
-                if idx > 1:
+                resolved = prefetched.get(book['amazon_link'])
+                if idx > 1 and not (resolved is not None and resolved.bsr):
                     time.sleep(config.AMAZON_DELAY_BETWEEN_REQUESTS / max_workers)
                 future = executor.submit(process_book, book)
                 futures[future] = book
@@ -239,8 +302,13 @@ def update_worksheet_bsr(self, worksheet_name: str):
             
             logger.info(f"Calculating average BSR for today in worksheet: {worksheet_name}...")
             current_today_row = sheets_manager.get_today_row(worksheet_name=worksheet_name)
-            sheets_manager.calculate_and_update_average(current_today_row, worksheet_name=worksheet_name)
+            avg_bsr = sheets_manager.calculate_and_update_average(current_today_row, worksheet_name=worksheet_name)
             logger.info(f"✓ Average BSR calculated and updated successfully for {worksheet_name}")
+            if avg_bsr is not None and OBSERVATION_STORE_ENABLED:
+                try:
+                    get_observation_store().record_average(worksheet_name, datetime.now(), avg_bsr)
+                except Exception as e:
+                    logger.warning(f"Could not record average observation for {worksheet_name}: {e}")
             
             # Flush all buffered updates to Google Sheets
             logger.info(f"Flushing buffered updates to Google Sheets for {worksheet_name}...")
@@ -283,10 +351,13 @@ def update_worksheet_bsr(self, worksheet_name: str):
             'message': f'BSR update completed: {success_count} success, {failure_count} failures'
         }
         
+        snapshot_stats = sheets_manager.get_snapshot_stats()
+        
         logger.info("=" * 50)
         logger.info(f"BSR update completed for worksheet: {worksheet_name}")
         logger.info(f"Success: {success_count}")
         logger.info(f"Failures: {failure_count}")
+        logger.info(f"Sheet snapshot: {snapshot_stats['hits']} hits, {snapshot_stats['misses']} misses")
         logger.info("=" * 50)
         
         return result
@@ -301,6 +372,9 @@ def update_worksheet_bsr(self, worksheet_name: str):
             }
         )
         raise
+    finally:
+        if sheets_manager is not None:
+            sheets_manager.end_snapshot_run(worksheet_name)
 
 
 @celery_app.task(bind=True, name='bsr.update_all_worksheets')
@@ -414,3 +488,88 @@ def update_all_worksheets_bsr(self):
         )
         raise
 
+
+
+def find_blocked_book(sheets_manager, entry: BlockedBook):
+    """(worksheet, book) of a blocked-registry entry: its recorded worksheet, else every worksheet"""
+    worksheet_names = [entry.worksheet] if entry.worksheet else sheets_manager.get_all_worksheets()
+    for worksheet_name in worksheet_names:
+        for book in sheets_manager.get_all_books(worksheet_name=worksheet_name):
+            if book.get('amazon_link') and registry_key(book['amazon_link']) == entry.key:
+                return worksheet_name, book
+    return None, None
+
+
+@celery_app.task(name='bsr.retry_blocked_book')
+def retry_blocked_book(key: str):
+    """
+    Retry one book of the blocked registry and write its BSR into today's row
+    
+    Success removes the book from the registry; a failure schedules its next retry.
+    
+    Args:
+        key: Registry key of the book ('{domain}:{ASIN}')
+    """
+    blocked = get_blocked_registry()
+    entry = blocked.get(key)
+    if entry is None:
+        return {'key': key, 'status': 'skipped', 'message': 'Book is no longer blocked'}
+    
+    sheets_manager = get_sheets_manager()
+    worksheet_name, book = find_blocked_book(sheets_manager, entry)
+    if book is None:
+        logger.warning(f"Blocked book {key} is not in any worksheet anymore, dropping it from the registry")
+        blocked.clear_key(key)
+        return {'key': key, 'status': 'not_found', 'message': 'Book not found in any worksheet'}
+    
+    amazon_url = book['amazon_link']
+    logger.info(f"🔁 Retrying blocked book {book['name']} in {worksheet_name} (attempt {entry.attempts + 1}, last: {entry.reason})")
+    scraper = AmazonScraper(
+        delay_between_requests=config.AMAZON_DELAY_BETWEEN_REQUESTS,
+        retry_attempts=config.AMAZON_RETRY_ATTEMPTS
+    )
+    try:
+        page = scraper.scrape_product(amazon_url, use_playwright=False)
+        bsr = page.bsr if page else None
+        if not bsr:
+            # Keep the first page's fields if Playwright only finds the rank
+            playwright_page = scraper.scrape_product(amazon_url, use_playwright=True)
+            bsr = playwright_page.bsr if playwright_page else None
+            if bsr and (page is None or playwright_page.from_html):
+                page = playwright_page
+    except Exception as e:
+        logger.error(f"✗ Retry of {book['name']} failed: {e}", exc_info=True)
+        bsr, reason = None, f"{type(e).__name__}: {e}"
+    else:
+        reason = 'no BSR' if bsr is None else f'invalid BSR {bsr}'
+    
+    if not (bsr and 0 < bsr <= 10000000):
+        retry_at = blocked.mark_blocked(amazon_url, reason=reason, worksheet=worksheet_name, col=book['col'])
+        return {
+            'key': key,
+            'status': 'failed',
+            'worksheet': worksheet_name,
+            'reason': reason,
+            'retry_at': datetime.fromtimestamp(retry_at).isoformat(timespec='seconds')
+        }
+    
+    today_row = save_book_bsr(sheets_manager, worksheet_name, book, bsr, page)
+    sheets_manager.calculate_and_update_average(today_row, worksheet_name=worksheet_name)
+    sheets_manager.flush_batch_updates(worksheet_name=worksheet_name)
+    try:
+        invalidate_chart_cache(worksheet_name=worksheet_name)
+    except Exception as e:
+        logger.error(f"✗ Error invalidating chart cache: {e}", exc_info=True)
+    return {'key': key, 'status': 'completed', 'worksheet': worksheet_name, 'bsr': bsr}
+
+
+@celery_app.task(name='bsr.dispatch_blocked_retries')
+def dispatch_blocked_retries(limit: int = BLOCKED_DISPATCH_BATCH):
+    """
+    Enqueue a bsr.retry_blocked_book task for every blocked book whose retry time has come
+    
+    Each dispatched book is leased (AMAZON_BLOCKED_CLAIM_LEASE), so overlapping
+    dispatcher runs never enqueue it twice.
+    """
+    keys = dispatch_due(get_blocked_registry(), lambda entry: retry_blocked_book.delay(entry.key), limit)
+    return {'status': 'completed', 'dispatched': len(keys), 'keys': keys}
@@ -0,0 +1,43 @@
+"""
+Amazon product URL helpers
+"""
+import re
+from typing import Optional
+
+# Product URL paths that carry the ASIN
+ASIN_PATTERNS = [
+    r'/dp/([A-Z0-9]{10})',
+    r'/gp/product/([A-Z0-9]{10})',
+    r'/product/([A-Z0-9]{10})',
+]
+
+
+def extract_asin(url: str) -> Optional[str]:
+    """Extract ASIN from Amazon URL"""
+    if not url:
+        return None
+    for pattern in ASIN_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def clean_amazon_url(url: str) -> str:
+    """Product URL without /ref and query parameters, with common typos fixed and a trailing slash"""
+    clean_url = url.split('/ref')[0].split('?')[0].rstrip('/')
+
+    # Fix common URL issues: amazon.co.ukgp -> amazon.co.uk/gp
+    if '.ukgp' in clean_url:
+        clean_url = clean_url.replace('.ukgp', '.uk/gp')
+    if '.comgp' in clean_url:
+        clean_url = clean_url.replace('.comgp', '.com/gp')
+
+    if not clean_url.endswith('/'):
+        clean_url += '/'
+    return clean_url
+
+
+def amazon_domain(url: str) -> str:
+    """Amazon marketplace of a URL ('amazon.co.uk' or 'amazon.com')"""
+    return 'amazon.co.uk' if 'amazon.co.uk' in (url or '') else 'amazon.com'
@@ -0,0 +1,357 @@
+"""
+Columnar BSR matrix
+Parses a transposed worksheet (books in columns, dates in rows) into a
+dates index, a book-column index and a dense int32 matrix in one vectorized pass
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from app.utils.date_utils import HEADER_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for cells without a valid BSR (valid BSR values are always >= 1)
+MISSING_BSR = -1
+
+# Column headers that mark the average column
+AVG_HEADERS = ['AVG RANKS', 'AVERAGE', 'AVG', 'MEAN']
+
+# Title headers that are never books
+NON_BOOK_TITLES = ['AVG RANKS', 'AVERAGE']
+
+# int32 holds up to 2,147,483,647 - longer digit strings can't be a BSR
+MAX_BSR_DIGITS = 9
+
+# Fixed cell width for the vectorized parse: "999,999,999" plus surrounding spaces.
+# Longer cells are text, not ranks, and are treated as missing.
+CELL_DTYPE = '<U16'
+
+# Row statistics supported by BSRMatrix.row_statistic
+AVG_METHODS = ('mean', 'median', 'trimmed')
+
+
+@dataclass
+class BookColumn:
+    """Header information for one book column"""
+    col: int  # 1-based column index in the worksheet
+    name: str
+    author: str
+    amazon_link: str
+    category: str
+
+
+@dataclass
+class BSRMatrix:
+    """
+    Parsed worksheet history
+
+    - dates: raw date strings from column A, one per date row
+    - books: book columns, in worksheet order
+    - bsr: int32 array of shape (len(dates), len(books)), MISSING_BSR where empty/invalid
+    - avg: float64 array of the AVG column (NaN where empty/invalid), or None if no AVG column
+    - row_count: number of worksheet rows the matrix was built from (headers included)
+    - first_row: worksheet row of the first date row (a window over the sheet starts later)
+    """
+    dates: List[str]
+    books: List[BookColumn]
+    bsr: np.ndarray
+    row_count: int = 0
+    avg_col: Optional[int] = None  # 1-based column index of the AVG column
+    avg: Optional[np.ndarray] = None
+    first_row: int = HEADER_ROWS + 1
+    _col_index: Dict[int, int] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_values(cls, all_values: List[List[str]], first_row: int = HEADER_ROWS + 1) -> 'BSRMatrix':
+        """
+        Build the matrix from gspread get_all_values() output
+
+        Args:
+            all_values: Worksheet values (list of rows, rows may be ragged)
+            first_row: Worksheet row of all_values[HEADER_ROWS]. Pass a later row to
+                parse a window: the 4 header rows followed by a slice of date rows.
+
+        Returns:
+            BSRMatrix (empty if the sheet has no header rows)
+        """
+        if not all_values:
+            return cls(dates=[], books=[], bsr=np.empty((0, 0), dtype=np.int32), first_row=first_row)
+
+        titles = all_values[0]
+        authors = all_values[1] if len(all_values) > 1 else []
+        links = all_values[2] if len(all_values) > 2 else []
+        categories = all_values[3] if len(all_values) > 3 else []
+
+        def header(row: List[str], col_idx: int) -> str:
+            return row[col_idx].strip() if col_idx < len(row) else ''
+
+        books = []
+        for col_idx in range(1, len(titles)):
+            title = header(titles, col_idx)
+            if not title or title.startswith('>>>') or title.upper() in NON_BOOK_TITLES:
+                continue
+            link = header(links, col_idx)
+            if not link:
+                continue
+            books.append(BookColumn(
+                col=col_idx + 1,
+                name=title,
+                author=header(authors, col_idx),
+                amazon_link=link,
+                category=header(categories, col_idx)
+            ))
+
+        avg_col = None
+        for col_idx, title in enumerate(titles):
+            if title.strip().upper() in AVG_HEADERS:
+                avg_col = col_idx + 1
+                break
+
+        data_rows = all_values[HEADER_ROWS:]
+        dates = [row[0] if row else '' for row in data_rows]
+
+        # Pad ragged rows once, then parse every book cell in one vectorized pass
+        book_idx = [book.col - 1 for book in books]
+        width = max(book_idx) + 1 if book_idx else 1
+        padded = [row[:width] if len(row) >= width else row + [''] * (width - len(row))
+                  for row in data_rows]
+        if padded:
+            cells = np.array(padded, dtype=CELL_DTYPE)[:, book_idx]
+        else:
+            cells = np.empty((0, len(book_idx)), dtype=CELL_DTYPE)
+        bsr = _parse_int_cells(cells)
+
+        avg = None
+        if avg_col is not None:
+            avg_cells = [row[avg_col - 1] if len(row) >= avg_col else '' for row in data_rows]
+            avg = _parse_float_cells(avg_cells)
+
+        return cls(
+            dates=dates,
+            books=books,
+            bsr=bsr,
+            row_count=first_row - 1 + len(data_rows),
+            avg_col=avg_col,
+            avg=avg,
+            first_row=first_row,
+            _col_index={book.col: idx for idx, book in enumerate(books)}
+        )
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of cells holding a BSR value"""
+        return self.bsr != MISSING_BSR
+
+    def book_index(self, col: int) -> Optional[int]:
+        """Matrix column for a 1-based worksheet column (None if not a book column)"""
+        return self._col_index.get(col)
+
+    def row_index(self, row: int) -> Optional[int]:
+        """Matrix row for a 1-based worksheet row (None if not a date row)"""
+        idx = row - self.first_row
+        if 0 <= idx < len(self.dates):
+            return idx
+        return None
+
+    def history(self, book_idx: int) -> List[Dict]:
+        """BSR history of one book as [{'date': ..., 'bsr': ...}] in sheet order"""
+        column = self.bsr[:, book_idx]
+        rows = np.flatnonzero(column != MISSING_BSR)
+        values = column[rows].tolist()
+        return [{'date': self.dates[r], 'bsr': v} for r, v in zip(rows.tolist(), values)]
+
+    def current_bsr(self) -> List[Optional[int]]:
+        """Last recorded BSR of each book (None if the book has no values)"""
+        if not self.books:
+            return []
+        valid = self.valid
+        has_value = valid.any(axis=0)
+        if not len(self.dates):
+            return [None] * len(self.books)
+        # Index of the last valid row per column
+        last_rows = len(self.dates) - 1 - np.argmax(valid[::-1], axis=0)
+        current = self.bsr[last_rows, np.arange(len(self.books))]
+        return [int(v) if ok else None for v, ok in zip(current.tolist(), has_value.tolist())]
+
+    def books_history(self) -> List[Dict]:
+        """Per-book dicts in the get_bsr_history format (headers, BSR history, current BSR)"""
+        current = self.current_bsr()
+        return [
+            {
+                'name': book.name,
+                'author': book.author,
+                'amazon_link': book.amazon_link,
+                'category': book.category,
+                'bsr_history': self.history(book_idx),
+                'current_bsr': current[book_idx]
+            }
+            for book_idx, book in enumerate(self.books)
+        ]
+
+    def rankings(self) -> List[int]:
+        """
+        Book indices ordered by current BSR (lower is better)
+
+        Books without any BSR go last, in worksheet order.
+        """
+        current = self.current_bsr()
+        ranked = sorted((v, idx) for idx, v in enumerate(current) if v is not None)
+        return [idx for _, idx in ranked] + [idx for idx, v in enumerate(current) if v is None]
+
+    def row_averages(self) -> np.ndarray:
+        """Mean BSR of every date row over books with a value (NaN when a row has none)"""
+        valid = self.valid
+        counts = valid.sum(axis=1)
+        sums = np.where(valid, self.bsr, 0).sum(axis=1, dtype=np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def row_statistic(self, method: str = 'mean', min_books: int = 1, trim: float = 0.1) -> np.ndarray:
+        """
+        One statistic per date row over the books with a value, for all rows at once
+
+        Args:
+            method: 'mean', 'median' or 'trimmed' (mean without the lowest and highest trim share)
+            min_books: Rows with fewer values get NaN
+            trim: Share cut from each end for 'trimmed' (0.1 drops the best and worst 10%)
+
+        Returns:
+            float64 array with one value per date row (NaN where there is no statistic)
+        """
+        if method not in AVG_METHODS:
+            raise ValueError(f"Unknown method {method!r} (expected one of {AVG_METHODS})")
+        if not 0 <= trim < 0.5:
+            raise ValueError(f"trim must be in [0, 0.5), got {trim}")
+        valid = self.valid
+        counts = valid.sum(axis=1)
+        if method == 'mean':
+            result = self.row_averages()
+        else:
+            # Valid values first in each row, ascending; missing cells sort last as NaN
+            ordered = np.sort(np.where(valid, self.bsr, np.nan), axis=1)
+            rows = np.arange(len(counts))
+            if method == 'median':
+                low = np.maximum(counts - 1, 0) // 2
+                high = np.minimum(counts // 2, np.maximum(counts - 1, 0))
+                result = (ordered[rows, low] + ordered[rows, high]) / 2
+            else:
+                cut = np.floor(counts * trim).astype(np.int64)
+                kept = counts - 2 * cut
+                cumulative = np.zeros((len(counts), ordered.shape[1] + 1))
+                np.cumsum(np.nan_to_num(ordered), axis=1, out=cumulative[:, 1:])
+                sums = cumulative[rows, counts - cut] - cumulative[rows, cut]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = sums / kept
+        return np.where(counts >= max(min_books, 1), result, np.nan)
+
+    def row_values(self, row: int) -> List[int]:
+        """Valid BSR values of a 1-based worksheet row"""
+        idx = self.row_index(row)
+        if idx is None:
+            return []
+        values = self.bsr[idx]
+        return values[values != MISSING_BSR].tolist()
+
+    def row_cells(self, row: int) -> Dict[int, int]:
+        """Valid BSR values of a 1-based worksheet row by book column"""
+        idx = self.row_index(row)
+        if idx is None:
+            return {}
+        return {book.col: int(bsr) for book, bsr in zip(self.books, self.bsr[idx]) if bsr != MISSING_BSR}
+
+    def avg_history(self) -> List[Dict]:
+        """AVG column as [{'date': ..., 'average_bsr': ...}] (rows with a date and a value)"""
+        if self.avg is None:
+            return []
+        return _avg_entries(self.dates, self.avg)
+
+
+def avg_history_from_columns(dates: List[str], avg_cells: List[str]) -> List[Dict]:
+    """Same entries as BSRMatrix.avg_history, from a separately read date column and AVG column"""
+    avg_cells = list(avg_cells[:len(dates)]) + [''] * (len(dates) - len(avg_cells))
+    return _avg_entries(dates, _parse_float_cells(avg_cells))
+
+
+def _avg_entries(dates: List[str], avg: np.ndarray) -> List[Dict]:
+    """[{'date': ..., 'average_bsr': ...}] for rows with a date and a value"""
+    entries = []
+    for date_str, value in zip(dates, avg.tolist()):
+        date_str = date_str.strip()
+        if date_str and not np.isnan(value):
+            entries.append({'date': date_str, 'average_bsr': value})
+    return entries
+
+
+# Character classes for the vectorized parse (code points above 255 are clipped to 255)
+_SPACE, _DIGIT, _COMMA, _OTHER = 0, 1, 2, 3
+_CHAR_CLASS = np.full(256, _OTHER, dtype=np.uint8)
+_CHAR_CLASS[[0, 9, 10, 11, 12, 13, 32, 160]] = _SPACE  # 0 is the fixed-width padding
+_CHAR_CLASS[ord('0'):ord('9') + 1] = _DIGIT
+_CHAR_CLASS[ord(',')] = _COMMA
+
+
+def _parse_int_cells(cells: np.ndarray) -> np.ndarray:
+    """
+    Vectorized "1,234" -> 1234 parse over a fixed-width unicode array
+
+    Works on the raw code points so no per-cell Python (or str -> int cast) runs.
+    A cell is valid when, after stripping surrounding whitespace, it only holds
+    digits and commas with at most MAX_BSR_DIGITS digits. Anything else, including
+    cells too long for CELL_DTYPE, becomes MISSING_BSR.
+    """
+    if cells.size == 0:
+        return np.full(cells.shape, MISSING_BSR, dtype=np.int32)
+
+    width = cells.dtype.itemsize // 4
+    codes = np.ascontiguousarray(cells).view(np.uint32).reshape(-1, width)
+    # Cell filled the whole fixed width: possibly truncated text
+    valid = codes[:, -1] == 0
+    chars = np.minimum(codes, 255).astype(np.uint8)
+    # Trailing positions that are empty in every cell need no work
+    used = np.flatnonzero(chars.any(axis=0))
+    width = int(used[-1]) + 1 if used.size else 0
+    # One row per character position, one column per cell: each step below is a
+    # contiguous pass over all cells
+    chars = np.ascontiguousarray(chars[:, :width].T)
+    classes = _CHAR_CLASS[chars]
+
+    count = chars.shape[1]
+    # int32 is enough: anything longer than MAX_BSR_DIGITS is rejected anyway
+    values = np.zeros(count, dtype=np.int32)
+    digit_count = np.zeros(count, dtype=np.int8)
+    seen_content = np.zeros(count, dtype=bool)
+    space_after_content = np.zeros(count, dtype=bool)
+
+    for pos in range(width):
+        char_class = classes[pos]
+        is_digit = char_class == _DIGIT
+        is_space = char_class == _SPACE
+        is_content = is_digit | (char_class == _COMMA)
+        # Reject any other character, and digits/commas that follow inner whitespace
+        valid &= char_class != _OTHER
+        valid &= ~(is_content & space_after_content)
+        space_after_content |= is_space & seen_content
+        seen_content |= is_content
+        np.multiply(values, 10, out=values, where=is_digit)
+        np.add(values, chars[pos] - ord('0'), out=values, where=is_digit, casting='unsafe')
+        digit_count += is_digit
+
+    valid &= (digit_count > 0) & (digit_count <= MAX_BSR_DIGITS)
+    return np.where(valid, values, MISSING_BSR).astype(np.int32).reshape(cells.shape)
+
+
+def _parse_float_cells(cells: List[str]) -> np.ndarray:
+    """Float parse of the AVG column ("1,234.5" -> 1234.5); invalid cells become NaN"""
+    result = np.full(len(cells), np.nan, dtype=np.float64)
+    for idx, cell in enumerate(cells):
+        cleaned = cell.strip().replace(',', '').replace(' ', '')
+        if not cleaned:
+            continue
+        try:
+            result[idx] = float(cleaned)
+        except ValueError:
+            continue
+    return result
@@ -1,10 +1,23 @@
 """
 Strict BSR (Best Sellers Rank) Parser
 Extracts and validates BSR values from HTML with strict rules
+
+parse_bsr works in tiers, cheapest first; every tier gives the same answer
+as the full BeautifulSoup parse, and only decides when it can be sure of that:
+  1. window - regex scan of the raw HTML (str or bytes) for the SalesRank div
+              or the one "Best Sellers Rank" label; only that slice is read
+  2. lxml   - lxml tree + XPath text (no BeautifulSoup), BSR methods 1-2
+  3. soup   - the full BeautifulSoup parse (parse_bsr_soup)
 """
 import re
+import time
 import logging
-from typing import Optional
+import threading
+from html import unescape
+from typing import Dict, Optional, Union
+
+import lxml.html
+from lxml import etree
 from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
@@ -12,8 +25,101 @@ logger = logging.getLogger(__name__)
 # Maximum reasonable BSR value (Amazon's max is around 10 million)
 MAX_BSR_VALUE = 10000000
 
+# Patterns for the SalesRank div, ordered by priority (most specific/main BSR first)
+# Priority 1: Main BSR - "Best Sellers Rank: #X in Kindle Store" (US) or "Best Sellers Rank: X in Kindle Store" (UK)
+# Numbers without a leading # must not continue another number or a minus sign ("#-123" is not a rank)
+SALESRANK_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    # Main BSR patterns (highest priority) - US format with #
+    r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    r'Amazon\s+Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    # Main BSR patterns - UK format without # (e.g., "Best Sellers Rank: 1,726 in Kindle Store")
+    r'Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    r'Amazon\s+Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    # Fallback patterns (with or without #)
+    r'Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)',  # With or without #
+    r'Amazon\s+Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)',
+    # Main BSR with "See Top" - prioritize Kindle Store
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',
+    r'(?<![\d,.\-])(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',  # UK format without #
+    # General patterns (lower priority - may match category BSRs)
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
+    r'(?<![\d,.\-])(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',  # UK format without #
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+.*?Store.*?\(See\s+Top',
+]]
+
+# Patterns for the whole page text, ordered by priority (main BSR first, category BSRs last)
+PAGE_TEXT_PATTERNS = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in [
+    # Main BSR - US format: "Best Sellers Rank: #X in Kindle Store" (highest priority)
+    # Handles both with and without "(See Top 100 in Kindle Store)" suffix
+    r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
+    r'Amazon\s+Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
+    # Main BSR - UK format: "Best Sellers Rank: X in Kindle Store" (without #)
+    # Handles both with and without "(See Top 100 in Kindle Store)" suffix
+    r'Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
+    r'Amazon\s+Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
+    # UK format: "Best Sellers Rank: X" (without "in Kindle Store" sometimes)
+    r'Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
+    # Main BSR with "See Top" - prioritize Kindle Store (both formats)
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',
+    r'(?<![\d,.\-])(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',  # UK format without #
+    # Main BSR without explicit "Best Sellers Rank:" but in Kindle Store
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    r'(?<![\d,.\-])(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',  # UK format without #
+    # Fallback patterns (may match category BSRs - use with caution)
+    r'Best\s+Sellers\s+Rank.*?#?(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
+    # Only match "in Store" if it's a reasonable BSR (>= 1000) to avoid category rankings
+    r'#(\d{1,3}(?:,\d{3}){2,})\s+in\s+.*?Store',  # At least 3 digits (1,000+) to avoid small category ranks
+    r'(?<![\d,.\-])(\d{1,3}(?:,\d{3}){2,})\s+in\s+Kindle\s+Store',  # UK format, at least 1,000+
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+.*?\(See\s+Top',
+    # Last resort: "Best Sellers Rank:" without "in" (validate it's reasonable)
+    r'Best\s+Sellers\s+Rank[:\s]*#?(\d{1,3}(?:,\d{3}){2,})',  # At least 1,000 to avoid category ranks
+    # Print books: "Best Sellers Rank: #890 in Books" (a category rank alone is not a BSR)
+    r'Best\s+Sellers\s+Rank:\s*#?(?<![\d,.\-])(\d{1,3}(?:,\d{3})*)\s+in\s+Books\b',
+]]
+
+# Patterns for OCR text of a product page screenshot, ordered by priority. Kindle Store
+# ranks only, with the number running up to "in": a category rank is not a BSR, and a
+# number OCR misread with a stray separator ("1.234") must not be cut short to "1"
+OCR_BSR_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    r'Best\s+Sellers\s+Rank[:\s]*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
+    r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
+    r'Best\s+Sellers\s+Rank[:\s]*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',  # UK format without #
+]]
+
+# The leading page text patterns all start at the "Best Sellers Rank" label, so when the
+# label appears once they can only match right after it (the window tier relies on this)
+LABEL_PATTERNS = PAGE_TEXT_PATTERNS[:5]
+
+# Text read after the label by the window tier
+LABEL_WINDOW = 2000
+
+PARSE_TIERS = ('window', 'lxml', 'soup')
+
+
+def _compile_pair(pattern: str, flags: int = 0):
+    """Compile a raw-HTML locator for both str and bytes pages"""
+    return re.compile(pattern, flags), re.compile(pattern.encode(), flags)
 
-def parse_bsr(html: str) -> Optional[int]:
+
+# Tag and attribute names are case-insensitive in HTML, the id value is not
+_SALESRANK_DIV = _compile_pair(r'(?i:<div\b[^>]*?\sid)\s*=\s*(["\']?)SalesRank\1[\s/>]')
+_DIV_TAG = _compile_pair(r'<(/?)div\b', re.IGNORECASE)
+# Any raw spelling that can become "Best Sellers Rank" in the page text (tags, entities and comments between the words)
+_RAW_LABEL = _compile_pair(
+    r'Best(?:\s|&nbsp;|&#\d+;|&#x[0-9a-f]+;|<[^>]*>)+Sellers(?:\s|&nbsp;|&#\d+;|&#x[0-9a-f]+;|<[^>]*>)+Rank',
+    re.IGNORECASE,
+)
+_TAG = re.compile(r'<[^>]*>')
+# Elements whose text BeautifulSoup's get_text leaves out
+_HIDDEN_OPENERS = ('<script', '<style', '<template', '<!--')
+_HIDDEN_BLOCKS = (('<script', '</script'), ('<style', '</style'), ('<template', '</template'), ('<!--', '-->'))
+
+_stats_lock = threading.Lock()
+_parse_stats = {'pages': 0, 'seconds': 0.0, 'found': 0, 'tiers': {tier: 0 for tier in PARSE_TIERS}}
+
+
+def parse_bsr(html: Union[str, bytes]) -> Optional[int]:
     """
     Strict BSR parser that extracts BSR from HTML
     
@@ -24,21 +130,158 @@ def parse_bsr(html: str) -> Optional[int]:
     - Never returns invalid values
     
     Args:
-        html: HTML content from Amazon product page
+        html: HTML content from Amazon product page (str, or the raw response bytes)
         
     Returns:
         BSR value as integer (1 to MAX_BSR_VALUE), or None if not found/invalid
     """
-    if not html or len(html) < 100:
-        logger.debug("HTML too short or empty")
+    if not html:
+        logger.debug("HTML empty")
         return None
     
+    start = time.perf_counter()
+    tier = 'window'
+    bsr = find_bsr_in_window(html)
+    if bsr is None:
+        tier = 'lxml'
+        bsr = _parse_bsr_lxml(html)
+    if bsr is None:
+        tier = 'soup'
+        try:
+            soup = BeautifulSoup(html, 'lxml')
+        except Exception as e:
+            logger.warning(f"Failed to parse HTML: {e}")
+            soup = None
+        bsr = parse_bsr_soup(soup) if soup is not None else None
+    
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        _parse_stats['pages'] += 1
+        _parse_stats['seconds'] += elapsed
+        _parse_stats['tiers'][tier] += 1
+        if bsr is not None:
+            _parse_stats['found'] += 1
+    logger.debug(f"BSR parse: {bsr} via {tier} tier in {elapsed * 1000:.2f}ms ({len(html):,} chars)")
+    return bsr
+
+
+def get_parse_stats() -> Dict:
+    """Pages parsed by parse_bsr since startup, which tier settled each, and the average parse time"""
+    with _stats_lock:
+        pages = _parse_stats['pages']
+        return {
+            'pages': pages,
+            'found': _parse_stats['found'],
+            'tiers': dict(_parse_stats['tiers']),
+            'avg_ms': round(_parse_stats['seconds'] / pages * 1000, 3) if pages else 0.0,
+        }
+
+
+def reset_parse_stats():
+    with _stats_lock:
+        _parse_stats.update(pages=0, seconds=0.0, found=0, tiers={tier: 0 for tier in PARSE_TIERS})
+
+
+def find_bsr_in_window(html: Union[str, bytes]) -> Optional[int]:
+    """
+    Tier 1: find the BSR by reading only the slice of raw HTML that holds it
+    
+    Returns a BSR only when the full parse would return the same one; None means
+    "not decided here" (the caller moves on to the next tier), not "no BSR".
+    """
+    is_bytes = isinstance(html, bytes)
+    if not is_bytes and not isinstance(html, str):
+        return None
+    
+    salesrank = _SALESRANK_DIV[is_bytes]
+    for match in salesrank.finditer(html):
+        if _in_hidden_block(html, match.start(), is_bytes):
+            continue
+        # First SalesRank div in the page text: the full parse reads exactly this div first
+        window = _div_contents(html, match.end(), is_bytes)
+        if window is None:
+            return None
+        window = _decode(window)
+        if any(opener in window for opener in _HIDDEN_OPENERS):
+            return None
+        return _match_salesrank_text(_window_text(window))
+    
+    if (b'SalesRank' if is_bytes else 'SalesRank') in html:
+        return None  # SalesRank markup we can't place; leave it to the tree tiers
+    
+    # No SalesRank div: the label-anchored page text patterns decide if the label is unique in the page text
+    labels = [match.start() for match in _RAW_LABEL[is_bytes].finditer(html) if _in_text(html, match.start(), is_bytes)]
+    if len(labels) != 1:
+        return None
+    start = labels[0]
+    
+    window = _decode(html[start:start + LABEL_WINDOW])
+    # Text after a hidden block or a cut-off tag isn't contiguous with the label's text
+    cut = min([window.find(opener) for opener in _HIDDEN_OPENERS if opener in window] or [len(window)])
+    window = window[:cut]
+    window = window[:window.rfind('<')] if window.rfind('<') > window.rfind('>') else window
+    return _match_patterns(LABEL_PATTERNS, _window_text(window), 'label window')
+
+
+def _in_text(html: Union[str, bytes], pos: int, is_bytes: bool) -> bool:
+    """True if pos is page text (not inside a tag, script, style, template or comment)"""
+    if html.rfind(b'<' if is_bytes else '<', 0, pos) > html.rfind(b'>' if is_bytes else '>', 0, pos):
+        return False
+    return not _in_hidden_block(html, pos, is_bytes)
+
+
+def _in_hidden_block(html: Union[str, bytes], pos: int, is_bytes: bool) -> bool:
+    """True if pos is inside a script, style, template or comment"""
+    for opener, closer in _HIDDEN_BLOCKS:
+        if is_bytes:
+            opener, closer = opener.encode(), closer.encode()
+        start = html.rfind(opener, 0, pos)
+        if start != -1 and html.find(closer, start, pos) == -1:
+            return True
+    return False
+
+
+def _div_contents(html: Union[str, bytes], pos: int, is_bytes: bool) -> Optional[Union[str, bytes]]:
+    """Markup of a div from just after its opening tag to its matching </div>"""
+    depth = 1
+    for tag in _DIV_TAG[is_bytes].finditer(html, pos):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[pos:tag.start()]
+    return None
+
+
+def _decode(window: Union[str, bytes]) -> str:
+    return window.decode('utf-8', errors='replace') if isinstance(window, bytes) else window
+
+
+def _window_text(window: str) -> str:
+    """Text of an HTML slice, joined the way BeautifulSoup's get_text joins it"""
+    return unescape(_TAG.sub('', window))
+
+
+def _parse_bsr_lxml(html: Union[str, bytes]) -> Optional[int]:
+    """Tier 2: BSR methods 1-2 on an lxml tree, without building a BeautifulSoup"""
     try:
-        soup = BeautifulSoup(html, 'lxml')
-    except Exception as e:
-        logger.warning(f"Failed to parse HTML: {e}")
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"lxml could not parse HTML: {e}")
         return None
+    etree.strip_elements(root, 'script', 'style', 'template', with_tail=False)
     
+    divs = root.xpath('//div[@id="SalesRank"]')
+    if divs:
+        bsr = _match_salesrank_text(divs[0].xpath('string()'))
+        if bsr:
+            return bsr
+    return _match_patterns(PAGE_TEXT_PATTERNS, root.xpath('string()'), 'page text')
+
+
+def parse_bsr_soup(soup: BeautifulSoup) -> Optional[int]:
+    """
+    Same rules as parse_bsr, for a page that is already parsed
+    (lets one BeautifulSoup tree serve every extractor of a product page)
+    """
     # Try multiple extraction methods in order of specificity
     
     # Method 1: SalesRank div (most reliable)
@@ -66,40 +309,23 @@ def _extract_from_salesrank_div(soup: BeautifulSoup) -> Optional[int]:
     if not product_details:
         return None
     
-    text = product_details.get_text()
+    return _match_salesrank_text(product_details.get_text())
+
+
+def _match_salesrank_text(text: str) -> Optional[int]:
+    """Method 1 patterns on the SalesRank div's text"""
     if not text:
         return None
     
-    # Patterns ordered by priority (most specific/main BSR first)
-    # Priority 1: Main BSR - "Best Sellers Rank: #X in Kindle Store" (US) or "Best Sellers Rank: X in Kindle Store" (UK)
-    patterns = [
-        # Main BSR patterns (highest priority) - US format with #
-        r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-        r'Amazon\s+Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-        # Main BSR patterns - UK format without # (e.g., "Best Sellers Rank: 1,726 in Kindle Store")
-        r'Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-        r'Amazon\s+Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-        # Fallback patterns (with or without #)
-        r'Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)',  # With or without #
-        r'Amazon\s+Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)',
-        # Main BSR with "See Top" - prioritize Kindle Store
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',
-        r'(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',  # UK format without #
-        # General patterns (lower priority - may match category BSRs)
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
-        r'(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',  # UK format without #
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+.*?Store.*?\(See\s+Top',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in SALESRANK_PATTERNS:
+        match = pattern.search(text)
         if match:
             bsr_value = _parse_bsr_number(match.group(1))
             if bsr_value:
                 # Additional validation: if BSR is very low (< 1000), it might be a category BSR
                 # Main BSR is usually higher (thousands or tens of thousands)
                 # But we still return it if it matches the main BSR pattern
-                logger.debug(f"Found BSR in SalesRank div: {bsr_value} (pattern: {pattern[:50]})")
+                logger.debug(f"Found BSR in SalesRank div: {bsr_value} (pattern: {pattern.pattern[:50]})")
                 return bsr_value
     
     return None
@@ -107,45 +333,19 @@ def _extract_from_salesrank_div(soup: BeautifulSoup) -> Optional[int]:
 
 def _extract_from_page_text(soup: BeautifulSoup) -> Optional[int]:
     """Extract BSR from page text - prioritize main BSR over category BSRs"""
-    page_text = soup.get_text()
-    if not page_text:
+    return _match_patterns(PAGE_TEXT_PATTERNS, soup.get_text(), 'page text')
+
+
+def _match_patterns(patterns, text: str, where: str) -> Optional[int]:
+    """First valid BSR of the first pattern that has one (patterns in priority order)"""
+    if not text:
         return None
     
-    # Patterns ordered by priority (main BSR first, category BSRs last)
-    # Priority 1: Main BSR patterns (works for both US and UK)
-    patterns = [
-        # Main BSR - US format: "Best Sellers Rank: #X in Kindle Store" (highest priority)
-        # Handles both with and without "(See Top 100 in Kindle Store)" suffix
-        r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
-        r'Amazon\s+Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
-        # Main BSR - UK format: "Best Sellers Rank: X in Kindle Store" (without #)
-        # Handles both with and without "(See Top 100 in Kindle Store)" suffix
-        r'Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
-        r'Amazon\s+Best\s+Sellers\s+Rank:\s*(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store(?:\s*\(See\s+Top.*?\))?',
-        # UK format: "Best Sellers Rank: X" (without "in Kindle Store" sometimes)
-        r'Best\s+Sellers\s+Rank:\s*#?(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
-        # Main BSR with "See Top" - prioritize Kindle Store (both formats)
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',
-        r'(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store.*?\(See\s+Top',  # UK format without #
-        # Main BSR without explicit "Best Sellers Rank:" but in Kindle Store
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-        r'(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',  # UK format without #
-        # Fallback patterns (may match category BSRs - use with caution)
-        r'Best\s+Sellers\s+Rank.*?#?(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
-        # Only match "in Store" if it's a reasonable BSR (>= 1000) to avoid category rankings
-        r'#(\d{1,3}(?:,\d{3}){2,})\s+in\s+.*?Store',  # At least 3 digits (1,000+) to avoid small category ranks
-        r'(\d{1,3}(?:,\d{3}){2,})\s+in\s+Kindle\s+Store',  # UK format, at least 1,000+
-        r'#(\d{1,3}(?:,\d{3})*)\s+in\s+.*?\(See\s+Top',
-        # Last resort: "Best Sellers Rank:" without "in" (validate it's reasonable)
-        r'Best\s+Sellers\s+Rank[:\s]*#?(\d{1,3}(?:,\d{3}){2,})',  # At least 1,000 to avoid category ranks
-    ]
-    
     for pattern in patterns:
-        matches = re.finditer(pattern, page_text, re.IGNORECASE | re.DOTALL)
-        for match in matches:
+        for match in pattern.finditer(text):
             bsr_value = _parse_bsr_number(match.group(1))
             if bsr_value:
-                logger.debug(f"Found BSR in page text: {bsr_value} (pattern: {pattern[:50]})")
+                logger.debug(f"Found BSR in {where}: {bsr_value} (pattern: {pattern.pattern[:50]})")
                 return bsr_value
     
     return None
@@ -181,6 +381,33 @@ def _extract_from_elements(soup: BeautifulSoup) -> Optional[int]:
     return None
 
 
+def parse_bsr_ocr_text(text: str) -> Optional[int]:
+    """
+    Extract BSR from the OCR text of a product page screenshot
+    
+    Args:
+        text: Text from pytesseract.image_to_string
+        
+    Returns:
+        BSR value (1 to MAX_BSR_VALUE - 1), or None if not found
+    """
+    if not text:
+        return None
+    
+    for pattern in OCR_BSR_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                bsr_value = int(match.group(1).replace(',', ''))
+            except (ValueError, AttributeError):
+                continue
+            if 1 <= bsr_value < MAX_BSR_VALUE:
+                logger.debug(f"Found BSR in OCR text: {bsr_value} (pattern: {pattern.pattern[:50]})")
+                return bsr_value
+    
+    return None
+
+
 def _parse_bsr_number(bsr_str: str) -> Optional[int]:
     """
     Parse BSR number string with strict validation
@@ -0,0 +1,158 @@
+"""
+Date parsing helpers shared by the Sheets layer and the chart service
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, date
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Header rows: titles, authors, links, categories. Date rows start right after them
+HEADER_ROWS = 4
+FIRST_DATE_ROW = HEADER_ROWS + 1
+
+# Format used when a new date row is appended to a worksheet
+SHEET_DATE_FORMAT = '%m/%d/%Y'
+
+
+def parse_date(date_str, log_failures: bool = True):
+    """
+    Parse date string in various formats and return datetime object
+
+    Supports:
+    - YYYY-MM-DD (e.g., '2024-02-06')
+    - M/D/YYYY (e.g., '2/6/2024', '02/06/2024')
+    - MM/DD/YYYY (e.g., '02/06/2024')
+    - M-D-YYYY (e.g., '2-6-2024')
+    - Various other common formats
+
+    Args:
+        date_str: Date string (or datetime, returned as-is)
+        log_failures: Log a warning when the string can't be parsed
+
+    Returns:
+        datetime object or None if parsing fails
+    """
+    if not date_str:
+        return None
+
+    if isinstance(date_str, datetime):
+        return date_str
+
+    date_str = str(date_str).strip()
+
+    if not date_str:
+        return None
+
+    # Try YYYY-MM-DD format first
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d')
+    except ValueError:
+        pass
+
+    # Try M/D/YYYY or MM/DD/YYYY format
+    try:
+        return datetime.strptime(date_str, '%m/%d/%Y')
+    except ValueError:
+        pass
+
+    # Try M/D/YY format (2-digit year)
+    try:
+        parsed = datetime.strptime(date_str, '%m/%d/%y')
+        # Convert 2-digit year to 4-digit (assume 2000s if < 50, else 1900s)
+        if parsed.year < 50:
+            parsed = parsed.replace(year=parsed.year + 2000)
+        else:
+            parsed = parsed.replace(year=parsed.year + 1900)
+        return parsed
+    except ValueError:
+        pass
+
+    # Try M-D-YYYY format
+    try:
+        return datetime.strptime(date_str, '%m-%d-%Y')
+    except ValueError:
+        pass
+
+    # Try DD/MM/YYYY format (European)
+    try:
+        return datetime.strptime(date_str, '%d/%m/%Y')
+    except ValueError:
+        pass
+
+    if log_failures:
+        logger.warning(f"Could not parse date: {date_str}")
+    return None
+
+
+def date_key(value: Union[str, date, datetime, None]) -> Optional[str]:
+    """
+    Normalized YYYY-MM-DD key for a date cell or date object
+
+    Returns:
+        Key string, or None if the value is not a date
+    """
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    parsed = parse_date(value, log_failures=False)
+    return parsed.strftime('%Y-%m-%d') if parsed else None
+
+
+@dataclass
+class DateRowIndex:
+    """
+    Normalized date -> worksheet row lookup for a transposed worksheet
+
+    Built once from column A of a snapshot; appending a date row is O(1).
+    Rows are 1-based. If a date appears twice, the first row wins (same as the
+    old top-down scan).
+    """
+    rows: Dict[str, int] = field(default_factory=dict)
+    row_count: int = 0  # Rows in the worksheet (headers included)
+
+    @classmethod
+    def from_values(cls, all_values: List[List[str]]) -> 'DateRowIndex':
+        """Build the index from gspread get_all_values() output"""
+        dates = [row[0] if row else '' for row in all_values[FIRST_DATE_ROW - 1:]]
+        index = cls.from_dates(dates, FIRST_DATE_ROW)
+        index.row_count = len(all_values)
+        return index
+
+    @classmethod
+    def from_dates(cls, dates: List[str], start_row: int) -> 'DateRowIndex':
+        """
+        Build the index from a slice of column A
+
+        Args:
+            dates: Date cells, dates[0] being worksheet row start_row
+            start_row: 1-based worksheet row of the first cell
+        """
+        index = cls(row_count=start_row - 1 + len(dates))
+        for offset, cell in enumerate(dates):
+            key = date_key(cell)
+            if key:
+                index.rows.setdefault(key, start_row + offset)
+        return index
+
+    def get(self, value: Union[str, date, datetime]) -> Optional[int]:
+        """Row for a date (any format parse_date accepts), or None"""
+        key = date_key(value)
+        return self.rows.get(key) if key else None
+
+    def next_row(self) -> int:
+        """First free row for a new date (never inside the header area)"""
+        return max(self.row_count + 1, FIRST_DATE_ROW)
+
+    def add(self, value: Union[str, date, datetime], row: int):
+        """Record a date written to a row (O(1), used when a date row is appended)"""
+        self.row_count = max(self.row_count, row)
+        key = date_key(value)
+        if key:
+            self.rows.setdefault(key, row)
+
+    def __contains__(self, value) -> bool:
+        return self.get(value) is not None
+
+    def __len__(self) -> int:
+        return len(self.rows)
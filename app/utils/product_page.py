@@ -0,0 +1,145 @@
+"""
+Product page extraction
+Everything we need from an Amazon product page (BSR, category ranks, cover,
+title, author, price, reviews) from one HTML document, parsed once
+"""
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from app.utils.bsr_parser import find_bsr_in_window, parse_bsr_soup, _parse_bsr_number
+
+logger = logging.getLogger(__name__)
+
+# Cover image elements, most specific first
+COVER_SELECTORS = [
+    {'id': 'landingImage'},
+    {'id': 'imgBlkFront'},
+    {'id': 'ebooksImgBlkFront'},
+    {'id': 'main-image'},
+    {'class': 'a-dynamic-image'},
+]
+
+# "#1,234 in Kindle Store" / "1,234 in Crime Fiction" (UK pages drop the #)
+RANK_ENTRY_PATTERN = re.compile(r'#?(\d{1,3}(?:,\d{3})+|\d+)\s+in\s+(.+?)(?=\s+#?(?:\d{1,3}(?:,\d{3})+|\d+)\s+in\s|$)')
+
+
+@dataclass
+class ProductPageResult:
+    """Fields extracted from one product page; None where the page doesn't have them"""
+    bsr: Optional[int] = None
+    category_ranks: List[Dict] = field(default_factory=list)  # [{'rank': 45, 'category': 'Crime Thrillers'}]
+    cover_image: Optional[str] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    price: Optional[str] = None
+    reviews: Optional[str] = None  # As shown, e.g. "1,234 ratings"
+    from_html: bool = True  # False when only the BSR is known (e.g. screenshot OCR)
+
+    @property
+    def review_count(self) -> Optional[int]:
+        match = re.search(r'\d[\d,.]*', self.reviews or '')
+        return int(re.sub(r'[,.]', '', match.group(0))) if match else None
+
+    def to_info(self) -> Dict[str, str]:
+        """Book info dict in the shape AmazonScraper.extract_book_info returns"""
+        info = {
+            'title': self.title,
+            'author': self.author,
+            'cover_image': self.cover_image,
+            'price': self.price,
+            'reviews': self.reviews,
+        }
+        return {key: value for key, value in info.items() if value}
+
+
+def normalize_cover_url(cover_url: str) -> str:
+    """Ask Amazon's image server for the 800px version of a cover"""
+    cover_url = re.sub(r'_SL\d+_', '_SL800_', cover_url)
+    cover_url = re.sub(r'\._AC_[^_]+_', '._AC_SL800_', cover_url)
+    if '_SL' not in cover_url:
+        cover_url = cover_url.replace('._AC_', '._AC_SL800_')
+    cover_url = re.sub(r'_SX\d+_', '_SX800_', cover_url)
+    return cover_url
+
+
+def extract_product_page(html: str) -> ProductPageResult:
+    """
+    Extract every product field from one HTML document (from requests or Playwright)
+
+    Args:
+        html: Product page HTML
+
+    Returns:
+        ProductPageResult (empty if the page can't be parsed)
+    """
+    if not html or len(html) < 100:
+        return ProductPageResult()
+    # Most pages give up their BSR from a raw slice; the tree is still needed for the other fields
+    bsr = find_bsr_in_window(html)
+    try:
+        soup = BeautifulSoup(html, 'lxml')
+    except Exception as e:
+        logger.warning(f"Failed to parse product page: {e}")
+        return ProductPageResult()
+    return extract_product_page_soup(soup, bsr=bsr)
+
+
+def extract_product_page_soup(soup: BeautifulSoup, bsr: Optional[int] = None) -> ProductPageResult:
+    """extract_product_page for a page that is already parsed (bsr: already found by the caller)"""
+    result = ProductPageResult(bsr=bsr or parse_bsr_soup(soup))
+    result.category_ranks = _extract_category_ranks(soup)
+
+    title_elem = soup.find('span', {'id': 'productTitle'})
+    if title_elem:
+        result.title = title_elem.get_text().strip()
+
+    author_elem = (soup.select_one('#bylineInfo .author a')
+                   or soup.find('a', {'class': 'a-link-normal', 'href': re.compile(r'/gp/product/.*author')})
+                   or soup.find('span', {'class': 'author'}))
+    if author_elem:
+        result.author = author_elem.get_text().strip()
+
+    for selector in COVER_SELECTORS:
+        img = soup.find('img', selector)
+        if img and img.get('src'):
+            result.cover_image = normalize_cover_url(img['src'])
+            break
+
+    price_elem = soup.find('span', {'class': 'a-price-whole'})
+    if price_elem:
+        price_fraction = soup.find('span', {'class': 'a-price-fraction'})
+        if price_fraction:
+            result.price = f"{price_elem.get_text()}.{price_fraction.get_text()}"
+
+    review_elem = soup.find('span', {'id': 'acrCustomerReviewText'})
+    if review_elem:
+        result.reviews = review_elem.get_text().strip()
+
+    return result
+
+
+def _extract_category_ranks(soup: BeautifulSoup) -> List[Dict]:
+    """Every "#N in Category" of the Best Sellers Rank section, in page order"""
+    section = soup.find('div', {'id': 'SalesRank'})
+    if section is None:
+        label = soup.find(string=re.compile(r'Best\s+Sellers\s+Rank', re.I))
+        if label is None:
+            return []
+        section = label.find_parent(['li', 'tr', 'div']) or label.parent
+
+    text = ' '.join(section.get_text(' ').split())
+    text = re.sub(r'^.*?Best\s+Sellers\s+Rank\s*:?', '', text, flags=re.I)
+    text = re.sub(r'\(\s*See\s+Top[^)]*\)', ' ', text, flags=re.I)
+    text = ' '.join(text.split())
+
+    ranks = []
+    for match in RANK_ENTRY_PATTERN.finditer(text):
+        rank = _parse_bsr_number(match.group(1))
+        category = match.group(2).strip(' .;,')
+        if rank and category:
+            ranks.append({'rank': rank, 'category': category})
+    return ranks
@@ -0,0 +1,173 @@
+"""
+Screenshot OCR for the Best Sellers Rank
+- preprocess_image: grayscale, upscale and binarize a screenshot (tesseract reads
+  small screen text far better at ~2x with clean black-on-white glyphs)
+- ocr_bsr_from_bytes: OCR an in-memory PNG and parse the rank (runs in worker processes)
+- ocr_bsr_async: the same from async code, in a process pool so the event loop never blocks
+- ocr_screenshot_file: one saved screenshot, for the batch scripts (process_screenshots.py)
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+import config
+from app.utils.bsr_parser import parse_bsr_ocr_text
+
+try:
+    import pytesseract
+    from PIL import Image, ImageOps
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# OCR worker processes (each tesseract call is single-threaded, see _init_worker)
+OCR_WORKERS = getattr(config, 'OCR_WORKERS', 2)
+
+# Block of text (--psm 6) restricted to what a rank line contains: letters for the
+# "Best Sellers Rank ... in Kindle Store" label, digits and the # , . : ( ) around them
+OCR_CHAR_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789#,.:()'
+TESSERACT_CONFIG = getattr(
+    config, 'OCR_TESSERACT_CONFIG',
+    f'--oem 1 --psm 6 -c tessedit_char_whitelist={OCR_CHAR_WHITELIST} -c preserve_interword_spaces=1',
+)
+
+# Screenshots narrower than this are upscaled (at most OCR_MAX_SCALE times)
+OCR_TARGET_WIDTH = 2000
+OCR_MAX_SCALE = 3
+
+
+def _otsu_threshold(histogram) -> int:
+    """Gray level that best separates text from background (Otsu's method)"""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background, weighted_background = 0, 0.0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def preprocess_image(image: 'Image.Image') -> 'Image.Image':
+    """Grayscale, upscale and binarize a screenshot for tesseract"""
+    gray = ImageOps.grayscale(image)
+    if gray.width < OCR_TARGET_WIDTH:
+        scale = min(OCR_MAX_SCALE, OCR_TARGET_WIDTH / gray.width)
+        gray = gray.resize((round(gray.width * scale), round(gray.height * scale)), Image.LANCZOS)
+    gray = ImageOps.autocontrast(gray)
+    threshold = _otsu_threshold(gray.histogram())
+    return gray.point(lambda level: 255 if level > threshold else 0)
+
+
+def ocr_image(image: 'Image.Image') -> Tuple[Optional[int], str]:
+    """BSR and OCR text of a screenshot (already opened)"""
+    text = pytesseract.image_to_string(preprocess_image(image), config=TESSERACT_CONFIG)
+    return parse_bsr_ocr_text(text), text
+
+
+def ocr_bsr_from_bytes(png: bytes) -> Optional[int]:
+    """BSR from an in-memory screenshot (PNG/JPEG bytes); None if OCR finds none"""
+    with Image.open(io.BytesIO(png)) as image:
+        bsr, _ = ocr_image(image)
+    return bsr
+
+
+def ocr_screenshot_file(path: str) -> Dict:
+    """
+    OCR one screenshot file (runs in worker processes; never raises)
+
+    Returns:
+        {'file', 'bsr', 'error', 'seconds'}; error is None when OCR ran, even if it found no BSR
+    """
+    start = time.perf_counter()
+    result = {'file': os.path.basename(path), 'bsr': None, 'error': None}
+    try:
+        with Image.open(path) as image:
+            result['bsr'], _ = ocr_image(image)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _ocr_in_worker(png: bytes) -> Optional[int]:
+    # Some pytesseract errors can't be unpickled in the parent (and would break the pool)
+    try:
+        return ocr_bsr_from_bytes(png)
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _init_worker():
+    # One thread per tesseract call; the pool provides the parallelism
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def make_ocr_executor(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for OCR (workers=None: one per core)
+
+    Spawned rather than forked, so workers don't inherit the browser's threads.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+    )
+
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """Process pool for the scraper's OCR (OCR_WORKERS processes)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = make_ocr_executor(OCR_WORKERS)
+        return _executor
+
+
+def _discard_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def ocr_bsr_async(png: bytes) -> Optional[int]:
+    """ocr_bsr_from_bytes in the OCR process pool (never blocks the event loop)"""
+    if not OCR_AVAILABLE:
+        logger.debug("OCR not available (pytesseract/PIL not installed)")
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_ocr_executor(), _ocr_in_worker, png)
+    except BrokenProcessPool as e:
+        _discard_executor()
+        logger.warning(f"OCR worker died, starting a new pool: {e}")
+        return None
+    except Exception as e:
+        logger.warning(f"Error extracting BSR from screenshot: {e}")
+        return None
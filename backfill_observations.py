@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script pentru a popula baza SQLite de observații BSR din Google Sheets
+Citește fiecare worksheet o singură dată (get_all_values) și îl rescrie complet în store
+"""
+import argparse
+import sys
+import time
+
+from app.services.sheets_service import get_sheets_manager
+from app.services.observation_store import ObservationStore, OBSERVATION_DB_PATH
+from app.services.sheets_quota import set_default_priority, PRIORITY_BATCH
+
+# Worksheet-uri ignorate (la fel ca în /api/worksheets)
+SKIPPED_WORKSHEETS = ['Sheet1', 'Sheet3']
+
+
+def backfill(worksheet_names=None, db_path=OBSERVATION_DB_PATH):
+    """
+    Copiază istoricul BSR și coloana AVG din worksheet-uri în store
+
+    Returnează: True dacă toate worksheet-urile au fost importate
+    """
+    manager = get_sheets_manager()
+    store = ObservationStore(db_path)
+    if not worksheet_names:
+        worksheet_names = [ws for ws in manager.get_all_worksheets() if ws not in SKIPPED_WORKSHEETS]
+
+    print(f"📦 Bază de date: {db_path}")
+    print(f"📋 Worksheet-uri de importat: {len(worksheet_names)}")
+    print()
+
+    imported = 0
+    for i, worksheet_name in enumerate(worksheet_names, 1):
+        print(f"[{i}/{len(worksheet_names)}] {worksheet_name}")
+        try:
+            start = time.time()
+            values = manager.get_all_values(worksheet_name, fresh=True)
+            count = store.replace_worksheet(worksheet_name, values)
+            print(f"   ✅ {count:,} observații din {len(values)} rânduri ({time.time() - start:.2f}s)")
+            imported += 1
+        except Exception as e:
+            print(f"   ❌ Eroare: {e}")
+
+    print()
+    print(f"✅ Importate {imported}/{len(worksheet_names)} worksheet-uri")
+    return imported == len(worksheet_names)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Populează store-ul SQLite de observații BSR din Google Sheets')
+    parser.add_argument('--worksheet', '-w', action='append',
+                        help='Worksheet de importat (poate fi folosit de mai multe ori; implicit toate)')
+    parser.add_argument('--db', default=OBSERVATION_DB_PATH,
+                        help=f'Fișierul bazei de date (implicit: {OBSERVATION_DB_PATH})')
+    args = parser.parse_args()
+
+    set_default_priority(PRIORITY_BATCH)
+    success = backfill(args.worksheet, db_path=args.db)
+    sys.exit(0 if success else 1)
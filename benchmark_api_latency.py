@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: p50/p99 latency of the dashboard read path
+/api/books, /api/rankings and /api/chart-data served from parsed worksheet values vs the SQLite observation store
+
+Usage:
+    # In-process, synthetic worksheet (no server, no Google Sheets)
+    python benchmark_api_latency.py --days 365 --books 40 --requests 50
+
+    # Against a running server; run once with OBSERVATION_STORE_ENABLED=false (before) and once with true (after)
+    python benchmark_api_latency.py --base-url http://localhost:5001 --worksheet "Crime Fiction - US" --label before
+
+    # Load test: 16 requests in flight per endpoint (wall time close to the sum means requests serialize)
+    python benchmark_api_latency.py --base-url http://localhost:5001 --concurrency 16
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.services.observation_store import ObservationStore
+from app.utils.bsr_matrix import BSRMatrix
+from benchmark_bsr_matrix import build_synthetic_sheet
+
+ENDPOINTS = ['/api/books', '/api/rankings', '/api/chart-data']
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of seconds"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def measure(func, count: int):
+    """Latency samples (seconds) of count calls"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name: str, samples):
+    print(f"{name:44s} p50 {percentile(samples, 50) * 1000:9.1f} ms   p99 {percentile(samples, 99) * 1000:9.1f} ms")
+
+
+def rank(books):
+    """Ordering done by /api/rankings (books with a BSR first, lowest BSR first)"""
+    with_bsr = sorted((b for b in books if b['current_bsr'] is not None), key=lambda b: b['current_bsr'])
+    return with_bsr + [b for b in books if b['current_bsr'] is None]
+
+
+def run_http(args):
+    """Time the real endpoints of a running server"""
+    session = requests.Session()
+    params = {'worksheet': args.worksheet} if args.worksheet else {}
+    print(f"Server: {args.base_url} ({args.label}), {args.requests} requests per endpoint")
+    for endpoint in ENDPOINTS:
+        url = args.base_url.rstrip('/') + endpoint
+        session.get(url, params=params, timeout=300).raise_for_status()  # Warm-up (first sync, caches)
+
+        def call():
+            response = session.get(url, params=params, timeout=300)
+            response.raise_for_status()
+
+        report(f"[{args.label}] {endpoint}", measure(call, args.requests))
+
+
+def run_load(args):
+    """Fire concurrent requests at each endpoint; speedup ~1.0 means the server serializes them"""
+    params = {'worksheet': args.worksheet} if args.worksheet else {}
+    print(f"Server: {args.base_url} ({args.label}), {args.requests} requests per endpoint, {args.concurrency} in flight")
+    for endpoint in ENDPOINTS:
+        url = args.base_url.rstrip('/') + endpoint
+
+        def call(_=None):
+            start = time.perf_counter()
+            requests.get(url, params=params, timeout=300).raise_for_status()
+            return time.perf_counter() - start
+
+        call()  # Warm-up
+        single = percentile(measure(call, 5), 50)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            samples = list(executor.map(call, range(args.requests)))
+        wall = time.perf_counter() - start
+        report(f"[{args.label}] {endpoint}", samples)
+        print(f"{'':44s} {args.requests / wall:.1f} req/s, speedup x{args.requests * single / wall:.1f} "
+              f"over one at a time")
+
+
+def run_synthetic(args):
+    """Time the service-level read path on a synthetic worksheet"""
+    print(f"Building synthetic sheet: {args.days} days x {args.books} books...")
+    sheet = build_synthetic_sheet(args.days, args.books)
+    directory = tempfile.mkdtemp()
+    try:
+        store = ObservationStore(os.path.join(directory, 'observations.db'))
+        start = time.perf_counter()
+        count = store.replace_worksheet('Synthetic', sheet)
+        print(f"Backfilled {count:,} observations in {time.perf_counter() - start:.2f}s")
+
+        matrix = BSRMatrix.from_values(sheet)
+        before = matrix.books_history()
+        after = store.get_books_history('Synthetic')
+        assert [b['current_bsr'] for b in before] == [b['current_bsr'] for b in after], "Current BSR mismatch"
+        assert matrix.avg_history() == store.get_avg_history('Synthetic'), "AVG history mismatch"
+
+        print("=" * 80)
+        # Before: every change to the worksheet means parsing all values again
+        report('[before] /api/books (parse values)', measure(
+            lambda: BSRMatrix.from_values(sheet).books_history(), args.requests))
+        report('[before] /api/rankings (parse values)', measure(
+            lambda: rank(BSRMatrix.from_values(sheet).books_history()), args.requests))
+        report('[before] /api/chart-data (parse values)', measure(
+            lambda: BSRMatrix.from_values(sheet).avg_history(), args.requests))
+        report('[cached] /api/books (parsed matrix)', measure(matrix.books_history, args.requests))
+        report('[after] /api/books (store, after a write)', measure(
+            lambda: store._load_books_history('Synthetic'), args.requests))
+        report('[after] /api/books (observation store)', measure(
+            lambda: store.get_books_history('Synthetic'), args.requests))
+        report('[after] /api/rankings (observation store)', measure(
+            lambda: rank(store.get_books_history('Synthetic')), args.requests))
+        report('[after] /api/chart-data (observation store)', measure(
+            lambda: store.get_avg_history('Synthetic'), args.requests))
+        print("=" * 80)
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard API read latency (p50/p99)')
+    parser.add_argument('--base-url', help='Time a running server instead of the in-process read path')
+    parser.add_argument('--worksheet', help='Worksheet to request (server mode; default worksheet if omitted)')
+    parser.add_argument('--label', default='run', help='Label printed with server results (e.g. before/after)')
+    parser.add_argument('--days', type=int, default=365, help='Number of date rows (synthetic mode)')
+    parser.add_argument('--books', type=int, default=40, help='Number of book columns (synthetic mode)')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='Requests in flight at once (server mode)')
+    args = parser.parse_args()
+
+    if args.base_url and args.concurrency > 1:
+        run_load(args)
+    elif args.base_url:
+        run_http(args)
+    else:
+        run_synthetic(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: startup and steady-state page times of the persistent browser worker
+vs a cold Playwright start per URL (what the sync wrapper did before the worker)
+
+Usage:
+    # Persistent worker: Chromium starts once, then every URL reuses it
+    python benchmark_browser_worker.py --urls urls.txt
+
+    # Also time the cold path (new event loop, Playwright, Chromium and contexts per URL)
+    python benchmark_browser_worker.py --urls urls.txt --cold 5
+
+    # Set AMAZON_PACING_START_RPM high (and use a fresh AMAZON_EGRESS_ID) to time the browser rather than the pacing
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.browser_pool_refactored import BrowserPool
+from app.services.browser_worker import BrowserWorker
+from benchmark_api_latency import percentile
+
+
+def load_urls(path: str, limit: int = None):
+    with open(path) as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return urls[:limit] if limit else urls
+
+
+def run_worker(urls, timeout: int):
+    """Startup timings, first fetch and steady-state fetch times of one worker"""
+    worker = BrowserWorker()
+    start = time.perf_counter()
+    startup = worker.start()
+    print(f"Startup: {time.perf_counter() - start:.2f}s {startup}")
+
+    errors = 0
+    try:
+        for url in urls:
+            html, error_reason, _ = worker.fetch_sync(url, timeout)
+            errors += int(not html)
+            if error_reason:
+                print(f"  {url}: {error_reason}")
+        return worker.stats(), errors
+    finally:
+        worker.stop()
+
+
+async def cold_fetch(url: str, timeout: int):
+    pool = BrowserPool()
+    try:
+        return await pool.fetch_page(url, timeout)
+    finally:
+        await pool.cleanup()
+
+
+def run_cold(urls, timeout: int):
+    """Seconds per URL when every URL starts its own Playwright and Chromium"""
+    durations = []
+    for url in urls:
+        start = time.perf_counter()
+        asyncio.run(cold_fetch(url, timeout))
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the persistent browser worker')
+    parser.add_argument('--urls', required=True, help='File with one Amazon product URL per line')
+    parser.add_argument('--limit', type=int, help='Use only the first N URLs')
+    parser.add_argument('--timeout', type=int, default=60000, help='Page timeout (ms)')
+    parser.add_argument('--cold', type=int, default=0, metavar='N', help='Also time N URLs with a cold start each')
+    args = parser.parse_args()
+
+    urls = load_urls(args.urls, args.limit)
+    print(f"{len(urls)} URLs")
+    print("=" * 72)
+
+    stats, errors = run_worker(urls, args.timeout)
+    print(f"First fetch: {stats['first_fetch_s']}s")
+    steady = stats.get('steady_state')
+    if steady:
+        print(f"Steady state: {steady['fetches']} fetches, avg {steady['avg_s']}s, "
+              f"p50 {steady['p50_s']}s, p95 {steady['p95_s']}s")
+    print(f"Pages without HTML: {errors}/{len(urls)}")
+
+    if args.cold:
+        durations = run_cold(urls[:args.cold], args.timeout)
+        print("-" * 72)
+        print(f"Cold start per URL: {len(durations)} fetches, avg {sum(durations) / len(durations):.2f}s, "
+              f"p50 {percentile(durations, 50):.2f}s, p95 {percentile(durations, 95):.2f}s")
+    print("=" * 72)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-cell Python parsing vs the columnar BSR matrix
+Uses a synthetic transposed worksheet (default: 5 years of daily rows x 500 books)
+
+Usage:
+    python benchmark_bsr_matrix.py
+    python benchmark_bsr_matrix.py --days 365 --books 40 --repeat 5
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.utils.bsr_matrix import BSRMatrix
+
+
+def build_synthetic_sheet(days: int, books: int, missing_rate: float = 0.1, seed: int = 42):
+    """Build get_all_values()-style rows: 4 header rows, then one row per day"""
+    rng = random.Random(seed)
+    titles = ['Date'] + [f'Book {i}' for i in range(books)] + ['AVG RANKS']
+    authors = [''] + [f'Author {i}' for i in range(books)] + ['']
+    links = [''] + [f'https://www.amazon.com/dp/B{i:09d}' for i in range(books)] + ['']
+    categories = [''] + ['Crime Fiction'] * books + ['']
+    rows = [titles, authors, links, categories]
+
+    start = datetime(2020, 1, 1)
+    for day in range(days):
+        date_str = (start + timedelta(days=day)).strftime('%-m/%-d/%Y')
+        values = []
+        for _ in range(books):
+            values.append('' if rng.random() < missing_rate else f'{rng.randint(1, 2000000):,}')
+        numeric = [int(v.replace(',', '')) for v in values if v]
+        avg = f'{sum(numeric) / len(numeric):,.2f}' if numeric else ''
+        rows.append([date_str] + values + [avg])
+    return rows
+
+
+def legacy_bsr_history(all_values):
+    """Per-cell parse used by get_bsr_history before the matrix"""
+    titles, authors, links = all_values[0], all_values[1], all_values[2]
+    books_data = []
+    for col_idx in range(1, len(titles)):
+        title = titles[col_idx].strip()
+        if not title or title.startswith('>>>') or title.upper() in ['AVG RANKS', 'AVERAGE']:
+            continue
+        link = links[col_idx].strip() if col_idx < len(links) else ''
+        if not link:
+            continue
+        bsr_history = []
+        current_bsr = None
+        for row_idx in range(4, len(all_values)):
+            if col_idx < len(all_values[row_idx]):
+                bsr_str = all_values[row_idx][col_idx].strip()
+                if bsr_str and bsr_str.replace(',', '').isdigit():
+                    bsr_value = int(bsr_str.replace(',', ''))
+                    bsr_history.append({'date': all_values[row_idx][0], 'bsr': bsr_value})
+                    current_bsr = bsr_value
+        books_data.append({
+            'name': title,
+            'author': authors[col_idx].strip(),
+            'bsr_history': bsr_history,
+            'current_bsr': current_bsr
+        })
+    return books_data
+
+
+def matrix_bsr_history(all_values):
+    """Same output built from the matrix"""
+    matrix = BSRMatrix.from_values(all_values)
+    current = matrix.current_bsr()
+    return [
+        {
+            'name': book.name,
+            'author': book.author,
+            'bsr_history': matrix.history(idx),
+            'current_bsr': current[idx]
+        }
+        for idx, book in enumerate(matrix.books)
+    ]
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    """Best wall time of several runs (seconds)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BSR matrix parsing')
+    parser.add_argument('--days', type=int, default=5 * 365, help='Number of date rows')
+    parser.add_argument('--books', type=int, default=500, help='Number of book columns')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    print(f"Building synthetic sheet: {args.days} days x {args.books} books...")
+    sheet = build_synthetic_sheet(args.days, args.books)
+
+    legacy = legacy_bsr_history(sheet)
+    vectorized = matrix_bsr_history(sheet)
+    assert [b['bsr_history'] for b in legacy] == [b['bsr_history'] for b in vectorized], "History mismatch"
+    assert [b['current_bsr'] for b in legacy] == [b['current_bsr'] for b in vectorized], "Current BSR mismatch"
+
+    matrix = BSRMatrix.from_values(sheet)
+    results = [
+        ('legacy get_bsr_history loop', timed(legacy_bsr_history, sheet, repeat=args.repeat)),
+        ('BSRMatrix.from_values', timed(BSRMatrix.from_values, sheet, repeat=args.repeat)),
+        ('matrix get_bsr_history', timed(matrix_bsr_history, sheet, repeat=args.repeat)),
+        ('matrix current_bsr', timed(matrix.current_bsr, repeat=args.repeat)),
+        ('matrix row_averages', timed(matrix.row_averages, repeat=args.repeat)),
+        ('matrix avg_history', timed(matrix.avg_history, repeat=args.repeat)),
+    ]
+
+    print("=" * 60)
+    print(f"Matrix shape: {matrix.bsr.shape}, {matrix.bsr.nbytes / 1024 / 1024:.1f} MB int32")
+    for name, seconds in results:
+        print(f"{name:32s} {seconds * 1000:10.1f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark and regression check for the BSR extractors
+Runs parse_bsr, alternative_scraper._extract_bsr_from_html and the screenshot OCR regexes
+over a labelled corpus of product pages (tests/fixtures/bsr_corpus) and reports
+pages/sec, p50/p99 latency, peak memory and accuracy
+
+Corpus format: gzipped fixtures plus manifest.json, one entry per fixture:
+    {"file": "uk_salesrank_div.html.gz", "kind": "html", "label": "uk", "expected_bsr": 1726}
+kind is "html" (a product page) or "ocr" (tesseract text of a page screenshot);
+label is us, uk, captcha, no_rank or category_only; expected_bsr is null when the page has no BSR.
+
+Usage:
+    python benchmark_bsr_parser.py
+    python benchmark_bsr_parser.py --repeat 20 --only parse_bsr
+
+    # Add a saved page to the corpus (label it with the rank shown on Amazon)
+    python benchmark_bsr_parser.py --add saved_page.html --expected 12345 --label us
+"""
+import argparse
+import gzip
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.services.alternative_scraper import _extract_bsr_from_html
+from app.utils.bsr_parser import get_parse_stats, parse_bsr, parse_bsr_ocr_text, reset_parse_stats
+from benchmark_api_latency import percentile
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'tests' / 'fixtures' / 'bsr_corpus'
+LABELS = ('us', 'uk', 'captcha', 'no_rank', 'category_only')
+
+# name -> (corpus kind it reads, extractor)
+EXTRACTORS: Dict[str, tuple] = {
+    'parse_bsr': ('html', parse_bsr),
+    'alternative_scraper': ('html', _extract_bsr_from_html),
+    'ocr_regexes': ('ocr', parse_bsr_ocr_text),
+}
+
+
+@dataclass
+class CorpusPage:
+    """One labelled fixture"""
+    name: str
+    kind: str
+    label: str
+    expected_bsr: Optional[int]
+    content: bytes
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR, kind: Optional[str] = None) -> List[CorpusPage]:
+    """Fixtures listed in the corpus manifest, decompressed (optionally only one kind)"""
+    manifest = json.loads((corpus_dir / 'manifest.json').read_text())
+    pages = []
+    for entry in manifest:
+        if kind and entry['kind'] != kind:
+            continue
+        pages.append(CorpusPage(
+            name=entry['file'].split('.')[0],
+            kind=entry['kind'],
+            label=entry['label'],
+            expected_bsr=entry['expected_bsr'],
+            content=gzip.decompress((corpus_dir / entry['file']).read_bytes()),
+        ))
+    return pages
+
+
+def add_to_corpus(path: str, expected_bsr: Optional[int], label: str, kind: str = 'html',
+                  corpus_dir: Path = CORPUS_DIR) -> str:
+    """Compress a saved page (or OCR text) into the corpus and list it in the manifest"""
+    if label not in LABELS:
+        raise ValueError(f"label must be one of {LABELS}")
+    source = Path(path)
+    filename = f"{source.stem}.{'html' if kind == 'html' else 'txt'}.gz"
+    (corpus_dir / filename).write_bytes(gzip.compress(source.read_bytes(), mtime=0))
+
+    manifest_path = corpus_dir / 'manifest.json'
+    manifest = [entry for entry in json.loads(manifest_path.read_text()) if entry['file'] != filename]
+    manifest.append({'file': filename, 'kind': kind, 'label': label, 'expected_bsr': expected_bsr})
+    manifest_path.write_text(json.dumps(manifest, indent=2) + '\n')
+    return filename
+
+
+def run_extractor(extract: Callable, pages: List[CorpusPage], repeat: int) -> Dict:
+    """Time extract over the corpus `repeat` times, then measure one pass under tracemalloc"""
+    inputs = [page.text for page in pages]
+    results = [extract(text) for text in inputs]  # Warm-up; also the answers checked for accuracy
+
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in inputs:
+            call_start = time.perf_counter()
+            extract(text)
+            samples.append(time.perf_counter() - call_start)
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    for text in inputs:
+        extract(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    misses = [
+        (page, result) for page, result in zip(pages, results)
+        if result != page.expected_bsr
+    ]
+    return {
+        'pages': len(pages),
+        'pages_per_sec': len(samples) / wall if wall else 0.0,
+        'p50': percentile(samples, 50),
+        'p99': percentile(samples, 99),
+        'peak_mb': peak / 1024 / 1024,
+        'accuracy': 1 - len(misses) / len(pages) if pages else 0.0,
+        'misses': misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BSR extractors on the labelled page corpus')
+    parser.add_argument('--corpus', default=str(CORPUS_DIR), help='Corpus directory (with manifest.json)')
+    parser.add_argument('--repeat', type=int, default=10, help='Passes over the corpus per extractor')
+    parser.add_argument('--only', choices=sorted(EXTRACTORS), action='append', help='Extractor(s) to run')
+    parser.add_argument('--add', metavar='FILE', help='Add a saved page (or OCR text) to the corpus and exit')
+    parser.add_argument('--expected', type=int, help='BSR shown on the page being added (omit if it has none)')
+    parser.add_argument('--label', choices=LABELS, help='Label of the page being added')
+    parser.add_argument('--kind', choices=['html', 'ocr'], default='html', help='Kind of the file being added')
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus)
+    if args.add:
+        if not args.label:
+            parser.error('--add needs --label')
+        filename = add_to_corpus(args.add, args.expected, args.label, args.kind, corpus_dir)
+        print(f"Added {filename} (expected BSR: {args.expected}) to {corpus_dir}")
+        return
+
+    corpus = load_corpus(corpus_dir)
+    print(f"Corpus: {corpus_dir} ({len(corpus)} fixtures), {args.repeat} passes per extractor")
+    print("=" * 96)
+    print(f"{'extractor':22s} {'pages':>5s} {'pages/s':>10s} {'p50 ms':>9s} {'p99 ms':>9s} {'peak MB':>8s} {'accuracy':>9s}")
+    misses = []
+    for name in args.only or EXTRACTORS:
+        kind, extract = EXTRACTORS[name]
+        pages = [page for page in corpus if page.kind == kind]
+        if not pages:
+            print(f"{name:22s} (no {kind} fixtures)")
+            continue
+        reset_parse_stats()
+        stats = run_extractor(extract, pages, args.repeat)
+        print(f"{name:22s} {stats['pages']:5d} {stats['pages_per_sec']:10.1f} {stats['p50'] * 1000:9.2f} "
+              f"{stats['p99'] * 1000:9.2f} {stats['peak_mb']:8.1f} {stats['accuracy']:9.0%}")
+        if name == 'parse_bsr':
+            print(f"{'':22s} tiers: {get_parse_stats()['tiers']}")
+        misses += [(name, page, result) for page, result in stats['misses']]
+    print("=" * 96)
+
+    for name, page, result in misses:
+        print(f"✗ {name}: {page.name} ({page.label}) expected {page.expected_bsr}, got {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,13 @@ Script to calculate and update average BSR for all dates in Google Sheets
 Extracts all data from all columns and generates averages in the table
 """
 import sys
+import argparse
 import logging
+from typing import Optional
+import numpy as np
 from google_sheets_transposed import GoogleSheetsManager
+from app.services.sheets_quota import set_default_priority, PRIORITY_BATCH
+from app.utils.bsr_matrix import AVG_METHODS
 import config
 from datetime import datetime
 
@@ -78,26 +83,15 @@ def calculate_all_averages(worksheet_name: str = 'Crime Fiction - US'):
         skipped_count = 0
         error_count = 0
         
-        # Date rows start from row 5 (index 4)
-        for row_idx in range(4, len(all_values)):
-            row_num = row_idx + 1  # Convert to 1-based
-            
-            # Check if this row has a date in column A
-            date_cell = all_values[row_idx][0].strip() if len(all_values[row_idx]) > 0 else ''
-            
-            # Skip if no date (empty row or header)
-            if not date_cell:
-                continue
-            
-            # Try to parse date to verify it's a date row
-            # Dates can be in various formats: M/D/YYYY, MM/DD/YYYY, etc.
-            is_date_row = False
-            if '/' in date_cell or '-' in date_cell:
-                # Likely a date
-                is_date_row = True
-            
-            if not is_date_row:
+        # Date rows come from the normalized date index (any supported date format)
+        date_index = sheets_manager.get_date_index(worksheet_name)
+        logger.info(f"Found {len(date_index)} date rows")
+        
+        for row_num in sorted(date_index.rows.values()):
+            row_idx = row_num - 1  # Convert to 0-based
+            if row_idx >= len(all_values):
                 continue
+            date_cell = all_values[row_idx][0].strip()
             
             # Collect BSR values from all book columns for this row
             bsr_values = []
@@ -144,9 +138,101 @@ def calculate_all_averages(worksheet_name: str = 'Crime Fiction - US'):
         raise
 
 
+def _format_avg(value: float) -> str:
+    return '' if np.isnan(value) else f"{value:.2f}"
+
+
+def calculate_all_averages_bulk(worksheet_name: str = 'Crime Fiction - US', method: str = 'mean',
+                                min_books: int = 1, trim: float = 0.1, dry_run: bool = False,
+                                sheets_manager: Optional[GoogleSheetsManager] = None) -> int:
+    """
+    Recompute the AVG column for every date row in one vectorized pass
+
+    Reads the worksheet once, computes the statistic for all rows at once and
+    writes the changed rows back as a single column range.
+
+    Args:
+        worksheet_name: Name of the worksheet to process
+        method: 'mean', 'median' or 'trimmed'
+        min_books: Rows with fewer BSR values get an empty AVG cell
+        trim: Share cut from each end for the trimmed mean
+        dry_run: Only log the rows that would change
+
+    Returns:
+        Number of rows whose AVG changed (or would change)
+    """
+    if sheets_manager is None:
+        sheets_manager = GoogleSheetsManager(
+            config.GOOGLE_SHEETS_CREDENTIALS_PATH,
+            config.GOOGLE_SHEETS_SPREADSHEET_ID
+        )
+
+    matrix = sheets_manager.get_bsr_matrix(worksheet_name)
+    if matrix.avg_col is None:
+        raise ValueError(f"No AVG column found in {worksheet_name}")
+    if not matrix.books:
+        logger.error("No books found in Google Sheets")
+        return 0
+
+    all_values = sheets_manager.get_all_values(worksheet_name)
+    date_index = sheets_manager.get_date_index(worksheet_name)
+    logger.info(f"Computing {method} over {len(matrix.books)} books and {len(date_index)} date rows "
+                f"(min {min_books} books)")
+
+    new_avg = np.round(matrix.row_statistic(method, min_books=min_books, trim=trim), 2)
+    # Unchanged = same value to the cent, or empty before and after
+    same = np.isclose(new_avg, matrix.avg, rtol=0, atol=0.005) | (np.isnan(new_avg) & np.isnan(matrix.avg))
+
+    changes = {}
+    for row_num in sorted(date_index.rows.values()):
+        idx = matrix.row_index(row_num)
+        if idx is None or same[idx]:
+            continue
+        changes[row_num] = _format_avg(new_avg[idx])
+        old = all_values[row_num - 1][matrix.avg_col - 1] if len(all_values[row_num - 1]) >= matrix.avg_col else ''
+        logger.info(f"Row {row_num} ({matrix.dates[idx]}): {old or '(empty)'} -> {changes[row_num] or '(empty)'}")
+
+    logger.info(f"{len(changes)} of {len(date_index)} rows changed")
+    if not changes or dry_run:
+        return len(changes)
+
+    # One range from the first to the last changed row; rows in between keep their current cell
+    first, last = min(changes), max(changes)
+    column = []
+    for row_num in range(first, last + 1):
+        if row_num in changes:
+            column.append(changes[row_num])
+        else:
+            row = all_values[row_num - 1] if row_num <= len(all_values) else []
+            column.append(row[matrix.avg_col - 1] if len(row) >= matrix.avg_col else '')
+    sheets_manager.write_column(worksheet_name, matrix.avg_col, first, column)
+    return len(changes)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Calculate the average BSR for every date row')
+    parser.add_argument('--worksheet', '-w', default='Crime Fiction - US', help='Worksheet name')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Recompute all rows in memory and write the AVG column in one call')
+    parser.add_argument('--method', choices=AVG_METHODS, default='mean', help='Statistic for --bulk')
+    parser.add_argument('--min-books', type=int, default=1,
+                        help='Minimum BSR values per row for --bulk (fewer leaves the cell empty)')
+    parser.add_argument('--trim', type=float, default=0.1,
+                        help='Share cut from each end for --method trimmed')
+    parser.add_argument('--dry-run', action='store_true', help='With --bulk: only log the rows that would change')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    # Leave the interactive share of the Sheets quota to the dashboard
+    set_default_priority(PRIORITY_BATCH)
     try:
-        calculate_all_averages()
+        if args.bulk:
+            calculate_all_averages_bulk(args.worksheet, method=args.method, min_books=args.min_books,
+                                        trim=args.trim, dry_run=args.dry_run)
+        else:
+            calculate_all_averages(args.worksheet)
         logger.info("✅ All averages calculated and updated successfully!")
     except Exception as e:
         logger.error(f"❌ Error: {e}")
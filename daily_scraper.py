@@ -75,6 +75,9 @@ def run_daily_scrape():
                 logger.warning(f"✗ Could not extract BSR for {book['name']}")
                 failure_count += 1
         
+        # Write all buffered BSR values in one batch call
+        sheets_manager.flush_batch_updates()
+        
         # Summary
         logger.info("=" * 50)
         logger.info("Daily scrape completed")
@@ -12,6 +12,7 @@ from datetime import datetime
 import pytz
 from google_sheets_transposed import GoogleSheetsManager
 from amazon_scraper import AmazonScraper
+from app.services.sheets_quota import set_default_priority, PRIORITY_BATCH
 import config
 import hashlib
 import logging
@@ -310,6 +311,9 @@ if __name__ == '__main__':
     
     args = parser.parse_args()
     
+    # Cererile Sheets ale scriptului lasă cota interactivă pentru dashboard
+    set_default_priority(PRIORITY_BATCH)
+    
     worksheet_names = None
     if args.worksheet:
         worksheet_names = args.worksheet
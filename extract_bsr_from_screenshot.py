@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
 Script pentru extragerea BSR-ului din screenshot-uri Amazon folosind OCR
+Cu mai multe screenshot-uri, OCR-ul rulează în paralel și se afișează o linie JSON per fișier
+(pentru directoare întregi, cu manifest: process_screenshots.py)
 """
 import sys
-import re
+import json
 from pathlib import Path
+from concurrent.futures import as_completed
 import argparse
 
+from app.utils.screenshot_ocr import make_ocr_executor, ocr_image, ocr_screenshot_file
+
 try:
     import pytesseract
     from PIL import Image
@@ -38,31 +43,14 @@ def extract_bsr_from_screenshot(screenshot_path: str) -> int:
         print(f"📸 Processing screenshot: {screenshot_path}")
         print(f"   Image size: {image.size}")
         
-        # Extract text using OCR
+        # Extract text using OCR (same preprocessing and tesseract config as the scraper)
         print("🔍 Extracting text with OCR...")
-        text = pytesseract.image_to_string(image)
+        bsr_value, text = ocr_image(image)
         print(f"   Extracted {len(text)} characters")
         
-        # Search for BSR pattern
-        bsr_patterns = [
-            r'Best\s+Sellers\s+Rank:\s*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-            r'Best\s+Sellers\s+Rank[:\s]*#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle',
-            r'#(\d{1,3}(?:,\d{3})*)\s+in\s+Kindle\s+Store',
-            r'Best\s+Sellers\s+Rank[:\s]*#?(\d{1,3}(?:,\d{3})*)',
-        ]
-        
-        print("\n🔍 Searching for BSR patterns...")
-        for i, pattern in enumerate(bsr_patterns, 1):
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    bsr_str = match.group(1).replace(',', '')
-                    bsr_value = int(bsr_str)
-                    if 1 <= bsr_value < 10000000:
-                        print(f"✅ BSR found with pattern {i}: #{bsr_value:,}")
-                        return bsr_value
-                except (ValueError, AttributeError):
-                    continue
+        if bsr_value:
+            print(f"✅ BSR found: #{bsr_value:,}")
+            return bsr_value
         
         print("❌ BSR not found in OCR text")
         print("\n📋 First 500 characters of extracted text:")
@@ -76,19 +64,41 @@ def extract_bsr_from_screenshot(screenshot_path: str) -> int:
         return None
 
 
+def extract_bsr_batch(screenshot_paths: list, workers: int = None) -> int:
+    """
+    OCR several screenshots in parallel, printing one JSON line per file as it finishes
+    
+    Returns:
+        Number of screenshots with a BSR
+    """
+    found = 0
+    with make_ocr_executor(workers) as executor:
+        futures = [executor.submit(ocr_screenshot_file, path) for path in screenshot_paths]
+        for future in as_completed(futures):
+            result = future.result()
+            found += bool(result['bsr'])
+            print(json.dumps(result), flush=True)
+    return found
+
+
 def main():
     parser = argparse.ArgumentParser(description='Extract BSR from Amazon screenshot using OCR')
-    parser.add_argument('screenshot', help='Path to screenshot image')
+    parser.add_argument('screenshot', nargs='+', help='Path to screenshot image (several: parallel, JSON lines)')
     parser.add_argument('--show-text', action='store_true', help='Show all extracted OCR text')
+    parser.add_argument('--workers', type=int, help='OCR worker processes for several screenshots (default: one per core)')
     
     args = parser.parse_args()
     
+    if len(args.screenshot) > 1:
+        found = extract_bsr_batch(args.screenshot, args.workers)
+        sys.exit(0 if found else 1)
+    
     print("=" * 60)
     print("🔍 EXTRAGERE BSR DIN SCREENSHOT")
     print("=" * 60)
     print()
     
-    bsr = extract_bsr_from_screenshot(args.screenshot)
+    bsr = extract_bsr_from_screenshot(args.screenshot[0])
     
     if bsr:
         print()
@@ -3,15 +3,74 @@ Google Sheets Integration - Transposed Format
 Reads book data from transposed format (books in columns, dates in rows)
 """
 import gspread
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import rowcol_to_a1, absolute_range_name
 from google.oauth2.service_account import Credentials
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Any
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+import atexit
 import logging
+import threading
+import time
 from datetime import datetime
 import config
+from app.utils.bsr_matrix import BSRMatrix, AVG_HEADERS, HEADER_ROWS, avg_history_from_columns
+from app.utils.date_utils import DateRowIndex, SHEET_DATE_FORMAT
+from app.services.sheets_cache import WorksheetMetadata, get_metadata, set_metadata
+from app.services import sheets_read_planner as read_planner
+from app.services.sheets_quota import get_quota_governor
+from app.services.running_average import RunningAverage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How long an unpinned snapshot may be served before it is re-downloaded (seconds)
+SNAPSHOT_TTL = getattr(config, 'SHEETS_SNAPSHOT_TTL', 60)
+
+# Write-behind buffer: flush automatically once a worksheet has this many
+# pending cells, or once the oldest pending cell is this old (seconds)
+BATCH_MAX_UPDATES = getattr(config, 'SHEETS_BATCH_MAX_UPDATES', 100)
+BATCH_MAX_AGE = getattr(config, 'SHEETS_BATCH_MAX_AGE', 120)
+
+# Retries for a whole batch rejected with 429 (exponential backoff from base delay)
+WRITE_RETRY_ATTEMPTS = getattr(config, 'SHEETS_WRITE_RETRY_ATTEMPTS', 5)
+WRITE_RETRY_DELAY = getattr(config, 'SHEETS_WRITE_RETRY_DELAY', 2.0)
+
+# How long the worksheet list and worksheet handles are reused (seconds)
+WORKSHEET_CACHE_TTL = getattr(config, 'SHEETS_WORKSHEET_CACHE_TTL', 300)
+
+# Send every API request through the shared quota governor (app/services/sheets_quota.py)
+QUOTA_GOVERNOR_ENABLED = getattr(config, 'SHEETS_QUOTA_ENABLED', True)
+
+
+@dataclass
+class WorksheetSnapshot:
+    """In-memory copy of a worksheet's values, shared by all read methods"""
+    worksheet_name: str
+    values: List[List[str]]
+    version: int
+    fetched_at: float = field(default_factory=time.time)
+    matrix: Optional[BSRMatrix] = None  # Parsed lazily, dropped on any change
+    date_index: Optional[DateRowIndex] = None  # Built lazily, kept across appended rows
+
+
+@dataclass
+class WorksheetRanges:
+    """Range-scoped reads of a worksheet, used while no full snapshot is loaded"""
+    worksheet_name: str
+    fetched_at: float = field(default_factory=time.time)
+    header: Optional[List[List[str]]] = None  # Rows 1-4
+    tail_index: Optional[DateRowIndex] = None  # Last date rows of column A
+
+
+def _find_avg_col(titles: List[str]) -> Optional[int]:
+    """1-based column of the first AVG header, or None"""
+    for col_idx, title in enumerate(titles):
+        if title.strip().upper() in AVG_HEADERS:
+            return col_idx + 1
+    return None
+
 
 class GoogleSheetsManager:
     def __init__(self, credentials_path: str, spreadsheet_id: str):
@@ -26,7 +85,39 @@ class GoogleSheetsManager:
         self.spreadsheet_id = spreadsheet_id
         self.client = None
         self.spreadsheet = None
+        
+        # Worksheet snapshots (one full read per worksheet per run)
+        self._snapshots: Dict[str, WorksheetSnapshot] = {}
+        self._snapshot_lock = threading.RLock()
+        self._snapshot_pins: Dict[str, int] = {}
+        self._snapshot_version = 0
+        self._snapshot_hits = 0
+        self._snapshot_misses = 0
+        
+        # Range-scoped reads (header rows, date tail, single rows) and worksheet metadata
+        self._ranges: Dict[str, WorksheetRanges] = {}
+        self._metadata: Dict[str, WorksheetMetadata] = {}
+        self._range_reads = 0
+        self._cells_read = 0
+        
+        # Worksheet handles by title, from one spreadsheet metadata read per WORKSHEET_CACHE_TTL
+        self._worksheets: Optional[Dict[str, Any]] = None
+        self._worksheets_fetched_at = 0.0
+        self._worksheets_lock = threading.RLock()
+        self._worksheet_list_reads = 0
+        
+        # Write-behind buffer: {worksheet_name: {(row, col): value}}
+        self._batch_buffer: Dict[str, Dict[Tuple[int, int], Any]] = {}
+        self._batch_queued_at: Dict[str, float] = {}
+        self._batch_lock = threading.RLock()
+        
+        # Running averages of date rows being updated: {(worksheet_name, row): RunningAverage}
+        self._running_averages: Dict[Tuple[str, int], RunningAverage] = {}
+        
         self._connect()
+        
+        # Never lose buffered writes when the process exits
+        atexit.register(self._flush_on_shutdown)
     
     def _connect(self):
         """Establish connection to Google Sheets"""
@@ -40,12 +131,602 @@ class GoogleSheetsManager:
                 scopes=scope
             )
             self.client = gspread.authorize(creds)
+            if QUOTA_GOVERNOR_ENABLED:
+                get_quota_governor().install(self.client)
             self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
             logger.info("Successfully connected to Google Sheets")
         except Exception as e:
             logger.error(f"Failed to connect to Google Sheets: {e}")
             raise
     
+    def _load_worksheets(self, refresh: bool = False) -> Dict[str, Any]:
+        """Worksheet handles by title (one metadata read lists them all)"""
+        with self._worksheets_lock:
+            fresh = (time.time() - self._worksheets_fetched_at) < WORKSHEET_CACHE_TTL
+            if self._worksheets is not None and fresh and not refresh:
+                return self._worksheets
+            
+            worksheets = self.spreadsheet.worksheets()
+            self._worksheet_list_reads += 1
+            self._worksheets = {ws.title: ws for ws in worksheets}
+            self._worksheets_fetched_at = time.time()
+            for ws in worksheets:
+                self._update_metadata(
+                    ws.title,
+                    sheet_id=getattr(ws, 'id', None),
+                    grid_rows=getattr(ws, 'row_count', None),
+                    grid_cols=getattr(ws, 'col_count', None)
+                )
+            logger.debug(f"Listed {len(worksheets)} worksheets")
+            return self._worksheets
+    
+    def _get_worksheet(self, worksheet_name: str):
+        """
+        Cached worksheet handle (no metadata round trip per call)
+        
+        An unknown title re-lists the worksheets once, so sheets added since the
+        last listing are found straight away.
+        
+        Raises:
+            WorksheetNotFound: No worksheet with that title
+        """
+        worksheet = self._load_worksheets().get(worksheet_name)
+        if worksheet is None:
+            worksheet = self._load_worksheets(refresh=True).get(worksheet_name)
+            if worksheet is None:
+                raise WorksheetNotFound(worksheet_name)
+        return worksheet
+    
+    def invalidate_worksheets(self):
+        """Forget the worksheet list and handles (sheets added, renamed or removed)"""
+        with self._worksheets_lock:
+            self._worksheets = None
+            self._worksheets_fetched_at = 0.0
+    
+    def _check_worksheet_error(self, error: Exception):
+        """Drop cached handles when the API says a worksheet or range doesn't exist"""
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if isinstance(error, WorksheetNotFound) or status in (400, 404):
+            self.invalidate_worksheets()
+    
+    def _get_values(self, worksheet_name: str) -> List[List[str]]:
+        """
+        Get all values of a worksheet, served from the in-memory snapshot when possible
+        
+        The returned list is shared with other callers and must not be modified.
+        """
+        return self._get_snapshot(worksheet_name).values
+    
+    def _get_snapshot(self, worksheet_name: str) -> WorksheetSnapshot:
+        """Return a fresh snapshot for the worksheet, downloading it on a miss"""
+        with self._snapshot_lock:
+            snapshot = self._snapshots.get(worksheet_name)
+            if snapshot is not None and self._is_snapshot_fresh(snapshot):
+                self._snapshot_hits += 1
+                return snapshot
+            
+            self._snapshot_misses += 1
+            worksheet = self._get_worksheet(worksheet_name)
+            try:
+                values = worksheet.get_all_values()
+            except APIError as e:
+                self._check_worksheet_error(e)
+                raise
+            self._cells_read += sum(len(row) for row in values)
+            self._apply_pending_writes(worksheet_name, values)
+            self._update_metadata_from_values(worksheet_name, values)
+            self._snapshot_version += 1
+            snapshot = WorksheetSnapshot(
+                worksheet_name=worksheet_name,
+                values=values,
+                version=self._snapshot_version
+            )
+            self._snapshots[worksheet_name] = snapshot
+            logger.debug(f"Loaded snapshot v{self._snapshot_version} for {worksheet_name} ({len(values)} rows)")
+            return snapshot
+    
+    def _apply_pending_writes(self, worksheet_name: str, values: List[List[str]]):
+        """Overlay buffered (not yet flushed) cell writes onto freshly read values"""
+        with self._batch_lock:
+            pending = dict(self._batch_buffer.get(worksheet_name, {}))
+        for (row, col), value in pending.items():
+            if row > len(values):
+                continue
+            row_values = values[row - 1]
+            if col > len(row_values):
+                row_values.extend([''] * (col - len(row_values)))
+            row_values[col - 1] = str(value)
+    
+    def _is_snapshot_fresh(self, snapshot: WorksheetSnapshot) -> bool:
+        """Pinned snapshots never expire, others live for SNAPSHOT_TTL seconds"""
+        if self._snapshot_pins.get(snapshot.worksheet_name):
+            return True
+        return (time.time() - snapshot.fetched_at) < SNAPSHOT_TTL
+    
+    def _patch_snapshot(self, worksheet_name: str, row: int, col: int, value):
+        """
+        Apply a single cell write to the cached snapshot
+        
+        Writes inside the existing grid are patched in place. Writes outside it
+        change the sheet structure, so the snapshot is dropped and re-read.
+        """
+        with self._snapshot_lock:
+            snapshot = self._snapshots.get(worksheet_name)
+            if snapshot is None:
+                return
+            if row > len(snapshot.values):
+                self.invalidate_snapshot(worksheet_name)
+                return
+            row_values = snapshot.values[row - 1]
+            if col > len(row_values):
+                row_values.extend([''] * (col - len(row_values)))
+            row_values[col - 1] = str(value)
+            snapshot.matrix = None
+            if col == 1:
+                snapshot.date_index = None
+    
+    def _append_date_row(self, worksheet_name: str, date_value: str) -> int:
+        """
+        Write a date into the first free row and record it in the cached reads
+        
+        The snapshot (if loaded) and the date indexes are updated in place instead
+        of forcing a re-read.
+        
+        Returns:
+            Row index (1-based) of the new date row
+        """
+        with self._snapshot_lock:
+            index = self._get_row_lookup_index(worksheet_name)
+            new_row = index.next_row()
+            worksheet = self._get_worksheet(worksheet_name)
+            try:
+                worksheet.update_cell(new_row, 1, date_value)
+            except APIError as e:
+                self._check_worksheet_error(e)
+                raise
+            
+            snapshot = self._peek_snapshot(worksheet_name)
+            if snapshot is not None:
+                width = len(snapshot.values[0]) if snapshot.values else 1
+                while len(snapshot.values) < new_row:
+                    snapshot.values.append([''] * width)
+                snapshot.values[new_row - 1][0] = date_value
+                snapshot.matrix = None
+                if snapshot.date_index is not None:
+                    snapshot.date_index.add(date_value, new_row)
+            ranges = self._ranges.get(worksheet_name)
+            if ranges is not None and ranges.tail_index is not None:
+                ranges.tail_index.add(date_value, new_row)
+            
+            self._update_metadata(worksheet_name, max_rows=new_row)
+            return new_row
+    
+    def _get_row_lookup_index(self, worksheet_name: str) -> DateRowIndex:
+        """Full date index when a snapshot is loaded, otherwise the tail of column A"""
+        snapshot = self._peek_snapshot(worksheet_name)
+        if snapshot is not None:
+            return self._get_date_index(snapshot)
+        return self._get_tail_index(worksheet_name)
+    
+    def _get_date_index(self, snapshot: WorksheetSnapshot) -> DateRowIndex:
+        """Date index of a snapshot, built on first use"""
+        if snapshot.date_index is None:
+            snapshot.date_index = DateRowIndex.from_values(snapshot.values)
+        return snapshot.date_index
+    
+    def get_date_index(self, worksheet_name: str) -> DateRowIndex:
+        """
+        Get the normalized date -> row index for a worksheet
+        
+        Accepts every date format chart_service.parse_date understands, so scripts
+        can look up a row directly instead of scanning column A.
+        """
+        with self._snapshot_lock:
+            return self._get_date_index(self._get_snapshot(worksheet_name))
+    
+    def find_date_row(self, date_value, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)') -> Optional[int]:
+        """
+        Row index (1-based) for a date, or None if the worksheet has no such row
+        
+        Args:
+            date_value: Date string (any supported format), date or datetime
+            worksheet_name: Name of the worksheet
+        """
+        return self.get_date_index(worksheet_name).get(date_value)
+    
+    def get_bsr_matrix(self, worksheet_name: str) -> BSRMatrix:
+        """
+        Get the parsed BSR matrix for a worksheet
+        
+        Built once per snapshot in a single vectorized pass and reused until the
+        snapshot changes.
+        """
+        with self._snapshot_lock:
+            snapshot = self._get_snapshot(worksheet_name)
+            if snapshot.matrix is None:
+                snapshot.matrix = BSRMatrix.from_values(snapshot.values)
+            return snapshot.matrix
+    
+    def _peek_snapshot(self, worksheet_name: str) -> Optional[WorksheetSnapshot]:
+        """Return the snapshot if one is loaded and fresh, without downloading it"""
+        with self._snapshot_lock:
+            snapshot = self._snapshots.get(worksheet_name)
+            if snapshot is not None and self._is_snapshot_fresh(snapshot):
+                return snapshot
+            return None
+    
+    def _get_ranges(self, worksheet_name: str) -> WorksheetRanges:
+        """Range reads cached for the worksheet (same freshness rules as snapshots)"""
+        with self._snapshot_lock:
+            ranges = self._ranges.get(worksheet_name)
+            if ranges is None or not self._is_snapshot_fresh(ranges):
+                ranges = WorksheetRanges(worksheet_name=worksheet_name)
+                self._ranges[worksheet_name] = ranges
+            return ranges
+    
+    def _batch_get(self, worksheet_name: str, plan: read_planner.ReadPlan) -> List[List[List[str]]]:
+        """
+        Fetch every range of a read plan with one values_batch_get call
+        
+        Returns:
+            One list of rows per range, in plan order (empty when the range has no values)
+        """
+        ranges = [absolute_range_name(worksheet_name, a1) for a1 in plan.ranges]
+        response = self.spreadsheet.values_batch_get(ranges)
+        results = [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
+        results += [[] for _ in range(len(ranges) - len(results))]
+        
+        cells = sum(len(row) for rows in results for row in rows)
+        self._range_reads += 1
+        self._cells_read += cells
+        logger.debug(f"Read plan '{plan.kind}' for {worksheet_name}: {plan.ranges} ({cells} cells)")
+        return results
+    
+    def _get_metadata(self, worksheet_name: str) -> Optional[WorksheetMetadata]:
+        """Worksheet metadata from this process, falling back to the shared cache"""
+        metadata = self._metadata.get(worksheet_name)
+        if metadata is None:
+            metadata = get_metadata(worksheet_name)
+            if metadata is not None:
+                self._metadata[worksheet_name] = metadata
+        return metadata
+    
+    def _update_metadata(self, worksheet_name: str, **changes):
+        """Merge changes into the worksheet metadata and publish it to the shared cache"""
+        metadata = self._get_metadata(worksheet_name) or WorksheetMetadata(
+            worksheet_name=worksheet_name, max_rows=0, max_cols=0, headers=[]
+        )
+        for name, value in changes.items():
+            setattr(metadata, name, value)
+        self._metadata[worksheet_name] = metadata
+        try:
+            set_metadata(worksheet_name, metadata)
+        except Exception as e:
+            logger.warning(f"Could not cache metadata for {worksheet_name}: {e}")
+    
+    def _update_metadata_from_values(self, worksheet_name: str, values: List[List[str]]):
+        """Record row/column counts and headers of a full worksheet read"""
+        titles = values[0] if values else []
+        self._update_metadata(
+            worksheet_name,
+            max_rows=len(values),
+            max_cols=max((len(row) for row in values), default=0),
+            headers=list(titles),
+            avg_col=_find_avg_col(titles)
+        )
+    
+    def _get_header_rows(self, worksheet_name: str) -> List[List[str]]:
+        """
+        Rows 1-4 of a worksheet
+        
+        Served from the full snapshot when one is loaded, otherwise read on their own.
+        """
+        snapshot = self._peek_snapshot(worksheet_name)
+        if snapshot is not None:
+            return snapshot.values[:HEADER_ROWS]
+        
+        with self._snapshot_lock:
+            ranges = self._get_ranges(worksheet_name)
+            if ranges.header is None:
+                plan = read_planner.plan_header()
+                header = self._batch_get(worksheet_name, plan)[0]
+                ranges.header = header
+                titles = header[0] if header else []
+                metadata = self._get_metadata(worksheet_name)
+                self._update_metadata(
+                    worksheet_name,
+                    max_rows=max(metadata.max_rows if metadata else 0, len(header)),
+                    headers=list(titles),
+                    avg_col=_find_avg_col(titles)
+                )
+            return ranges.header
+    
+    def _get_tail_index(self, worksheet_name: str) -> DateRowIndex:
+        """
+        Date index over the last rows of column A
+        
+        Enough for today's row: the read starts a few rows before the last known
+        date row and is open-ended, so it stays small as the history grows.
+        """
+        with self._snapshot_lock:
+            ranges = self._get_ranges(worksheet_name)
+            if ranges.tail_index is None:
+                metadata = self._get_metadata(worksheet_name)
+                plan = read_planner.plan_tail_dates(metadata)
+                rows = self._batch_get(worksheet_name, plan)[0]
+                if not rows and plan.start_row > read_planner.FIRST_DATE_ROW:
+                    # Rows were removed since the metadata was cached - read the whole date column
+                    plan = read_planner.plan_tail_dates(None)
+                    rows = self._batch_get(worksheet_name, plan)[0]
+                dates = [row[0] if row else '' for row in rows]
+                ranges.tail_index = DateRowIndex.from_dates(dates, plan.start_row)
+                self._update_metadata(worksheet_name, max_rows=ranges.tail_index.row_count)
+            return ranges.tail_index
+    
+    def _get_row_window(self, worksheet_name: str, row: int) -> BSRMatrix:
+        """
+        Parse a single date row together with the header rows
+        
+        Buffered (not yet flushed) writes to the row are included.
+        """
+        header = [list(r) for r in self._get_header_rows(worksheet_name)]
+        header += [[] for _ in range(HEADER_ROWS - len(header))]
+        plan = read_planner.plan_row(row)
+        rows = self._batch_get(worksheet_name, plan)[0]
+        row_values = list(rows[0]) if rows else []
+        
+        with self._batch_lock:
+            pending = {col: value for (r, col), value in self._batch_buffer.get(worksheet_name, {}).items() if r == row}
+        for col, value in pending.items():
+            if col > len(row_values):
+                row_values.extend([''] * (col - len(row_values)))
+            row_values[col - 1] = str(value)
+        
+        return BSRMatrix.from_values(header + ([row_values] if row_values else []), first_row=row)
+    
+    def get_all_values(self, worksheet_name: str, fresh: bool = False) -> List[List[str]]:
+        """
+        Copy of every value in a worksheet
+        
+        Args:
+            worksheet_name: Name of the worksheet
+            fresh: Drop any cached snapshot first (e.g. for a full reconciliation)
+        """
+        if fresh:
+            self.invalidate_snapshot(worksheet_name)
+        return [list(row) for row in self._get_values(worksheet_name)]
+    
+    def read_rows(self, worksheet_name: str, start_row: int, count: int) -> Tuple[List[List[str]], List[List[str]]]:
+        """
+        Read the header rows and up to `count` rows from start_row in one call
+        
+        Always goes to the API (used by the incremental sync).
+        
+        Returns:
+            (header rows, rows) - rows[0] is worksheet row start_row; trailing empty rows are omitted
+        """
+        plan = read_planner.plan_sync_tail(start_row, count)
+        header, rows = self._batch_get(worksheet_name, plan)
+        return header, rows
+    
+    def invalidate_snapshot(self, worksheet_name: Optional[str] = None):
+        """Drop the cached snapshot and range reads for a worksheet (or everything, worksheet list included)"""
+        with self._snapshot_lock:
+            if worksheet_name:
+                self._snapshots.pop(worksheet_name, None)
+                self._ranges.pop(worksheet_name, None)
+            else:
+                self._snapshots.clear()
+                self._ranges.clear()
+                self.invalidate_worksheets()
+    
+    def begin_snapshot_run(self, worksheet_name: str):
+        """
+        Start a run on a worksheet: drop any old snapshot and pin the next one
+        
+        While pinned, the snapshot is shared by every read until the run ends or
+        a structural write (e.g. a new date row) forces a refresh.
+        """
+        with self._snapshot_lock:
+            if not self._snapshot_pins.get(worksheet_name):
+                self.invalidate_snapshot(worksheet_name)
+            self._snapshot_pins[worksheet_name] = self._snapshot_pins.get(worksheet_name, 0) + 1
+    
+    def end_snapshot_run(self, worksheet_name: str):
+        """
+        Unpin the worksheet snapshot so it expires normally again
+        
+        Running averages the run never turned into an AVG cell (an aborted run)
+        are dropped, so no later run resumes from their totals.
+        """
+        with self._snapshot_lock:
+            pins = self._snapshot_pins.get(worksheet_name, 0) - 1
+            if pins > 0:
+                self._snapshot_pins[worksheet_name] = pins
+                return
+            self._snapshot_pins.pop(worksheet_name, None)
+        self.discard_running_averages(worksheet_name)
+    
+    def discard_running_averages(self, worksheet_name: str):
+        """Forget the running averages of a worksheet"""
+        for key in [key for key in self._running_averages if key[0] == worksheet_name]:
+            if self._running_averages.pop(key, None) is not None:
+                logger.info(f"Dropping unfinished running average for {worksheet_name} row {key[1]}")
+    
+    @contextmanager
+    def snapshot_run(self, worksheet_name: str):
+        """Context manager around begin_snapshot_run/end_snapshot_run"""
+        self.begin_snapshot_run(worksheet_name)
+        try:
+            yield self
+        finally:
+            self.end_snapshot_run(worksheet_name)
+    
+    def get_snapshot_stats(self) -> Dict:
+        """Get snapshot hit/miss counters, range read counters and cached versions"""
+        with self._snapshot_lock:
+            total = self._snapshot_hits + self._snapshot_misses
+            return {
+                'hits': self._snapshot_hits,
+                'misses': self._snapshot_misses,
+                'hit_rate': self._snapshot_hits / total if total else 0.0,
+                'range_reads': self._range_reads,
+                'cells_read': self._cells_read,
+                'worksheet_list_reads': self._worksheet_list_reads,
+                'versions': {name: snap.version for name, snap in self._snapshots.items()},
+                'pinned': sorted(self._snapshot_pins.keys())
+            }
+    
+    def _queue_update(self, worksheet_name: str, row: int, col: int, value):
+        """
+        Buffer a cell write and flush automatically when a threshold is reached
+        
+        A later write to the same cell replaces the earlier one.
+        """
+        with self._batch_lock:
+            buffer = self._batch_buffer.setdefault(worksheet_name, {})
+            buffer[(row, col)] = value
+            self._batch_queued_at.setdefault(worksheet_name, time.time())
+            pending = len(buffer)
+            age = time.time() - self._batch_queued_at[worksheet_name]
+        
+        self._patch_snapshot(worksheet_name, row, col, value)
+        
+        if pending >= BATCH_MAX_UPDATES or age >= BATCH_MAX_AGE:
+            logger.info(f"Auto-flushing {pending} buffered updates for {worksheet_name} (age {age:.0f}s)")
+            self.flush_batch_updates(worksheet_name=worksheet_name)
+    
+    def _build_batch_data(self, worksheet_name: str, updates: Dict[Tuple[int, int], Any]) -> List[Dict]:
+        """
+        Turn buffered cells into value ranges, one range per run of adjacent cells in a row
+        
+        e.g. {(5, 2): 10, (5, 3): 20, (5, 4): 30, (5, 1): 15} -> A5:D5
+        """
+        by_row: Dict[int, Dict[int, Any]] = {}
+        for (row, col), value in updates.items():
+            by_row.setdefault(row, {})[col] = value
+        
+        data = []
+        for row in sorted(by_row):
+            cols = sorted(by_row[row])
+            run = [cols[0]]
+            for col in cols[1:] + [None]:
+                if col is not None and col == run[-1] + 1:
+                    run.append(col)
+                    continue
+                a1 = rowcol_to_a1(row, run[0])
+                if len(run) > 1:
+                    a1 = f"{a1}:{rowcol_to_a1(row, run[-1])}"
+                data.append({
+                    'range': absolute_range_name(worksheet_name, a1),
+                    'values': [[by_row[row][c] for c in run]]
+                })
+                if col is not None:
+                    run = [col]
+        return data
+    
+    def _execute_batch(self, body: Dict):
+        """Send one values_batch_update, retrying the whole batch on 429 (rate limit)"""
+        for attempt in range(WRITE_RETRY_ATTEMPTS + 1):
+            try:
+                return self.spreadsheet.values_batch_update(body=body)
+            except APIError as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status != 429 or attempt >= WRITE_RETRY_ATTEMPTS:
+                    raise
+                delay = WRITE_RETRY_DELAY * (2 ** attempt)
+                logger.warning(f"Sheets write quota exceeded (429), retrying batch in {delay:.0f}s "
+                               f"(attempt {attempt + 1}/{WRITE_RETRY_ATTEMPTS})")
+                time.sleep(delay)
+    
+    def flush_batch_updates(self, worksheet_name: Optional[str] = None) -> int:
+        """
+        Commit buffered cell writes with a single values_batch_update per worksheet
+        
+        Args:
+            worksheet_name: Worksheet to flush (None = all worksheets)
+            
+        Returns:
+            Number of cells written
+        """
+        with self._batch_lock:
+            names = [worksheet_name] if worksheet_name else list(self._batch_buffer.keys())
+        
+        written = 0
+        for name in names:
+            with self._batch_lock:
+                updates = self._batch_buffer.pop(name, None)
+                self._batch_queued_at.pop(name, None)
+            if not updates:
+                continue
+            
+            body = {
+                'valueInputOption': 'USER_ENTERED',
+                'data': self._build_batch_data(name, updates)
+            }
+            try:
+                self._execute_batch(body)
+            except Exception as e:
+                # Put the cells back (without overwriting newer writes) so nothing is lost
+                with self._batch_lock:
+                    buffer = self._batch_buffer.setdefault(name, {})
+                    for cell, value in updates.items():
+                        buffer.setdefault(cell, value)
+                    self._batch_queued_at.setdefault(name, time.time())
+                logger.error(f"Error flushing {len(updates)} buffered updates for {name}: {e}")
+                raise
+            
+            written += len(updates)
+            logger.info(f"Flushed {len(updates)} buffered updates for {name} in {len(body['data'])} ranges (1 API call)")
+        
+        return written
+
+    def write_column(self, worksheet_name: str, col: int, start_row: int, values: List[Any]) -> int:
+        """
+        Write consecutive cells of one column as a single range (one API call)
+
+        Buffered writes for the worksheet are flushed first so they can't overwrite the range later.
+
+        Args:
+            worksheet_name: Name of the worksheet
+            col: Column (1-based)
+            start_row: First row (1-based)
+            values: Cell values from start_row down ('' clears a cell)
+
+        Returns:
+            Number of cells written
+        """
+        if not values:
+            return 0
+        self.flush_batch_updates(worksheet_name=worksheet_name)
+
+        a1 = f"{rowcol_to_a1(start_row, col)}:{rowcol_to_a1(start_row + len(values) - 1, col)}"
+        body = {
+            'valueInputOption': 'USER_ENTERED',
+            'data': [{'range': absolute_range_name(worksheet_name, a1), 'values': [[value] for value in values]}]
+        }
+        self._execute_batch(body)
+        self.invalidate_snapshot(worksheet_name)
+        logger.info(f"Wrote {len(values)} cells to {worksheet_name}!{a1} (1 API call)")
+        return len(values)
+
+    def get_pending_updates_count(self, worksheet_name: Optional[str] = None) -> int:
+        """Number of buffered cell writes not yet flushed"""
+        with self._batch_lock:
+            if worksheet_name:
+                return len(self._batch_buffer.get(worksheet_name, {}))
+            return sum(len(updates) for updates in self._batch_buffer.values())
+    
+    def _flush_on_shutdown(self):
+        """atexit hook: flush anything still buffered"""
+        if not self.get_pending_updates_count():
+            return
+        try:
+            logger.info("Flushing buffered Google Sheets updates on shutdown...")
+            self.flush_batch_updates()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered updates on shutdown: {e}")
+    
     def get_all_books(self, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)') -> List[Dict[str, str]]:
         """
         Get all books from Google Sheets (transposed format)
@@ -61,8 +742,8 @@ class GoogleSheetsManager:
             List of dictionaries with book data
         """
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            all_values = worksheet.get_all_values()
+            # Only the header rows are needed
+            all_values = self._get_header_rows(worksheet_name)
             
             if not all_values or len(all_values) < 3:
                 logger.warning("Sheet doesn't have enough rows")
@@ -104,40 +785,34 @@ class GoogleSheetsManager:
     
     def get_today_row(self, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)') -> int:
         """
-        Get the row index for today's date
+        Get the row index for today's date, appending a new date row if needed
         
         Returns:
             Row index (1-based) for today's BSR data
+        
+        Raises:
+            Exception: If the worksheet can't be read or written. There is no fallback
+                row - writing to a guessed row could overwrite the header area.
         """
+        today = datetime.now()
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            all_values = worksheet.get_all_values()
-            
-            # Dates start from row 5 (index 4, after categories row)
-            today = datetime.now().strftime('%-m/%-d/%Y')  # Format: 1/15/2024
-            today_alt = datetime.now().strftime('%m/%d/%Y')  # Format: 01/15/2024
-            today_alt2 = datetime.now().strftime('%#m/%#d/%Y')  # Windows format
-            
-            # Check existing date rows (starting from row 5, index 4)
-            for row_idx in range(4, len(all_values)):
-                if row_idx < len(all_values):
-                    date_cell = all_values[row_idx][0] if len(all_values[row_idx]) > 0 else ''
-                    if date_cell.strip() in [today, today_alt, today_alt2]:
-                        return row_idx + 1  # Convert to 1-based
-            
-            # If not found, add new row
-            new_row = len(all_values) + 1
-            worksheet.update_cell(new_row, 1, datetime.now().strftime('%m/%d/%Y'))
-            logger.info(f"Created new row for date: {datetime.now().strftime('%m/%d/%Y')} at row {new_row}")
-            
-            return new_row
+            # Hold the snapshot lock so parallel workers don't append the same date twice
+            with self._snapshot_lock:
+                row = self._get_row_lookup_index(worksheet_name).get(today)
+                if row is not None:
+                    return row
+                
+                today_str = today.strftime(SHEET_DATE_FORMAT)
+                new_row = self._append_date_row(worksheet_name, today_str)
+                logger.info(f"Created new row for date: {today_str} at row {new_row}")
+                return new_row
             
         except Exception as e:
-            logger.error(f"Error getting today's row: {e}")
-            # Default to row 4 if error
-            return 4
+            logger.error(f"Error getting today's row for {worksheet_name}: {e}")
+            raise
     
-    def update_bsr(self, col: int, row: int, bsr_value: int, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)'):
+    def update_bsr(self, col: int, row: int, bsr_value: int, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)',
+                   batch: bool = True):
         """
         Update BSR value for a specific book
         
@@ -146,80 +821,113 @@ class GoogleSheetsManager:
             row: Row number (1-based) - date row
             bsr_value: BSR value to write
             worksheet_name: Name of the worksheet
+            batch: If True, buffer the write until flush_batch_updates(); if False, write immediately
         """
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            worksheet.update_cell(row, col, bsr_value)
-            logger.info(f"Updated BSR for column {col}, row {row}: {bsr_value}")
+            if batch:
+                self._queue_update(worksheet_name, row, col, bsr_value)
+                logger.info(f"Queued BSR for column {col}, row {row}: {bsr_value}")
+            else:
+                worksheet = self._get_worksheet(worksheet_name)
+                worksheet.update_cell(row, col, bsr_value)
+                self._patch_snapshot(worksheet_name, row, col, bsr_value)
+                logger.info(f"Updated BSR for column {col}, row {row}: {bsr_value}")
+            
+            running = self._running_averages.get((worksheet_name, row))
+            if running is not None:
+                running.add(col, int(bsr_value))
         except Exception as e:
             logger.error(f"Error updating BSR: {e}")
             raise
     
-    def calculate_and_update_average(self, row: int, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)'):
+    def start_running_average(self, row: int, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)') -> RunningAverage:
+        """
+        Keep a running sum and count for a date row as update_bsr writes to it
+        
+        Seeded from the values already in the row, taken from the loaded snapshot
+        (or the header rows and this row). calculate_and_update_average then uses
+        the running totals instead of reading the row again.
+        """
+        if self._peek_snapshot(worksheet_name) is not None:
+            matrix = self.get_bsr_matrix(worksheet_name)
+        else:
+            matrix = self._get_row_window(worksheet_name, row)
+        running = RunningAverage(worksheet_name, row, matrix.avg_col)
+        running.seed(matrix.row_cells(row))
+        self._running_averages[(worksheet_name, row)] = running
+        logger.info(f"Tracking running average for {worksheet_name} row {row} ({running.count} values so far)")
+        return running
+    
+    def calculate_and_update_average(self, row: int, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)',
+                                     batch: bool = True):
         """
         Calculate and update the average BSR for a specific date row
         
+        Buffered BSR writes that have not been flushed yet are included. A row
+        tracked with start_running_average is averaged from its running totals
+        without reading the sheet.
+        
         Args:
             row: Row number (1-based) - date row
             worksheet_name: Name of the worksheet
+            batch: If True, buffer the write until flush_batch_updates(); if False, write immediately
+        
+        Returns:
+            The rounded average, or None if there was nothing to average
         """
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            all_values = worksheet.get_all_values()
-            
-            if row > len(all_values):
+            running = self._running_averages.pop((worksheet_name, row), None)
+            if running is not None:
+                return self._write_average(worksheet_name, row, running.avg_col, running.average(),
+                                           running.count, batch)
+            
+            # Without a loaded snapshot only the header rows and this row are read
+            if self._peek_snapshot(worksheet_name) is not None:
+                matrix = self.get_bsr_matrix(worksheet_name)
+            else:
+                matrix = self._get_row_window(worksheet_name, row)
+            
+            if row > matrix.row_count:
                 logger.warning(f"Row {row} doesn't exist yet")
                 return
             
-            # Get all books to know which columns to check
-            books = self.get_all_books(worksheet_name)
-            if not books:
+            # Book columns come from the same parsed header rows as get_all_books
+            if not matrix.books:
                 logger.warning("No books found, cannot calculate average")
                 return
             
             # Collect BSR values from all book columns for this row
-            bsr_values = []
-            row_idx = row - 1  # Convert to 0-based index
-            
-            for book in books:
-                col_idx = book['col'] - 1  # Convert to 0-based index
-                if row_idx < len(all_values) and col_idx < len(all_values[row_idx]):
-                    bsr_str = all_values[row_idx][col_idx].strip()
-                    if bsr_str and bsr_str.replace(',', '').isdigit():
-                        bsr_value = int(bsr_str.replace(',', ''))
-                        bsr_values.append(bsr_value)
+            bsr_values = matrix.row_values(row)
             
             if not bsr_values:
                 logger.warning(f"No BSR values found for row {row}, cannot calculate average")
                 return
             
-            # Calculate average
-            avg_bsr = sum(bsr_values) / len(bsr_values)
-            avg_bsr_rounded = round(avg_bsr, 2)
-            
-            # Find the average column (usually column A or a column marked "AVG RANKS" or "AVERAGE")
-            # Check column A first (index 0)
-            avg_col = 1  # Column A (1-based)
-            
-            # Check if column A header indicates it's for averages
-            if len(all_values) > 0:
-                header_a = all_values[0][0].strip().upper() if len(all_values[0]) > 0 else ''
-                if header_a not in ['AVG RANKS', 'AVERAGE', 'AVG', 'MEAN']:
-                    # Look for a column with "AVG" or "AVERAGE" in header
-                    headers = all_values[0] if len(all_values) > 0 else []
-                    for col_idx, header in enumerate(headers, start=1):
-                        if header.strip().upper() in ['AVG RANKS', 'AVERAGE', 'AVG', 'MEAN']:
-                            avg_col = col_idx
-                            break
-            
-            # Write average to the average column
-            worksheet.update_cell(row, avg_col, avg_bsr_rounded)
-            logger.info(f"Updated average BSR for row {row}, column {avg_col}: {avg_bsr_rounded} (from {len(bsr_values)} books)")
+            return self._write_average(worksheet_name, row, matrix.avg_col,
+                                       sum(bsr_values) / len(bsr_values), len(bsr_values), batch)
             
         except Exception as e:
             logger.error(f"Error calculating/updating average: {e}")
             raise
     
+    def _write_average(self, worksheet_name: str, row: int, avg_col: Optional[int], avg_bsr: Optional[float],
+                       count: int, batch: bool) -> Optional[float]:
+        """Write a row's average to the AVG column (column A if there is none)"""
+        if avg_bsr is None:
+            logger.warning(f"No BSR values found for row {row}, cannot calculate average")
+            return None
+        avg_bsr_rounded = round(avg_bsr, 2)
+        avg_col = avg_col or 1
+        
+        if batch:
+            self._queue_update(worksheet_name, row, avg_col, avg_bsr_rounded)
+        else:
+            worksheet = self._get_worksheet(worksheet_name)
+            worksheet.update_cell(row, avg_col, avg_bsr_rounded)
+            self._patch_snapshot(worksheet_name, row, avg_col, avg_bsr_rounded)
+        logger.info(f"Updated average BSR for row {row}, column {avg_col}: {avg_bsr_rounded} (from {count} books)")
+        return avg_bsr_rounded
+    
     def get_bsr_history(self, worksheet_name: str = 'Crime Fiction - US @zsh (32-38)') -> List[Dict]:
         """
         Get BSR history for all books (optimized)
@@ -228,68 +936,19 @@ class GoogleSheetsManager:
             List of dictionaries with book data and BSR history
         """
         try:
-            import time
             start_time = time.time()
             
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            all_values = worksheet.get_all_values()
+            # Per-book histories and current BSR are views over the parsed matrix
+            matrix = self.get_bsr_matrix(worksheet_name)
             
             load_time = time.time() - start_time
             logger.info(f"Loaded data from Google Sheets in {load_time:.2f}s")
             
-            if not all_values or len(all_values) < 4:
+            if matrix.row_count < 4:
                 return []
             
-            # Get book info from rows 1-3
-            titles = all_values[0]
-            authors = all_values[1] if len(all_values) > 1 else []
-            links = all_values[2] if len(all_values) > 2 else []
-            
-            books_data = []
             process_start = time.time()
-            
-            # Process each book (column) - optimized
-            for col_idx in range(1, len(titles)):
-                title = titles[col_idx].strip() if col_idx < len(titles) else ''
-                if not title or title.startswith('>>>') or title.upper() in ['AVG RANKS', 'AVERAGE']:
-                    continue
-                
-                author = authors[col_idx].strip() if col_idx < len(authors) else ''
-                link = links[col_idx].strip() if col_idx < len(links) else ''
-                
-                if not title or not link:
-                    continue
-                
-                # Extract BSR values from date rows (starting from row 5, index 4, after categories row)
-                bsr_history = []
-                current_bsr = None
-                
-                # Get category from row 4 (index 3) if available
-                category = ''
-                if len(all_values) > 3 and col_idx < len(all_values[3]):
-                    category = all_values[3][col_idx].strip() if col_idx < len(all_values[3]) else ''
-                
-                # Process rows normally (chronological order) - start from row 5 (index 4)
-                for row_idx in range(4, len(all_values)):
-                    if col_idx < len(all_values[row_idx]):
-                        bsr_str = all_values[row_idx][col_idx].strip()
-                        if bsr_str and bsr_str.replace(',', '').isdigit():
-                            date_str = all_values[row_idx][0] if len(all_values[row_idx]) > 0 else ''
-                            bsr_value = int(bsr_str.replace(',', ''))
-                            bsr_history.append({
-                                'date': date_str,
-                                'bsr': bsr_value
-                            })
-                            current_bsr = bsr_value
-                
-                books_data.append({
-                    'name': title,
-                    'author': author,
-                    'amazon_link': link,
-                    'category': category,
-                    'bsr_history': bsr_history,
-                    'current_bsr': current_bsr
-                })
+            books_data = matrix.books_history()
             
             process_time = time.time() - process_start
             total_time = time.time() - start_time
@@ -305,54 +964,37 @@ class GoogleSheetsManager:
         """
         Get average BSR history from the AVG column in Google Sheets
         
+        Reads only column A and the AVG column unless a full snapshot is loaded.
+        
         Returns:
             List of dictionaries with date and average BSR
         """
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            all_values = worksheet.get_all_values()
-            
-            if not all_values or len(all_values) < 5:
-                return []
-            
-            # Find the AVG column
-            headers = all_values[0] if len(all_values) > 0 else []
-            avg_col = None
-            
-            # Look for AVG column in headers
-            for col_idx, header in enumerate(headers):
-                if header.strip().upper() in ['AVG RANKS', 'AVERAGE', 'AVG', 'MEAN']:
-                    avg_col = col_idx
-                    break
+            if self._peek_snapshot(worksheet_name) is not None:
+                matrix = self.get_bsr_matrix(worksheet_name)
+                if matrix.row_count < 5:
+                    return []
+                avg_col = matrix.avg_col
+            else:
+                self._get_header_rows(worksheet_name)
+                metadata = self._get_metadata(worksheet_name)
+                matrix = None
+                avg_col = metadata.avg_col if metadata else None
             
             if avg_col is None:
                 logger.warning("No AVG column found in Google Sheets")
                 return []
             
-            logger.info(f"Found AVG column at index {avg_col}")
-            
-            # Extract date and average values from date rows (starting from row 5, index 4)
-            avg_history = []
+            logger.info(f"Found AVG column at index {avg_col - 1}")
             
-            for row_idx in range(4, len(all_values)):
-                date_str = all_values[row_idx][0].strip() if len(all_values[row_idx]) > 0 else ''
-                if not date_str:
-                    continue
-                
-                # Get average value from AVG column
-                if avg_col < len(all_values[row_idx]):
-                    avg_str = all_values[row_idx][avg_col].strip()
-                    if avg_str:
-                        # Try to parse as float (remove commas)
-                        avg_str_clean = avg_str.replace(',', '').replace(' ', '')
-                        try:
-                            avg_value = float(avg_str_clean)
-                            avg_history.append({
-                                'date': date_str,
-                                'average_bsr': avg_value
-                            })
-                        except ValueError:
-                            continue
+            # Date rows with a numeric AVG value (starting from row 5, index 4)
+            if matrix is not None:
+                avg_history = matrix.avg_history()
+            else:
+                date_rows, avg_rows = self._batch_get(worksheet_name, read_planner.plan_avg_column(metadata))
+                dates = [row[0] if row else '' for row in date_rows]
+                avg_cells = [row[0] if row else '' for row in avg_rows]
+                avg_history = avg_history_from_columns(dates, avg_cells)
             
             logger.info(f"Extracted {len(avg_history)} average values from AVG column")
             return avg_history
@@ -363,15 +1005,14 @@ class GoogleSheetsManager:
     
     def get_all_worksheets(self) -> List[str]:
         """
-        Get list of all worksheet names in the spreadsheet
+        Get list of all worksheet names in the spreadsheet (cached for WORKSHEET_CACHE_TTL)
         
         Returns:
             List of worksheet names
         """
         try:
-            worksheets = self.spreadsheet.worksheets()
-            worksheet_names = [ws.title for ws in worksheets]
-            logger.info(f"Found {len(worksheet_names)} worksheets: {worksheet_names}")
+            worksheet_names = list(self._load_worksheets())
+            logger.debug(f"Found {len(worksheet_names)} worksheets: {worksheet_names}")
             return worksheet_names
         except Exception as e:
             logger.error(f"Error getting worksheets: {e}")
@@ -1,12 +1,34 @@
 #!/usr/bin/env python3
 """
 Script pentru procesarea tuturor screenshot-urilor Amazon și extragerea BSR-ului
+- OCR în paralel, un proces per core (--workers)
+- Manifest persistent (ocr_results.jsonl în directorul screenshot-urilor): fiecare rezultat
+  e adăugat imediat ce e gata, iar la rularea următoare fișierele deja procesate sunt sărite
+- --write-sheet: BSR-urile recuperate se scriu în Google Sheets, un singur batch per worksheet
 """
 import sys
 import os
+import re
+import json
+import hashlib
+from datetime import datetime
 from pathlib import Path
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import argparse
-import subprocess
+
+from app.services.blocked_registry import registry_key
+from app.utils.amazon_urls import clean_amazon_url
+from app.utils.screenshot_ocr import make_ocr_executor, ocr_screenshot_file
+
+MANIFEST_NAME = 'ocr_results.jsonl'
+
+# amazon_bsr_{timestamp}_{md5(url)[:8]}.png, as the browser pool saves them
+SCREENSHOT_NAME = re.compile(r'^amazon_bsr_(\d+)_([0-9a-f]{8})\.png$')
+
+# Worksheets update_bsr.py leaves out
+EXCLUDED_WORKSHEETS = ('Sheet1', 'Sheet3')
+
 
 def find_screenshots(screenshot_dir: str) -> list:
     """Find all Amazon BSR screenshots in directory"""
@@ -14,129 +36,289 @@ def find_screenshots(screenshot_dir: str) -> list:
     if not dir_path.exists():
         print(f"❌ Directorul nu există: {screenshot_dir}")
         return []
-    
+
     screenshots = list(dir_path.glob('amazon_bsr_*.png'))
     screenshots.sort(key=lambda p: p.stat().st_mtime, reverse=True)  # Most recent first
     return screenshots
 
 
-def process_screenshot(screenshot_path: Path) -> dict:
-    """Process a single screenshot and extract BSR"""
-    print(f"\n{'='*60}")
-    print(f"📸 Procesare: {screenshot_path.name}")
-    print(f"{'='*60}")
-    
+def url_hash(url: str) -> str:
+    """Hash the browser pool puts in screenshot names for a product URL"""
+    return hashlib.md5(clean_amazon_url(url).encode()).hexdigest()[:8]
+
+
+def book_keys(url: str) -> set:
+    """
+    Keys a screenshot of a book's page can be filed under
+
+    The '{domain}:{ASIN}' of the page (screenshots with a .json sidecar), plus the name
+    hashes of the clean URL with and without its trailing slash (older screenshots
+    without a sidecar; the pool hashes whatever URL it was given).
+    """
+    clean_url = clean_amazon_url(url)
+    return {registry_key(url), url_hash(url), hashlib.md5(clean_url.rstrip('/').encode()).hexdigest()[:8]}
+
+
+def record_key(record: Dict) -> Optional[str]:
+    """Book key of a screenshot record: its page's '{domain}:{ASIN}', or the hash in its name"""
+    if record.get('url'):
+        return registry_key(record['url'])
+    return record.get('url_hash')
+
+
+def file_key(screenshot_path: Path) -> str:
+    """Manifest key: a file replaced under the same name is processed again"""
+    stat = screenshot_path.stat()
+    return f"{screenshot_path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def screenshot_info(screenshot_path: Path) -> Dict:
+    """URL hash, page URL and capture time of a screenshot (from its .json sidecar or its name)"""
+    info = {'url': None, 'url_hash': None, 'taken_at': None}
+    match = SCREENSHOT_NAME.match(screenshot_path.name)
+    if match:
+        info['taken_at'] = int(match.group(1))
+        info['url_hash'] = match.group(2)
+
+    sidecar = screenshot_path.with_suffix('.json')
+    if sidecar.exists():
+        try:
+            data = json.loads(sidecar.read_text())
+            info['url'] = data.get('url')
+            info['taken_at'] = int(data.get('taken_at') or info['taken_at'] or 0) or None
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Sidecar invalid {sidecar.name}: {e}")
+
+    if info['taken_at'] is None:
+        info['taken_at'] = int(screenshot_path.stat().st_mtime)
+    return info
+
+
+def load_manifest(manifest_path: Path) -> Dict[str, Dict]:
+    """Manifest records by file key (the last record of a file wins)"""
+    records = {}
+    if not manifest_path.exists():
+        return records
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                records[record['key']] = record
+            except (ValueError, KeyError, TypeError):
+                continue  # Truncated line from an interrupted run
+    return records
+
+
+def pending_screenshots(screenshots: List[Path], manifest: Dict[str, Dict]) -> List[Path]:
+    """Screenshots not in the manifest yet (or whose OCR failed to run, e.g. no tesseract)"""
+    pending = []
+    for screenshot in screenshots:
+        record = manifest.get(file_key(screenshot))
+        if record is None or record.get('error'):
+            pending.append(screenshot)
+    return pending
+
+
+def run_batch(screenshots: List[Path], manifest_path: Path, workers: Optional[int] = None,
+              executor=None, ocr: Callable[[str], Dict] = ocr_screenshot_file) -> Iterator[Dict]:
+    """
+    OCR screenshots in parallel, yielding each record as it finishes
+
+    Every record is appended to the manifest before it is yielded, so an interrupted
+    run keeps what it already did.
+
+    Args:
+        screenshots: Files to process
+        manifest_path: JSONL manifest to append to
+        workers: Worker processes (None = one per core)
+        executor: Executor to use instead of a new process pool
+        ocr: Function run on each path (must be picklable for a process pool)
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = make_ocr_executor(workers)
     try:
-        result = subprocess.run(
-            [sys.executable, 'extract_bsr_from_screenshot.py', str(screenshot_path)],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        if result.returncode == 0:
-            # Extract BSR from output
-            output_lines = result.stdout.split('\n')
-            bsr = None
-            for line in output_lines:
-                if 'BSR EXTRAS:' in line or 'BSR extracted' in line:
-                    # Try to extract number
-                    import re
-                    match = re.search(r'#?(\d{1,3}(?:,\d{3})*)', line)
-                    if match:
-                        bsr_str = match.group(1).replace(',', '')
-                        bsr = int(bsr_str)
-                        break
-            
-            return {
-                'success': True,
-                'bsr': bsr,
-                'screenshot': screenshot_path,
-                'output': result.stdout
-            }
-        else:
-            return {
-                'success': False,
-                'bsr': None,
-                'screenshot': screenshot_path,
-                'error': result.stderr or result.stdout
-            }
-    except subprocess.TimeoutExpired:
-        return {
-            'success': False,
-            'bsr': None,
-            'screenshot': screenshot_path,
-            'error': 'Timeout processing screenshot'
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'bsr': None,
-            'screenshot': screenshot_path,
-            'error': str(e)
-        }
+        futures = {executor.submit(ocr, str(screenshot)): screenshot for screenshot in screenshots}
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            for future in as_completed(futures):
+                screenshot = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # The worker itself died
+                    result = {'bsr': None, 'error': f"{type(e).__name__}: {e}"}
+                record = {'key': file_key(screenshot), 'file': screenshot.name, **screenshot_info(screenshot), **result,
+                          'processed_at': datetime.now().isoformat(timespec='seconds')}
+                manifest.write(json.dumps(record) + '\n')
+                manifest.flush()
+                yield record
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def latest_bsr_by_book_day(records: Iterable[Dict]) -> Dict[tuple, Dict]:
+    """Recovered BSRs keyed by (record_key, date); the latest screenshot of a day wins"""
+    latest = {}
+    for record in records:
+        book = record_key(record)
+        if not record.get('bsr') or not book or not record.get('taken_at'):
+            continue
+        key = (book, datetime.fromtimestamp(record['taken_at']).date())
+        if key not in latest or record['taken_at'] > latest[key]['taken_at']:
+            latest[key] = record
+    return latest
+
+
+def write_to_sheet(sheets_manager, records: Iterable[Dict], worksheet_names: List[str], dry_run: bool = False) -> int:
+    """
+    Write recovered BSRs into the cells that are still empty
+
+    Writes are queued and flushed once per worksheet, together with the new AVG of
+    every row that got a value; dates without a row are skipped (no rows are
+    appended for past days).
+
+    Returns:
+        Number of cells written (or that would be written with dry_run)
+    """
+    latest = latest_bsr_by_book_day(records)
+    if not latest:
+        return 0
+
+    written = 0
+    for worksheet_name in worksheet_names:
+        books = sheets_manager.get_all_books(worksheet_name)
+        matrix = sheets_manager.get_bsr_matrix(worksheet_name)
+        rows = {}
+        touched_rows = set()
+        queued = 0
+        for book in books:
+            if not book.get('amazon_link'):
+                continue
+            keys = book_keys(book['amazon_link'])
+            # A day can have a record under each key (sidecar and name hash): the latest wins
+            days = {}
+            for (key, day), record in latest.items():
+                if key in keys and (day not in days or record['taken_at'] > days[day]['taken_at']):
+                    days[day] = record
+            for day, record in days.items():
+                if day not in rows:
+                    rows[day] = sheets_manager.find_date_row(day, worksheet_name)
+                row = rows[day]
+                if row is None or book['col'] in matrix.row_cells(row):
+                    continue
+                print(f"   📝 {worksheet_name} / {book['name']} ({day}): #{record['bsr']:,}")
+                if not dry_run:
+                    sheets_manager.update_bsr(book['col'], row, record['bsr'], worksheet_name, batch=True)
+                touched_rows.add(row)
+                queued += 1
+
+        if queued and not dry_run:
+            # Averages include the queued values, so they go out in the same flush
+            for row in sorted(touched_rows):
+                sheets_manager.calculate_and_update_average(row, worksheet_name)
+            sheets_manager.flush_batch_updates(worksheet_name)
+        written += queued
+    return written
+
+
+def connect_sheets():
+    """Google Sheets manager from config"""
+    import config
+    from google_sheets_transposed import GoogleSheetsManager
+    return GoogleSheetsManager(
+        config.GOOGLE_SHEETS_CREDENTIALS_PATH,
+        config.GOOGLE_SHEETS_SPREADSHEET_ID
+    )
 
 
 def main():
     parser = argparse.ArgumentParser(description='Process all Amazon BSR screenshots and extract BSR values')
-    parser.add_argument('--dir', default='/tmp/amazon_screenshots', help='Screenshot directory')
+    parser.add_argument('--dir', default=os.getenv('SCREENSHOT_DIR', '/tmp/amazon_screenshots'), help='Screenshot directory')
     parser.add_argument('--limit', type=int, help='Limit number of screenshots to process')
     parser.add_argument('--show-all', action='store_true', help='Show all results, including failures')
-    
+    parser.add_argument('--workers', type=int, help='OCR worker processes (default: one per core)')
+    parser.add_argument('--manifest', help=f'Results manifest (default: <dir>/{MANIFEST_NAME})')
+    parser.add_argument('--reprocess', action='store_true', help='Ignore the manifest and OCR every screenshot again')
+    parser.add_argument('--jsonl', action='store_true', help='Print one JSON line per result on stdout (nothing else)')
+    parser.add_argument('--write-sheet', action='store_true', help='Write recovered BSRs into empty sheet cells')
+    parser.add_argument('--worksheet', action='append', help='Worksheet to write (repeatable; default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='With --write-sheet: only show what would be written')
+
     args = parser.parse_args()
-    
-    print("="*60)
-    print("🔍 PROCESARE SCREENSHOT-URI AMAZON PENTRU BSR")
-    print("="*60)
-    print()
-    
+    say = (lambda *a, **k: print(*a, file=sys.stderr, **k)) if args.jsonl else print
+
+    say("="*60)
+    say("🔍 PROCESARE SCREENSHOT-URI AMAZON PENTRU BSR")
+    say("="*60)
+    say()
+
     screenshots = find_screenshots(args.dir)
-    
+
     if not screenshots:
-        print(f"❌ Nu s-au găsit screenshot-uri în: {args.dir}")
+        say(f"❌ Nu s-au găsit screenshot-uri în: {args.dir}")
         sys.exit(1)
-    
-    print(f"📸 Găsite {len(screenshots)} screenshot-uri")
+
+    say(f"📸 Găsite {len(screenshots)} screenshot-uri")
     if args.limit:
         screenshots = screenshots[:args.limit]
-        print(f"   Limitat la {len(screenshots)} screenshot-uri")
-    print()
-    
+        say(f"   Limitat la {len(screenshots)} screenshot-uri")
+
+    manifest_path = Path(args.manifest) if args.manifest else Path(args.dir) / MANIFEST_NAME
+    manifest = {} if args.reprocess else load_manifest(manifest_path)
+    pending = pending_screenshots(screenshots, manifest)
+    if len(pending) < len(screenshots):
+        say(f"   ⏭️  {len(screenshots) - len(pending)} deja procesate (manifest: {manifest_path})")
+    say(f"   ⚙️  {len(pending)} de procesat cu {args.workers or os.cpu_count()} procese")
+    say()
+
     results = []
-    for i, screenshot in enumerate(screenshots, 1):
-        print(f"\n[{i}/{len(screenshots)}] Procesare: {screenshot.name}")
-        result = process_screenshot(screenshot)
-        results.append(result)
-        
-        if result['success'] and result['bsr']:
-            print(f"✅ BSR extras: #{result['bsr']:,}")
+    for i, record in enumerate(run_batch(pending, manifest_path, args.workers), 1):
+        results.append(record)
+        if args.jsonl:
+            print(json.dumps(record), flush=True)
+        elif record['bsr']:
+            print(f"[{i}/{len(pending)}] ✅ {record['file']}: #{record['bsr']:,} ({record['seconds']}s)")
         elif args.show_all:
-            print(f"❌ Eșec: {result.get('error', 'Unknown error')}")
-    
+            print(f"[{i}/{len(pending)}] ❌ {record['file']}: {record['error'] or 'BSR negăsit'}")
+
     # Summary
-    print("\n" + "="*60)
-    print("📊 REZUMAT")
-    print("="*60)
-    
-    successful = [r for r in results if r['success'] and r['bsr']]
-    failed = [r for r in results if not r['success'] or not r['bsr']]
-    
-    print(f"✅ Succes: {len(successful)}/{len(results)}")
-    print(f"❌ Eșec: {len(failed)}/{len(results)}")
-    
-    if successful:
+    say("\n" + "="*60)
+    say("📊 REZUMAT")
+    say("="*60)
+
+    successful = [r for r in results if r['bsr']]
+    failed = [r for r in results if not r['bsr']]
+
+    say(f"✅ Succes: {len(successful)}/{len(results)}")
+    say(f"❌ Eșec: {len(failed)}/{len(results)}")
+
+    if successful and not args.jsonl:
         print("\n📋 BSR-uri extrase:")
         for r in successful:
-            print(f"   {r['screenshot'].name}: #{r['bsr']:,}")
-    
-    if failed and args.show_all:
+            print(f"   {r['file']}: #{r['bsr']:,}")
+
+    if failed and args.show_all and not args.jsonl:
         print("\n❌ Eșecuri:")
         for r in failed:
-            print(f"   {r['screenshot'].name}: {r.get('error', 'BSR not found')}")
-    
-    print()
-    
-    if successful:
+            print(f"   {r['file']}: {r['error'] or 'BSR not found'}")
+
+    if args.write_sheet:
+        # Everything in the manifest, so BSRs from runs without --write-sheet are written too
+        records = list(load_manifest(manifest_path).values())
+        say("\n📋 Scriere BSR-uri recuperate în Google Sheets...")
+        try:
+            sheets_manager = connect_sheets()
+            worksheet_names = args.worksheet or [ws for ws in sheets_manager.get_all_worksheets()
+                                                 if ws not in EXCLUDED_WORKSHEETS]
+            written = write_to_sheet(sheets_manager, records, worksheet_names, dry_run=args.dry_run)
+            say(f"✅ {'De scris' if args.dry_run else 'Scrise'}: {written} celule")
+        except Exception as e:
+            say(f"❌ Eroare la scrierea în Google Sheets: {e}")
+            sys.exit(1)
+
+    say()
+
+    if successful or not pending:
         sys.exit(0)
     else:
         sys.exit(1)
@@ -144,4 +326,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
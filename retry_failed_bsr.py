@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 """
-Script pentru a identifica cărțile care au eșuat la update BSR din log-uri
-și a re-pornește update-ul doar pentru acele cărți
+Script pentru a identifica cărțile care au eșuat la update BSR și a re-porni
+update-ul doar pentru acele cărți
+- Implicit: cărțile din registrul de cărți blocate (Redis, per ASIN și domeniu),
+  cele a căror oră de re-încercare a venit (--all: toate)
+- --list: afișează registrul (încercări, motiv, când va fi re-încercată fiecare carte)
+- --dispatch: trimite cărțile scadente la Celery, câte un task per carte
+- --from-log: vechea metodă, cărțile eșuate extrase din app.log
 """
 import re
 import sys
@@ -11,6 +16,7 @@ from datetime import datetime
 from pathlib import Path
 from google_sheets_transposed import GoogleSheetsManager
 from amazon_scraper import AmazonScraper
+from app.services.blocked_registry import get_blocked_registry, dispatch_due
 import config
 
 def extract_failed_books_from_logs(log_file_path="app.log", max_lines=10000):
@@ -121,6 +127,59 @@ def extract_failed_books_from_logs(log_file_path="app.log", max_lines=10000):
     print()
     return failed_books
 
+def extract_failed_books_from_registry(include_pending=False):
+    """
+    Extrage cărțile eșuate din registrul de cărți blocate
+    
+    Args:
+        include_pending: Dacă True, și cărțile a căror oră de re-încercare nu a venit încă
+    
+    Returnează: dict cu {worksheet_name: [list of amazon_urls]}
+    """
+    failed_books = {}
+    without_worksheet = 0
+    now = time.time()
+    
+    print("📋 Citire registru cărți blocate...")
+    print()
+    
+    for book in get_blocked_registry().list_blocked(limit=5000):
+        if not include_pending and book.retry_at > now:
+            continue
+        if not book.worksheet:
+            without_worksheet += 1
+            continue
+        failed_books.setdefault(book.worksheet, []).append(book.url)
+        print(f"   ❌ {book.worksheet} - {book.url} ({book.attempts} încercări, {book.reason})")
+    
+    if without_worksheet:
+        print(f"   ⚠️  {without_worksheet} cărți fără worksheet (se re-încearcă doar cu --dispatch)")
+    print()
+    return failed_books
+
+def print_blocked_registry():
+    """Afișează cărțile blocate și când va fi re-încercată fiecare"""
+    stats = get_blocked_registry().get_stats(limit=5000)
+    print("=" * 60)
+    print(f"🗂️  REGISTRU CĂRȚI BLOCATE: {stats['count']} cărți, {stats['due']} scadente")
+    print("=" * 60)
+    for book in stats['books']:
+        when = 'acum' if book['retry_in_s'] == 0 else f"în {book['retry_in_s'] / 3600:.1f}h ({book['retry_at']})"
+        dispatched = f", trimisă la {book['dispatched_at']}" if book['dispatched_at'] else ''
+        print(f"   {book['key']:<28} {book['attempts']:>3} încercări, re-încercare {when}{dispatched}")
+        print(f"      {book['worksheet'] or '-'} / {book['reason']}")
+        print(f"      🔗 {book['url']}")
+    print()
+
+def dispatch_blocked_books():
+    """Trimite cărțile scadente din registru la Celery (un task bsr.retry_blocked_book per carte)"""
+    from app.tasks.bsr_tasks import retry_blocked_book
+    keys = dispatch_due(get_blocked_registry(), lambda book: retry_blocked_book.delay(book.key))
+    for key in keys:
+        print(f"   📤 {key}")
+    print(f"✅ {len(keys)} cărți trimise la Celery pentru re-încercare")
+    return keys
+
 def get_books_by_urls(sheets_manager, worksheet_name, urls):
     """Obține cărțile din Google Sheets care au URL-urile specificate"""
     all_books = sheets_manager.get_all_books(worksheet_name)
@@ -199,6 +258,8 @@ def retry_failed_books(failed_books_dict, dry_run=False):
         return False
     print()
     
+    blocked = get_blocked_registry()
+    
     # Inițializare scraper
     scraper = AmazonScraper(
         delay_between_requests=config.AMAZON_DELAY_BETWEEN_REQUESTS,
@@ -267,6 +328,7 @@ def retry_failed_books(failed_books_dict, dry_run=False):
                         # Scrie în Google Sheets
                         sheets_manager.update_bsr(book['col'], today_row, bsr, worksheet_name)
                         print(f"      ✅ Scris în Google Sheets (coloana {book['col']}, rândul {today_row})")
+                        blocked.clear(book['amazon_link'])
                     else:
                         print(f"      ⚠️  DRY-RUN: Ar fi scris BSR #{bsr:,}")
                     
@@ -274,11 +336,16 @@ def retry_failed_books(failed_books_dict, dry_run=False):
                     total_success += 1
                 else:
                     print(f"❌ Nu s-a putut extrage BSR (din nou)")
+                    if not dry_run:
+                        blocked.mark_blocked(book['amazon_link'], reason='no BSR', worksheet=worksheet_name, col=book['col'])
                     worksheet_failed += 1
                     total_failed += 1
             
             except Exception as e:
                 print(f"❌ Eroare: {e}")
+                if not dry_run:
+                    blocked.mark_blocked(book['amazon_link'], reason=f"{type(e).__name__}: {e}",
+                                         worksheet=worksheet_name, col=book['col'])
                 worksheet_failed += 1
                 total_failed += 1
             
@@ -306,6 +373,15 @@ def retry_failed_books(failed_books_dict, dry_run=False):
             except Exception as e:
                 print(f"   ⚠️  Eroare la calcularea mediei: {e}")
             print()
+        
+        # Scrie toate valorile din buffer într-un singur apel batch
+        if not dry_run:
+            try:
+                written = sheets_manager.flush_batch_updates(worksheet_name=worksheet_name)
+                print(f"   💾 {written} celule scrise în Google Sheets (batch)")
+            except Exception as e:
+                print(f"   ⚠️  Eroare la scrierea batch în Google Sheets: {e}")
+            print()
     
     # Rezumat final
     print("=" * 60)
@@ -322,8 +398,16 @@ if __name__ == '__main__':
     import argparse
     
     parser = argparse.ArgumentParser(description='Re-încearcă update BSR pentru cărțile eșuate')
+    parser.add_argument('--from-log', action='store_true',
+                       help='Extrage cărțile eșuate din log-uri în loc de registrul de cărți blocate')
     parser.add_argument('--log-file', '-l', default='app.log',
-                       help='Calea către fișierul de log (default: app.log)')
+                       help='Calea către fișierul de log (cu --from-log, default: app.log)')
+    parser.add_argument('--list', action='store_true',
+                       help='Afișează registrul de cărți blocate și când va fi re-încercată fiecare')
+    parser.add_argument('--dispatch', action='store_true',
+                       help='Trimite cărțile scadente din registru la Celery și ieși')
+    parser.add_argument('--all', action='store_true',
+                       help='Re-încearcă toate cărțile din registru, nu doar cele scadente')
     parser.add_argument('--dry-run', action='store_true',
                        help='Mod dry-run: nu scrie în Google Sheets')
     parser.add_argument('--max-lines', type=int, default=10000,
@@ -331,6 +415,14 @@ if __name__ == '__main__':
     
     args = parser.parse_args()
     
+    if args.list:
+        print_blocked_registry()
+        sys.exit(0)
+    
+    if args.dispatch:
+        dispatch_blocked_books()
+        sys.exit(0)
+    
     print()
     if args.dry_run:
         print("⚠️  ATENȚIE: Mod DRY-RUN activat - nu se vor scrie date!")
@@ -338,11 +430,14 @@ if __name__ == '__main__':
         print("⚠️  ATENȚIE: Acest script va scrie date reale în Google Sheets!")
     print()
     
-    # Extrage cărțile eșuate din log-uri
-    failed_books = extract_failed_books_from_logs(args.log_file, args.max_lines)
+    # Extrage cărțile eșuate din registru (sau din log-uri)
+    if args.from_log:
+        failed_books = extract_failed_books_from_logs(args.log_file, args.max_lines)
+    else:
+        failed_books = extract_failed_books_from_registry(include_pending=args.all)
     
     if not failed_books:
-        print("✅ Nu s-au găsit cărți eșuate în log-uri!")
+        print(f"✅ Nu s-au găsit cărți eșuate {'în log-uri' if args.from_log else 'de re-încercat în registru'}!")
         sys.exit(0)
     
     print(f"📊 Găsite cărți eșuate în {len(failed_books)} worksheet-uri:")
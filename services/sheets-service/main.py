@@ -3,6 +3,7 @@ Sheets Service - Google Sheets operations microservice
 """
 import sys
 import os
+import threading
 
 # Add parent directories to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -17,6 +18,8 @@ from shared.models import ErrorResponse
 
 # Import sheets manager
 from google_sheets_transposed import GoogleSheetsManager
+from app.services.sheets_executor import run_sheets, shutdown_sheets_executor, get_executor_stats
+from app.services.sheets_quota import get_quota_stats
 
 # Setup logger
 logger = setup_logger('sheets-service')
@@ -30,37 +33,58 @@ app = FastAPI(
 
 # Initialize sheets manager
 _sheets_manager = None
+_sheets_manager_lock = threading.Lock()
 
 def get_sheets_manager():
-    """Lazy initialization of sheets manager"""
+    """
+    Lazy initialization of sheets manager
+    Builds the gspread client (blocking I/O), so endpoints call it through run_sheets
+    """
     global _sheets_manager
-    if _sheets_manager is None:
-        from shared.config import GOOGLE_SHEETS_CREDENTIALS_PATH, GOOGLE_SHEETS_SPREADSHEET_ID
-        import os
-        # Resolve credentials path relative to project root
-        creds_path = GOOGLE_SHEETS_CREDENTIALS_PATH
-        if not os.path.isabs(creds_path):
-            # If relative path, resolve from project root
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
-            creds_path = os.path.join(project_root, creds_path)
-        _sheets_manager = GoogleSheetsManager(
-            credentials_path=creds_path,
-            spreadsheet_id=GOOGLE_SHEETS_SPREADSHEET_ID
-        )
+    with _sheets_manager_lock:
+        if _sheets_manager is None:
+            _sheets_manager = _build_sheets_manager()
     return _sheets_manager
 
 
+def _build_sheets_manager():
+    """Create the sheets manager from the shared config"""
+    from shared.config import GOOGLE_SHEETS_CREDENTIALS_PATH, GOOGLE_SHEETS_SPREADSHEET_ID
+    # Resolve credentials path relative to project root
+    creds_path = GOOGLE_SHEETS_CREDENTIALS_PATH
+    if not os.path.isabs(creds_path):
+        # If relative path, resolve from project root
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+        creds_path = os.path.join(project_root, creds_path)
+    return GoogleSheetsManager(
+        credentials_path=creds_path,
+        spreadsheet_id=GOOGLE_SHEETS_SPREADSHEET_ID
+    )
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Build the sheets manager on the Sheets executor before the first request"""
+    try:
+        await run_sheets(get_sheets_manager)
+    except Exception as e:
+        # Endpoints retry the lazy initialization
+        logger.error(f"Error initializing sheets manager: {e}", exc_info=True)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        manager = get_sheets_manager()
+        manager = await run_sheets(get_sheets_manager)
         # Try to get worksheets as health check
-        worksheets = manager.get_all_worksheets()
+        worksheets = await run_sheets(manager.get_all_worksheets)
         return {
             "status": "healthy",
             "service": "sheets-service",
-            "worksheets_count": len(worksheets)
+            "worksheets_count": len(worksheets),
+            "executor": get_executor_stats(),
+            "quota": get_quota_stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}", exc_info=True)
@@ -74,8 +98,8 @@ async def health_check():
 async def get_worksheets():
     """Get list of all worksheets"""
     try:
-        manager = get_sheets_manager()
-        worksheets = manager.get_all_worksheets()
+        manager = await run_sheets(get_sheets_manager)
+        worksheets = await run_sheets(manager.get_all_worksheets)
         # Filter out unwanted sheets
         filtered = [ws for ws in worksheets if ws not in ['Sheet1', 'Sheet3']]
         return filtered
@@ -88,8 +112,8 @@ async def get_worksheets():
 async def get_books(worksheet: str = Query('Crime Fiction - US')):
     """Get all books from a worksheet"""
     try:
-        manager = get_sheets_manager()
-        books = manager.get_all_books(worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        books = await run_sheets(manager.get_all_books, worksheet_name=worksheet)
         return books
     except Exception as e:
         logger.error(f"Error getting books: {e}", exc_info=True)
@@ -100,8 +124,8 @@ async def get_books(worksheet: str = Query('Crime Fiction - US')):
 async def get_bsr_history(worksheet: str = Query('Crime Fiction - US')):
     """Get BSR history for all books"""
     try:
-        manager = get_sheets_manager()
-        history = manager.get_bsr_history(worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        history = await run_sheets(manager.get_bsr_history, worksheet_name=worksheet)
         return history
     except Exception as e:
         logger.error(f"Error getting BSR history: {e}", exc_info=True)
@@ -112,8 +136,8 @@ async def get_bsr_history(worksheet: str = Query('Crime Fiction - US')):
 async def get_avg_history(worksheet: str = Query('Crime Fiction - US')):
     """Get average BSR history"""
     try:
-        manager = get_sheets_manager()
-        history = manager.get_avg_history(worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        history = await run_sheets(manager.get_avg_history, worksheet_name=worksheet)
         return history
     except Exception as e:
         logger.error(f"Error getting avg history: {e}", exc_info=True)
@@ -135,11 +159,11 @@ async def update_bsr(data: dict):
                 detail="Missing required fields: col, row, bsr_value"
             )
         
-        manager = get_sheets_manager()
-        manager.update_bsr(col, row, bsr_value, worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        await run_sheets(manager.update_bsr, col, row, bsr_value, worksheet_name=worksheet)
         
         # Flush batch updates
-        manager.flush_batch_updates(worksheet_name=worksheet)
+        await run_sheets(manager.flush_batch_updates, worksheet_name=worksheet)
         
         return {"status": "success", "message": "BSR updated"}
     except Exception as e:
@@ -160,11 +184,11 @@ async def calculate_average(data: dict):
                 detail="Missing required field: row"
             )
         
-        manager = get_sheets_manager()
-        manager.calculate_and_update_average(row, worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        await run_sheets(manager.calculate_and_update_average, row, worksheet_name=worksheet)
         
         # Flush batch updates
-        manager.flush_batch_updates(worksheet_name=worksheet)
+        await run_sheets(manager.flush_batch_updates, worksheet_name=worksheet)
         
         return {"status": "success", "message": "Average calculated"}
     except Exception as e:
@@ -177,8 +201,8 @@ async def flush_updates(data: dict):
     """Flush batch updates to Google Sheets"""
     try:
         worksheet = data.get('worksheet', 'Crime Fiction - US')
-        manager = get_sheets_manager()
-        manager.flush_batch_updates(worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        await run_sheets(manager.flush_batch_updates, worksheet_name=worksheet)
         return {"status": "success", "message": "Updates flushed"}
     except Exception as e:
         logger.error(f"Error flushing updates: {e}", exc_info=True)
@@ -189,14 +213,25 @@ async def flush_updates(data: dict):
 async def get_today_row(worksheet: str = Query('Crime Fiction - US')):
     """Get today's row index"""
     try:
-        manager = get_sheets_manager()
-        row = manager.get_today_row(worksheet_name=worksheet)
+        manager = await run_sheets(get_sheets_manager)
+        row = await run_sheets(manager.get_today_row, worksheet_name=worksheet)
         return {"row": row}
     except Exception as e:
         logger.error(f"Error getting today row: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered writes and stop the Sheets executor"""
+    if _sheets_manager is not None:
+        try:
+            await run_sheets(_sheets_manager.flush_batch_updates)
+        except Exception as e:
+            logger.error(f"Error flushing updates on shutdown: {e}", exc_info=True)
+    shutdown_sheets_executor()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
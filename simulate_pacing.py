@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Offline simulator for the adaptive pacing controller
+Runs AIMD policies against recorded page outcomes on a simulated clock (nothing is fetched)
+
+Outcome sources:
+  model   - CAPTCHA/5xx/error probabilities per request rate, fitted from a recorded
+            trace (AMAZON_PACING_TRACE); the simulated rate decides what Amazon answers
+  replay  - the recorded outcomes in their original order, whatever the simulated rate
+  --safe-rpm N (no trace) - synthetic Amazon that starts blocking above N pages/minute
+
+Usage:
+    AMAZON_PACING_TRACE=/tmp/pacing_trace.jsonl celery -A app.celery_app worker ...   # record
+    python simulate_pacing.py --trace /tmp/pacing_trace.jsonl --domain amazon.com
+    python simulate_pacing.py --trace /tmp/pacing_trace.jsonl --captcha-factor 0.5 --increase 0.5
+    python simulate_pacing.py --safe-rpm 3 --pages 500
+"""
+import argparse
+import bisect
+import json
+import logging
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.services.adaptive_pacing import (
+    OUTCOME_CAPTCHA, OUTCOME_SUCCESS, OUTCOMES, AIMDPolicy, LocalPacingState, PacingController,
+)
+from app.services.scraper_metrics import ScraperMetrics
+
+# Upper rpm of each rate bucket the model is fitted on
+RATE_EDGES = (0.5, 1, 2, 4, 8, 16, float('inf'))
+
+
+def load_trace(path: str, domain: Optional[str] = None) -> List[Dict]:
+    """Records of a pacing trace ({'t', 'domain', 'egress', 'outcome', 'rpm'}), oldest first"""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('outcome') in OUTCOMES and (domain is None or record.get('domain') == domain):
+                records.append(record)
+    records.sort(key=lambda record: record['t'])
+    return records
+
+
+class OutcomeModel:
+    """Outcome probabilities per request-rate bucket; rates never seen use the nearest bucket with data"""
+
+    def __init__(self, buckets: Dict[int, Counter], edges=RATE_EDGES):
+        self.edges = edges
+        self.buckets = {index: counts for index, counts in buckets.items() if sum(counts.values())}
+        if not self.buckets:
+            raise ValueError("No outcomes to fit the model on")
+
+    @classmethod
+    def from_trace(cls, records: Iterable[Dict], edges=RATE_EDGES) -> 'OutcomeModel':
+        # A record holds the rate after its outcome; the page itself ran at the rate the
+        # previous outcome of the same domain and egress left behind
+        buckets = defaultdict(Counter)
+        previous = {}
+        for record in records:
+            key = (record.get('domain'), record.get('egress'))
+            rpm = previous.get(key, record['rpm'])
+            buckets[bisect.bisect_left(edges, rpm)][record['outcome']] += 1
+            previous[key] = record['rpm']
+        return cls(buckets, edges)
+
+    def _counts(self, rpm: float) -> Counter:
+        index = bisect.bisect_left(self.edges, rpm)
+        nearest = min(self.buckets, key=lambda bucket: (abs(bucket - index), -bucket))
+        return self.buckets[nearest]
+
+    def draw(self, rpm: float, rng: random.Random) -> str:
+        counts = self._counts(rpm)
+        return rng.choices(list(counts), weights=list(counts.values()))[0]
+
+    def describe(self) -> List[str]:
+        lines = []
+        for index in sorted(self.buckets):
+            counts = self.buckets[index]
+            total = sum(counts.values())
+            low = self.edges[index - 1] if index else 0
+            high = self.edges[index]
+            lines.append(f"  {low:>5}-{high:<5} rpm: {total:>5} pages, CAPTCHA {counts[OUTCOME_CAPTCHA] / total:.1%}, "
+                         f"success {counts[OUTCOME_SUCCESS] / total:.1%}")
+        return lines
+
+
+def threshold_model(safe_rpm: float, captcha_above: float = 0.3, captcha_below: float = 0.005) -> Callable:
+    """Synthetic Amazon: rare CAPTCHAs up to safe_rpm, frequent ones above it"""
+    def draw(rpm: float, rng: random.Random) -> str:
+        return OUTCOME_CAPTCHA if rng.random() < (captcha_above if rpm > safe_rpm else captcha_below) else OUTCOME_SUCCESS
+    return draw
+
+
+@dataclass
+class SimulationResult:
+    pages: int
+    duration_s: float
+    outcomes: Counter
+    paced_out: int     # Times a fetch found the next slot beyond max_wait and slept before reserving it
+    min_rpm: float
+    mean_rpm: float
+    final_rpm: float
+
+    @property
+    def pages_per_hour(self) -> float:
+        return self.pages / self.duration_s * 3600 if self.duration_s else 0.0
+
+
+def simulate(policy: AIMDPolicy, pages: int, draw: Optional[Callable] = None, replay: Optional[List[str]] = None,
+             page_seconds: float = 8.0, seed: int = 0) -> SimulationResult:
+    """
+    Run one worker through `pages` pages under a policy on a simulated clock
+
+    Args:
+        policy: Pacing policy to test
+        pages: Pages to fetch (replay: at most the recorded outcomes)
+        draw: draw(rpm, rng) -> outcome, the simulated Amazon (model mode)
+        replay: Recorded outcomes, used in order (replay mode)
+        page_seconds: Time one page takes once its slot comes
+        seed: Random seed (jitter and drawn outcomes)
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # AIMDPolicy.stretch() jitter
+    now = [0.0]
+    clock = lambda: now[0]
+    controller = PacingController(LocalPacingState(clock), policy, metrics=ScraperMetrics(),
+                                  egress='simulated', trace_path='', clock=clock)
+    sources = iter(replay) if replay is not None else None
+    outcomes, rates, paced_out = Counter(), [], 0
+
+    for _ in range(pages):
+        outcome = next(sources, None) if sources is not None else None
+        if sources is not None and outcome is None:
+            break
+        reserved, wait = controller.try_reserve('amazon.com')
+        while not reserved:
+            # Like PacingController.wait: sleep until the slot is within max_wait, then reserve it
+            paced_out += 1
+            now[0] += max(wait - policy.max_wait, 1.0)
+            reserved, wait = controller.try_reserve('amazon.com')
+        now[0] += wait
+        rpm = controller.rpm('amazon.com')
+        if outcome is None:
+            outcome = draw(rpm, rng)
+        now[0] += page_seconds
+        rates.append(controller.record('amazon.com', outcome))
+        outcomes[outcome] += 1
+
+    done = sum(outcomes.values())
+    return SimulationResult(
+        pages=done,
+        duration_s=now[0],
+        outcomes=outcomes,
+        paced_out=paced_out,
+        min_rpm=min(rates) if rates else policy.start_rpm,
+        mean_rpm=sum(rates) / len(rates) if rates else policy.start_rpm,
+        final_rpm=rates[-1] if rates else policy.start_rpm,
+    )
+
+
+def static_policy(policy: AIMDPolicy) -> AIMDPolicy:
+    """The old fixed pacing: start_rpm forever, whatever happens"""
+    return replace(policy, increase_rpm=0.0, captcha_factor=1.0, server_error_factor=1.0)
+
+
+def print_result(name: str, result: SimulationResult):
+    captchas = result.outcomes[OUTCOME_CAPTCHA]
+    print(f"{name:<10} {result.pages:>6} pages in {result.duration_s / 3600:>6.2f}h "
+          f"({result.pages_per_hour:>6.1f}/h), CAPTCHA {captchas:>4} ({captchas / max(result.pages, 1):.1%}), "
+          f"success {result.outcomes[OUTCOME_SUCCESS] / max(result.pages, 1):.1%}, "
+          f"rpm min/mean/final {result.min_rpm:.2f}/{result.mean_rpm:.2f}/{result.final_rpm:.2f}, "
+          f"backed off {result.paced_out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate adaptive pacing policies offline')
+    parser.add_argument('--trace', help='Recorded pacing trace (AMAZON_PACING_TRACE JSON lines)')
+    parser.add_argument('--domain', help='Only outcomes of this domain')
+    parser.add_argument('--mode', choices=('model', 'replay'), default='model', help='How the trace is used')
+    parser.add_argument('--safe-rpm', type=float, help='Without a trace: synthetic Amazon blocking above this rate')
+    parser.add_argument('--pages', type=int, default=1000, help='Pages to simulate')
+    parser.add_argument('--page-seconds', type=float, default=8.0, help='Time one page takes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-rpm', type=float)
+    parser.add_argument('--min-rpm', type=float)
+    parser.add_argument('--max-rpm', type=float)
+    parser.add_argument('--increase', type=float, help='rpm gained per minute of clean pages')
+    parser.add_argument('--captcha-factor', type=float, help='Rate kept after a CAPTCHA')
+    parser.add_argument('--server-error-factor', type=float, help='Rate kept after a 5xx')
+    parser.add_argument('--window', type=float, help='Window of outcomes behind an increase (seconds)')
+    args = parser.parse_args()
+    logging.getLogger('app.services.adaptive_pacing').setLevel(logging.ERROR)  # One line per CAPTCHA otherwise
+
+    if not args.trace and args.safe_rpm is None:
+        parser.error('give a --trace to test against, or --safe-rpm for a synthetic one')
+
+    overrides = {
+        'start_rpm': args.start_rpm, 'min_rpm': args.min_rpm, 'max_rpm': args.max_rpm,
+        'increase_rpm': args.increase, 'captcha_factor': args.captcha_factor,
+        'server_error_factor': args.server_error_factor, 'window': args.window,
+    }
+    policy = replace(AIMDPolicy.from_config(), **{k: v for k, v in overrides.items() if v is not None})
+    print(f"Policy: {policy}")
+
+    draw, replay = None, None
+    if args.trace:
+        records = load_trace(args.trace, args.domain)
+        print(f"Trace: {len(records)} outcomes {dict(Counter(record['outcome'] for record in records))}")
+        if args.mode == 'replay':
+            replay = [record['outcome'] for record in records]
+        else:
+            model = OutcomeModel.from_trace(records)
+            print("Outcome model:")
+            for line in model.describe():
+                print(line)
+            draw = model.draw
+    else:
+        print(f"Synthetic Amazon: blocking above {args.safe_rpm} rpm")
+        draw = threshold_model(args.safe_rpm)
+    print("=" * 72)
+
+    for name, candidate in (('static', static_policy(policy)), ('adaptive', policy)):
+        print_result(name, simulate(candidate, args.pages, draw=draw, replay=replay,
+                                    page_seconds=args.page_seconds, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
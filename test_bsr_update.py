@@ -104,7 +104,7 @@ def test_bsr_update():
                 
                 # Scriere în Google Sheets
                 print(f"   📝 Scriere în Google Sheets (coloana {book['col']}, rândul {today_row})...")
-                sheets_manager.update_bsr(book['col'], today_row, bsr)
+                sheets_manager.update_bsr(book['col'], today_row, bsr, batch=False)
                 print(f"   ✅ BSR scris cu succes în Google Sheets!")
                 success_count += 1
             else:
@@ -41,7 +41,7 @@ print(f"✍️  Scriere BSR simulat: {test_bsr}")
 print(f"   Coloană: {book['col']}, Rând: {today_row}")
 
 try:
-    sheets_manager.update_bsr(book['col'], today_row, test_bsr)
+    sheets_manager.update_bsr(book['col'], today_row, test_bsr, batch=False)
     print("✅ BSR scris cu succes în Google Sheets!")
     print()
     print("🎉 Test reușit! Verifică Google Sheet-ul pentru a vedea valoarea.")
@@ -0,0 +1,103 @@
+"""
+Unit tests for the adaptive pacing controller (local state, simulated clock)
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from app.services.adaptive_pacing import AIMDPolicy, LocalPacingState, PacingController
+from app.services.browser_pool_refactored import pacing_outcome
+from app.services.scraper_metrics import ScraperMetrics
+from simulate_pacing import simulate, static_policy, threshold_model
+
+
+def make_controller(**policy):
+    now = [1000.0]
+    policy = AIMDPolicy(**dict({'start_rpm': 2.0, 'min_rpm': 0.1, 'max_rpm': 20.0, 'jitter': 0.0}, **policy))
+    controller = PacingController(LocalPacingState(lambda: now[0]), policy, metrics=ScraperMetrics(),
+                                  egress='test', trace_path='', clock=lambda: now[0])
+    return controller, now
+
+
+class TestPacingController(unittest.TestCase):
+    """Slots and AIMD rate changes of one domain"""
+
+    def test_slots_are_spaced_by_the_rate(self):
+        controller, now = make_controller()
+        self.assertEqual([controller.reserve('amazon.com') for _ in range(3)], [0.0, 30.0, 60.0])
+        self.assertEqual(controller.reserve('amazon.co.uk'), 0.0)  # Each domain has its own slots
+
+    def test_far_slot_is_not_reserved(self):
+        controller, now = make_controller(start_rpm=0.5, max_wait=100)
+        self.assertEqual(controller.reserve('amazon.com'), 0.0)
+        self.assertIsNone(controller.reserve('amazon.com'))  # 120s away
+        now[0] += 30
+        self.assertEqual(controller.reserve('amazon.com'), 90.0)
+
+    def test_far_slot_is_waited_for(self):
+        controller, now = make_controller(start_rpm=0.5, max_wait=100)
+        controller.reserve('amazon.com')
+        slept = []
+
+        async def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        with patch('app.services.adaptive_pacing.asyncio.sleep', sleep):
+            self.assertFalse(asyncio.run(controller.wait('amazon.com', patient=False)))
+            self.assertEqual(slept, [])
+            self.assertTrue(asyncio.run(controller.wait('amazon.com')))
+        self.assertEqual(slept, [20.0, 100.0])  # Until the slot is within max_wait, then up to it
+
+    def test_clean_window_grows_the_rate(self):
+        controller, now = make_controller(increase_rpm=0.5)
+        rates = []
+        for _ in range(4):
+            now[0] += 10
+            rates.append(controller.record('amazon.com', 'success'))
+        self.assertEqual(rates, [2.25, 2.25 + 0.5 / 2.25, rates[1] + 0.5 / rates[1], rates[2] + 0.5 / rates[2]])
+
+    def test_captcha_cuts_the_rate_and_holds_growth(self):
+        controller, now = make_controller(captcha_factor=0.25, window=600)
+        self.assertEqual(controller.record('amazon.com', 'captcha'), 0.5)
+        self.assertEqual(controller.reserve('amazon.com'), 120.0)  # A full new gap from the CAPTCHA on
+        now[0] += 300
+        self.assertEqual(controller.record('amazon.com', 'success'), 0.5)  # CAPTCHA still in the window
+        now[0] += 301
+        self.assertGreater(controller.record('amazon.com', 'success'), 0.5)
+
+    def test_server_error_and_floor(self):
+        controller, now = make_controller(start_rpm=0.3, server_error_factor=0.5)
+        self.assertEqual(controller.record('amazon.com', 'server_error'), 0.15)
+        self.assertEqual(controller.record('amazon.com', 'server_error'), 0.1)
+        stats = controller.get_stats(['amazon.com'])['amazon.com:test']
+        self.assertEqual((stats['rpm'], stats['interval_s'], stats['server_error_rate']), (0.1, 600.0, 1.0))
+
+    def test_fetch_results_as_outcomes(self):
+        self.assertEqual(pacing_outcome(None), 'success')
+        self.assertEqual(pacing_outcome('continue_shopping_interstitial'), 'captcha')
+        self.assertEqual(pacing_outcome('timeout'), 'error')
+        self.assertIsNone(pacing_outcome('HTTP 503 after 3 retries'))  # Each 5xx was recorded already
+        self.assertIsNone(pacing_outcome('captcha_cooldown'))
+
+
+class TestSimulator(unittest.TestCase):
+    """AIMD against a synthetic Amazon"""
+
+    def test_adaptive_speeds_up_when_amazon_is_permissive(self):
+        draw = threshold_model(safe_rpm=8)
+        policy = AIMDPolicy(start_rpm=1.33, min_rpm=0.1, max_rpm=20.0)
+        static = simulate(static_policy(policy), 300, draw=draw)
+        adaptive = simulate(policy, 300, draw=draw)
+        self.assertGreater(adaptive.pages_per_hour, 1.5 * static.pages_per_hour)
+
+    def test_adaptive_backs_off_when_amazon_blocks(self):
+        draw = threshold_model(safe_rpm=0.5)
+        policy = AIMDPolicy(start_rpm=1.33, min_rpm=0.1, max_rpm=20.0)
+        static = simulate(static_policy(policy), 300, draw=draw)
+        adaptive = simulate(policy, 300, draw=draw)
+        self.assertLess(adaptive.outcomes['captcha'], static.outcomes['captcha'])
+
+
+if __name__ == '__main__':
+    unittest.main()
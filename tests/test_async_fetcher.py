@@ -0,0 +1,110 @@
+"""
+Unit tests for the async tier-1 fetcher (mock transport, no network)
+"""
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from app.services.async_fetcher import AsyncAmazonFetcher, DomainRateLimiter, fetch_bsr_many
+
+PRODUCT_PAGE = (
+    '<html><body><div id="detailBullets_feature_div">Product details Add to Cart '
+    '<span>Best Sellers Rank: #{rank} in Kindle Store (See Top 100)</span></div>'
+    + 'x' * 12000 + '</body></html>'
+)
+CAPTCHA_PAGE = '<html><body><form>Enter the characters you see below - captcha</form></body></html>'
+
+
+class FakeAmazon:
+    """Mock transport that records when each domain was hit"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request):
+        self.hits.setdefault(request.url.host, []).append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        if 'CAPTCHA' in request.url.path:
+            return httpx.Response(200, text=CAPTCHA_PAGE)
+        if 'GONE' in request.url.path:
+            return httpx.Response(503, text='')
+        return httpx.Response(200, text=PRODUCT_PAGE.format(rank='1,234'))
+
+
+def run_fetch(urls, fake, **kwargs):
+    async def run():
+        async with AsyncAmazonFetcher(transport=httpx.MockTransport(fake.handler), **kwargs) as fetcher:
+            return await fetcher.fetch_many(urls)
+    return asyncio.run(run())
+
+
+class TestDomainPacing(unittest.TestCase):
+    """Domains are paced separately and run concurrently with each other"""
+
+    def test_domains_overlap_but_each_stays_paced(self):
+        fake = FakeAmazon()
+        urls = [f'https://www.amazon.com/dp/B00000000{i}' for i in range(3)]
+        urls += [f'https://www.amazon.co.uk/dp/B00000001{i}' for i in range(3)]
+        # One request per 0.1s per domain
+        limits = {'amazon.com': 600, 'amazon.co.uk': 600}
+
+        start = time.monotonic()
+        with patch('app.services.async_fetcher.get_metrics'):
+            results = run_fetch(urls, fake, rate_limits=limits, concurrency=3, jitter=0.0)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([r.bsr for r in results], [1234] * 6)
+        for host in ('www.amazon.com', 'www.amazon.co.uk'):
+            hits = fake.hits[host]
+            gaps = [b - a for a, b in zip(hits, hits[1:])]
+            self.assertTrue(all(gap >= 0.095 for gap in gaps), gaps)
+        # Both domains in flight together: ~0.25s instead of ~0.55s back to back
+        self.assertGreater(fake.max_in_flight, 1)
+        self.assertLess(elapsed, 0.45)
+
+    def test_uk_pages_are_left_to_playwright(self):
+        fake = FakeAmazon(latency=0)
+        urls = ['https://www.amazon.com/dp/B000000001', 'https://www.amazon.co.uk/dp/B000000002']
+        with patch('app.services.async_fetcher.get_metrics'):
+            results = fetch_bsr_many(urls, transport=httpx.MockTransport(fake.handler), jitter=0.0)
+
+        self.assertEqual(list(results), urls[:1])
+        self.assertEqual(list(fake.hits), ['www.amazon.com'])
+
+    def test_jitter_only_lengthens_gaps(self):
+        async def slots():
+            limiter = DomainRateLimiter('amazon.com', per_minute=1200, concurrency=1, jitter=0.5)
+            waits = [await limiter.wait() for _ in range(4)]
+            return waits
+
+        waits = asyncio.run(slots())
+        self.assertEqual(waits[0], 0)
+        self.assertTrue(all(0.045 <= w <= 0.08 for w in waits[1:]), waits)
+
+
+class TestFetchResults(unittest.TestCase):
+    """Robot pages and blocking statuses are reported, not parsed"""
+
+    def test_blocked_pages(self):
+        fake = FakeAmazon(latency=0)
+        urls = ['https://www.amazon.com/dp/CAPTCHA000', 'https://www.amazon.com/dp/GONE000000/ref=sr_1']
+        with patch('app.services.async_fetcher.get_metrics') as metrics:
+            results = run_fetch(urls, fake, rate_limits={'amazon.com': 6000}, jitter=0.0)
+
+        self.assertTrue(all(r.blocked and r.bsr is None for r in results))
+        self.assertEqual(results[1].status, 503)
+        self.assertEqual(results[1].url, urls[1])  # Keyed by the sheet's URL, fetched without /ref
+        self.assertEqual(metrics.return_value.record_request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
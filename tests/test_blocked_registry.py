@@ -0,0 +1,123 @@
+"""
+Unit tests for the blocked-book registry (local state, simulated clock)
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.services.blocked_registry import BlockedRegistry, LocalBlockedState, dispatch_due, registry_key
+from app.tasks import bsr_tasks
+from app.utils.product_page import ProductPageResult
+
+URL = 'https://www.amazon.com/Some-Book/dp/B000000001/ref=sr_1_1?keywords=a'
+
+
+def make_registry():
+    now = [1000.0]
+    registry = BlockedRegistry(LocalBlockedState(lambda: now[0]), base_delay=3600, max_delay=4 * 3600,
+                               clock=lambda: now[0])
+    return registry, now
+
+
+class TestBlockedRegistry(unittest.TestCase):
+    """Failures per ASIN and domain, with exponential backoff"""
+
+    def test_key_is_canonical_asin_and_domain(self):
+        self.assertEqual(registry_key(URL), 'amazon.com:B000000001')
+        self.assertEqual(registry_key('https://amazon.com/gp/product/B000000001?th=1'), 'amazon.com:B000000001')
+        self.assertEqual(registry_key('https://www.amazon.co.uk/dp/B000000001'), 'amazon.co.uk:B000000001')
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        registry, now = make_registry()
+        retries = [registry.mark_blocked(URL, reason='captcha') - now[0] for _ in range(4)]
+        self.assertEqual(retries, [3600, 7200, 14400, 14400])
+        book = registry.list_blocked()[0]
+        self.assertEqual((book.key, book.attempts, book.reason, book.url), ('amazon.com:B000000001', 4, 'captcha', URL))
+
+    def test_blocked_until_retry_time_and_cleared_on_success(self):
+        registry, now = make_registry()
+        registry.mark_blocked(URL, worksheet='US', col=3)
+        self.assertTrue(registry.is_blocked('https://www.amazon.com/dp/B000000001'))
+        now[0] += 3601
+        self.assertFalse(registry.is_blocked(URL))
+        registry.mark_blocked(URL)  # Worksheet and column are kept
+        book = registry.list_blocked()[0]
+        self.assertEqual((book.attempts, book.worksheet, book.col), (2, 'US', 3))
+        self.assertTrue(registry.clear(URL))
+        self.assertEqual(registry.list_blocked(), [])
+        self.assertEqual(registry.mark_blocked(URL) - now[0], 3600)  # Counter starts over
+
+    def test_explicit_retry_time(self):
+        registry, now = make_registry()
+        self.assertEqual(registry.mark_blocked(URL, retry_after=now[0] + 60), now[0] + 60)
+        self.assertEqual(registry.get_stats()['books'][0]['retry_in_s'], 60)
+
+
+class TestDispatch(unittest.TestCase):
+    """Due books go to the retry queue once per lease"""
+
+    def test_only_due_books_are_dispatched_once(self):
+        registry, now = make_registry()
+        registry.mark_blocked(URL, worksheet='US', col=3)
+        registry.mark_blocked('https://www.amazon.co.uk/dp/B000000002')
+        registry.mark_blocked('https://www.amazon.co.uk/dp/B000000002')  # Due an hour later
+        sent = []
+        self.assertEqual(dispatch_due(registry, sent.append), [])
+
+        now[0] += 3600
+        self.assertEqual(dispatch_due(registry, sent.append), ['amazon.com:B000000001'])
+        self.assertEqual((sent[0].worksheet, sent[0].col), ('US', 3))
+        self.assertEqual(dispatch_due(registry, sent.append), [])  # Leased while its retry runs
+        stats = registry.get_stats()
+        self.assertEqual((stats['count'], stats['due']), (2, 0))
+
+        now[0] += 3600  # The first retry never reported back: its lease is over
+        self.assertEqual(dispatch_due(registry, sent.append), ['amazon.com:B000000001', 'amazon.co.uk:B000000002'])
+
+    def test_failed_enqueue_goes_back_to_backoff(self):
+        registry, now = make_registry()
+        registry.mark_blocked(URL)
+        now[0] += 3600
+
+        def broken(book):
+            raise ConnectionError('broker down')
+
+        self.assertEqual(dispatch_due(registry, broken), [])
+        book = registry.list_blocked()[0]
+        self.assertEqual((book.attempts, book.due_at - now[0]), (2, 7200))
+        self.assertIn('broker down', book.reason)
+
+
+
+class TestRetryBlockedBook(unittest.TestCase):
+    """A recovered BSR gets everything a BSR from the daily run gets"""
+
+    def test_success_writes_sheet_observation_and_cover(self):
+        registry, now = make_registry()
+        registry.mark_blocked(URL, worksheet='US', col=3)
+        book = {'col': 3, 'name': 'A', 'author': 'B', 'amazon_link': URL}
+        sheets = MagicMock()
+        sheets.get_all_books.return_value = [book]
+        sheets.get_today_row.return_value = 40
+        scraper = MagicMock()
+        scraper.scrape_product.return_value = ProductPageResult(bsr=500, cover_image='https://img/1.jpg')
+        store = MagicMock()
+
+        with patch.object(bsr_tasks, 'get_blocked_registry', return_value=registry), \
+                patch.object(bsr_tasks, 'get_sheets_manager', return_value=sheets), \
+                patch.object(bsr_tasks, 'AmazonScraper', return_value=scraper), \
+                patch.object(bsr_tasks, 'OBSERVATION_STORE_ENABLED', True), \
+                patch.object(bsr_tasks, 'get_observation_store', return_value=store), \
+                patch.object(bsr_tasks, 'invalidate_chart_cache'), \
+                patch('app.services.cache_service.get_cached_cover', return_value=None), \
+                patch('app.services.cache_service.set_cached_cover') as set_cover:
+            result = bsr_tasks.retry_blocked_book(registry_key(URL))
+
+        self.assertEqual(result['status'], 'completed')
+        sheets.update_bsr.assert_called_once_with(3, 40, 500, worksheet_name='US')
+        self.assertEqual(store.record_bsr.call_args[0][::3], ('US', 500))
+        set_cover.assert_called_once_with(URL, 'https://img/1.jpg')
+        self.assertEqual(registry.list_blocked(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
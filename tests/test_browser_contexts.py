@@ -0,0 +1,108 @@
+"""
+Unit tests for the browser context scheduler (no browser)
+"""
+import asyncio
+import tempfile
+import unittest
+
+from app.services.browser_contexts import (
+    FINGERPRINT_PROFILES, ContextScheduler, build_slots,
+)
+
+
+def make_scheduler(count, max_pages=None, cooldown=60, max_failures=3):
+    slots = build_slots(tempfile.mkdtemp(), count)
+    return ContextScheduler(slots, max_pages=max_pages, captcha_cooldown=cooldown, max_failures=max_failures)
+
+
+class TestContextScheduler(unittest.TestCase):
+    """Which context gets the next page"""
+
+    def test_slots_get_their_own_profile_and_session(self):
+        slots = build_slots(tempfile.mkdtemp(), 3)
+        self.assertEqual(len({slot.profile.name for slot in slots}), 3)
+        self.assertEqual(len({slot.storage_state_path for slot in slots}), 3)
+
+    def test_pages_rotate_over_contexts(self):
+        scheduler = make_scheduler(3, max_pages=1)
+
+        async def run():
+            used = []
+            for _ in range(6):
+                slot = await scheduler.acquire()
+                used.append(slot.index)
+                scheduler.release(slot)
+            return used
+        self.assertEqual(asyncio.run(run()), [0, 1, 2, 0, 1, 2])
+
+    def test_page_count_is_bounded(self):
+        scheduler = make_scheduler(4, max_pages=2)
+        open_pages, peak = 0, 0
+
+        async def page():
+            nonlocal open_pages, peak
+            slot = await scheduler.acquire()
+            open_pages += 1
+            peak = max(peak, open_pages)
+            await asyncio.sleep(0.01)
+            open_pages -= 1
+            scheduler.release(slot)
+
+        async def run():
+            await asyncio.gather(*(page() for _ in range(8)))
+        asyncio.run(run())
+        self.assertEqual(peak, 2)
+        self.assertEqual([slot.pages for slot in scheduler.slots], [2, 2, 2, 2])
+
+    def test_captcha_cooldown(self):
+        scheduler = make_scheduler(2, max_pages=1)
+
+        async def run():
+            first = await scheduler.acquire()
+            scheduler.release(first, 'captcha')
+            self.assertTrue(first.needs_reset and first.drop_session)
+            # Only the other context is served while the first one rests
+            served = []
+            for _ in range(3):
+                slot = await scheduler.acquire()
+                served.append(slot.index)
+                scheduler.release(slot, 'captcha' if len(served) == 3 else None)
+            self.assertEqual(served, [1, 1, 1])
+            return await scheduler.acquire()
+        self.assertIsNone(asyncio.run(run()))
+
+    def test_repeated_captchas_back_off_longer(self):
+        scheduler = make_scheduler(1, cooldown=60)
+        slot = scheduler.slots[0]
+
+        async def captcha():
+            scheduler.release(await scheduler.acquire(), 'captcha')
+            slot.cooldown_until, left = 0.0, slot.cooldown_until
+            return left
+
+        first = asyncio.run(captcha())
+        second = asyncio.run(captcha())
+        self.assertAlmostEqual(second - first, 60, delta=1)
+
+    def test_failures_reopen_context(self):
+        scheduler = make_scheduler(1, max_failures=2)
+
+        async def run():
+            for reason in ('timeout', 'network_error'):
+                scheduler.release(await scheduler.acquire(), reason)
+        asyncio.run(run())
+        slot = scheduler.slots[0]
+        self.assertTrue(slot.needs_reset)
+        self.assertFalse(slot.drop_session)
+        self.assertEqual(scheduler.stats()[0]['outcomes'], {'timeout': 1, 'network_error': 1})
+
+    def test_init_script_matches_profile(self):
+        for profile in FINGERPRINT_PROFILES:
+            script = profile.init_script()
+            self.assertIn(f'"{profile.platform}"', script)
+            self.assertIn(f'=> {profile.hardware_concurrency} ', script)
+            self.assertEqual('Win32' in script, 'Windows' in profile.user_agent)
+
+
+if __name__ == '__main__':
+    unittest.main()
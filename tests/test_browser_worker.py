@@ -0,0 +1,80 @@
+"""
+Unit tests for the persistent browser worker (fake pool, no browser)
+"""
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.browser_worker import BrowserWorker
+
+
+class FakePool:
+    """Records which thread each call ran on"""
+    created = 0
+
+    def __init__(self):
+        FakePool.created += 1
+        self.threads = set()
+        self.cleaned_up = False
+        self.startup_timings = {'browser_launch_s': 0.01}
+
+    async def initialize(self):
+        await asyncio.sleep(0.01)
+
+    async def fetch_page(self, url, timeout=30000, full_html=False):
+        self.threads.add(threading.current_thread().name)
+        await asyncio.sleep(0.001)
+        return f'<html>{url}</html>', None, None
+
+    def get_stats(self):
+        return [{'context': 0}]
+
+    async def cleanup(self):
+        self.cleaned_up = True
+
+
+class TestBrowserWorker(unittest.TestCase):
+    """One pool for every caller, started once"""
+
+    def setUp(self):
+        FakePool.created = 0
+        self.worker = BrowserWorker(pool_factory=FakePool)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_sync_and_async_callers_share_one_pool(self):
+        urls = [f'https://www.amazon.com/dp/B{i:09d}/' for i in range(20)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.worker.fetch_sync, urls))
+
+        async def from_another_loop():
+            return await self.worker.fetch(urls[0])
+        results.append(asyncio.run(from_another_loop()))
+
+        self.assertEqual(FakePool.created, 1)
+        self.assertEqual(results[3], (f'<html>{urls[3]}</html>', None, None))
+        self.assertEqual(self.worker.pool.threads, {'browser-worker'})
+
+    def test_startup_and_steady_state_timings(self):
+        self.assertIn('total_s', self.worker.start(timeout=5))
+        for i in range(5):
+            self.worker.fetch_sync(f'https://www.amazon.com/dp/{i}/')
+
+        stats = self.worker.stats()
+        self.assertEqual(stats['fetches'], 5)
+        self.assertEqual(stats['steady_state']['fetches'], 4)
+        self.assertEqual(stats['startup']['browser_launch_s'], 0.01)
+        self.assertEqual(stats['contexts'], [{'context': 0}])
+
+    def test_stop_cleans_up_pool(self):
+        self.worker.fetch_sync('https://www.amazon.com/dp/1/')
+        pool = self.worker.pool
+        self.worker.stop()
+        self.assertTrue(pool.cleaned_up)
+        self.assertFalse(self.worker.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Regression tests for the BSR extractors on the labelled page corpus (tests/fixtures/bsr_corpus)
+"""
+import unittest
+
+from app.utils.bsr_parser import parse_bsr, parse_bsr_ocr_text
+from benchmark_bsr_parser import LABELS, load_corpus, run_extractor
+
+
+class TestBSRCorpus(unittest.TestCase):
+    """parse_bsr must keep reading every labelled page correctly"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = load_corpus()
+
+    def test_corpus_covers_every_label(self):
+        labels = {page.label for page in self.corpus if page.kind == 'html'}
+        self.assertEqual(labels, set(LABELS))
+
+    def test_parse_bsr_accuracy(self):
+        for page in self.corpus:
+            if page.kind != 'html':
+                continue
+            with self.subTest(page=page.name):
+                self.assertEqual(parse_bsr(page.text), page.expected_bsr)
+                self.assertEqual(parse_bsr(page.content), page.expected_bsr)
+
+    def test_benchmark_report(self):
+        pages = [page for page in self.corpus if page.kind == 'ocr']
+        stats = run_extractor(parse_bsr_ocr_text, pages, repeat=1)
+
+        self.assertEqual(stats['pages'], len(pages))
+        self.assertLessEqual(stats['p50'], stats['p99'])
+        self.assertEqual(stats['misses'], [])
+
+    def test_ocr_never_reads_a_partial_or_category_rank(self):
+        # OCR reads "1,234" as "1.234" now and then: no BSR beats a BSR of 1
+        self.assertIsNone(parse_bsr_ocr_text('#1.234 in Kindle Store'))
+        self.assertIsNone(parse_bsr_ocr_text('Best Sellers Rank: #12 in Thrillers'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Unit tests for the columnar BSR matrix
+"""
+import unittest
+
+import numpy as np
+
+from app.utils.bsr_matrix import BSRMatrix, MISSING_BSR
+
+
+SHEET = [
+    ['Date', 'Book One', '>>>SKIP', 'Book Two', 'No Link', 'AVG RANKS'],
+    ['', 'Author One', '', 'Author Two', 'Author Three', ''],
+    ['', 'https://www.amazon.com/dp/B1', 'x', 'https://www.amazon.co.uk/dp/B2', '', ''],
+    ['', 'Crime', '', 'Thriller'],
+    ['1/1/2024', '1,000', '5', ' 3,000 ', '7', '2,000'],
+    ['1/2/2024', 'n/a', '', '', '', ''],
+    ['1/3/2024', '1,200'],
+    ['', '900', '', '2,500', '', 'bad'],
+]
+
+
+class TestBSRMatrix(unittest.TestCase):
+    """Test cases for BSRMatrix"""
+
+    def setUp(self):
+        self.matrix = BSRMatrix.from_values(SHEET)
+
+    def test_book_columns(self):
+        """Only titled columns with a link are books"""
+        self.assertEqual([b.col for b in self.matrix.books], [2, 4])
+        self.assertEqual(self.matrix.books[1].category, 'Thriller')
+        self.assertEqual(self.matrix.avg_col, 6)
+        self.assertEqual(self.matrix.book_index(4), 1)
+        self.assertIsNone(self.matrix.book_index(3))
+
+    def test_dense_matrix_with_sentinel(self):
+        """Empty, ragged and non-numeric cells become the sentinel"""
+        self.assertEqual(self.matrix.bsr.dtype, np.int32)
+        expected = [[1000, 3000], [MISSING_BSR, MISSING_BSR], [1200, MISSING_BSR], [900, 2500]]
+        self.assertEqual(self.matrix.bsr.tolist(), expected)
+
+    def test_history_and_current(self):
+        """History keeps sheet order; current BSR is the last value"""
+        self.assertEqual(self.matrix.history(1), [
+            {'date': '1/1/2024', 'bsr': 3000},
+            {'date': '', 'bsr': 2500},
+        ])
+        self.assertEqual(self.matrix.current_bsr(), [900, 2500])
+        self.assertEqual(self.matrix.rankings(), [0, 1])
+
+    def test_averages(self):
+        """Row averages skip missing cells; AVG column skips rows without date or value"""
+        averages = self.matrix.row_averages()
+        self.assertEqual(averages[0], 2000.0)
+        self.assertTrue(np.isnan(averages[1]))
+        self.assertEqual(self.matrix.row_values(5), [1000, 3000])
+        self.assertEqual(self.matrix.row_values(4), [])
+        self.assertEqual(self.matrix.avg_history(), [{'date': '1/1/2024', 'average_bsr': 2000.0}])
+
+    def test_row_statistic(self):
+        """Median and trimmed mean per row; rows under min_books are NaN"""
+        values = [['Date'] + ['Book'] * 5, [''] * 6, [''] + ['https://www.amazon.com/dp/B'] * 5, [''] * 6,
+                  ['1/1/2024', '10', '20', '30', '40', '1000'],
+                  ['1/2/2024', '10', '', '30', '', ''],
+                  ['1/3/2024', '', '', '', '', '']]
+        matrix = BSRMatrix.from_values(values)
+
+        np.testing.assert_allclose(matrix.row_statistic('median'), [30, 20, np.nan])
+        np.testing.assert_allclose(matrix.row_statistic('trimmed', trim=0.2), [30, 20, np.nan])
+        np.testing.assert_allclose(matrix.row_statistic('mean', min_books=3), [220, np.nan, np.nan])
+        with self.assertRaises(ValueError):
+            matrix.row_statistic('mode')
+
+    def test_empty_sheet(self):
+        """Empty or header-only sheets produce an empty matrix"""
+        self.assertEqual(BSRMatrix.from_values([]).books, [])
+        header_only = BSRMatrix.from_values(SHEET[:4])
+        self.assertEqual(header_only.bsr.shape, (0, 2))
+        self.assertEqual(header_only.current_bsr(), [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
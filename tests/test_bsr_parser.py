@@ -2,7 +2,9 @@
 Unit tests for strict BSR parser
 """
 import unittest
-from app.utils.bsr_parser import parse_bsr, _parse_bsr_number
+from bs4 import BeautifulSoup
+
+from app.utils.bsr_parser import parse_bsr, parse_bsr_soup, _parse_bsr_number, find_bsr_in_window
 
 
 class TestBSRParser(unittest.TestCase):
@@ -213,6 +215,36 @@ class TestBSRParser(unittest.TestCase):
         self.assertIsNone(_parse_bsr_number("000"))  # Zero with leading zeros
 
 
+class TestTieredParser(unittest.TestCase):
+    """The fast tiers agree with the full BeautifulSoup parse"""
+    
+    PADDING = '<div class="a-section">' + '<p>Customers also viewed #12 in Books</p>' * 500 + '</div>'
+    DECOY = '<script>var label = "Best Sellers Rank: #999 in Kindle Store";</script>'
+    
+    def assert_same_as_full(self, body):
+        html = f'<html><body>{self.DECOY}{self.PADDING}{body}{self.PADDING}</body></html>'
+        full = parse_bsr_soup(BeautifulSoup(html, 'lxml'))
+        self.assertEqual(parse_bsr(html), full)
+        self.assertEqual(parse_bsr(html.encode()), full)
+        return full
+    
+    def test_window_tier(self):
+        us = ('<div id="detailBullets_feature_div"><span class="a-text-bold">Best Sellers Rank:</span> '
+              '#12,345 in Kindle Store (<a href="/gp/bestsellers">See Top 100</a>)<ul><li>#45 in Thrillers</li></ul></div>')
+        uk = '<div id="SalesRank"><b>Best Sellers Rank:</b> 1,726 in Kindle Store <div>12 in Crime Fiction</div></div>'
+        self.assertEqual(self.assert_same_as_full(us), 12345)
+        self.assertEqual(self.assert_same_as_full(uk), 1726)
+        self.assertEqual(find_bsr_in_window(uk.encode()), 1726)
+    
+    def test_undecided_pages_fall_through(self):
+        # Two labels, a label split by a comment, and no label at all
+        self.assertEqual(self.assert_same_as_full(
+            '<p>Best Sellers Rank: #5 in Kindle Store</p><p>Best Sellers Rank: #6 in Kindle Store</p>'), 5)
+        self.assertEqual(self.assert_same_as_full('<p>Best Sellers <!-- x --> Rank: #4,445 in Kindle Store</p>'), 4445)
+        self.assertEqual(self.assert_same_as_full('<span id="productRank">#3,456</span>'), 3456)
+        self.assertIsNone(find_bsr_in_window('<p>Best Sellers Rank: #5 in Kindle Store</p>' * 2))
+
+
 if __name__ == '__main__':
     unittest.main()
 
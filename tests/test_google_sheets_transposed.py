@@ -0,0 +1,447 @@
+"""
+Unit tests for GoogleSheetsManager (transposed format) using an in-memory worksheet
+"""
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch, MagicMock
+
+from gspread.exceptions import APIError
+from gspread.utils import a1_range_to_grid_range
+
+from google_sheets_transposed import GoogleSheetsManager
+from calculate_all_averages import calculate_all_averages_bulk
+
+
+class FakeWorksheet:
+    """Minimal stand-in for gspread.Worksheet that counts API calls"""
+
+    def __init__(self, title, values):
+        self.title = title
+        self.values = [list(row) for row in values]
+        self.read_calls = 0
+        self.write_calls = 0
+
+    def get_all_values(self):
+        self.read_calls += 1
+        return [list(row) for row in self.values]
+
+    def update_cell(self, row, col, value):
+        self.write_calls += 1
+        while len(self.values) < row:
+            self.values.append([''] * len(self.values[0]))
+        row_values = self.values[row - 1]
+        if len(row_values) < col:
+            row_values.extend([''] * (col - len(row_values)))
+        row_values[col - 1] = str(value)
+
+
+class FakeSpreadsheet:
+    """Minimal stand-in for gspread.Spreadsheet"""
+
+    def __init__(self, worksheets):
+        self._worksheets = {ws.title: ws for ws in worksheets}
+        self.batch_calls = []
+        self.batch_get_calls = []
+        self.fail_with_429 = 0
+        self.list_calls = 0
+        self.lookup_calls = 0
+
+    def values_batch_update(self, body=None, params=None):
+        if self.fail_with_429:
+            self.fail_with_429 -= 1
+            response = MagicMock(status_code=429, text='Quota exceeded')
+            response.json.return_value = {'error': {'code': 429, 'message': 'Quota exceeded'}}
+            raise APIError(response)
+        self.batch_calls.append(body)
+        for item in body['data']:
+            sheet_name, a1 = item['range'].rsplit('!', 1)
+            worksheet = self._worksheets[sheet_name.strip("'")]
+            grid = a1_range_to_grid_range(a1)
+            for row_offset, row in enumerate(item['values']):
+                for offset, value in enumerate(row):
+                    worksheet.update_cell(grid['startRowIndex'] + 1 + row_offset,
+                                          grid['startColumnIndex'] + 1 + offset, value)
+                worksheet.write_calls -= len(row)
+
+    def values_batch_get(self, ranges, params=None):
+        self.batch_get_calls.append(list(ranges))
+        value_ranges = []
+        for range_name in ranges:
+            sheet_name, a1 = range_name.rsplit('!', 1)
+            worksheet = self._worksheets[sheet_name.strip("'")]
+            grid = a1_range_to_grid_range(a1)
+            rows = worksheet.values[grid.get('startRowIndex', 0):grid.get('endRowIndex')]
+            rows = [row[grid.get('startColumnIndex', 0):grid.get('endColumnIndex')] for row in rows]
+            # Like the API: no trailing empty cells or rows
+            rows = [row[:max([i + 1 for i, v in enumerate(row) if v] or [0])] for row in rows]
+            while rows and not rows[-1]:
+                rows.pop()
+            value_range = {'range': range_name}
+            if rows:
+                value_range['values'] = rows
+            value_ranges.append(value_range)
+        return {'valueRanges': value_ranges}
+
+    def worksheet(self, name):
+        self.lookup_calls += 1
+        return self._worksheets[name]
+
+    def worksheets(self):
+        self.list_calls += 1
+        return list(self._worksheets.values())
+
+
+def make_sheet_values():
+    """Build a small transposed sheet: two books, an AVG column, two date rows"""
+    return [
+        ['Date', 'Book One', 'Book Two', 'AVG RANKS'],
+        ['', 'Author One', 'Author Two', ''],
+        ['', 'https://www.amazon.com/dp/B000000001', 'https://www.amazon.com/dp/B000000002', ''],
+        ['', 'Crime', 'Crime', ''],
+        ['1/1/2024', '1,000', '3,000', '2,000'],
+        ['1/2/2024', '1,500', '', ''],
+    ]
+
+
+def setUpModule():
+    # Keep worksheet metadata in-process (no Redis in unit tests)
+    patch('google_sheets_transposed.get_metadata', return_value=None).start()
+    patch('google_sheets_transposed.set_metadata').start()
+
+
+def tearDownModule():
+    patch.stopall()
+
+
+def make_manager(values, title='Test Sheet'):
+    """Create a GoogleSheetsManager wired to a FakeSpreadsheet"""
+    worksheet = FakeWorksheet(title, values)
+    with patch.object(GoogleSheetsManager, '_connect'), patch('google_sheets_transposed.atexit.register'):
+        manager = GoogleSheetsManager('credentials.json', 'spreadsheet-id')
+    manager.spreadsheet = FakeSpreadsheet([worksheet])
+    return manager, worksheet
+
+
+class TestWorksheetSnapshot(unittest.TestCase):
+    """Read methods share one snapshot per run"""
+
+    def test_reads_share_snapshot_during_run(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with manager.snapshot_run('Test Sheet'):
+            books = manager.get_all_books('Test Sheet')
+            history = manager.get_bsr_history('Test Sheet')
+            avg_history = manager.get_avg_history('Test Sheet')
+
+        self.assertEqual(len(books), 2)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(avg_history, [{'date': '1/1/2024', 'average_bsr': 2000.0}])
+        self.assertEqual(worksheet.read_calls, 1)
+
+        stats = manager.get_snapshot_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        # get_all_books ran before the snapshot was loaded: header rows only
+        self.assertEqual(stats['range_reads'], 1)
+
+    def test_new_date_row_extends_snapshot(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with manager.snapshot_run('Test Sheet'):
+            manager.get_bsr_history('Test Sheet')
+            today_row = manager.get_today_row('Test Sheet')
+            self.assertEqual(today_row, 7)
+            # Appended row is recorded in the date index - no re-read needed
+            self.assertEqual(manager.get_today_row('Test Sheet'), 7)
+            self.assertEqual(manager.find_date_row(datetime.now(), 'Test Sheet'), 7)
+
+        self.assertEqual(worksheet.read_calls, 1)
+        self.assertEqual(worksheet.write_calls, 1)
+
+    def test_cell_write_patches_snapshot(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with manager.snapshot_run('Test Sheet'):
+            manager.update_bsr(3, 6, 2500, worksheet_name='Test Sheet')
+            history = manager.get_bsr_history('Test Sheet')
+
+        book_two = [b for b in history if b['name'] == 'Book Two'][0]
+        self.assertEqual(book_two['current_bsr'], 2500)
+        self.assertEqual(worksheet.read_calls, 1)
+
+    def test_new_run_starts_from_fresh_snapshot(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with manager.snapshot_run('Test Sheet'):
+            manager.get_bsr_history('Test Sheet')
+        with manager.snapshot_run('Test Sheet'):
+            manager.get_bsr_history('Test Sheet')
+
+        self.assertEqual(worksheet.read_calls, 2)
+
+
+class TestDateRowIndex(unittest.TestCase):
+    """Date rows are looked up through the normalized date index"""
+
+    def test_lookup_accepts_any_supported_format(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        for value in ['1/2/2024', '01/02/2024', '2024-01-02', '1-2-2024', date(2024, 1, 2)]:
+            self.assertEqual(manager.find_date_row(value, 'Test Sheet'), 6)
+        self.assertIsNone(manager.find_date_row('2024-03-01', 'Test Sheet'))
+        self.assertEqual(worksheet.read_calls, 1)
+
+    @patch('google_sheets_transposed.datetime')
+    def test_existing_today_row_in_other_format(self, mock_datetime):
+        mock_datetime.now.return_value = datetime(2024, 1, 2, 9, 30)
+        values = make_sheet_values()
+        values[5][0] = '2024-01-02'
+        manager, worksheet = make_manager(values)
+
+        self.assertEqual(manager.get_today_row('Test Sheet'), 6)
+        self.assertEqual(worksheet.write_calls, 0)
+
+    def test_new_date_row_never_lands_in_header_area(self):
+        manager, worksheet = make_manager(make_sheet_values()[:2])
+
+        self.assertEqual(manager.get_today_row('Test Sheet'), 5)
+
+    def test_failed_lookup_raises_instead_of_row_4(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.spreadsheet.values_batch_get = MagicMock(side_effect=RuntimeError('API down'))
+
+        with self.assertRaises(RuntimeError):
+            manager.get_today_row('Test Sheet')
+
+
+class TestRangeReads(unittest.TestCase):
+    """Without a loaded snapshot, reads fetch only the ranges they need"""
+
+    def make_long_sheet(self, days):
+        values = make_sheet_values()[:4]
+        for day in range(days):
+            values.append([f'1/{day % 28 + 1}/{2000 + day // 28}', '1,000', '3,000', '2,000'])
+        return values
+
+    def test_books_read_header_rows_only(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        books = manager.get_all_books('Test Sheet')
+
+        self.assertEqual([b['name'] for b in books], ['Book One', 'Book Two'])
+        self.assertEqual(worksheet.read_calls, 0)
+        self.assertEqual(manager.spreadsheet.batch_get_calls, [["'Test Sheet'!1:4"]])
+
+    def test_book_column_added_later_is_read(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.get_all_books('Test Sheet')
+        for row, value in zip(worksheet.values, ['Book Three', 'Author Three', 'https://www.amazon.com/dp/B000000003', 'Crime']):
+            row.append(value)
+        manager.invalidate_snapshot('Test Sheet')
+
+        with manager.snapshot_run('Test Sheet'):
+            books = manager.get_all_books('Test Sheet')
+
+        self.assertIn('Book Three', [b['name'] for b in books])
+        self.assertEqual(manager.spreadsheet.batch_get_calls[-1], ["'Test Sheet'!1:4"])
+
+    def test_avg_history_reads_date_and_avg_columns(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        avg_history = manager.get_avg_history('Test Sheet')
+
+        self.assertEqual(avg_history, [{'date': '1/1/2024', 'average_bsr': 2000.0}])
+        self.assertEqual(worksheet.read_calls, 0)
+        self.assertEqual(manager.spreadsheet.batch_get_calls[-1], ["'Test Sheet'!A5:A", "'Test Sheet'!D5:D"])
+
+    def test_daily_update_reads_stay_flat_as_history_grows(self):
+        cells_read = []
+        for days in (10, 500):
+            manager, worksheet = make_manager(self.make_long_sheet(days))
+            # Metadata from an earlier run (normally shared through Redis)
+            manager._update_metadata('Test Sheet', max_rows=len(worksheet.values), max_cols=4)
+            with manager.snapshot_run('Test Sheet'):
+                books = manager.get_all_books('Test Sheet')
+                row = manager.get_today_row('Test Sheet')
+                for book in books:
+                    manager.update_bsr(book['col'], manager.get_today_row('Test Sheet'), 1200, worksheet_name='Test Sheet')
+                manager.calculate_and_update_average(row, worksheet_name='Test Sheet')
+                manager.flush_batch_updates('Test Sheet')
+
+            self.assertEqual(row, days + 5)
+            self.assertEqual(worksheet.values[row - 1][1:], ['1200', '1200', '1200.0'])
+            self.assertEqual(worksheet.read_calls, 0)
+            stats = manager.get_snapshot_stats()
+            self.assertEqual(stats['range_reads'], 3)
+            cells_read.append(stats['cells_read'])
+
+        self.assertEqual(cells_read[0], cells_read[1])
+
+
+class TestBatchUpdates(unittest.TestCase):
+    """Buffered writes are committed with one values_batch_update per worksheet"""
+
+    def test_flush_writes_all_cells_in_one_call(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.update_bsr(2, 6, 1400, worksheet_name='Test Sheet')
+        manager.update_bsr(3, 6, 2600, worksheet_name='Test Sheet')
+        manager.calculate_and_update_average(6, worksheet_name='Test Sheet')
+
+        self.assertEqual(manager.get_pending_updates_count('Test Sheet'), 3)
+        self.assertEqual(worksheet.values[5], ['1/2/2024', '1,500', '', ''])
+
+        written = manager.flush_batch_updates(worksheet_name='Test Sheet')
+
+        self.assertEqual(written, 3)
+        self.assertEqual(len(manager.spreadsheet.batch_calls), 1)
+        self.assertEqual(worksheet.write_calls, 0)
+        # Both books and the AVG column are adjacent: a single B6:D6 range
+        self.assertEqual(manager.spreadsheet.batch_calls[0]['data'][0]['range'], "'Test Sheet'!B6:D6")
+        self.assertEqual(worksheet.values[5], ['1/2/2024', '1400', '2600', '2000.0'])
+        self.assertEqual(manager.get_pending_updates_count(), 0)
+
+    def test_batch_false_writes_immediately(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.update_bsr(3, 6, 2600, worksheet_name='Test Sheet', batch=False)
+
+        self.assertEqual(worksheet.write_calls, 1)
+        self.assertEqual(manager.get_pending_updates_count(), 0)
+
+    def test_auto_flush_on_threshold(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with patch('google_sheets_transposed.BATCH_MAX_UPDATES', 2):
+            manager.update_bsr(2, 6, 1400, worksheet_name='Test Sheet')
+            self.assertEqual(len(manager.spreadsheet.batch_calls), 0)
+            manager.update_bsr(3, 6, 2600, worksheet_name='Test Sheet')
+
+        self.assertEqual(len(manager.spreadsheet.batch_calls), 1)
+        self.assertEqual(manager.get_pending_updates_count(), 0)
+
+    @patch('google_sheets_transposed.time.sleep')
+    def test_retries_whole_batch_on_429(self, mock_sleep):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.spreadsheet.fail_with_429 = 2
+        manager.update_bsr(3, 6, 2600, worksheet_name='Test Sheet')
+
+        manager.flush_batch_updates(worksheet_name='Test Sheet')
+
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(len(manager.spreadsheet.batch_calls), 1)
+        self.assertEqual(worksheet.values[5][2], '2600')
+
+    @patch('google_sheets_transposed.WRITE_RETRY_ATTEMPTS', 1)
+    @patch('google_sheets_transposed.time.sleep')
+    def test_failed_flush_keeps_updates_buffered(self, mock_sleep):
+        manager, worksheet = make_manager(make_sheet_values())
+        manager.spreadsheet.fail_with_429 = 5
+        manager.update_bsr(3, 6, 2600, worksheet_name='Test Sheet')
+
+        with self.assertRaises(APIError):
+            manager.flush_batch_updates(worksheet_name='Test Sheet')
+
+        self.assertEqual(manager.get_pending_updates_count('Test Sheet'), 1)
+
+
+class TestRunningAverage(unittest.TestCase):
+    """A tracked row is averaged from running totals, with no read at the end"""
+
+    def test_average_without_reads(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with manager.snapshot_run('Test Sheet'):
+            manager.get_all_books('Test Sheet')
+            manager.start_running_average(6, worksheet_name='Test Sheet')  # Seeded with Book One = 1500
+            reads = (worksheet.read_calls, len(manager.spreadsheet.batch_get_calls))
+
+            manager.update_bsr(3, 6, 2000, worksheet_name='Test Sheet')
+            manager.update_bsr(3, 6, 2500, worksheet_name='Test Sheet')  # Replaces, not counted twice
+            with patch.object(manager, 'get_bsr_matrix', side_effect=AssertionError('matrix rebuilt')):
+                avg = manager.calculate_and_update_average(6, worksheet_name='Test Sheet')
+            manager.flush_batch_updates('Test Sheet')
+
+        self.assertEqual(avg, 2000.0)
+        self.assertEqual((worksheet.read_calls, len(manager.spreadsheet.batch_get_calls)), reads)
+        # BSR and AVG cells go out in the same flush
+        self.assertEqual(len(manager.spreadsheet.batch_calls), 1)
+        self.assertEqual(worksheet.values[5], ['1/2/2024', '1,500', '2500', '2000.0'])
+
+    def test_aborted_run_leaves_no_totals_behind(self):
+        manager, worksheet = make_manager(make_sheet_values())
+        with self.assertRaises(RuntimeError), manager.snapshot_run('Test Sheet'):
+            manager.start_running_average(6, worksheet_name='Test Sheet')
+            manager.update_bsr(3, 6, 9000, worksheet_name='Test Sheet')
+            raise RuntimeError('worker killed')  # No AVG written, no flush
+        self.assertEqual(manager._running_averages, {})
+
+
+class TestBulkAverages(unittest.TestCase):
+    """calculate_all_averages --bulk recomputes every row and writes one column range"""
+
+    def make_sheet(self):
+        values = make_sheet_values()
+        values[4][3] = '1,999'      # Stale
+        values[5][3] = '1500'       # Already right
+        values.append(['1/3/2024', '800', '1,200', ''])
+        values.append(['1/4/2024', '', '', '5'])  # No books any more
+        return values
+
+    def test_dry_run_lists_changed_rows_only(self):
+        manager, worksheet = make_manager(self.make_sheet())
+        with self.assertLogs('calculate_all_averages', level='INFO') as logs:
+            changed = calculate_all_averages_bulk('Test Sheet', dry_run=True, sheets_manager=manager)
+
+        self.assertEqual(changed, 3)
+        row_lines = [line for line in logs.output if ':Row ' in line]
+        self.assertEqual(len(row_lines), 3)
+        self.assertIn('Row 5 (1/1/2024): 1,999 -> 2000.00', row_lines[0])
+        self.assertEqual(manager.spreadsheet.batch_calls, [])
+
+    def test_writes_one_range(self):
+        manager, worksheet = make_manager(self.make_sheet())
+        manager.update_bsr(2, 6, 1400, worksheet_name='Test Sheet')
+
+        changed = calculate_all_averages_bulk('Test Sheet', min_books=2, sheets_manager=manager)
+
+        # Buffered write flushed first, then D5:D8 in one call
+        self.assertEqual(changed, 4)
+        self.assertEqual(len(manager.spreadsheet.batch_calls), 2)
+        self.assertEqual(manager.spreadsheet.batch_calls[1]['data'][0]['range'], "'Test Sheet'!D5:D8")
+        self.assertEqual([row[3] for row in worksheet.values[4:]], ['2000.00', '', '1000.00', ''])
+
+
+class TestWorksheetCache(unittest.TestCase):
+    """Worksheet handles and the worksheet list come from one cached listing"""
+
+    def test_one_listing_serves_all_calls(self):
+        manager, worksheet = make_manager(make_sheet_values())
+
+        manager.get_all_worksheets()
+        manager.get_bsr_history('Test Sheet')
+        manager.update_bsr(2, 6, 1234, worksheet_name='Test Sheet', batch=False)
+        manager.get_all_worksheets()
+
+        self.assertEqual(manager.spreadsheet.list_calls, 1)
+        self.assertEqual(manager.spreadsheet.lookup_calls, 0)
+        self.assertEqual(worksheet.write_calls, 1)
+
+    def test_unknown_title_relists_once(self):
+        manager, _ = make_manager(make_sheet_values())
+        self.assertEqual(manager.get_all_worksheets(), ['Test Sheet'])
+
+        added = FakeWorksheet('New Sheet', make_sheet_values())
+        manager.spreadsheet._worksheets['New Sheet'] = added
+        self.assertEqual(manager.get_bsr_history('New Sheet')[0]['current_bsr'], 1500)
+        self.assertEqual(manager.spreadsheet.list_calls, 2)
+        self.assertEqual(manager.get_all_worksheets(), ['Test Sheet', 'New Sheet'])
+
+        self.assertEqual(manager.get_bsr_history('Missing Sheet'), [])  # Logged, not raised
+        self.assertEqual(manager.spreadsheet.list_calls, 3)
+
+    def test_ttl_and_invalidation(self):
+        manager, _ = make_manager(make_sheet_values())
+        manager.get_all_worksheets()
+
+        with patch('google_sheets_transposed.WORKSHEET_CACHE_TTL', 0):
+            manager.get_all_worksheets()
+        self.assertEqual(manager.spreadsheet.list_calls, 2)
+
+        manager.invalidate_snapshot()
+        manager.get_all_worksheets()
+        self.assertEqual(manager.spreadsheet.list_calls, 3)
+        self.assertEqual(manager.get_snapshot_stats()['worksheet_list_reads'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
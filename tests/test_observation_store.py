@@ -0,0 +1,109 @@
+"""
+Unit tests for the SQLite observation store
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from app.services.observation_store import ObservationStore
+from app.utils.bsr_matrix import BSRMatrix
+
+
+def make_values(days):
+    values = [
+        ['Date', 'Book One', 'Book Two', 'AVG RANKS'],
+        ['', 'Author One', 'Author Two', ''],
+        ['', 'https://www.amazon.com/dp/B000000001', 'https://www.amazon.com/Some-Title/dp/B000000002/ref=x', ''],
+        ['', 'Crime', 'Thriller', ''],
+    ]
+    for day in range(1, days + 1):
+        values.append([f'1/{day}/2024', f'{1000 + day:,}', '' if day % 2 else f'{3000 + day:,}', str(2000 + day)])
+    return values
+
+
+class TestObservationStore(unittest.TestCase):
+    """Store reads match the worksheet parse; writes are keyed by (worksheet, column, date)"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = ObservationStore(os.path.join(directory, 'observations.db'))
+
+    def test_backfill_matches_matrix(self):
+        values = make_values(6)
+        self.assertEqual(self.store.replace_worksheet('Sheet', values), 9)
+
+        matrix = BSRMatrix.from_values(values)
+        self.assertEqual(self.store.get_books_history('Sheet'), matrix.books_history())
+        self.assertEqual(self.store.get_avg_history('Sheet'), matrix.avg_history())
+        self.assertEqual(self.store.get_observations('B000000002'), [
+            ('Sheet', '2024-01-02', 3002), ('Sheet', '2024-01-04', 3004), ('Sheet', '2024-01-06', 3006)
+        ])
+        self.assertFalse(self.store.has_worksheet('Other'))
+
+    def test_upsert_rows_replaces_changed_dates(self):
+        values = make_values(3)
+        self.store.replace_worksheet('Sheet', values)
+        values[6][1] = ''          # 1/3/2024, Book One cleared
+        values[5][2] = '4,444'     # 1/2/2024, Book Two edited
+        values.append(['1/4/2024', '1,004', '', ''])
+
+        self.store.upsert_rows('Sheet', values, [6, 7, 8])
+
+        books = self.store.get_books_history('Sheet')
+        self.assertEqual([h['date'] for h in books[0]['bsr_history']], ['1/1/2024', '1/2/2024', '1/4/2024'])
+        self.assertEqual(books[1]['current_bsr'], 4444)
+        self.assertEqual(self.store.get_avg_history('Sheet')[-1], {'date': '1/3/2024', 'average_bsr': 2003.0})
+
+    def test_write_through_invalidates_cached_reads(self):
+        self.store.replace_worksheet('Sheet', make_values(2))
+        books = self.store.get_books_history('Sheet')
+        books[0]['cover_image'] = 'cover.jpg'  # Callers decorate the dicts they get
+
+        book = {'col': 2, 'name': 'Book One', 'author': 'Author One',
+                'amazon_link': 'https://www.amazon.com/dp/B000000001'}
+        self.store.record_bsr('Sheet', book, datetime(2024, 1, 3), 777)
+        self.store.record_average('Sheet', datetime(2024, 1, 3), 777.0)
+
+        books = self.store.get_books_history('Sheet')
+        self.assertNotIn('cover_image', books[0])
+        self.assertEqual(books[0]['bsr_history'][-1], {'date': '01/03/2024', 'bsr': 777})
+        self.assertEqual(books[0]['current_bsr'], 777)
+        self.assertEqual(self.store.get_avg_history('Sheet')[-1], {'date': '01/03/2024', 'average_bsr': 777.0})
+
+        # A second connection (another process) sees the same data
+        other = ObservationStore(self.store.path)
+        self.assertEqual(other.get_books_history('Sheet'), books)
+
+    def test_duplicate_listing_keeps_both_columns(self):
+        values = make_values(2)
+        values[2][2] = values[2][1]  # Book Two links to Book One's ASIN
+        self.store.replace_worksheet('Sheet', values)
+
+        matrix = BSRMatrix.from_values(values)
+        self.assertEqual(self.store.get_books_history('Sheet'), matrix.books_history())
+        self.store.record_bsr('Sheet', {'col': 3, 'name': 'Book Two', 'amazon_link': values[2][2]},
+                              datetime(2024, 1, 3), 555)
+        books = self.store.get_books_history('Sheet')
+        self.assertEqual([book['current_bsr'] for book in books], [1002, 555])
+
+    def test_old_schema_is_rebuilt(self):
+        path = os.path.join(os.path.dirname(self.store.path), 'old.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE observations (worksheet TEXT, asin TEXT, date TEXT, sheet_date TEXT, '
+                     'bsr INTEGER, updated_at REAL, PRIMARY KEY (worksheet, asin, date))')
+        conn.execute("INSERT INTO observations VALUES ('Sheet', 'B000000001', '2024-01-01', '1/1/2024', 1, 0)")
+        conn.commit()
+        conn.close()
+
+        store = ObservationStore(path)
+        self.assertFalse(store.has_worksheet('Sheet'))
+        self.assertEqual(store.replace_worksheet('Sheet', make_values(2)), 3)
+        self.assertEqual(ObservationStore(path).get_books_history('Sheet')[0]['current_bsr'], 1002)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Unit tests for DOM fragment extraction (the in-browser script is mirrored with BeautifulSoup)
+"""
+import asyncio
+import unittest
+
+from bs4 import BeautifulSoup
+
+from app.services.page_fragments import COVER_CSS_SELECTORS, PageFragment, extract_fragment
+from app.services.page_waits import CAPTCHA_SELECTORS, RANK_SELECTORS
+from app.utils.bsr_parser import parse_bsr
+from app.utils.product_page import extract_product_page
+from benchmark_bsr_parser import load_corpus
+
+
+def text_of(element):
+    """textContent without script/style/template, as FRAGMENT_SCRIPT reads it"""
+    for node in element.find_all(['script', 'style', 'template']):
+        node.decompose()
+    return element.get_text()
+
+
+def fragment_payload(html):
+    """What FRAGMENT_SCRIPT returns for a page"""
+    soup = BeautifulSoup(html, 'lxml')
+    sections = [[selector.lstrip('#'), text_of(soup.select_one(selector))]
+                for selector in RANK_SELECTORS if soup.select_one(selector)]
+    if not any('Best Sellers Rank' in text for _, text in sections):
+        label = soup.body.find(string=lambda s: 'Best Sellers Rank' in s and s.parent.name not in ('script', 'style'))
+        if label is not None:
+            # Element.closest() starts at the element itself
+            row = label.parent if label.parent.name in ('li', 'tr', 'div') else label.parent.find_parent(['li', 'tr', 'div'])
+            if row is not None:
+                sections.append(['', text_of(row)])
+    image = next((img['src'] for img in map(soup.select_one, COVER_CSS_SELECTORS) if img and img.get('src')), None)
+    title = soup.select_one('span#productTitle')
+    return {
+        'title': title.get_text() if title else None,
+        'image': image,
+        'sections': sections,
+        'captcha': any(soup.select_one(selector) for selector in CAPTCHA_SELECTORS),
+    }
+
+
+class FakePage:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = 0
+
+    async def evaluate(self, script, arg=None):
+        self.calls += 1
+        return self.payload
+
+
+class TestPageFragment(unittest.TestCase):
+    """The fragment reads like the full page wherever it has a rank"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pages = [page for page in load_corpus() if page.kind == 'html']
+
+    def test_fragment_rank_matches_full_page(self):
+        for page in self.pages:
+            with self.subTest(page=page.name):
+                fragment = PageFragment.from_payload(fragment_payload(page.text))
+                # No rank in the fragment means the pool reads the whole document instead
+                if fragment.bsr is not None or page.expected_bsr is not None:
+                    self.assertEqual(fragment.bsr, parse_bsr(page.text))
+
+    def test_captcha_page(self):
+        page = next(page for page in self.pages if page.label == 'captcha')
+        self.assertTrue(PageFragment.from_payload(fragment_payload(page.text)).captcha)
+
+    def test_fragment_is_small_and_keeps_product_fields(self):
+        for page in self.pages:
+            if page.expected_bsr is None:
+                continue
+            with self.subTest(page=page.name):
+                fragment_html = PageFragment.from_payload(fragment_payload(page.text)).to_html()
+                full, small = extract_product_page(page.text), extract_product_page(fragment_html)
+                self.assertEqual((small.bsr, small.title, small.cover_image), (full.bsr, full.title, full.cover_image))
+                self.assertLess(len(fragment_html), len(page.text))
+
+    def test_text_is_escaped(self):
+        fragment = PageFragment(title='<b>A & B</b>', sections=[('SalesRank', 'Best Sellers Rank: #1,234 in Kindle Store <x>')])
+        self.assertIn('&lt;b&gt;A &amp; B&lt;/b&gt;', fragment.to_html())
+        self.assertEqual(fragment.bsr, 1234)
+
+    def test_one_evaluate_per_page(self):
+        page = FakePage({'title': 'T', 'image': None, 'sections': [['SalesRank', 'Best Sellers Rank: 1,726 in Kindle Store']], 'captcha': False})
+        fragment = asyncio.run(extract_fragment(page))
+        self.assertEqual((fragment.bsr, page.calls), (1726, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
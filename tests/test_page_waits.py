@@ -0,0 +1,55 @@
+"""
+Unit tests for Playwright page waits (fake page, no browser)
+"""
+import asyncio
+import time
+import unittest
+
+from app.services.page_waits import wait_for_rank
+
+
+class FakeHandle:
+    def __init__(self, value):
+        self.value = value
+
+    async def json_value(self):
+        return self.value
+
+
+class FakePage:
+    """wait_for_function resolves after `ready_after` seconds, or times out"""
+
+    def __init__(self, state, ready_after=0.0):
+        self.state = state
+        self.ready_after = ready_after
+        self.timeouts = []
+
+    async def wait_for_function(self, script, arg=None, timeout=None, polling=None):
+        self.timeouts.append(timeout)
+        if self.ready_after * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(f"Timeout {timeout}ms exceeded")
+        await asyncio.sleep(self.ready_after)
+        return FakeHandle(self.state)
+
+
+class TestWaitForRank(unittest.TestCase):
+    """The wait ends when the page is ready, not after a fixed sleep"""
+
+    def test_returns_as_soon_as_rank_is_in_dom(self):
+        page = FakePage('rank', ready_after=0.05)
+        start = time.monotonic()
+        state = asyncio.run(wait_for_rank(page, deadline=time.monotonic() + 5))
+
+        self.assertEqual(state, 'rank')
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertGreater(page.timeouts[0], 4000)
+
+    def test_deadline(self):
+        page = FakePage('rank', ready_after=10)
+        state = asyncio.run(wait_for_rank(page, deadline=time.monotonic() + 0.05))
+        self.assertEqual(state, 'timeout')
+
+
+if __name__ == '__main__':
+    unittest.main()
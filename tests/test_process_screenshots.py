@@ -0,0 +1,176 @@
+"""
+Unit tests for batch screenshot OCR (fake OCR function, fake sheets manager)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.browser_pool_refactored import BrowserPool
+from app.services.playwright_scraper_refactored import scrape_product_with_playwright
+from process_screenshots import (
+    find_screenshots, load_manifest, pending_screenshots, run_batch, screenshot_info, url_hash, write_to_sheet,
+)
+
+URL = 'https://www.amazon.com/Some-Book/dp/B000000001'
+TAKEN_AT = int(datetime(2026, 10, 14, 9, 30).timestamp())
+
+
+def fake_ocr(path):
+    return {'file': Path(path).name, 'bsr': 12345, 'error': None, 'seconds': 0.01}
+
+
+def failing_ocr(path):
+    return {'file': Path(path).name, 'bsr': None, 'error': 'TesseractNotFoundError: not installed', 'seconds': 0.0}
+
+
+class FakeMatrix:
+    def __init__(self, filled):
+        self.filled = filled
+
+    def row_cells(self, row):
+        return self.filled.get(row, {})
+
+
+class FakeSheets:
+    """Two books in one worksheet; the second already has a BSR for the day"""
+
+    def __init__(self):
+        self.updates = []
+        self.averages = []
+        self.flushes = 0
+
+    def get_all_books(self, worksheet_name):
+        return [
+            {'col': 2, 'name': 'A', 'amazon_link': URL + '/ref=sr_1_1?keywords=a'},
+            {'col': 3, 'name': 'B', 'amazon_link': 'https://www.amazon.com/dp/B000000002'},
+        ]
+
+    def get_bsr_matrix(self, worksheet_name):
+        return FakeMatrix({40: {3: 999}})
+
+    def find_date_row(self, date_value, worksheet_name):
+        return 40 if date_value == datetime.fromtimestamp(TAKEN_AT).date() else None
+
+    def update_bsr(self, col, row, bsr_value, worksheet_name, batch=True):
+        self.updates.append((col, row, bsr_value, batch))
+
+    def calculate_and_update_average(self, row, worksheet_name):
+        self.averages.append((row, self.flushes))
+
+    def flush_batch_updates(self, worksheet_name=None):
+        self.flushes += 1
+        return len(self.updates)
+
+
+class TestBatchOCR(unittest.TestCase):
+    """Parallel OCR with a persistent manifest"""
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.manifest = self.dir / 'ocr_results.jsonl'
+        self.screenshots = []
+        for i in range(5):
+            path = self.dir / f"amazon_bsr_{TAKEN_AT + i}_{url_hash(f'https://www.amazon.com/dp/B00000000{i}/')}.png"
+            path.write_bytes(b'png')
+            self.screenshots.append(path)
+
+    def batch(self, screenshots, ocr=fake_ocr):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            return list(run_batch(screenshots, self.manifest, executor=executor, ocr=ocr))
+
+    def test_rerun_skips_processed_files(self):
+        self.assertEqual(len(self.batch(self.screenshots[:3])), 3)
+        pending = pending_screenshots(self.screenshots, load_manifest(self.manifest))
+        self.assertEqual(pending, self.screenshots[3:])
+
+    def test_failed_ocr_is_retried(self):
+        self.batch(self.screenshots, ocr=failing_ocr)
+        self.assertEqual(len(pending_screenshots(self.screenshots, load_manifest(self.manifest))), 5)
+
+    def test_manifest_is_jsonl_and_survives_truncated_line(self):
+        self.batch(self.screenshots[:2])
+        with open(self.manifest, 'a') as f:
+            f.write('{"key": "amazon_bsr_')
+        records = load_manifest(self.manifest)
+        self.assertEqual(len(records), 2)
+        self.assertEqual({record['file'] for record in records.values()}, {path.name for path in self.screenshots[:2]})
+        self.assertTrue(all(record['bsr'] == 12345 for record in records.values()))
+
+    def test_sidecar_url(self):
+        self.screenshots[0].with_suffix('.json').write_text(json.dumps({'url': URL, 'taken_at': TAKEN_AT + 0.5}))
+        info = screenshot_info(self.screenshots[0])
+        self.assertEqual((info['url'], info['taken_at']), (URL, TAKEN_AT))
+
+    def test_url_hash_matches_screenshot_name(self):
+        self.assertEqual(url_hash(URL + '/ref=x?tag=y'), hashlib.md5((URL + '/').encode()).hexdigest()[:8])
+
+
+class TestWriteToSheet(unittest.TestCase):
+    """Recovered BSRs fill empty cells only, in one flush per worksheet"""
+
+    def test_writes_empty_cells_once(self):
+        records = [
+            {'url_hash': url_hash(URL), 'taken_at': TAKEN_AT, 'bsr': 500},
+            {'url_hash': url_hash(URL), 'taken_at': TAKEN_AT + 60, 'bsr': 450},  # Later the same day
+            {'url_hash': url_hash('https://www.amazon.com/dp/B000000002/'), 'taken_at': TAKEN_AT, 'bsr': 7},
+            {'url_hash': url_hash(URL), 'taken_at': TAKEN_AT - 86400 * 30, 'bsr': 1},  # No row for that day
+            {'url_hash': url_hash(URL), 'taken_at': TAKEN_AT, 'bsr': None},
+        ]
+        sheets = FakeSheets()
+        self.assertEqual(write_to_sheet(sheets, records, ['US']), 1)
+        self.assertEqual(sheets.updates, [(2, 40, 450, True)])
+        self.assertEqual(sheets.averages, [(40, 0)])  # Recomputed for the touched row, before the flush
+        self.assertEqual(sheets.flushes, 1)
+
+    def pool_screenshot(self, fetch_url=None):
+        """Directory with the screenshot the pool saves for book A when OCR finds no rank"""
+        screenshot_dir = tempfile.mkdtemp()
+        page = MagicMock(query_selector=AsyncMock(return_value=None), screenshot=AsyncMock(return_value=b'png'))
+
+        async def fetch_page(url, timeout=30000):
+            await BrowserPool._ocr_rank_section(MagicMock(), page, fetch_url or url)
+            return None, 'bsr_not_found', None
+
+        with patch.dict(os.environ, {'SCREENSHOT_DIR': screenshot_dir}), \
+                patch('app.services.browser_pool_refactored.ocr_bsr_async', AsyncMock(return_value=None)), \
+                patch('app.services.playwright_scraper_refactored.fetch_page', fetch_page):
+            asyncio.run(scrape_product_with_playwright(FakeSheets().get_all_books('US')[0]['amazon_link']))
+        return screenshot_dir
+
+    def assert_written_to_book(self, screenshot_dir):
+        screenshots = find_screenshots(screenshot_dir)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            records = list(run_batch(screenshots, Path(screenshot_dir) / 'manifest.jsonl', executor=executor, ocr=fake_ocr))
+        for record in records:
+            record['taken_at'] = TAKEN_AT
+        sheets = FakeSheets()
+        self.assertEqual(write_to_sheet(sheets, records, ['US']), 1)
+        self.assertEqual(sheets.updates, [(2, 40, 12345, True)])
+
+    def test_screenshot_from_the_pool_finds_its_book(self):
+        self.assert_written_to_book(self.pool_screenshot())
+
+    def test_screenshot_without_sidecar_matches_on_name(self):
+        # Pool given the URL without its trailing slash, sidecar lost
+        screenshot_dir = self.pool_screenshot(fetch_url=URL)
+        for sidecar in Path(screenshot_dir).glob('*.json'):
+            sidecar.unlink()
+        self.assertNotEqual(find_screenshots(screenshot_dir)[0].stem[-8:], url_hash(URL))
+        self.assert_written_to_book(screenshot_dir)
+
+    def test_dry_run_writes_nothing(self):
+        sheets = FakeSheets()
+        records = [{'url_hash': url_hash(URL), 'taken_at': TAKEN_AT, 'bsr': 500}]
+        self.assertEqual(write_to_sheet(sheets, records, ['US'], dry_run=True), 1)
+        self.assertEqual((sheets.updates, sheets.averages, sheets.flushes), ([], [], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for single-pass product page extraction
+"""
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch, MagicMock
+
+from app.utils.product_page import extract_product_page, normalize_cover_url
+from amazon_scraper import AmazonScraper
+from app.services.playwright_scraper_refactored import scrape_product_with_playwright
+
+
+US_PAGE = '''
+<html><body>
+    <span id="productTitle"> The Silent Witness </span>
+    <div id="bylineInfo"><span class="author"><a href="/e/B001">Jane Doe</a></span></div>
+    <img id="landingImage" src="https://m.media-amazon.com/images/I/81abc._AC_SY300_.jpg">
+    <span class="a-price-whole">4</span><span class="a-price-fraction">99</span>
+    <span id="acrCustomerReviewText">1,234 ratings</span>
+    <div id="detailBullets_feature_div"><ul><li><span class="a-list-item">
+        <span class="a-text-bold">Best Sellers Rank:</span> #12,345 in Kindle Store
+        (<a href="/gp/bestsellers/digital-text">See Top 100 in Kindle Store</a>)
+        <ul><li>#45 in Crime Thrillers</li><li>#67 in Mystery &amp; Suspense</li></ul>
+    </span></li></ul></div>
+</body></html>
+'''
+
+UK_PAGE = '''
+<html><body>
+    <span id="productTitle">A British Mystery</span>
+    <div id="SalesRank">Best Sellers Rank: 1,726 in Kindle Store (See Top 100 in Kindle Store)
+        12 in Crime Fiction 34 in Thrillers</div>
+</body></html>
+'''
+
+
+class TestProductPage(unittest.TestCase):
+    """All fields come from one parse of the page"""
+
+    def test_us_page(self):
+        page = extract_product_page(US_PAGE)
+
+        self.assertEqual(page.bsr, 12345)
+        self.assertEqual(page.category_ranks, [
+            {'rank': 12345, 'category': 'Kindle Store'},
+            {'rank': 45, 'category': 'Crime Thrillers'},
+            {'rank': 67, 'category': 'Mystery & Suspense'},
+        ])
+        self.assertEqual(page.title, 'The Silent Witness')
+        self.assertEqual(page.author, 'Jane Doe')
+        self.assertEqual(page.cover_image, 'https://m.media-amazon.com/images/I/81abc._AC_SL800_.jpg')
+        self.assertEqual(page.price, '4.99')
+        self.assertEqual(page.review_count, 1234)
+
+    def test_uk_page_without_hash(self):
+        page = extract_product_page(UK_PAGE)
+
+        self.assertEqual(page.bsr, 1726)
+        self.assertEqual([r['rank'] for r in page.category_ranks], [1726, 12, 34])
+        self.assertIsNone(page.cover_image)
+        self.assertEqual(page.to_info(), {'title': 'A British Mystery'})
+
+    def test_cover_url_normalization(self):
+        self.assertEqual(normalize_cover_url('https://x/I/1._SX300_.jpg'), 'https://x/I/1._SX800_.jpg')
+        self.assertEqual(normalize_cover_url('https://x/I/1._SL500_.jpg'), 'https://x/I/1._SL800_.jpg')
+
+
+class TestSingleDownload(unittest.TestCase):
+    """BSR and cover come from the same request"""
+
+    def test_scrape_product_downloads_once(self):
+        scraper = AmazonScraper(delay_between_requests=0, retry_attempts=1)
+        response = MagicMock(status_code=200, content=US_PAGE.encode())
+        with patch.object(scraper.session, 'get', return_value=response) as mock_get:
+            page = scraper.scrape_product('https://www.amazon.com/dp/B000000001/ref=sr_1')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual((page.bsr, page.author), (12345, 'Jane Doe'))
+        self.assertTrue(page.cover_image.endswith('_SL800_.jpg'))
+
+    def test_uk_playwright_page_keeps_the_cover(self):
+        scraper = AmazonScraper(delay_between_requests=0, retry_attempts=1)
+        fetch = AsyncMock(return_value=(US_PAGE, None, None))
+        with patch('app.services.playwright_scraper_refactored.fetch_page', fetch), \
+                patch('app.services.playwright_scraper_refactored.get_browser_worker') as worker:
+            worker.return_value.run.side_effect = lambda coro: MagicMock(result=lambda timeout: asyncio.run(coro))
+            page = scraper.scrape_product('https://www.amazon.co.uk/dp/B000000001/')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(page.from_html)
+        self.assertEqual(page.bsr, 12345)
+        self.assertTrue(page.cover_image.endswith('_SL800_.jpg'))
+
+    def test_screenshot_ocr_result_is_rank_only(self):
+        fetch = AsyncMock(return_value=(None, None, 777))
+        with patch('app.services.playwright_scraper_refactored.fetch_page', fetch):
+            page, reason = asyncio.run(scrape_product_with_playwright('https://www.amazon.co.uk/dp/B000000001/'))
+
+        self.assertEqual((page.bsr, page.from_html, page.cover_image, reason), (777, False, None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit tests for Playwright request routing (fake route/page objects, no browser)
+"""
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from app.services.request_policy import RequestPolicy
+from app.services.scraper_metrics import ScraperMetrics
+
+
+class FakePage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+
+class FakeRoute:
+    def __init__(self, page, url, resource_type):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type, frame=SimpleNamespace(page=page))
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+    async def abort(self, error_code=None):
+        self.outcome = 'aborted'
+
+
+PAGE_REQUESTS = [
+    ('https://www.amazon.com/dp/B000000001', 'document'),
+    ('https://m.media-amazon.com/images/I/81abc.js', 'script'),
+    ('https://m.media-amazon.com/images/I/81abc._AC_SL800_.jpg', 'image'),
+    ('https://m.media-amazon.com/images/G/01/AmazonEmber.woff2', 'font'),
+    ('https://fls-na.amazon.com/1/batch/1/OE/', 'xhr'),
+    ('https://www.google-analytics.com/collect', 'xhr'),
+    ('https://cdn.thirdparty.example/widget.js', 'script'),
+]
+
+
+def route_page(policy):
+    page = FakePage()
+    traffic = policy.track(page)
+    routes = [FakeRoute(page, url, resource_type) for url, resource_type in PAGE_REQUESTS]
+
+    async def run():
+        for route in routes:
+            await policy._handle(route)
+    asyncio.run(run())
+    policy.release(page)
+    return traffic, [route.outcome for route in routes]
+
+
+class TestRoutingModes(unittest.TestCase):
+    """What each mode lets through"""
+
+    def test_allowlist_only_drops_other_hosts(self):
+        traffic, outcomes = route_page(RequestPolicy(mode='allowlist', ab_split=1.0))
+        self.assertEqual(outcomes, ['continued'] * 5 + ['aborted'] * 2)
+        self.assertEqual(traffic.blocked, 2)
+
+    def test_block_drops_heavy_types_and_beacons(self):
+        traffic, outcomes = route_page(RequestPolicy(mode='block', ab_split=1.0))
+        self.assertEqual(outcomes, ['continued', 'continued'] + ['aborted'] * 5)
+        # Estimated from the default sizes: image, font, two beacons and a third-party script
+        self.assertEqual(traffic.bytes_saved, 40000 + 60000 + 2 * 5000 + 50000)
+
+    def test_ab_control_pages_load_everything(self):
+        traffic, outcomes = route_page(RequestPolicy(mode='block', ab_split=0.0))
+        self.assertEqual(traffic.mode, 'off')
+        self.assertEqual(set(outcomes), {'continued'})
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            RequestPolicy(mode='aggressive')
+
+
+class TestVariantMetrics(unittest.TestCase):
+    """CAPTCHA rate and bytes saved per routing arm"""
+
+    def test_variant_stats(self):
+        metrics = ScraperMetrics()
+        metrics.record_request(1.0, success=True, variant='routing:block')
+        metrics.record_request(1.0, success=False, captcha=True, error_reason='captcha', variant='routing:block')
+        metrics.record_request(1.0, success=True, variant='routing:off')
+        metrics.record_traffic('routing:block', requests=40, blocked=30, bytes_loaded=500000, bytes_saved=1500000)
+
+        variants = metrics.get_stats()['variants']
+        self.assertEqual(variants['routing:block']['captcha_rate'], 0.5)
+        self.assertEqual(variants['routing:block']['avg_bytes_saved'], 1500000)
+        self.assertEqual(variants['routing:off']['success_rate'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Unit tests for screenshot OCR preprocessing (the OCR itself needs the tesseract binary)
+"""
+import asyncio
+import io
+import shutil
+import unittest
+
+from PIL import Image, ImageDraw
+
+from app.utils.screenshot_ocr import _otsu_threshold, ocr_bsr_async, preprocess_image
+
+
+def rank_screenshot(text='Best Sellers Rank: #12,345 in Kindle Store', size=(600, 40)):
+    """Dark grey text on an off-white background, like the details section"""
+    image = Image.new('RGB', size, (250, 250, 248))
+    ImageDraw.Draw(image).text((10, 12), text, fill=(40, 40, 40))
+    return image
+
+
+class TestPreprocessing(unittest.TestCase):
+    """What tesseract gets to see"""
+
+    def test_upscaled_and_binarized(self):
+        processed = preprocess_image(rank_screenshot())
+        self.assertEqual(processed.mode, 'L')
+        self.assertEqual(processed.size, (1800, 120))  # 3x, the cap below 2000px
+        self.assertEqual(set(processed.getdata()), {0, 255})
+
+    def test_wide_screenshot_keeps_its_size(self):
+        self.assertEqual(preprocess_image(rank_screenshot(size=(2400, 60))).width, 2400)
+
+    def test_otsu_splits_text_from_background(self):
+        histogram = [0] * 256
+        histogram[40], histogram[250] = 100, 900
+        self.assertTrue(40 <= _otsu_threshold(histogram) < 250)
+
+
+@unittest.skipUnless(shutil.which('tesseract'), 'tesseract binary not installed')
+class TestOCR(unittest.TestCase):
+    """In-memory PNG through the OCR process pool"""
+
+    def test_rank_from_png_bytes(self):
+        buffer = io.BytesIO()
+        rank_screenshot().save(buffer, format='PNG')
+        self.assertEqual(asyncio.run(ocr_bsr_async(buffer.getvalue())), 12345)
+
+
+if __name__ == '__main__':
+    unittest.main()
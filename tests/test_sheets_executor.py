@@ -0,0 +1,76 @@
+"""
+Load test: concurrent dashboard requests with slow Sheets calls run in parallel
+"""
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.routes import router
+from app.services import sheets_executor
+
+SHEETS_LATENCY = 0.2
+
+
+class SlowManager:
+    """Blocking stand-in for GoogleSheetsManager (every call takes SHEETS_LATENCY seconds)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get_bsr_history(self, worksheet_name):
+        time.sleep(SHEETS_LATENCY)
+        with self.lock:
+            self.calls += 1
+        return [{'name': 'Book One', 'author': 'Author One', 'amazon_link': 'https://www.amazon.com/dp/B000000001',
+                 'category': '', 'bsr_history': [{'date': '1/1/2024', 'bsr': 1000}], 'current_bsr': 1000}]
+
+
+class TestConcurrentDashboardRequests(unittest.TestCase):
+    """Blocking Sheets calls run on the bounded executor, not on the event loop"""
+
+    def setUp(self):
+        self.manager = SlowManager()
+        for target, value in [
+            ('app.services.sheets_service.get_sheets_manager', lambda: self.manager),
+            ('app.services.sheets_service.SYNC_ENABLED', False),
+            ('app.services.sheets_service.OBSERVATION_STORE_ENABLED', False),
+            ('app.services.sheets_executor.SHEETS_EXECUTOR_WORKERS', 4),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        sheets_executor.shutdown_sheets_executor()
+        self.addCleanup(sheets_executor.shutdown_sheets_executor)
+        self.app = FastAPI()
+        self.app.include_router(router)
+
+    async def _fire(self, count):
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.get('/api/books', params={'worksheet': 'Sheet'}) for _ in range(count)
+            ])
+            return time.perf_counter() - start, responses
+
+    def test_requests_do_not_serialize(self):
+        elapsed, responses = asyncio.run(self._fire(8))
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(self.manager.calls, 8)
+        # Serialized on the event loop this takes 8 x 0.2s; four workers need two rounds
+        self.assertLess(elapsed, 8 * SHEETS_LATENCY * 0.6)
+        stats = sheets_executor.get_executor_stats()
+        self.assertEqual(stats['max_running'], 4)  # Never more than the cap
+        self.assertEqual(stats['running'], 0)
+        self.assertEqual(stats['queued'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
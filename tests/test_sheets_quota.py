@@ -0,0 +1,105 @@
+"""
+Unit tests for the Google Sheets quota governor
+"""
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.services.sheets_quota import (
+    LocalTokenBucket, SheetsQuotaGovernor, QuotaWaitTimeout,
+    sheets_priority, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+)
+
+
+def make_governor(capacity=10, rate=0.001):
+    """Governor over local buckets that practically never refill"""
+    return SheetsQuotaGovernor({
+        'read': LocalTokenBucket('read', capacity, rate),
+        'write': LocalTokenBucket('write', capacity, rate),
+    })
+
+
+class TestPriorities(unittest.TestCase):
+    """Batch traffic leaves the reserve to interactive requests"""
+
+    def test_batch_stops_at_reserve(self):
+        governor = make_governor()
+        with patch('app.services.sheets_quota.BATCH_RESERVE', 0.3):
+            for _ in range(7):
+                governor.acquire('read', PRIORITY_BATCH)
+            with self.assertRaises(QuotaWaitTimeout):
+                governor.acquire('read', PRIORITY_BATCH)
+
+            for _ in range(3):
+                governor.acquire('read', PRIORITY_INTERACTIVE)
+            with self.assertRaises(QuotaWaitTimeout):
+                governor.acquire('read', PRIORITY_INTERACTIVE)
+
+        # The write bucket is separate
+        governor.acquire('write', PRIORITY_BATCH)
+        stats = governor.get_stats()['buckets']
+        self.assertEqual(stats['read']['batch'], 7)
+        self.assertEqual(stats['read']['interactive'], 3)
+        self.assertEqual(stats['read']['timeouts'], 2)
+        self.assertLess(stats['read']['headroom'], 0.01)
+        self.assertEqual(stats['write']['granted'], 1)
+
+    def test_context_priority(self):
+        governor = make_governor(capacity=2)
+        with patch('app.services.sheets_quota.BATCH_RESERVE', 0.5), sheets_priority(PRIORITY_BATCH):
+            governor.acquire('write')
+            with self.assertRaises(QuotaWaitTimeout):
+                governor.acquire('write')
+        governor.acquire('write')  # Interactive outside the block
+
+
+class TestCoalescing(unittest.TestCase):
+    """Identical reads in flight at the same time are sent once"""
+
+    def setUp(self):
+        self.governor = make_governor(capacity=100)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        with self.lock:
+            self.calls.append((method, endpoint))
+        time.sleep(0.2)
+        return {'endpoint': endpoint, 'params': params}
+
+    def _concurrent(self, calls):
+        governed = self.governor.wrap(self.request)
+        results = [None] * len(calls)
+
+        def run(i, method, endpoint, params):
+            results[i] = governed(method, endpoint, params=params)
+
+        threads = [threading.Thread(target=run, args=(i,) + call) for i, call in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_reads_share_one_request(self):
+        url = 'https://sheets.googleapis.com/v4/spreadsheets/x/values:batchGet'
+        results = self._concurrent([('get', url, {'ranges': 'A1:B2'})] * 5 + [('get', url, {'ranges': 'C1:C9'})])
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertTrue(all(result is results[0] for result in results[:5]))
+        self.assertEqual(results[5]['params'], {'ranges': 'C1:C9'})
+        stats = self.governor.get_stats()
+        self.assertEqual(stats['coalesced_reads'], 4)
+        self.assertEqual(stats['buckets']['read']['granted'], 2)
+
+    def test_writes_are_never_coalesced(self):
+        url = 'https://sheets.googleapis.com/v4/spreadsheets/x/values:batchUpdate'
+        self._concurrent([('post', url, None)] * 3)
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.governor.get_stats()['buckets']['write']['granted'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Unit tests for the incremental worksheet history sync
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.services.history_store import WorksheetHistoryStore
+from app.services.observation_store import ObservationStore
+from app.services.sheets_sync import SheetsSyncEngine
+
+
+class FakeManager:
+    """Serves read_rows/get_all_values from an in-memory worksheet"""
+
+    def __init__(self, values):
+        self.values = values
+        self.full_reads = 0
+        self.tail_reads = []
+
+    def get_all_values(self, worksheet_name, fresh=False):
+        self.full_reads += 1
+        width = max(len(row) for row in self.values)
+        return [list(row) + [''] * (width - len(row)) for row in self.values]
+
+    def read_rows(self, worksheet_name, start_row, count):
+        self.tail_reads.append(start_row)
+        rows = [list(row) for row in self.values[start_row - 1:start_row - 1 + count]]
+        while rows and not any(rows[-1]):
+            rows.pop()
+        return [list(row) for row in self.values[:4]], rows
+
+
+def make_values(days):
+    values = [
+        ['Date', 'Book One', 'Book Two', 'AVG RANKS'],
+        ['', 'Author One', 'Author Two', ''],
+        ['', 'https://www.amazon.com/dp/B000000001', 'https://www.amazon.com/dp/B000000002', ''],
+        ['', 'Crime', 'Crime', ''],
+    ]
+    for day in range(1, days + 1):
+        values.append([f'1/{day}/2024', f'{1000 + day:,}', f'{3000 + day:,}', str(2000 + day)])
+    return values
+
+
+class TestSheetsSync(unittest.TestCase):
+    """Tail syncs fetch only new rows; full syncs reconcile hand edits"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.stores = {}
+        patcher = patch('app.services.sheets_sync.get_history_store', side_effect=self._store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _store(self, worksheet_name):
+        if worksheet_name not in self.stores:
+            self.stores[worksheet_name] = WorksheetHistoryStore(worksheet_name, self.directory)
+        return self.stores[worksheet_name]
+
+    def test_first_sync_is_full_then_tail_only(self):
+        manager = FakeManager(make_values(10))
+        engine = SheetsSyncEngine(lambda: manager)
+
+        self.assertEqual(engine.sync('Sheet').mode, 'full')
+        manager.values.append(['1/11/2024', '1,011', '', ''])
+        result = engine.sync('Sheet', force=True)
+
+        self.assertEqual(result.mode, 'tail')
+        self.assertEqual(manager.full_reads, 1)
+        # Overlap re-reads the last two synced rows, then picks up the new one; the empty next window ends the sheet
+        self.assertEqual(manager.tail_reads, [13, 513])
+        self.assertEqual(result.rows_changed, 1)
+        books = self._store('Sheet').get_matrix().books_history()
+        self.assertEqual(books[0]['current_bsr'], 1011)
+        self.assertEqual(books[1]['current_bsr'], 3010)
+
+    @patch('app.services.sheets_sync.SYNC_WINDOW_ROWS', 3)
+    @patch('app.services.sheets_sync.SYNC_OVERLAP_ROWS', 4)
+    def test_blank_row_at_window_end_is_not_a_truncation(self):
+        manager = FakeManager(make_values(12))
+        engine = SheetsSyncEngine(lambda: manager)
+        engine.sync('Sheet')
+        manager.values[14] = ['', '', '', '']  # Row 15 emptied: the window 13-15 comes back as rows 13-14
+
+        result = engine.sync('Sheet', force=True)
+
+        self.assertEqual(manager.tail_reads, [13, 16, 19])
+        self.assertEqual(result.last_row, 16)
+        store = self._store('Sheet')
+        self.assertEqual((store.row_count, store.rows.get(15, []), store.rows[16][1]), (16, [], '1,012'))
+
+    def test_sync_respects_interval(self):
+        manager = FakeManager(make_values(3))
+        engine = SheetsSyncEngine(lambda: manager)
+        engine.sync('Sheet')
+
+        self.assertEqual(engine.sync('Sheet').mode, 'skipped')
+        self.assertEqual(manager.tail_reads, [])
+
+    def test_full_reconciliation_catches_hand_edits(self):
+        manager = FakeManager(make_values(10))
+        engine = SheetsSyncEngine(lambda: manager)
+        engine.sync('Sheet')
+
+        manager.values[5][1] = '9,999'  # Edited by hand, far from the tail
+        engine.sync('Sheet', force=True)
+        self.assertEqual(self._store('Sheet').rows[6][1], '1,002')
+
+        result = engine.sync('Sheet', full=True)
+        self.assertEqual(result.rows_changed, 1)
+        self.assertEqual(self._store('Sheet').rows[6][1], '9,999')
+
+    def test_store_survives_reload_and_compaction(self):
+        manager = FakeManager(make_values(5))
+        engine = SheetsSyncEngine(lambda: manager)
+        engine.sync('Sheet')
+        manager.values.append(['1/6/2024', '1,006', '3,006', '2006'])
+        engine.sync('Sheet', force=True)
+
+        # Another process reading the same log
+        reader = WorksheetHistoryStore('Sheet', self.directory)
+        self.assertEqual(reader.values(), self._store('Sheet').values())
+        self.assertEqual(reader.last_synced_row, 10)
+
+        engine.sync('Sheet', full=True)
+        reader.refresh()
+        self.assertEqual(reader.get_matrix().avg_history()[-1], {'date': '1/6/2024', 'average_bsr': 2006.0})
+
+    def test_changes_are_mirrored_into_observation_store(self):
+        manager = FakeManager(make_values(3))
+        observations = ObservationStore(os.path.join(self.directory, 'observations.db'))
+        engine = SheetsSyncEngine(lambda: manager, observation_store=observations)
+        engine.sync('Sheet')
+        manager.values.append(['1/4/2024', '1,004', '', '2004'])
+        engine.sync('Sheet', force=True)
+
+        books = observations.get_books_history('Sheet')
+        self.assertEqual(books, self._store('Sheet').get_matrix().books_history())
+        self.assertEqual(observations.get_avg_history('Sheet')[-1], {'date': '1/4/2024', 'average_bsr': 2004.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
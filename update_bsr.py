@@ -8,7 +8,9 @@ import time
 from datetime import datetime
 import pytz
 from google_sheets_transposed import GoogleSheetsManager
+from app.utils.bsr_matrix import MISSING_BSR
 from amazon_scraper import AmazonScraper
+from app.services.blocked_registry import get_blocked_registry
 import config
 
 def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=False):
@@ -87,6 +89,8 @@ def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=
         delay_between_requests=config.AMAZON_DELAY_BETWEEN_REQUESTS,
         retry_attempts=config.AMAZON_RETRY_ATTEMPTS
     )
+    # Registrul cărților eșuate (re-încercate mai târziu de Celery / retry_failed_bsr.py)
+    blocked = get_blocked_registry()
     
     total_success = 0
     total_failed = 0
@@ -118,21 +122,14 @@ def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=
                 print(f"   🔄 Mod RETRY-FAILED: Filtrare cărți fără BSR pentru ziua curentă...")
                 books_without_bsr = []
                 try:
-                    worksheet = sheets_manager.spreadsheet.worksheet(worksheet_name)
-                    all_values = worksheet.get_all_values()
+                    # Rândul de azi vine din indexul de date; valorile din snapshot-ul deja citit
+                    matrix = sheets_manager.get_bsr_matrix(worksheet_name)
+                    row_idx = matrix.row_index(today_row)
                     
                     for book in books:
-                        col_idx = book['col'] - 1  # Convert to 0-based
-                        # Check if today_row has BSR value for this book
-                        if today_row <= len(all_values):
-                            row_values = all_values[today_row - 1]  # today_row is 1-based
-                            if col_idx < len(row_values):
-                                bsr_str = row_values[col_idx].strip()
-                                # If empty or not a number, consider it failed
-                                if not bsr_str or not bsr_str.replace(',', '').isdigit():
-                                    books_without_bsr.append(book)
-                        else:
-                            # Row doesn't exist yet, consider it failed
+                        book_idx = matrix.book_index(book['col'])
+                        # Rândul nu există încă sau celula e goală / nu e număr => eșuat
+                        if row_idx is None or book_idx is None or matrix.bsr[row_idx, book_idx] == MISSING_BSR:
                             books_without_bsr.append(book)
                     
                     if not books_without_bsr:
@@ -188,6 +185,7 @@ def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=
                             # Scrie în Google Sheets
                             sheets_manager.update_bsr(book['col'], today_row, bsr, worksheet_name)
                             print(f"      ✅ Scris în Google Sheets (coloana {book['col']}, rândul {today_row})")
+                            blocked.clear(book['amazon_link'])
                         else:
                             print(f"      ⚠️  DRY-RUN: Ar fi scris BSR #{bsr:,} în coloana {book['col']}, rândul {today_row}")
                         
@@ -284,6 +282,7 @@ def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=
                             if not dry_run:
                                 sheets_manager.update_bsr(book['col'], today_row, bsr, worksheet_name)
                                 print(f"      ✅ Scris în Google Sheets (coloana {book['col']}, rândul {today_row})")
+                                blocked.clear(book['amazon_link'])
                             else:
                                 print(f"      ⚠️  DRY-RUN: Ar fi scris BSR #{bsr:,} în coloana {book['col']}, rândul {today_row}")
                             
@@ -326,11 +325,24 @@ def update_bsr_for_worksheets(worksheet_names=None, dry_run=False, retry_failed=
                     print(f"   ⚠️  Eroare la calcularea mediei: {e}")
                 print()
             
+            # Scrie toate valorile din buffer într-un singur apel batch
+            if not dry_run:
+                try:
+                    written = sheets_manager.flush_batch_updates(worksheet_name=worksheet_name)
+                    print(f"   💾 {written} celule scrise în Google Sheets (batch)")
+                except Exception as e:
+                    print(f"   ⚠️  Eroare la scrierea batch în Google Sheets: {e}")
+                print()
+            
             # Dacă mai sunt cărți care au eșuat după toate retry-urile
             if failed_books:
                 print(f"   ⚠️  {len(failed_books)} cărți au eșuat după {max_retries} încercări:")
                 for book in failed_books:
                     print(f"      - {book['name']} ({book['amazon_link']})")
+                    if not dry_run:
+                        blocked.mark_blocked(book['amazon_link'], reason='no BSR', worksheet=worksheet_name, col=book['col'])
+                if not dry_run:
+                    print(f"   🗂️  Înregistrate pentru re-încercare automată (python retry_failed_bsr.py --list)")
                 print()
         
         except Exception as e: